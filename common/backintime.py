@@ -14,7 +14,7 @@ import argparse
 import atexit
 import subprocess
 from datetime import datetime
-from time import sleep
+from time import sleep, perf_counter
 import json
 import pathlib
 import tools
@@ -24,7 +24,12 @@ tools.initiate_translation(None)
 import config
 import logger
 import snapshots
+import snapshotlog
+import statussocket
+import changeindex
+import snapshotsize
 import sshtools
+import sshbenchmark
 import mount
 import password
 import encfstools
@@ -39,6 +44,19 @@ RETURN_OK = 0
 RETURN_ERR = 1
 RETURN_NO_CFG = 2
 
+# Names of the filters of the 'log' command
+LOG_FILTERS = {
+    'all': snapshotlog.LogFilter.NO_FILTER,
+    'errors': snapshotlog.LogFilter.ERROR,
+    'changes': snapshotlog.LogFilter.CHANGES,
+    'information': snapshotlog.LogFilter.INFORMATION,
+    'errors-and-changes': snapshotlog.LogFilter.ERROR_AND_CHANGES,
+    'transfer-failures': snapshotlog.LogFilter.RSYNC_TRANSFER_FAILURES,
+}
+
+# Seconds between two reads of the log with 'log --follow'
+LOG_FOLLOW_INTERVAL = 0.5
+
 parsers = {}
 
 
@@ -187,6 +205,13 @@ def createParsers(app_name='backintime'):
                                     action = 'store_true',
                                     help = "Don't unmount on exit.")
 
+    #define arguments which are only used by snapshots-list and snapshots-list-path
+    catalogArgsParser = argparse.ArgumentParser(add_help = False)
+    catalogArgsParser.add_argument('--rebuild-catalog',
+                                   action = 'store_true',
+                                   help = 'Rebuild the snapshot catalog by '
+                                          'scanning the snapshot folder.')
+
     #define arguments which are used by rsync commands (backup and restore)
     rsyncArgsParser = argparse.ArgumentParser(add_help = False)
     rsyncArgsParser.add_argument('--checksum',
@@ -262,7 +287,7 @@ def createParsers(app_name='backintime'):
     command = 'benchmark-cipher'
     nargs = '?'
     aliases.append((command, nargs))
-    description = 'Show a benchmark of all ciphers for ssh transfer.'
+    description = 'Measure the ssh transfer speed with all ciphers.'
     benchmarkCipherCP =    subparsers.add_parser(command,
                                                  epilog = epilogCommon,
                                                  help = description,
@@ -274,7 +299,27 @@ def createParsers(app_name='backintime'):
                                                  action = 'store',
                                                  default = 40,
                                                  nargs = '?',
-                                                 help = 'File size used for benchmark.')
+                                                 help = 'Size in MiB transferred with each cipher.')
+    benchmarkCipherCP.add_argument('--mac',
+                                   dest = 'macs',
+                                   action = 'append',
+                                   metavar = 'MAC',
+                                   help = 'Combine each cipher with this MAC. '
+                                          'Can be given multiple times. '
+                                          'Default is the default MAC of ssh.')
+    benchmarkCipherCP.add_argument('--compression',
+                                   action = 'store_true',
+                                   help = 'Measure each combination also '
+                                          'with compression.')
+    benchmarkCipherCP.add_argument('--json',
+                                   action = 'store_true',
+                                   help = 'Print the results as JSON.')
+    benchmarkCipherCP.add_argument('--apply',
+                                   action = 'store_true',
+                                   help = 'Store the fastest cipher in the '
+                                          'profile. Only combinations with '
+                                          'the default MAC and without '
+                                          'compression are considered.')
 
     command = 'check-config'
     description = 'Check the profiles configuration and install crontab entries.'
@@ -288,6 +333,25 @@ def createParsers(app_name='backintime'):
     checkConfigCP.set_defaults(func = checkConfig)
     parsers[command] = checkConfigCP
 
+    command = 'convert-fileinfo'
+    description = 'Convert the permission manifest (fileinfo.bz2) of ' \
+                  'snapshots into the indexed format (fileinfo.idx).'
+    convertFileInfoCP =    subparsers.add_parser(command,
+                                                 epilog = epilogCommon,
+                                                 help = description,
+                                                 description = description)
+    convertFileInfoCP.add_argument              ('SNAPSHOT_ID',
+                                                 type = str,
+                                                 action = 'store',
+                                                 nargs = '*',
+                                                 help = 'ID of snapshots which should be converted. '
+                                                        'Convert all snapshots if omitted.')
+    convertFileInfoCP.add_argument              ('--force',
+                                                 action = 'store_true',
+                                                 help = 'Convert even if fileinfo.idx already exists.')
+    convertFileInfoCP.set_defaults(func = convertFileInfo)
+    parsers[command] = convertFileInfoCP
+
     command = 'decode'
     nargs = '*'
     aliases.append((command, nargs))
@@ -305,6 +369,19 @@ def createParsers(app_name='backintime'):
                                                  help = 'Decode PATH. If no PATH is specified on command line ' +\
                                                  'a list of filenames will be read from stdin.')
 
+    command = 'index-changes'
+    description = 'Add the paths changed by existing snapshots (read from ' \
+                  'their logs) to the change index.'
+    indexChangesCP =       subparsers.add_parser(command,
+                                                 epilog = epilogCommon,
+                                                 help = description,
+                                                 description = description)
+    indexChangesCP.add_argument                 ('--force',
+                                                 action = 'store_true',
+                                                 help = 'Index snapshots again even if they are already indexed.')
+    indexChangesCP.set_defaults(func = indexChanges)
+    parsers[command] = indexChangesCP
+
     command = 'last-snapshot'
     nargs = 0
     aliases.append((command, nargs))
@@ -328,6 +405,23 @@ def createParsers(app_name='backintime'):
     lastSnapshotsPathCP.set_defaults(func = lastSnapshotPath)
     parsers[command] = lastSnapshotsPathCP
 
+    command = 'log'
+    description = 'Show the log of the last snapshot.'
+    logCP =                subparsers.add_parser(command,
+                                                 epilog = epilogCommon,
+                                                 help = description,
+                                                 description = description)
+    logCP.set_defaults(func = showLog)
+    parsers[command] = logCP
+    logCP.add_argument                          ('--filter',
+                                                 choices = list(LOG_FILTERS),
+                                                 default = 'all',
+                                                 help = 'Show only lines of this kind. Default: all')
+    logCP.add_argument                          ('--follow',
+                                                 action = 'store_true',
+                                                 help = 'Keep running and show new lines while they are '
+                                                        'written (e.g. by a running snapshot).')
+
     command = 'pw-cache'
     nargs = '*'
     aliases.append((command, nargs))
@@ -419,6 +513,11 @@ def createParsers(app_name='backintime'):
                                                  help = 'Only restore files which do not exist or are newer than ' +\
                                                         'those in destination. Using "rsync --update" option.')
 
+    restoreCP.add_argument                      ('--verbose-permissions',
+                                                 action = 'store_true',
+                                                 help = 'Report every single owner, group and mode change while ' +\
+                                                        'restoring permissions instead of a summary.')
+
     command = 'shutdown'
     nargs = 0
     description = 'Shut down the computer after the snapshot is done.'
@@ -436,6 +535,10 @@ def createParsers(app_name='backintime'):
                                                  epilog = epilogCommon,
                                                  help = description,
                                                  description = description)
+    smartRemoveCP.add_argument('--dry-run',
+                               action = 'store_true',
+                               help = 'Show which snapshots would be kept '
+                                      'and removed without removing them.')
     smartRemoveCP.set_defaults(func = smartRemove)
     parsers[command] = smartRemoveCP
 
@@ -444,10 +547,16 @@ def createParsers(app_name='backintime'):
     aliases.append((command, nargs))
     description = 'Show a list of snapshot IDs.'
     snapshotsListCP =      subparsers.add_parser(command,
-                                                 parents = [snapshotPathParser],
+                                                 parents = [snapshotPathParser,
+                                                            catalogArgsParser],
                                                  epilog = epilogCommon,
                                                  help = description,
                                                  description = description)
+    snapshotsListCP.add_argument('--size',
+                                 action = 'store_true',
+                                 help = 'Show the space held exclusively by '
+                                        'each snapshot. Sizes which are not '
+                                        'cached yet are computed.')
     snapshotsListCP.set_defaults(func = snapshotsList)
     parsers[command] = snapshotsListCP
 
@@ -456,7 +565,8 @@ def createParsers(app_name='backintime'):
     aliases.append((command, nargs))
     description = "Show the paths to snapshots."
     snapshotsListPathCP =  subparsers.add_parser(command,
-                                                 parents = [snapshotPathParser],
+                                                 parents = [snapshotPathParser,
+                                                            catalogArgsParser],
                                                  epilog = epilogCommon,
                                                  help = description,
                                                  description = description)
@@ -475,6 +585,22 @@ def createParsers(app_name='backintime'):
     snapshotsPathCP.set_defaults(func = snapshotsPath)
     parsers[command] = snapshotsPathCP
 
+    command = 'status'
+    description = 'Show the status of a running snapshot.'
+    statusCP =             subparsers.add_parser(command,
+                                                 epilog = epilogCommon,
+                                                 help = description,
+                                                 description = description)
+    statusCP.set_defaults(func = status)
+    parsers[command] = statusCP
+    statusCP.add_argument                       ('--follow',
+                                                 action = 'store_true',
+                                                 help = 'Keep running and show each status change until '
+                                                        'the snapshot finished.')
+    statusCP.add_argument                       ('--json',
+                                                 action = 'store_true',
+                                                 help = 'Print one JSON object per status event.')
+
     command = 'unmount'
     nargs = 0
     aliases.append((command, nargs))
@@ -960,13 +1086,33 @@ def snapshotsList(args):
 
     if args.quiet:
         msg = '{}'
+        sizeMsg = '{}\t{}\t{}'
     else:
         msg = 'SnapshotID: {}'
+        sizeMsg = 'SnapshotID: {}  Size: {}  Inodes: {}'
+    if args.rebuild_catalog:
+        snapshots.rebuildCatalog(cfg)
     no_sids = True
-    #use snapshots.listSnapshots instead of iterSnapshots because of sorting
-    for sid in snapshots.listSnapshots(cfg, reverse = False):
-        print(msg.format(sid), file=force_stdout)
-        no_sids = False
+    if args.size:
+        for sid, size in snapshots.snapshotSizes(cfg, compute = True).items():
+            if size is None:
+                print(sizeMsg.format(sid, '-', '-'), file=force_stdout)
+            elif args.quiet:
+                print(sizeMsg.format(sid, size.exclusive_bytes,
+                                     size.exclusive_inodes),
+                      file=force_stdout)
+            else:
+                print(sizeMsg.format(
+                          sid,
+                          snapshotsize.formatSize(size.exclusive_bytes),
+                          size.exclusive_inodes),
+                      file=force_stdout)
+            no_sids = False
+    else:
+        #use snapshots.listSnapshots instead of iterSnapshots because of sorting
+        for sid in snapshots.listSnapshots(cfg, reverse = False):
+            print(msg.format(sid), file=force_stdout)
+            no_sids = False
     if no_sids:
         logger.error("There are no snapshots in '%s'" % cfg.profileName())
     if not args.keep_mount:
@@ -993,6 +1139,8 @@ def snapshotsListPath(args):
         msg = '{}'
     else:
         msg = 'SnapshotPath: {}'
+    if args.rebuild_catalog:
+        snapshots.rebuildCatalog(cfg)
     no_sids = True
     #use snapshots.listSnapshots instead of iterSnapshots because of sorting
     for sid in snapshots.listSnapshots(cfg, reverse = False):
@@ -1079,10 +1227,11 @@ def unmount(args):
     sys.exit(RETURN_OK)
 
 
-def benchmarkCipher(args):
+def showLog(args):
     """
-    Command for transferring a file with scp to remote host with all
-    available ciphers and print its speed and time.
+    Command for printing the log of the last snapshot in current profile.
+    With ``--follow`` only lines appended to the log are read and printed
+    until interrupted.
 
     Args:
         args (argparse.Namespace):
@@ -1091,20 +1240,216 @@ def benchmarkCipher(args):
     Raises:
         SystemExit:     0
     """
-    setQuiet(args)
-    printHeader()
+    force_stdout = setQuiet(args)
+    cfg = getConfig(args)
+    tail = snapshotlog.SnapshotLog(cfg).tail(mode=LOG_FILTERS[args.filter])
+    try:
+        while True:
+            for line in tail.lines():
+                print(line, file=force_stdout, flush=True)
+            if not args.follow:
+                break
+            sleep(LOG_FOLLOW_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    sys.exit(RETURN_OK)
+
 
+def status(args):
+    """
+    Command for printing the status of a running snapshot in current profile.
+    The status is pushed by the backup process through its status socket
+    (see :py:mod:`statussocket`). With ``--follow`` all events are printed
+    until the snapshot finished. If there is no socket the message file is
+    read instead.
+
+    Args:
+        args (argparse.Namespace):
+                        previously parsed arguments
+
+    Raises:
+        SystemExit:     0
+    """
+    force_stdout = setQuiet(args)
     cfg = getConfig(args)
 
-    if cfg.snapshotsMode() in ('ssh', 'ssh_encfs'):
-        ssh = sshtools.SSH(cfg)
-        ssh.benchmarkCipher(args.FILE_SIZE)
-        sys.exit(RETURN_OK)
+    def show(event):
+        if args.json:
+            print(json.dumps(event), file=force_stdout, flush=True)
+            return
 
-    else:
+        for line in _statusLines(event):
+            print(line, file=force_stdout, flush=True)
+
+    client = statussocket.StatusClient(cfg.takeSnapshotSocketFile())
+    try:
+        if client.connect():
+            for event in client.events():
+                show(event)
+                if not args.follow:
+                    break
+
+        elif not _statusFromFiles(snapshots.Snapshots(cfg), show, args.follow):
+            if not args.json:
+                print('No snapshot running', file=force_stdout)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        client.close()
+
+    sys.exit(RETURN_OK)
+
+
+def _statusFromFiles(sn, show, follow):
+    """Status of a backup without status socket (e.g. of an older
+    version) read from the message file.
+
+    Returns:
+        bool: ``False`` if no snapshot is running.
+    """
+    if not sn.busy():
+        return False
+
+    last = None
+    while sn.busy():
+        message = sn.takeSnapshotMessage()
+        if message and message != last:
+            last = message
+            show({'event': statussocket.MESSAGE,
+                  'type_id': message[0],
+                  'message': message[1]})
+        if not follow:
+            return True
+        sleep(LOG_FOLLOW_INTERVAL)
+
+    show({'event': statussocket.FINISHED, 'error': False})
+
+    return True
+
+
+def _statusLines(event):
+    """Human readable lines of a status event."""
+    kind = event.get('event')
+
+    if kind == statussocket.HELLO:
+        yield 'Snapshot running (PID {}, profile {})'.format(
+            event.get('pid'), event.get('profile_id'))
+        if event.get('phase'):
+            yield 'Phase: {}'.format(event['phase'])
+        if event.get('message'):
+            type_id, message = event['message']
+            yield from _statusLines({'event': statussocket.MESSAGE,
+                                     'type_id': type_id,
+                                     'message': message})
+        if event.get('progress'):
+            yield from _statusLines({'event': statussocket.PROGRESS,
+                                     'progress': event['progress']})
+
+    elif kind == statussocket.PHASE:
+        yield 'Phase: {}'.format(event.get('phase'))
+
+    elif kind == statussocket.MESSAGE:
+        message = event.get('message', '').replace('\n', ' ')
+        if event.get('type_id') == 1:
+            message = 'Error: ' + message
+        yield message
+
+    elif kind == statussocket.PROGRESS:
+        pg = event.get('progress')
+        if pg:
+            yield '{}% | Sent: {} | Speed: {} | ETA: {}'.format(
+                pg.get('percent'), pg.get('sent'), pg.get('speed'),
+                pg.get('eta'))
+
+    elif kind == statussocket.FINISHED:
+        if event.get('error'):
+            yield 'Finished with errors'
+        else:
+            yield 'Finished'
+
+
+def benchmarkCipher(args):
+    """
+    Command for streaming data to the remote host with all available ciphers
+    and print the speed and CPU time of each.
+
+    Args:
+        args (argparse.Namespace):
+                        previously parsed arguments
+
+    Raises:
+        SystemExit:     0 or 1
+    """
+    force_stdout = setQuiet(args)
+
+    if not args.json:
+        printHeader()
+
+    cfg = getConfig(args)
+
+    if cfg.snapshotsMode() not in ('ssh', 'ssh_encfs'):
         logger.error("SSH is not configured for profile '%s'!" % cfg.profileName())
         sys.exit(RETURN_ERR)
 
+    def log(result):
+        if args.json:
+            return
+        if result.error:
+            speed = 'failed: {}'.format(result.error.splitlines()[0])
+        else:
+            remote = '-' if result.remote_cpu is None \
+                else '{:.2f}s'.format(result.remote_cpu)
+            speed = '{:8.2f} MiB/s  CPU local {:.2f}s remote {}'.format(
+                result.mbPerSecond, result.local_cpu, remote)
+        print('{:<14} {:<28} {:<3} {}'.format(
+                  result.cipher,
+                  result.mac,
+                  'C' if result.compression else '',
+                  speed),
+              file=force_stdout)
+
+    ssh = sshtools.SSH(cfg)
+    results = ssh.benchmarkCipher(args.FILE_SIZE,
+                                  macs = args.macs or ('default', ),
+                                  compression = args.compression,
+                                  log = log)
+    best = sshbenchmark.winner(results)
+    # Only a cipher can be stored in the profile, no MAC or compression
+    applicable = sshbenchmark.winner(result for result in results
+                                     if result.mac == 'default'
+                                     and not result.compression)
+    applied = bool(args.apply and applicable)
+
+    if applied:
+        cfg.setSshCipher(applicable.cipher)
+        cfg.save()
+
+    elif args.apply and best:
+        logger.warning('No measurement with the default MAC and without '
+                       'compression succeeded. Nothing stored in profile.')
+
+    if args.json:
+        print(json.dumps({'size': args.FILE_SIZE * 1024 * 1024,
+                          'results': [result.toDict() for result in results],
+                          'best': best.toDict() if best else None,
+                          'applied': applicable.cipher if applied else None},
+                         indent=4),
+              file=force_stdout)
+    elif best:
+        print('', file=force_stdout)
+        print('Fastest: {} (MAC {}{})'.format(
+                  best.cipher,
+                  best.mac,
+                  ', compression' if best.compression else ''),
+              file=force_stdout)
+        if applied:
+            print('Stored cipher in profile: {}'.format(applicable.cipher),
+                  file=force_stdout)
+
+    sys.exit(RETURN_OK if best else RETURN_ERR)
+
 
 def pwCache(args):
     """
@@ -1218,6 +1563,101 @@ def remove(args, force=False):
     sys.exit(RETURN_OK)
 
 
+def convertFileInfo(args):
+    """
+    Command for converting the permission manifest of snapshots into the
+    indexed format.
+
+    Args:
+        args (argparse.Namespace):
+                        previously parsed arguments
+
+    Raises:
+        SystemExit:     0 or 1
+    """
+    force_stdout = setQuiet(args)
+    printHeader()
+
+    cfg = getConfig(args)
+    _mount(cfg)
+
+    sids = snapshots.listSnapshots(cfg, reverse = False)
+    if args.SNAPSHOT_ID:
+        unknown = set(args.SNAPSHOT_ID) - set(sid.sid for sid in sids)
+        if unknown:
+            logger.error('Unknown snapshot IDs: {}'.format(', '.join(sorted(unknown))))
+            _umount(cfg)
+            sys.exit(RETURN_ERR)
+        sids = [sid for sid in sids if sid.sid in args.SNAPSHOT_ID]
+
+    for sid in sids:
+        count = sid.convertFileInfo(force = args.force)
+        if count is None:
+            print('{}: skipped'.format(sid), file = force_stdout)
+        else:
+            print('{}: converted {} entries'.format(sid, count), file = force_stdout)
+
+    _umount(cfg)
+    sys.exit(RETURN_OK)
+
+
+def indexChanges(args):
+    """
+    Command for adding the changes of existing snapshots to the change index
+    of the current profile.
+
+    Args:
+        args (argparse.Namespace):
+                        previously parsed arguments
+
+    Raises:
+        SystemExit:     0 or 1
+    """
+    force_stdout = setQuiet(args)
+    printHeader()
+
+    cfg = getConfig(args)
+    if cfg.snapshotsMode() in ('local_encfs', 'ssh_encfs'):
+        logger.error('The change index is not available for encrypted profiles')
+        sys.exit(RETURN_ERR)
+
+    _mount(cfg)
+
+    index = snapshots.changeIndex(cfg)
+    indexed = index.indexed()
+    if indexed is None:
+        logger.error('Failed to open change index {}'.format(index.filename))
+        _umount(cfg)
+        sys.exit(RETURN_ERR)
+
+    sids = snapshots.listSnapshots(cfg, reverse = False)
+    for sid in sids:
+        if sid.sid in indexed and not args.force:
+            print('{}: skipped'.format(sid), file = force_stdout)
+            continue
+
+        try:
+            link_dest, changes = changeindex.readSnapshotLog(
+                sid.path(sid.LOG), sid.path(sid.LOG_INDEX))
+        except OSError as e:
+            print('{}: failed to read log: {}'.format(sid, str(e)), file = force_stdout)
+            continue
+
+        # Logs written with a log level below 2 contain no changes.
+        if not changes:
+            print('{}: skipped, no changes in log'.format(sid), file = force_stdout)
+            continue
+
+        index.add(sid.sid, link_dest, changes)
+        print('{}: indexed {} changes'.format(sid, len(changes)), file = force_stdout)
+
+    if sids:
+        index.prune(sids[0].sid)
+
+    _umount(cfg)
+    sys.exit(RETURN_OK)
+
+
 def removeAndDoNotAskAgain(args):
     """
     Command for removing snapshots without asking before remove
@@ -1245,7 +1685,7 @@ def smartRemove(args):
         SystemExit:     0 if okay
                         2 if Smart-Removal is not configured
     """
-    setQuiet(args)
+    force_stdout = setQuiet(args)
     printHeader()
     cfg = getConfig(args)
     sn = snapshots.Snapshots(cfg)
@@ -1253,13 +1693,23 @@ def smartRemove(args):
     enabled, keep_all, keep_one_per_day, keep_one_per_week, keep_one_per_month = cfg.smartRemove()
     if enabled:
         _mount(cfg)
+        start = perf_counter()
         del_snapshots = sn.smartRemoveList(datetime.today(),
                                            keep_all,
                                            keep_one_per_day,
                                            keep_one_per_week,
                                            keep_one_per_month)
+        duration = perf_counter() - start
         logger.info('Smart Removal will remove {} snapshots'.format(len(del_snapshots)))
-        sn.smartRemove(del_snapshots, log = logger.info)
+        if args.dry_run:
+            remove = set(del_snapshots)
+            for sid in snapshots.listSnapshots(cfg, reverse = False):
+                action = 'Remove' if sid in remove else 'Keep'
+                print('{:<8}{}'.format(action + ':', sid), file = force_stdout)
+            print('Plan computed in {:.3f} seconds'.format(duration),
+                  file = force_stdout)
+        else:
+            sn.smartRemove(del_snapshots, log = logger.info)
         _umount(cfg)
         sys.exit(RETURN_OK)
     else:
@@ -1294,7 +1744,8 @@ def restore(args):
                 args.WHERE,
                 delete=args.delete,
                 backup=backup,
-                only_new=args.only_new)
+                only_new=args.only_new,
+                verbose_permissions=args.verbose_permissions)
 
     _umount(cfg)
 
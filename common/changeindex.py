@@ -0,0 +1,384 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Index of the paths changed by each snapshot.
+
+The log of each snapshot contains one ``[C]`` line per path rsync created,
+updated or deleted compared to the previous snapshot (the one used for
+``--link-dest``). This module stores these lines in an SQLite database per
+profile: path -> snapshot ID -> itemized change flags (see ``--itemize-
+changes`` in ``man rsync``). For each snapshot the ID of its previous
+snapshot is stored too.
+
+Following these links from the newest to the oldest of some snapshots gives
+the complete chain of changes between them. Snapshots which got removed in
+the meantime stay part of the chain. Together with a single ``stat()`` of
+the path in the oldest snapshot this answers which snapshots contain
+different versions of a file (see :py:func:`versions`) without looking into
+any other snapshot.
+
+The index is a cache. All methods are failure tolerant and return ``None``
+if it can't answer. Then the caller has to look into the snapshots.
+"""
+from __future__ import annotations
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+import logarchive
+import logger
+
+SCHEMA_VERSION = 1
+
+# Number of rows inserted at once
+BATCH_SIZE = 1000
+
+# Kinds of a change, see classify()
+DELETED = 'deleted'
+NEW = 'new'
+ATTRIBUTES = 'attributes'
+
+# "[C] <11 itemize flags> <path>" as written by Snapshots.rsyncCallback()
+_CHANGE_LINE = re.compile(r'^\[C\] ([^ ].{10}) (.+)$')
+
+# --link-dest argument in the rsync command logged with "[I]"
+_LINK_DEST = re.compile(r'--link-dest=\S*?(\d{8}-\d{6}-\d{3})/backup(?:\s|$)')
+
+# Characters rsync would escape as "\#ooo" in its output
+_ESCAPED = re.compile(r'[\x00-\x1f\x7f\udc80-\udcff]|\\#')
+
+
+def parseLine(line: str) -> Optional[tuple[str, str]]:
+    """Flags and absolute path of a ``[C]`` log line.
+
+    Returns:
+        tuple: ``(flags, path)`` or ``None`` if ``line`` is no change.
+    """
+    match = _CHANGE_LINE.match(line)
+
+    if not match:
+        return None
+
+    flags, path = match.groups()
+
+    # strip %L of symlinks and hard links
+    if flags[1] == 'L':
+        path = path.partition(' -> ')[0]
+
+    elif flags[0] == 'h':
+        path = path.partition(' => ')[0]
+
+    path = '/' + path.rstrip('/')
+
+    return (flags, path)
+
+
+def parseLinkDest(line: str) -> Optional[str]:
+    """Snapshot ID used for ``--link-dest`` in the rsync command logged in
+    ``line`` or ``None``."""
+    if not line.startswith('[I] ') or '--link-dest=' not in line:
+        return None
+
+    match = _LINK_DEST.search(line)
+
+    return match.group(1) if match else None
+
+
+def classify(flags: str) -> str:
+    """Kind of change of a regular file with itemized ``flags``.
+
+    Returns:
+        str: :py:data:`DELETED` if the path got deleted or is no regular file
+            anymore, :py:data:`NEW` if content, size or modification time
+            changed (a new version of the file) or :py:data:`ATTRIBUTES` if
+            only permissions, owner or similar changed.
+    """
+    if flags[0] == '*' or flags[1] != 'f':
+        return DELETED
+
+    if '+' in flags or any(c not in '. ' for c in flags[2:5]):
+        return NEW
+
+    return ATTRIBUTES
+
+
+def versions(chain: list[str],
+             changes: dict[str, str],
+             listed: Iterable[str],
+             exists: bool) -> list[str]:
+    """Snapshots holding different versions of a file.
+
+    For each version the newest of the ``listed`` snapshots containing it is
+    returned. That is the same one a scan from the newest to the oldest
+    snapshot would keep.
+
+    Args:
+        chain: Snapshot IDs from the oldest listed to the newest listed
+            snapshot (oldest first), including removed or not listed
+            snapshots in between. See :py:func:`ChangeIndex.chain`.
+        changes: Change flags of the file per snapshot ID.
+        listed: Snapshot IDs which may be returned.
+        exists: ``True`` if the file exists as regular file in ``chain[0]``.
+
+    Returns:
+        list: Snapshot IDs, newest first.
+    """
+    listed = set(listed)
+    result = []
+    current = None
+    present = exists
+
+    for i, sid in enumerate(chain):
+        # the state of the first snapshot is given by "exists"
+        flags = changes.get(sid) if i else None
+
+        if flags is not None:
+            kind = classify(flags)
+
+            if kind != ATTRIBUTES or not present:
+                if current:
+                    result.append(current)
+
+                current = None
+                present = kind != DELETED
+
+        if present and sid in listed:
+            current = sid
+
+    if current:
+        result.append(current)
+
+    result.reverse()
+
+    return result
+
+
+def isIndexable(path: str) -> bool:
+    """``False`` if rsync would escape characters of ``path`` in its
+    output. Those paths are not found in the index."""
+    return not _ESCAPED.search(path)
+
+
+def readLog(lines: Iterable[str]) -> tuple[Optional[str], list]:
+    """Changes and previous snapshot from the lines of a snapshot log.
+
+    Returns:
+        tuple: ``(link_dest, changes)``. ``link_dest`` is the snapshot ID used
+            for ``--link-dest`` or ``None`` if not logged. ``changes`` is a
+            list of ``(flags, path)``.
+    """
+    link_dest = None
+    changes = []
+
+    for line in lines:
+        change = parseLine(line)
+
+        if change:
+            changes.append(change)
+
+        elif link_dest is None:
+            link_dest = parseLinkDest(line)
+
+    return (link_dest, changes)
+
+
+def readSnapshotLog(filename: str, index: str) -> tuple[Optional[str], list]:
+    """Like :py:func:`readLog` for a compressed snapshot log (see
+    :py:mod:`logarchive`). Only blocks containing ``[C]`` or ``[I]`` lines
+    are decompressed.
+
+    Raises:
+        OSError: If the log can't be read.
+    """
+    archive = logarchive.LogArchive(filename, index)
+
+    return readLog(line
+                   for chunk in archive.chunks(('C', 'I'))
+                   for line in chunk)
+
+
+class ChangeIndex:
+    """Database of changed paths per snapshot.
+
+    Args:
+        filename: The SQLite database of the profile.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.filename, timeout=10)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS meta '
+            '(key TEXT PRIMARY KEY, value)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            'sid TEXT PRIMARY KEY, '
+            'prev TEXT)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS paths ('
+            'id INTEGER PRIMARY KEY, '
+            'path TEXT UNIQUE NOT NULL)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS changes ('
+            'path_id INTEGER NOT NULL, '
+            'sid TEXT NOT NULL, '
+            'flags TEXT NOT NULL, '
+            'PRIMARY KEY (path_id, sid)) WITHOUT ROWID')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS changes_sid ON changes (sid)')
+        version = conn.execute(
+            'SELECT value FROM meta WHERE key = ?', ('version', )).fetchone()
+
+        if version is None:
+            conn.execute('INSERT INTO meta (key, value) VALUES (?, ?)',
+                         ('version', SCHEMA_VERSION))
+
+        elif version[0] != SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                f'Unknown schema version {version[0]}')
+
+        return conn
+
+    @contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        """Connection as a context manager committing on success."""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self,
+            sid: str,
+            prev: Optional[str],
+            changes: Iterable[tuple[str, str]]) -> bool:
+        """Store the changes of snapshot ``sid``. Existing changes of it are
+        replaced.
+
+        Args:
+            sid: Snapshot ID.
+            prev: ID of the snapshot used for ``--link-dest`` or ``''`` if
+                there was none.
+            changes: ``(flags, path)`` of all changed paths.
+
+        Returns:
+            bool: ``True`` on success.
+        """
+        try:
+            with self._open() as conn:
+                conn.execute('DELETE FROM changes WHERE sid = ?', (sid, ))
+                conn.execute(
+                    'INSERT OR REPLACE INTO snapshots (sid, prev) '
+                    'VALUES (?, ?)', (sid, prev))
+
+                batch = []
+                for item in changes:
+                    batch.append(item)
+
+                    if len(batch) >= BATCH_SIZE:
+                        self._insert(conn, sid, batch)
+                        batch = []
+
+                self._insert(conn, sid, batch)
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to add snapshot {sid} to change index '
+                         f'{self.filename}: {exc}', self)
+            return False
+
+        return True
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, sid: str, batch: list) -> None:
+        conn.executemany('INSERT OR IGNORE INTO paths (path) VALUES (?)',
+                         ((path, ) for _, path in batch))
+        conn.executemany(
+            'INSERT OR REPLACE INTO changes (path_id, sid, flags) '
+            'SELECT id, ?, ? FROM paths WHERE path = ?',
+            ((sid, flags, path) for flags, path in batch))
+
+    def indexed(self) -> Optional[set[str]]:
+        """IDs of all indexed snapshots or ``None`` on errors."""
+        if not os.path.exists(self.filename):
+            return set()
+
+        try:
+            with self._open() as conn:
+                return {row[0] for row in conn.execute(
+                    'SELECT sid FROM snapshots')}
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to read change index {self.filename}: '
+                         f'{exc}', self)
+            return None
+
+    def chain(self, oldest: str, newest: str) -> Optional[list[str]]:
+        """All snapshots from ``oldest`` to ``newest`` linked by their
+        previous snapshot.
+
+        Returns:
+            list: Snapshot IDs, oldest first, or ``None`` if a snapshot in
+                between is not indexed.
+        """
+        if not os.path.exists(self.filename):
+            return None
+
+        try:
+            with self._open() as conn:
+                prev = dict(conn.execute('SELECT sid, prev FROM snapshots'))
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to read change index {self.filename}: '
+                         f'{exc}', self)
+            return None
+
+        result = [newest]
+
+        while result[-1] != oldest:
+            # the first snapshot ('') or not indexed (None)
+            if not prev.get(result[-1]) or len(result) > len(prev):
+                return None
+
+            result.append(prev[result[-1]])
+
+        result.reverse()
+
+        return result
+
+    def changes(self, path: str) -> Optional[dict[str, str]]:
+        """Change flags of ``path`` per snapshot ID or ``None`` on errors."""
+        try:
+            with self._open() as conn:
+                return dict(conn.execute(
+                    'SELECT changes.sid, changes.flags FROM changes '
+                    'JOIN paths ON paths.id = changes.path_id '
+                    'WHERE paths.path = ?', (path, )))
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to read change index {self.filename}: '
+                         f'{exc}', self)
+            return None
+
+    def prune(self, oldest: str) -> None:
+        """Forget snapshots older than ``oldest``. They are not needed for
+        any chain of existing snapshots anymore."""
+        try:
+            with self._open() as conn:
+                conn.execute('DELETE FROM changes WHERE sid < ?', (oldest, ))
+                conn.execute('DELETE FROM snapshots WHERE sid < ?',
+                             (oldest, ))
+                conn.execute(
+                    'DELETE FROM paths WHERE NOT EXISTS '
+                    '(SELECT 1 FROM changes WHERE path_id = paths.id)')
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to prune change index {self.filename}: '
+                         f'{exc}', self)
@@ -42,6 +42,7 @@ import tools
 import configfile
 import logger
 import sshtools
+import sshmaster
 import encfstools
 import password
 import pluginmanager
@@ -501,6 +502,14 @@ class Config(configfile.ConfigFileWithProfiles):
     def setSshCipher(self, value, profile_id = None):
         self.setProfileStrValue('snapshots.ssh.cipher', value, profile_id)
 
+    def sshControlMaster(self, profile_id = None):
+        #?Share one SSH connection (ControlMaster) between all SSH commands
+        #?while the remote path is mounted.
+        return self.profileBoolValue('snapshots.ssh.control_master', True, profile_id)
+
+    def setSshControlMaster(self, value, profile_id = None):
+        self.setProfileBoolValue('snapshots.ssh.control_master', value, profile_id)
+
     def sshUser(self, profile_id = None):
         #?Remote SSH user;;local users name
         return self.profileStrValue('snapshots.ssh.user', getpass.getuser(), profile_id)
@@ -581,6 +590,15 @@ class Config(configfile.ConfigFileWithProfiles):
     def setSshCheckCommands(self, value, profile_id = None):
         self.setProfileBoolValue('snapshots.ssh.check_commands', value, profile_id)
 
+    def sshCheckCacheHours(self, profile_id = None):
+        #?Hours a successful check of the cipher and the remote commands is
+        #?remembered. Changing the SSH settings runs the checks again.
+        #?0 disables the cache.;0-8760
+        return self.profileIntValue('snapshots.ssh.check_cache_hours', 24, profile_id)
+
+    def setSshCheckCacheHours(self, value, profile_id = None):
+        self.setProfileIntValue('snapshots.ssh.check_cache_hours', value, profile_id)
+
     def sshCheckPingHost(self, profile_id = None):
         #?Check if the remote host is available before trying to mount.
         return self.profileBoolValue('snapshots.ssh.check_ping', True, profile_id)
@@ -588,10 +606,14 @@ class Config(configfile.ConfigFileWithProfiles):
     def setSshCheckPingHost(self, value, profile_id = None):
         self.setProfileBoolValue('snapshots.ssh.check_ping', value, profile_id)
 
-    def sshDefaultArgs(self, profile_id = None):
+    def sshDefaultArgs(self, profile_id = None, master = False):
         """
         Default arguments used for ``ssh`` and ``sshfs`` commands.
 
+        Args:
+            master (bool):  arguments to start the shared master connection
+                            (see :py:mod:`sshmaster`)
+
         Returns:
             list:   arguments for ssh
         """
@@ -602,6 +624,8 @@ class Config(configfile.ConfigFileWithProfiles):
         # specifying key file here allows to override for potentially
         # conflicting .ssh/config key entry
         args += ['-o', 'IdentityFile={}'.format(self.sshPrivateKeyFile(profile_id))]
+        # use the shared connection if it is running
+        args += sshmaster.controlArgs(self, profile_id, master)
         return args
 
     def sshCommand(self,
@@ -614,6 +638,7 @@ class Config(configfile.ConfigFileWithProfiles):
                    nice=True,
                    quote=False,
                    prefix=True,
+                   master=False,
                    profile_id=None):
         """
         Return SSH command with all arguments.
@@ -628,6 +653,7 @@ class Config(configfile.ConfigFileWithProfiles):
             nice (bool):        use nice if configured
             quote (bool):       quote remote command
             prefix (bool):      use prefix from config before remote command
+            master (bool):      start the shared master connection
             profile_id (str):   profile ID that should  be used in config
 
         Returns:
@@ -639,7 +665,7 @@ class Config(configfile.ConfigFileWithProfiles):
         assert custom_args is None or isinstance(custom_args, list), "custom_args '{}' is not list instance".format(custom_args)
 
         ssh = ['ssh']
-        ssh += self.sshDefaultArgs(profile_id)
+        ssh += self.sshDefaultArgs(profile_id, master)
 
         # Proxy (aka Jump host)
         if self.sshProxyHost(profile_id):
@@ -1032,12 +1058,33 @@ class Config(configfile.ConfigFileWithProfiles):
         self.setProfileIntValue('snapshots.smart_remove.keep_one_per_month', keep_one_per_month, profile_id)
 
     def smartRemoveRunRemoteInBackground(self, profile_id = None):
-        #?If using mode SSH or SSH-encrypted, run smart_remove in background on remote machine
+        #?If using mode SSH or SSH-encrypted, run smart_remove on remote machine
+        #?with a helper script which removes several snapshots in parallel.
+        #?The backup waits until the helper has finished
         return self.profileBoolValue('snapshots.smart_remove.run_remote_in_background', False, profile_id)
 
     def setSmartRemoveRunRemoteInBackground(self, value, profile_id = None):
         self.setProfileBoolValue('snapshots.smart_remove.run_remote_in_background', value, profile_id)
 
+    def removeWorkers(self, profile_id = None):
+        #?Number of threads removing files when deleting a snapshot and
+        #?number of snapshots removed in parallel on remote machine. Higher
+        #?values help on network filesystems and slow disks.;1-99
+        return self.profileIntValue('snapshots.remove.workers', 8, profile_id)
+
+    def setRemoveWorkers(self, value, profile_id = None):
+        self.setProfileIntValue('snapshots.remove.workers', value, profile_id)
+
+    def sizeAccounting(self, profile_id = None):
+        #?Measure the space held exclusively by each new snapshot and cache
+        #?it inside the snapshot folder. This walks each new snapshot once
+        #?more. The cached sizes let the minimum free space rule remove
+        #?several snapshots at once. Not done for SSH profiles.
+        return self.profileBoolValue('snapshots.size_accounting.enabled', True, profile_id)
+
+    def setSizeAccounting(self, value, profile_id = None):
+        self.setProfileBoolValue('snapshots.size_accounting.enabled', value, profile_id)
+
     def notify(self, profile_id = None):
         #?Display notifications (errors, warnings) through libnotify.
         return self.profileBoolValue('snapshots.notify.enabled', True, profile_id)
@@ -1138,6 +1185,21 @@ class Config(configfile.ConfigFileWithProfiles):
         self.setProfileBoolValue('snapshots.bwlimit.enabled', enabled, profile_id)
         self.setProfileIntValue('snapshots.bwlimit.value', value, profile_id)
 
+    def parallelTransferEnabled(self, profile_id = None):
+        #?Split the include list into independent shards (one per source
+        #?device) and transfer them with concurrent rsync processes into the
+        #?same snapshot.
+        return self.profileBoolValue('snapshots.parallel_transfer.enabled', False, profile_id)
+
+    def parallelTransferWorkers(self, profile_id = None):
+        #?Maximum number of concurrent rsync processes if parallel transfer
+        #?is enabled.;1-99
+        return self.profileIntValue('snapshots.parallel_transfer.workers', 2, profile_id)
+
+    def setParallelTransfer(self, enabled, workers, profile_id = None):
+        self.setProfileBoolValue('snapshots.parallel_transfer.enabled', enabled, profile_id)
+        self.setProfileIntValue('snapshots.parallel_transfer.workers', workers, profile_id)
+
     def noSnapshotOnBattery(self, profile_id = None):
         #?Don't take snapshots if the Computer runs on battery.
         return self.profileBoolValue('snapshots.no_on_battery', False, profile_id)
@@ -1280,10 +1342,35 @@ class Config(configfile.ConfigFileWithProfiles):
 
         return profile_id
 
+    def sshCheckCacheFile(self):
+        return os.path.join(self._LOCAL_DATA_FOLDER, 'ssh_checks.json')
+
+    def changeIndexFile(self, profile_id = None):
+        return os.path.join(self._LOCAL_DATA_FOLDER,
+                            "changes_%s.sqlite" % self.fileId(profile_id))
+
     def takeSnapshotLogFile(self, profile_id = None):
         return os.path.join(self._LOCAL_DATA_FOLDER,
                             "takesnapshot_%s.log" % self.fileId(profile_id))
 
+    def takeSnapshotMessageRate(self, profile_id = None):
+        #?Maximum number of status message updates per second while taking
+        #?a snapshot. Messages in between are coalesced and passed to
+        #?plugins in batches. Errors are always passed on immediately.
+        #?0 disables coalescing.;0-100
+        return self.profileIntValue('snapshots.message_rate', 4, profile_id)
+
+    def setTakeSnapshotMessageRate(self, value, profile_id = None):
+        self.setProfileIntValue('snapshots.message_rate', value, profile_id)
+
+    def progressRate(self, profile_id = None):
+        #?Maximum number of progress file updates per second while rsync is
+        #?running. 0 writes every progress line.;0-100
+        return self.profileIntValue('snapshots.progress_rate', 2, profile_id)
+
+    def setProgressRate(self, value, profile_id = None):
+        self.setProfileIntValue('snapshots.progress_rate', value, profile_id)
+
     def takeSnapshotMessageFile(self, profile_id = None):
         return os.path.join(self._LOCAL_DATA_FOLDER,
                             "worker%s.message" % self.fileId(profile_id))
@@ -1292,6 +1379,12 @@ class Config(configfile.ConfigFileWithProfiles):
         return os.path.join(self._LOCAL_DATA_FOLDER,
                             "worker%s.progress" % self.fileId(profile_id))
 
+    def takeSnapshotSocketFile(self, profile_id=None):
+        """Unix socket pushing the status of a running snapshot. See
+        :py:mod:`statussocket`."""
+        return os.path.join(self._LOCAL_DATA_FOLDER,
+                            "worker%s.sock" % self.fileId(profile_id))
+
     def takeSnapshotInstanceFile(self, profile_id=None):
         return os.path.join(
             self._LOCAL_DATA_FOLDER,
@@ -0,0 +1,249 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Remove large directory trees (e.g. snapshots) fast.
+
+Snapshots are hardlink farms with millions of entries. Removing them is
+dominated by the latency of the single ``unlink()`` calls, especially on
+network filesystems and spinning disks. The tree is walked once with
+:py:func:`os.scandir` and the files are unlinked in batches by a bounded
+pool of threads. Directories are removed afterwards level by level, deepest
+first.
+
+Read-only directories are made writable on the fly, the same way
+:py:meth:`snapshots.Snapshots.deletePath` does it.
+"""
+from __future__ import annotations
+import os
+import stat
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+import logger
+
+DEFAULT_WORKERS = 8
+# Number of files handed to a worker thread at once.
+BATCH_SIZE = 256
+
+
+@dataclass
+class DeletionStats:
+    """Counters of a running or finished :py:func:`removeTree`."""
+    files: int = 0
+    dirs: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Removed files per second."""
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.files / self.seconds
+
+    def __str__(self):
+        return (f'{self.files} files, {self.dirs} folders in '
+                f'{self.seconds:.1f}s ({self.rate:.0f} files/s)')
+
+
+def _makeWritable(path: str) -> None:
+    """Add user write and execute permission to the folder ``path``."""
+    st = os.lstat(path)
+    os.chmod(path, st.st_mode | stat.S_IWUSR | stat.S_IXUSR | stat.S_IRUSR)
+
+
+def _retry(func: Callable[[str], None], path: str) -> None:
+    """Call ``func(path)``. Fix permissions and try again if this fails.
+
+    Raises:
+        OSError: If ``func`` fails a second time.
+    """
+    try:
+        func(path)
+
+    except PermissionError:
+        _makeWritable(os.path.dirname(path))
+        func(path)
+
+
+def _unlinkBatch(paths: list[str]) -> tuple[int, int]:
+    """Unlink all files in ``paths``.
+
+    Returns:
+        tuple: Number of removed files and number of errors.
+    """
+    removed = errors = 0
+
+    for path in paths:
+        try:
+            _retry(os.unlink, path)
+            removed += 1
+
+        except FileNotFoundError:
+            pass
+
+        except OSError as exc:
+            logger.error(f'Failed to remove {path}: {exc}')
+            errors += 1
+
+    return removed, errors
+
+
+def _scan(path: str) -> list[os.DirEntry]:
+    """Content of the folder ``path``. Unreadable folders are fixed."""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+
+    except PermissionError:
+        _makeWritable(path)
+
+        with os.scandir(path) as it:
+            return list(it)
+
+
+def removeTree(path: str,
+               workers: int = DEFAULT_WORKERS,
+               progress: Optional[Callable[[DeletionStats], None]] = None,
+               interval: float = 1.0) -> DeletionStats:
+    """Remove ``path`` and everything inside it.
+
+    Symlinks are removed, never followed. A ``path`` which doesn't exist is
+    not an error.
+
+    Args:
+        path: File or folder to remove.
+        workers: Maximum number of threads unlinking files.
+        progress: Called with the current :py:class:`DeletionStats` about
+            every ``interval`` seconds and once at the end.
+        interval: Seconds between two ``progress`` calls.
+
+    Returns:
+        DeletionStats: Counters of the removal. ``errors`` is greater than
+            zero if something was left behind.
+    """
+    stats = DeletionStats()
+    start = time.monotonic()
+    last_report = start
+
+    def report(force=False):
+        nonlocal last_report
+
+        now = time.monotonic()
+        stats.seconds = now - start
+
+        if progress and (force or now - last_report >= interval):
+            last_report = now
+            progress(stats)
+
+    if not os.path.lexists(path):
+        return stats
+
+    if os.path.islink(path) or not os.path.isdir(path):
+        stats.files, stats.errors = _unlinkBatch([path])
+        report(force=True)
+        return stats
+
+    workers = max(1, workers)
+    # (depth, folder) in pre-order. Children always come after their parent.
+    folders = []
+    pending = deque()
+
+    def collect(future):
+        removed, errors = future.result()
+        stats.files += removed
+        stats.errors += errors
+
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix='removeTree') as pool:
+
+        def submit(batch):
+            # Keep the queue short so memory doesn't grow with the tree size.
+            while len(pending) >= workers * 4:
+                collect(pending.popleft())
+
+            pending.append(pool.submit(_unlinkBatch, batch))
+            report()
+
+        stack = [(0, path)]
+        while stack:
+            depth, current = stack.pop()
+            folders.append((depth, current))
+            batch = []
+
+            try:
+                entries = _scan(current)
+
+            except FileNotFoundError:
+                continue
+
+            except OSError as exc:
+                logger.error(f'Failed to list {current}: {exc}')
+                stats.errors += 1
+                continue
+
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    stack.append((depth + 1, entry.path))
+                    continue
+
+                batch.append(entry.path)
+                if len(batch) >= BATCH_SIZE:
+                    submit(batch)
+                    batch = []
+
+            if batch:
+                submit(batch)
+
+        while pending:
+            collect(pending.popleft())
+
+        # Remove folders level by level, deepest first.
+        levels = {}
+        for depth, folder in folders:
+            levels.setdefault(depth, []).append(folder)
+
+        for depth in sorted(levels, reverse=True):
+            for failed in pool.map(_rmdir, levels[depth]):
+                if failed:
+                    stats.errors += 1
+                else:
+                    stats.dirs += 1
+
+            report()
+
+    report(force=True)
+
+    return stats
+
+
+def _rmdir(path: str) -> bool:
+    """Remove the empty folder ``path``.
+
+    Returns:
+        bool: ``True`` if this failed.
+    """
+    try:
+        _retry(os.rmdir, path)
+
+    except FileNotFoundError:
+        pass
+
+    except OSError as exc:
+        logger.error(f'Failed to remove {path}: {exc}')
+        return True
+
+    return False
@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Cache of paths translated by ``encfsctl``.
+
+:py:class:`encfstools.Encode` and :py:class:`encfstools.Decode` translate
+paths with an ``encfsctl`` child process, one line per path. This module
+keeps the results in memory, so each path passes the pipe only once, and
+sends many paths with one write.
+
+Entries are whole paths, not single names. With chained name IVs (the
+EncFS default) the encrypted name depends on all its parent folders. Each
+cache holds both directions. A path encoded by ``Encode`` is found by
+``Decode`` without another lookup and vice versa.
+
+There is one cache per EncFS config file (see :py:func:`cache`). It lives
+until the EncFS volume gets unmounted (see :py:func:`drop`). Nothing is
+written to disk, because that would store plain names next to encrypted
+ones.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, Optional
+
+# Maximum number of paths per direction in one cache
+MAX_ENTRIES = 20000
+
+# Maximum size in bytes of paths written to encfsctl at once. Replies are
+# only read after the whole batch is written. An encrypted name can be about
+# 25 times longer than a one character name. So the replies of one batch
+# always fit into the pipe buffer (64 KiB) and no side blocks the other.
+BATCH_BYTES = 2048
+
+_caches: dict[str, PathCache] = {}
+_caches_lock = threading.Lock()
+
+
+class PathCache:
+    """LRU cache of plain and encrypted paths in both directions.
+
+    Args:
+        maxsize: Maximum number of paths per direction.
+    """
+
+    def __init__(self, maxsize: int = MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._encoded = OrderedDict()
+        self._decoded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._encoded)
+
+    @staticmethod
+    def _get(data: OrderedDict, key: str) -> Optional[str]:
+        value = data.get(key)
+
+        if value is not None:
+            data.move_to_end(key)
+
+        return value
+
+    def _set(self, data: OrderedDict, key: str, value: str) -> None:
+        data[key] = value
+        data.move_to_end(key)
+
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def encode(self, plain: str) -> Optional[str]:
+        """Encrypted path of ``plain`` or ``None`` if unknown."""
+        with self._lock:
+            return self._get(self._encoded, plain)
+
+    def decode(self, cipher: str) -> Optional[str]:
+        """Plain path of ``cipher`` or ``None`` if unknown."""
+        with self._lock:
+            return self._get(self._decoded, cipher)
+
+    def add(self, plain: str, cipher: str) -> None:
+        """Remember that ``plain`` is encrypted as ``cipher``."""
+        with self._lock:
+            self._set(self._encoded, plain, cipher)
+            self._set(self._decoded, cipher, plain)
+
+    def clear(self) -> None:
+        """Forget all paths."""
+        with self._lock:
+            self._encoded.clear()
+            self._decoded.clear()
+
+
+def cache(key: str) -> PathCache:
+    """The shared cache of the EncFS volume with the config file ``key``."""
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = PathCache()
+
+        return _caches[key]
+
+
+def drop(key: str) -> None:
+    """Forget the cache of the EncFS volume with the config file ``key``."""
+    with _caches_lock:
+        old = _caches.pop(key, None)
+
+    if old is not None:
+        old.clear()
+
+
+def batches(paths: Iterable, max_bytes: int = BATCH_BYTES) -> Iterator[list]:
+    """Split ``paths`` (``str`` or ``bytes``) into lists of at most
+    ``max_bytes`` (and at least one path)."""
+    batch = []
+    size = 0
+
+    for path in paths:
+        length = len(path) + 1
+
+        if batch and size + length > max_bytes:
+            yield batch
+            batch = []
+            size = 0
+
+        batch.append(path)
+        size += length
+
+    if batch:
+        yield batch
+
+
+def translate(paths: Iterable,
+              lookup: Callable[[str], Optional[str]],
+              run: Callable[[list], list]) -> dict:
+    """Translate all ``paths`` which are not cached with as few calls of
+    ``run`` as possible.
+
+    Args:
+        paths: Paths to translate.
+        lookup: Returns the cached translation of a path or ``None``.
+        run: Translates a batch of paths (see :py:func:`batches`) and returns
+            the results in the same order.
+
+    Returns:
+        dict: Translation of each of ``paths``.
+    """
+    result = {}
+    missing = []
+
+    for path in paths:
+        if path in result:
+            continue
+
+        cached = lookup(path)
+
+        if cached is None:
+            missing.append(path)
+            # placeholder to skip duplicates
+            result[path] = None
+
+        else:
+            result[path] = cached
+
+    for batch in batches(missing):
+        result.update(zip(batch, run(batch)))
+
+    return result
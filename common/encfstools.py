@@ -19,6 +19,7 @@ import password_ipc
 import tools
 import sshtools
 import logger
+import encfscache
 from mount import MountControl
 from exceptions import MountException, EncodeValueError
 
@@ -82,6 +83,13 @@ class EncFS_mount(MountControl):
                         .format(command=' '.join(encfs)),
                         output))
 
+    def _umount(self):
+        """
+        unmount the service and forget the paths translated for it
+        """
+        super(EncFS_mount, self)._umount()
+        encfscache.drop(self.configFile())
+
     def preMountCheck(self, first_run=False):
         """Check what ever conditions must be given for the mount.
 
@@ -360,6 +368,10 @@ class Encode:
         self.re_asterisk = re.compile(r'\*')
         self.re_separate_asterisk = re.compile(r'(.*?)(\*+)(.*)')
 
+        #translated paths shared with Decode
+        self.cache = encfscache.cache(self.encfs.configFile())
+        self.collected = None
+
     def __del__(self):
         self.close()
 
@@ -383,7 +395,26 @@ class Encode:
 
     def path(self, path):
         """
-        write plain path to encfsctl stdin and read encrypted path from stdout
+        return encrypted path from cache or from encfsctl
+        """
+        if self.collected is not None:
+            self.collected.append(path)
+            return path
+        ret = self.cache.encode(path)
+        if ret is None:
+            ret = self.paths([path])[path]
+        return ret
+
+    def paths(self, paths):
+        """
+        encrypt many paths with as few round trips to encfsctl as possible.
+        Return a dict with the encrypted path of each path.
+        """
+        return encfscache.translate(paths, self.cache.encode, self.pipe)
+
+    def pipe(self, paths):
+        """
+        write plain paths to encfsctl stdin and read encrypted paths from stdout
         """
         if not 'p' in vars(self):
             self.startProcess()
@@ -391,14 +422,32 @@ class Encode:
             logger.warning('\'encfsctl encode\' process terminated. Restarting.', self)
             del self.p
             self.startProcess()
-        self.p.stdin.write(path + '\n')
-        ret = self.p.stdout.readline().strip('\n')
-        if not len(ret) and len(path):
-            logger.debug('Failed to encode %s. Got empty string'
-                         %path, self)
-            raise EncodeValueError()
+        self.p.stdin.write(''.join(path + '\n' for path in paths))
+        #read all replies first to keep the pipe in sync
+        ret = [self.p.stdout.readline().strip('\n') for path in paths]
+        for path, enc in zip(paths, ret):
+            if not len(enc) and len(path):
+                logger.debug('Failed to encode %s. Got empty string'
+                             %path, self)
+                raise EncodeValueError()
+            self.cache.add(path, enc)
         return ret
 
+    def prefetch(self, method, items):
+        """
+        run ``method`` (e.g. :py:func:`exclude`) for all ``items`` only to
+        collect the paths it needs. Encrypt them in batches so later calls
+        are answered from cache.
+        """
+        self.collected = []
+        try:
+            for item in items:
+                method(item)
+            collected = self.collected
+        finally:
+            self.collected = None
+        self.paths(collected)
+
     def exclude(self, path):
         """
         encrypt paths for snapshots.takeSnapshot exclude list.
@@ -483,6 +532,9 @@ class Bounce:
     def remote(self, path):
         return path
 
+    def prefetch(self, method, items):
+        pass
+
     def close(self):
         pass
 
@@ -592,6 +644,10 @@ class Decode:
         else:
             self.newline = b'\n'
 
+        #translated paths shared with Encode
+        self.cache = encfscache.cache(self.encfs.configFile())
+        self.collected = None
+
     def __del__(self):
         self.close()
 
@@ -616,35 +672,85 @@ class Decode:
 
     def path(self, path):
         """
-        write encrypted path to encfsctl stdin and read plain path from stdout
-        if stdout is empty (most likely because there was an error) return crypt path
+        return plain path from cache or from encfsctl
+        if decoding failed return crypt path
         """
         if self.string:
             assert isinstance(path, str), 'path is not str type: %s' % path
         else:
             assert isinstance(path, bytes), 'path is not bytes type: %s' % path
+        if self.collected is not None:
+            self.collected.append(path)
+            return path
+        ret = self.lookup(path)
+        if ret is None:
+            ret = self.paths([path])[path]
+        return ret
+
+    def lookup(self, path):
+        """
+        return cached plain path or ``None``
+        """
+        if self.string:
+            return self.cache.decode(path)
+        ret = self.cache.decode(os.fsdecode(path))
+        if ret is not None:
+            return os.fsencode(ret)
+
+    def paths(self, paths):
+        """
+        decrypt many paths with as few round trips to encfsctl as possible.
+        Return a dict with the plain path of each path.
+        """
+        return encfscache.translate(paths, self.lookup, self.pipe)
+
+    def pipe(self, paths):
+        """
+        write encrypted paths to encfsctl stdin and read plain paths from stdout
+        if stdout is empty (most likely because there was an error) return crypt path
+        """
         if not 'p' in vars(self):
             self.startProcess()
         if not self.p.returncode is None:
             logger.warning('\'encfsctl decode\' process terminated. Restarting.', self)
             del self.p
             self.startProcess()
-        self.p.stdin.write(path + self.newline)
-        ret = self.p.stdout.readline()
-        ret = ret.strip(self.newline)
-        if ret:
-            return ret
-        return path
+        self.p.stdin.write(self.newline.join(paths) + self.newline)
+        ret = []
+        for path in paths:
+            dec = self.p.stdout.readline().strip(self.newline)
+            if dec:
+                if self.string:
+                    self.cache.add(dec, path)
+                else:
+                    self.cache.add(os.fsdecode(dec), os.fsdecode(path))
+                ret.append(dec)
+            else:
+                ret.append(path)
+        return ret
+
+    def prefetch(self, method, items):
+        """
+        run ``method`` (e.g. :py:func:`log`) for all ``items`` only to
+        collect the paths it needs. Decrypt them in batches so later calls
+        are answered from cache.
+        """
+        self.collected = []
+        try:
+            for item in items:
+                method(item)
+            collected = self.collected
+        finally:
+            self.collected = None
+        self.paths(collected)
 
     #TODO: rename this, 'list' is corrupting sphinx doc
     def list(self, list_):
         """
         decode a list of paths
         """
-        output = []
-        for path in list_:
-            output.append(self.path(path))
-        return output
+        decoded = self.paths(list_)
+        return [decoded[path] for path in list_]
 
     def log(self, line):
         """
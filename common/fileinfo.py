@@ -0,0 +1,414 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Permission manifest (owner, group and mode) of the files in a snapshot.
+
+The legacy ``fileinfo.bz2`` is a compressed text file with one line
+``mode user group path`` per file. It has to be decompressed and parsed
+completely even to look up a single file.
+
+The indexed format (``fileinfo.idx``) can be memory mapped and searched in
+place. Only the pages touched by a lookup are read. All integers are little
+endian. The layout is::
+
+    header          see HEADER
+    names           user and group names, each as uint16 length + bytes
+    records         fixed width records (see RECORD) sorted by path
+    paths           all paths concatenated in the order of the records
+    block index     uint32 count, count * (uint64 offset, uint32 length)
+                    followed by the first path of every block of
+                    ``block_size`` records
+
+A lookup does a binary search over the small block index and then over the
+records of one block.
+"""
+from __future__ import annotations
+import abc
+import bz2
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Iterator, Optional
+import logger
+
+MAGIC = b'BITFINFO'
+VERSION = 1
+BLOCK_SIZE = 128
+
+# magic, version, reserved, record count, name count, block size,
+# offsets of names, records, paths and block index
+HEADER = struct.Struct('<8sHHIIIQQQQ')
+# path offset, path length, mode, user index, group index
+RECORD = struct.Struct('<QIIII')
+NAME_LEN = struct.Struct('<H')
+INDEX_COUNT = struct.Struct('<I')
+INDEX_ENTRY = struct.Struct('<QI')
+
+
+class FileInfo(Mapping):
+    """Read-only mapping of ``{path: (mode, user, group)}``.
+
+    Paths, user and group names are :py:class:`bytes`. Next to the mapping
+    interface subclasses provide lookups of whole directory trees.
+    """
+
+    @abc.abstractmethod
+    def iterPrefix(self, prefix: bytes) -> Iterator[tuple[bytes, tuple]]:
+        """Iterate over all entries whose path starts with ``prefix``.
+
+        Args:
+            prefix: Raw bytes prefix.
+
+        Yields:
+            ``(path, (mode, user, group))`` in ascending path order.
+        """
+
+    def iterTree(self, path: bytes) -> Iterator[tuple[bytes, tuple]]:
+        """Iterate over ``path`` and everything below it.
+
+        Unlike :py:func:`iterPrefix` siblings sharing the same name prefix
+        (e.g. ``/home/user2`` for ``/home/user``) are not included.
+
+        Args:
+            path: A file or directory.
+
+        Yields:
+            ``(path, (mode, user, group))`` in ascending path order.
+        """
+        path = path.rstrip(b'/')
+
+        if not path:
+            # root includes everything
+            yield from self.iterPrefix(b'/')
+            return
+
+        info = self.get(path)
+
+        if info is not None:
+            yield (path, info)
+
+        yield from self.iterPrefix(path + b'/')
+
+    def close(self) -> None:
+        """Release resources."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class LegacyFileInfo(FileInfo):
+    """Entries of a legacy ``fileinfo.bz2``.
+
+    The whole file is parsed into memory.
+
+    Args:
+        filename: Path of the ``fileinfo.bz2`` file. If ``None`` or not
+            existing the mapping is empty.
+    """
+
+    def __init__(self, filename: Optional[str] = None):
+        self._data = readLegacy(filename) if filename else {}
+        self._sorted = None
+
+    def __getitem__(self, path):
+        return self._data[path]
+
+    def __contains__(self, path):
+        return path in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def iterPrefix(self, prefix):
+        if self._sorted is None:
+            self._sorted = sorted(self._data)
+
+        for i in range(bisect_left(self._sorted, prefix), len(self._sorted)):
+            path = self._sorted[i]
+
+            if not path.startswith(prefix):
+                break
+
+            yield (path, self._data[path])
+
+
+class FileInfoIndex(FileInfo):
+    """Memory mapped reader of the indexed format.
+
+    Args:
+        filename: Path of the ``fileinfo.idx`` file.
+
+    Raises:
+        ValueError: If the file is not in the indexed format or truncated.
+        OSError: If the file can not be opened.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+        with open(filename, 'rb') as handle:
+            size = os.fstat(handle.fileno()).st_size
+
+            if size < HEADER.size:
+                raise ValueError(f'{filename} is too short')
+
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._readHeader(size)
+        except (ValueError, struct.error) as exc:
+            self._mm.close()
+            raise ValueError(f'{filename} is corrupt: {exc}') from exc
+
+    def _readHeader(self, size):
+        (magic, version, _reserved, self._count, name_count, self._blockSize,
+         names_offset, self._recordsOffset, self._pathsOffset,
+         index_offset) = HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC:
+            raise ValueError('wrong magic number')
+
+        if version != VERSION:
+            raise ValueError(f'unsupported version {version}')
+
+        if (self._recordsOffset + self._count * RECORD.size > size
+                or index_offset > size):
+            raise ValueError('offsets beyond end of file')
+
+        pos = names_offset
+        self._names = []
+        for _ in range(name_count):
+            length, = NAME_LEN.unpack_from(self._mm, pos)
+            pos += NAME_LEN.size
+            self._names.append(self._mm[pos:pos + length])
+            pos += length
+
+        index_count, = INDEX_COUNT.unpack_from(self._mm, index_offset)
+        self._indexOffset = index_offset + INDEX_COUNT.size
+        self._indexKeysOffset \
+            = self._indexOffset + index_count * INDEX_ENTRY.size
+        self._indexCount = index_count
+
+    def close(self):
+        if not self._mm.closed:
+            self._mm.close()
+
+    def _indexKey(self, block: int) -> bytes:
+        offset, length = INDEX_ENTRY.unpack_from(
+            self._mm, self._indexOffset + block * INDEX_ENTRY.size)
+        start = self._indexKeysOffset + offset
+
+        return self._mm[start:start + length]
+
+    def _record(self, i: int) -> tuple[int, int, int, int, int]:
+        return RECORD.unpack_from(self._mm,
+                                  self._recordsOffset + i * RECORD.size)
+
+    def _path(self, i: int) -> bytes:
+        offset, length = self._record(i)[:2]
+        start = self._pathsOffset + offset
+
+        return self._mm[start:start + length]
+
+    def _info(self, record) -> tuple[int, bytes, bytes]:
+        _, _, mode, user, group = record
+
+        return (mode, self._names[user], self._names[group])
+
+    def _lowerBound(self, key: bytes) -> int:
+        """Index of the first record with a path not less than ``key``."""
+        # last block whose first path is <= key
+        lo, hi = 0, self._indexCount
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._indexKey(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        block = max(lo - 1, 0)
+        lo = block * self._blockSize
+        hi = min(lo + self._blockSize, self._count)
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def __getitem__(self, path):
+        i = self._lowerBound(path)
+
+        if i < self._count:
+            record = self._record(i)
+            start = self._pathsOffset + record[0]
+
+            if self._mm[start:start + record[1]] == path:
+                return self._info(record)
+
+        raise KeyError(path)
+
+    def __contains__(self, path):
+        try:
+            self[path]
+        except KeyError:
+            return False
+
+        return True
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._path(i)
+
+    def iterPrefix(self, prefix):
+        for i in range(self._lowerBound(prefix), self._count):
+            record = self._record(i)
+            start = self._pathsOffset + record[0]
+            path = self._mm[start:start + record[1]]
+
+            if not path.startswith(prefix):
+                break
+
+            yield (path, self._info(record))
+
+
+def readLegacy(filename: str) -> dict:
+    """Parse a legacy ``fileinfo.bz2``.
+
+    Args:
+        filename: Path of the file.
+
+    Returns:
+        dict: ``{path: (mode, user, group)}``. Empty if the file doesn't
+            exist.
+    """
+    result = {}
+
+    if not os.path.isfile(filename):
+        return result
+
+    try:
+        with bz2.BZ2File(filename, 'rb') as handle:
+            for line in handle:
+                line = line.strip(b'\n')
+                index = line.find(b'/')
+                if index < 0:
+                    continue
+
+                info = line[:index].strip().split(b' ')
+                if len(info) == 3:
+                    result[line[index:]] = (int(info[0]), info[1], info[2])
+
+    except (OSError, EOFError, ValueError) as exc:
+        logger.error(f'Failed to load {filename}: {exc}')
+
+    return result
+
+
+def writeIndex(filename: str, fileinfo) -> None:
+    """Write permission entries in the indexed format.
+
+    The file is written to a temporary name first and then renamed. So
+    readers never see a partial file.
+
+    Args:
+        filename: Path of the ``fileinfo.idx`` file.
+        fileinfo: Mapping of ``{path: (mode, user, group)}`` with paths and
+            names as :py:class:`bytes`.
+    """
+    names = {}
+    records = bytearray()
+    paths = bytearray()
+    index_keys = []
+
+    for i, path in enumerate(sorted(fileinfo)):
+        mode, user, group = fileinfo[path]
+        user_idx = names.setdefault(user, len(names))
+        group_idx = names.setdefault(group, len(names))
+
+        records += RECORD.pack(len(paths), len(path), mode,
+                               user_idx, group_idx)
+        paths += path
+
+        if i % BLOCK_SIZE == 0:
+            index_keys.append(path)
+
+    names_blob = b''.join(NAME_LEN.pack(len(name)) + name for name in names)
+
+    index = bytearray(INDEX_COUNT.pack(len(index_keys)))
+    offset = 0
+    for key in index_keys:
+        index += INDEX_ENTRY.pack(offset, len(key))
+        offset += len(key)
+
+    names_offset = HEADER.size
+    records_offset = names_offset + len(names_blob)
+    paths_offset = records_offset + len(records)
+    index_offset = paths_offset + len(paths)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(records) // RECORD.size,
+                         len(names), BLOCK_SIZE, names_offset,
+                         records_offset, paths_offset, index_offset)
+
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as handle:
+        for blob in (header, names_blob, records, paths, index, *index_keys):
+            handle.write(blob)
+
+    os.replace(tmp, filename)
+
+
+def openFileInfo(index_filename: str,
+                 legacy_filename: Optional[str] = None) -> FileInfo:
+    """Open the best available permission manifest of a snapshot.
+
+    Args:
+        index_filename: Path of ``fileinfo.idx``.
+        legacy_filename: Path of ``fileinfo.bz2`` used if there is no valid
+            indexed file.
+
+    Returns:
+        FileInfo: The reader. Empty if neither file exists.
+    """
+    if os.path.isfile(index_filename):
+        try:
+            return FileInfoIndex(index_filename)
+
+        except (OSError, ValueError) as exc:
+            logger.warning(f'Failed to open {index_filename}: {exc}')
+
+    return LegacyFileInfo(legacy_filename)
+
+
+def convert(legacy_filename: str, index_filename: str) -> int:
+    """Convert a legacy ``fileinfo.bz2`` into the indexed format.
+
+    Args:
+        legacy_filename: Path of ``fileinfo.bz2``.
+        index_filename: Path of ``fileinfo.idx``.
+
+    Returns:
+        int: Number of converted entries.
+    """
+    data = readLegacy(legacy_filename)
+    writeIndex(index_filename, data)
+
+    return len(data)
@@ -0,0 +1,281 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Compressed snapshot log (``takesnapshot.log.bz2``) with a block index.
+
+The log is split at line boundaries into blocks of about
+:py:data:`BLOCK_BYTES`. Each block is compressed as an independent bz2
+stream and the streams are concatenated. The result is still a valid bz2
+file, which ``bzip2``, :py:class:`bz2.BZ2File` and older versions of Back In
+Time read as a whole.
+
+A small index file (``takesnapshot.log.idx``) next to it describes each
+block. So a single block can be read and decompressed without touching the
+others. All integers are little endian. The layout is::
+
+    header          see HEADER
+    blocks          count * BLOCK, in the order of the log
+
+Each block records the number of lines tagged ``[E]``, ``[C]`` and ``[I]``
+and of untagged lines. Filtering for one tag skips all blocks which can't
+contain a matching line.
+
+Logs written by older versions have no index. They are read as one stream.
+"""
+from __future__ import annotations
+import bz2
+import io
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Union
+
+MAGIC = b'BITLOGIX'
+VERSION = 1
+
+# Uncompressed size in bytes after which a block is closed
+BLOCK_BYTES = 128 * 1024
+
+# Number of lines per chunk when reading logs without index
+LEGACY_CHUNK_LINES = 1000
+
+# magic, version, reserved, block count, size of the compressed log
+HEADER = struct.Struct('<8sHHIQ')
+# offset, compressed length, first line, line count and the number of
+# lines tagged [E], [C], [I] and untagged lines
+BLOCK = struct.Struct('<QIQIIIII')
+
+# Tags counted per block. Untagged lines (not starting with '[') are
+# counted as OTHER and pass every tag filter.
+TAGS = {b'[E]': 'E', b'[C]': 'C', b'[I]': 'I'}
+OTHER = 'other'
+
+
+@dataclass
+class Block:
+    """Entry of the index describing one compressed block.
+
+    Attributes:
+        offset: Position of the bz2 stream in the log file.
+        length: Size of the bz2 stream.
+        first_line: Number of the first line (starting with 0).
+        lines: Number of lines.
+        counts: Number of lines per tag (``E``, ``C``, ``I`` and
+            :py:data:`OTHER`).
+    """
+    offset: int
+    length: int
+    first_line: int
+    lines: int
+    counts: dict
+
+    def mayContain(self, tags: Optional[Iterable[str]]) -> bool:
+        """``True`` if the block might contain lines passing a filter for
+        ``tags``. ``None`` means no filter."""
+        if tags is None or self.counts.get(OTHER):
+            return True
+
+        return any(self.counts.get(tag) for tag in tags)
+
+
+def tagOf(line: bytes) -> Optional[str]:
+    """Tag of ``line`` as counted in :py:class:`Block`. ``None`` for lines
+    with other tags."""
+    if not line.startswith(b'['):
+        return OTHER
+
+    return TAGS.get(line[:3])
+
+
+def _lines(source: Union[bytes, str, Iterable[bytes]]) -> Iterator[bytes]:
+    """Lines of ``source`` including their line breaks."""
+    if isinstance(source, str):
+        source = source.encode('utf-8', 'replace')
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    yield from source
+
+
+def write(filename: str,
+          index: str,
+          source: Union[bytes, str, Iterable[bytes]],
+          block_bytes: int = BLOCK_BYTES) -> int:
+    """Write ``source`` as compressed log with index.
+
+    Args:
+        filename: Compressed log file.
+        index: Index file.
+        source: Whole log or an iterable of lines (e.g. a file opened in
+            binary mode).
+        block_bytes: Uncompressed size after which a block is closed.
+
+    Returns:
+        int: Number of blocks.
+    """
+    blocks = []
+    offset = 0
+    line_count = 0
+
+    with open(filename, 'wb') as f:
+        def flush(chunk, counts, lines):
+            nonlocal offset
+
+            data = bz2.compress(b''.join(chunk))
+            f.write(data)
+            blocks.append(Block(offset, len(data), line_count - lines,
+                                lines, counts))
+            offset += len(data)
+
+        chunk, size, counts, lines = [], 0, {}, 0
+
+        for line in _lines(source):
+            chunk.append(line)
+            size += len(line)
+            lines += 1
+            line_count += 1
+            tag = tagOf(line.rstrip(b'\n'))
+
+            if tag:
+                counts[tag] = counts.get(tag, 0) + 1
+
+            if size >= block_bytes:
+                flush(chunk, counts, lines)
+                chunk, size, counts, lines = [], 0, {}, 0
+
+        if chunk or not blocks:
+            flush(chunk, counts, lines)
+
+    with open(index, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(blocks), offset))
+
+        for block in blocks:
+            f.write(BLOCK.pack(block.offset,
+                               block.length,
+                               block.first_line,
+                               block.lines,
+                               *(block.counts.get(tag, 0)
+                                 for tag in ('E', 'C', 'I', OTHER))))
+
+    return len(blocks)
+
+
+def readIndex(index: str, filename: str) -> Optional[list[Block]]:
+    """Blocks described in ``index`` or ``None`` if it is missing or does
+    not match the compressed log ``filename``."""
+    try:
+        with open(index, 'rb') as f:
+            data = f.read()
+
+        size = os.path.getsize(filename)
+
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+
+    magic, version, _, count, total = HEADER.unpack_from(data)
+
+    if (magic != MAGIC or version != VERSION or total != size
+            or len(data) != HEADER.size + count * BLOCK.size):
+        return None
+
+    blocks = []
+
+    for i in range(count):
+        offset, length, first, lines, *counts = BLOCK.unpack_from(
+            data, HEADER.size + i * BLOCK.size)
+        blocks.append(Block(offset, length, first, lines,
+                            dict(zip(('E', 'C', 'I', OTHER), counts))))
+
+    return blocks
+
+
+class LogArchive:
+    """Reader of a compressed snapshot log.
+
+    Args:
+        filename: Compressed log file.
+        index: Index file. If it is missing or outdated the log is read
+            as one stream like logs of older versions.
+    """
+
+    def __init__(self, filename: str, index: str):
+        self.filename = filename
+        self.blocks = readIndex(index, filename)
+
+    @property
+    def indexed(self) -> bool:
+        """``True`` if single blocks can be read."""
+        return self.blocks is not None
+
+    def readBlock(self, block: Block, f=None) -> list[str]:
+        """Decompress the lines of ``block`` (without line breaks).
+
+        Args:
+            block: Block to read.
+            f: The log file opened in binary mode. It is opened if ``None``.
+        """
+        if f is None:
+            with open(self.filename, 'rb') as f:
+                return self.readBlock(block, f)
+
+        f.seek(block.offset)
+
+        return self._split(bz2.decompress(f.read(block.length)))
+
+    @staticmethod
+    def _split(data: bytes) -> list[str]:
+        lines = data.decode('utf-8', 'replace').split('\n')
+
+        if lines and not lines[-1]:
+            lines.pop()
+
+        return lines
+
+    def chunks(self,
+               tags: Optional[Iterable[str]] = None) -> Iterator[list[str]]:
+        """Lines of the log in chunks, one block at a time.
+
+        Args:
+            tags: Skip blocks which can't contain lines passing a filter for
+                these tags. ``None`` reads all blocks. Ignored for logs
+                without index.
+
+        Yields:
+            list: Lines without line breaks.
+
+        Raises:
+            OSError: If the log can't be read.
+        """
+        if self.blocks is None:
+            yield from self._legacyChunks()
+            return
+
+        tags = None if tags is None else tuple(tags)
+
+        with open(self.filename, 'rb') as f:
+            for block in self.blocks:
+                if block.mayContain(tags):
+                    yield self.readBlock(block, f)
+
+    def _legacyChunks(self) -> Iterator[list[str]]:
+        # Streams the file instead of reading it completely.
+        with bz2.BZ2File(self.filename, 'rb') as f:
+            chunk = []
+
+            for line in f:
+                chunk.append(line.decode('utf-8', 'replace').rstrip('\n'))
+
+                if len(chunk) >= LEGACY_CHUNK_LINES:
+                    yield chunk
+                    chunk = []
+
+            if chunk:
+                yield chunk
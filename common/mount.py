@@ -101,11 +101,11 @@ import getpass
 import json
 import os
 import subprocess
-from time import sleep
 from zlib import crc32
 from pathlib import Path
 import config
 import logger
+import mountlock
 import password
 import tools
 from exceptions import HashCollision, MountException
@@ -746,7 +746,7 @@ class MountControl:
         (``self.mount_root``)::
 
             .
-            ├── <pid>.lock              <=  mountprocess lock that will prevent
+            ├── mountprocess.flock      <=  mountprocess lock that will prevent
             │                               different processes modifying
             │                               mountpoints at one time
             │
@@ -762,6 +762,7 @@ class MountControl:
             │   │
             │   └── locks/              <=  ``self.lock_path`` for each process
             │                               you have a ``<pid>.lock`` file
+            │                               held with a shared flock
             │
             ├── <profile id>_<pid>/     <=  sym-link to the right path. return
             │                               by config.snapshotsPath (can be
@@ -779,8 +780,10 @@ class MountControl:
 
     def mountProcessLockAcquire(self, timeout=60):
         """
-        Create a short term lock only for blocking other processes changing
-        mounts at the same time.
+        Take a short term lock only for blocking other processes changing
+        mounts at the same time. It is an exclusive ``flock`` on
+        ``mountprocess.flock`` in ``self.mount_root`` (see
+        :py:mod:`mountlock`).
 
         Args:
             timeout (int): Wait ``timeout`` seconds before fail acquiring
@@ -789,49 +792,60 @@ class MountControl:
         Raises:
             exceptions.MountException: If timed out.
         """
-        lock_path = self.mount_root
-        lockSuffix = '.lock'
-        # e.g. ~/.local/share/backintime/mnt/123456.lock
-        lock = os.path.join(lock_path, self.pid + lockSuffix)
-
-        # Every second
-        count = 0
-        while self.checkLocks(lock_path, lockSuffix):
-            count += 1
+        lock = self.mountProcessLockPath()
 
-            if count == timeout:
-                raise MountException('Mountprocess lock timeout')
+        try:
+            mountlock.acquire(lock, timeout=timeout, info=self.lockInfo())
 
-            sleep(1)
+        except TimeoutError as exc:
+            raise MountException(f'Mountprocess lock timeout: {exc}') from exc
 
         logger.debug(f'Acquire mountprocess lock {lock}', self)
 
-        with open(lock, 'w') as f:
-            f.write(self.pid)
+        # Remove lock files of older versions and their symlinks
+        self.checkLocks(self.mount_root, '.lock')
 
     def mountProcessLockRelease(self):
-        """Remove mountprocess lock."""
-        lock_path = self.mount_root
-        lockSuffix = '.lock'
-        lock = os.path.join(lock_path, self.pid + lockSuffix)
+        """Release mountprocess lock."""
+        lock = self.mountProcessLockPath()
 
         logger.debug(f'Release mountprocess lock {lock}', self)
 
-        if os.path.exists(lock):
-            os.remove(lock)
+        mountlock.release(lock)
+
+    def mountProcessLockPath(self):
+        """
+        Get path ``~/.local/share/backintime/mnt/mountprocess.flock``. It
+        doesn't use the suffix ``.lock`` of the PID based lock files.
+        """
+        return os.path.join(self.mount_root, 'mountprocess.flock')
+
+    def lockInfo(self):
+        """
+        Owner information written into the lock files of this process.
+
+        Returns:
+            dict:   see :py:func:`mountlock.ownerInfo`
+        """
+        return mountlock.ownerInfo(profile_id=self.profile_id,
+                                   hash_id=self.hash_id,
+                                   tmp_mount=self.tmp_mount)
 
     def mountLockAquire(self):
         """
-        Create a lock file for a mountpoint to prevent unmounting as long as
-        this process is running.
+        Hold a shared ``flock`` on a lock file for a mountpoint to prevent
+        unmounting as long as this process is running. The lock is released
+        automatically if the process dies.
         """
         lockSuffix = '.tmp.lock' if self.tmp_mount else '.lock'
         lock = os.path.join(self.lock_path, self.pid + lockSuffix)
 
+        if mountlock.isHeld(lock):
+            return
+
         logger.debug(f'Set mount lock {lock}', self)
 
-        with open(lock, 'w') as f:
-            f.write(self.pid)
+        mountlock.acquire(lock, shared=True, timeout=5, info=self.lockInfo())
 
     def mountLockCheck(self):
         """
@@ -850,17 +864,23 @@ class MountControl:
         lockSuffix = '.tmp.lock' if self.tmp_mount else '.lock'
         lock = os.path.join(self.lock_path, self.pid + lockSuffix)
 
-        if os.path.exists(lock):
+        if mountlock.isHeld(lock):
+            logger.debug(f'Remove mount lock {lock}', self)
+            mountlock.release(lock, remove=True)
+
+        elif os.path.exists(lock):
             logger.debug(f'Remove mount lock {lock}', self)
             os.remove(lock)
 
     def checkLocks(self, path, lock_suffix):
         """Check existence of active and foreign locks.
 
-        The lock owning process is specified by the PID contained in the
-        filename of the lock file used. Lock files of the current process are
-        ignored and ``False`` is returned if they share the same tmp-mount
-        state. If a lock exist but its process not the lock is removed and
+        A lock is active as long as its owning process holds a ``flock`` on
+        it (see :py:mod:`mountlock`). Lock files of older versions without
+        owner information are active as long as the process with the PID
+        contained in the filename exists. Lock files of the current process
+        are ignored and ``False`` is returned if they share the same
+        tmp-mount state. If a lock isn't active anymore it is removed and
         ``False`` returned. In that latter case mount symlinks related to that
         lock also removed.
 
@@ -901,13 +921,18 @@ class MountControl:
                     # a mount temporary.
                     continue
 
-            if tools.processAlive(int(lock_pid)):
+            info = mountlock.owner(str(lock_fp))
+
+            if info is None and tools.processAlive(int(lock_pid)):
+                # lock file of an older version
                 return True
 
-            logger.debug(f'Remove old and invalid lock {lock_fp}', self)
+            if not mountlock.removeIfStale(str(lock_fp)):
+                logger.debug(f'Lock {lock_fp} is held by '
+                             f'{mountlock.describe(info)}', self)
+                return True
 
-            # Clean up the lock file
-            lock_fp.unlink()
+            logger.debug(f'Removed old and invalid lock {lock_fp}', self)
 
             # Clean up related symlinks
             for symlink in Path(self.mount_root).iterdir():
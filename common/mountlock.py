@@ -0,0 +1,234 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""File locks (``fcntl.flock``) used while mounting.
+
+A lock is held as long as its file descriptor is open. The kernel releases
+it when the owning process dies, so a lock never outlives its process and
+no PID has to be checked in ``/proc``. Waiting for a lock takes a few
+milliseconds instead of whole seconds of polling.
+
+The lock file contains JSON with information about its owner (see
+:py:func:`ownerInfo`). It is only used for diagnostics.
+
+Locks are reentrant within one process. Acquiring a lock the process
+already holds increases a counter and does not block, like the PID based
+lock files did before.
+"""
+from __future__ import annotations
+import fcntl
+import getpass
+import json
+import os
+import socket
+import sys
+import threading
+from datetime import datetime
+from time import monotonic, sleep
+from typing import Optional
+import logger
+
+# Lock files held by this process: path -> [file descriptor, count]
+_held: dict[str, list] = {}
+_held_lock = threading.Lock()
+
+# Seconds between two attempts while waiting for a lock
+POLL_MIN = 0.01
+POLL_MAX = 0.1
+
+
+def ownerInfo(**extra) -> dict:
+    """Information about the current process stored in its lock files."""
+    info = {
+        'pid': os.getpid(),
+        'user': getpass.getuser(),
+        'host': socket.gethostname(),
+        'command': ' '.join(sys.argv),
+        'since': datetime.now().isoformat(timespec='seconds'),
+    }
+    info.update(extra)
+
+    return info
+
+
+def owner(path: str) -> Optional[dict]:
+    """Owner information stored in the lock file or ``None`` if the file
+    does not exist or has no valid content (e.g. lock files created by
+    older versions)."""
+    try:
+        with open(path, 'rt', encoding='utf-8') as handle:
+            info = json.load(handle)
+
+    except (OSError, ValueError):
+        return None
+
+    return info if isinstance(info, dict) else None
+
+
+def describe(info: Optional[dict]) -> str:
+    """Human readable description of the owner ``info``."""
+    if not info:
+        return 'unknown process'
+
+    return 'PID {} ({}) since {}'.format(info.get('pid'),
+                                        info.get('command'),
+                                        info.get('since'))
+
+
+def _tryLock(fd: int, shared: bool) -> bool:
+    """Lock ``fd`` without blocking. ``True`` on success."""
+    try:
+        fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                    | fcntl.LOCK_NB)
+
+    except BlockingIOError:
+        return False
+
+    return True
+
+
+def _sameFile(fd: int, path: str) -> bool:
+    """``True`` if ``path`` still links to the file opened as ``fd``.
+
+    The file might have been removed and recreated by another process
+    between opening and locking it.
+    """
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+
+    except FileNotFoundError:
+        return False
+
+
+def isHeld(path: str) -> bool:
+    """``True`` if this process holds the lock on ``path``."""
+    with _held_lock:
+        return path in _held
+
+
+def acquire(path: str,
+            shared: bool = False,
+            timeout: Optional[float] = None,
+            info: Optional[dict] = None) -> None:
+    """Lock ``path`` and create the file if necessary.
+
+    Args:
+        path: Lock file.
+        shared: Take a shared instead of an exclusive lock.
+        timeout: Seconds to wait for the lock. ``None`` waits forever.
+        info: Owner information written into the lock file. Default is
+            :py:func:`ownerInfo`.
+
+    Raises:
+        TimeoutError: If the lock was not acquired within ``timeout``.
+    """
+    with _held_lock:
+        if path in _held:
+            _held[path][1] += 1
+            return
+
+    deadline = None if timeout is None else monotonic() + timeout
+    delay = POLL_MIN
+    waiting = False
+
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+
+        if _tryLock(fd, shared):
+            if _sameFile(fd, path):
+                break
+
+            # removed as stale by another process in the meantime
+            os.close(fd)
+            continue
+
+        os.close(fd)
+
+        if not waiting:
+            waiting = True
+            logger.debug(f'Wait for lock {path} held by '
+                         f'{describe(owner(path))}')
+
+        if deadline is not None and monotonic() >= deadline:
+            raise TimeoutError(f'Timeout while waiting for lock {path} held '
+                               f'by {describe(owner(path))}')
+
+        sleep(delay if deadline is None
+              else max(0, min(delay, deadline - monotonic())))
+        delay = min(delay * 2, POLL_MAX)
+
+    data = json.dumps(info or ownerInfo()).encode()
+
+    # The owner information is for diagnostics only. Failing to write it is
+    # no error.
+    try:
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, data, 0)
+
+    except OSError as exc:
+        logger.debug(f'Failed to write owner of lock {path}: {exc}')
+
+    with _held_lock:
+        _held[path] = [fd, 1]
+
+
+def release(path: str, remove: bool = False) -> None:
+    """Release the lock on ``path`` if this was the last acquisition of
+    this process.
+
+    Args:
+        path: Lock file.
+        remove: Remove the lock file while still holding the lock.
+    """
+    with _held_lock:
+        if path not in _held:
+            return
+
+        _held[path][1] -= 1
+
+        if _held[path][1] > 0:
+            return
+
+        fd = _held.pop(path)[0]
+
+    if remove:
+        try:
+            os.remove(path)
+
+        except FileNotFoundError:
+            pass
+
+    os.close(fd)
+
+
+def removeIfStale(path: str) -> bool:
+    """Remove the lock file ``path`` if no process holds a lock on it.
+
+    Returns:
+        bool: ``True`` if the file was stale and is removed (or is already
+            gone). ``False`` if it is locked by any process including this
+            one.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+
+    except FileNotFoundError:
+        return True
+
+    try:
+        if not _tryLock(fd, shared=False):
+            return False
+
+        # Remove while holding the lock. Processes which opened the file in
+        # the meantime notice it with _sameFile().
+        if _sameFile(fd, path):
+            os.remove(path)
+
+        return True
+
+    finally:
+        os.close(fd)
@@ -131,6 +131,22 @@ class Plugin:
         """
         pass
 
+    def messages(self, profile_id, profile_name, messages):
+        """Send a batch of snapshot-related messages to plugins.
+
+        Status messages are coalesced while taking a snapshot and passed on
+        in batches. The default implementation calls :py:func:`message`
+        for each of them. Override it to process a whole batch at once.
+
+        Args:
+            profile_id: Profile ID from configuration.
+            profile_name: Profile name from the configuration.
+            messages: List of ``(level, message, timeout)`` tuples in the
+                order they were created. See :py:func:`message`.
+        """
+        for level, message, timeout in messages:
+            self.message(profile_id, profile_name, level, message, timeout)
+
     def appStart(self):
         """ Called when the GUI of Back In Time was started.
 
@@ -172,6 +188,25 @@ class Plugin:
         return
 
 
+def latestMessages(messages):
+    """The last message of each level in ``messages``.
+
+    Plugins which only show the current status can use this in
+    :py:func:`Plugin.messages` instead of processing every message of a
+    batch.
+
+    Args:
+        messages: List of ``(level, message, timeout)`` tuples. See
+            :py:func:`Plugin.messages`.
+
+    Returns:
+        list: The last tuple of each level in the order of ``messages``.
+    """
+    latest = {level: i for i, (level, _, _) in enumerate(messages)}
+
+    return [messages[i] for i in sorted(latest.values())]
+
+
 class PluginManager:
     """ Central interface for loading plugins and calling their API
 
@@ -301,6 +336,13 @@ class PluginManager:
             except BaseException as e:
                 self.logError(plugin, e)
 
+    def messages(self, profile_id, profile_name, messages):
+        for plugin in self.plugins:
+            try:
+                plugin.messages(profile_id, profile_name, messages)
+            except BaseException as e:
+                self.logError(plugin, e)
+
     def appStart(self):
         for plugin in reversed(self.plugins):
             try:
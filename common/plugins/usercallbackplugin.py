@@ -113,6 +113,12 @@ class UserCallbackPlugin(pluginmanager.Plugin):
         else:
             self.callback('4', code, message)
 
+    def messages(self, profile_id, profile_name, messages):
+        # Only the latest status of each level is of interest, not every
+        # line rsync printed since the last batch
+        for level, message, timeout in pluginmanager.latestMessages(messages):
+            self.message(profile_id, profile_name, level, message, timeout)
+
     def newSnapshot(self, snapshot_id, snapshot_path):
         self.callback('3', snapshot_id, snapshot_path)
 
@@ -6,7 +6,10 @@
 # General Public License v2 (GPLv2). See LICENSES directory or go to
 # <https://spdx.org/licenses/GPL-2.0-or-later.html>.
 import os
+import time
+import collections
 import configfile
+import logger
 
 
 class ProgressFile(configfile.ConfigFile):
@@ -29,3 +32,191 @@ class ProgressFile(configfile.ConfigFile):
 
     def fileReadable(self):
         return os.access(self.filename, os.R_OK)
+
+    @classmethod
+    def fromValues(cls, cfg, values):
+        """Progress with ``values`` as written by :py:class:`ProgressWriter`
+        (e.g. received through :py:mod:`statussocket`) instead of loaded from
+        the file."""
+        pg = cls(cfg)
+
+        for key, value in values.items():
+            pg.setStrValue(key, str(value))
+
+        return pg
+
+
+class ProgressWriter:
+    """Publish the progress of a running rsync process.
+
+    Parsing a progress line and writing a :py:class:`ProgressFile` for each
+    of them is expensive while rsync prints them many times per second.
+    The writer keeps the last samples of transferred bytes in a ring
+    buffer. From them it computes a smoothed transfer rate and the
+    estimated time left. The file is written at most ``rate`` times per
+    second. It is written to a temporary file first and then renamed, so
+    readers never see a partial file.
+
+    The keys are the same as written by :py:class:`ProgressFile` users
+    before (``status``, ``sent``, ``percent``, ``speed``) plus ``eta``.
+
+    Args:
+        filename (str): path of the progress file
+        rate (float): maximum number of writes per second. ``0`` writes
+            every update.
+        window (int): number of samples used for smoothing
+        clock (callable): monotonic time source (for tests)
+        publish (callable): called with the values on each write, e.g. to
+            send them to subscribers of the status socket
+    """
+
+    def __init__(self, filename, rate=2, window=20, clock=time.monotonic,
+                 publish=None):
+        self.filename = filename
+        self.publish = publish
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.samples = collections.deque(maxlen=max(2, window))
+        self.clock = clock
+        self.lastWrite = None
+        self.values = None
+
+    def update(self, sent, percent, speed=None):
+        """Add a new sample and write the file if it is due.
+
+        Args:
+            sent (int): bytes transferred so far
+            percent (int): percentage done as reported by rsync
+            speed (int): current speed in bytes per second as reported by
+                rsync. Used as long as there are not enough samples.
+        """
+        now = self.clock()
+
+        # A smaller value than before means a new transfer started
+        if self.samples and sent < self.samples[-1][1]:
+            self.samples.clear()
+
+        self.samples.append((now, sent))
+
+        rate = self.rate()
+        if rate is None:
+            rate = max(speed or 0, 0)
+
+        self.values = {
+            'status': ProgressFile.RSYNC,
+            'sent': formatRsyncSize(sent),
+            'percent': percent,
+            'speed': formatRsyncSize(rate) + 'B/s',
+            'eta': formatEta(self.eta(sent, percent, rate)),
+        }
+
+        if self.lastWrite is None or now - self.lastWrite >= self.interval:
+            self.flush()
+
+    def rate(self):
+        """Smoothed transfer rate over the buffered samples.
+
+        Returns:
+            float: bytes per second or ``None`` if there are not enough
+                samples yet.
+        """
+        if len(self.samples) < 2:
+            return None
+
+        (start, first), (end, last) = self.samples[0], self.samples[-1]
+        if end <= start:
+            return None
+
+        return (last - first) / (end - start)
+
+    @staticmethod
+    def eta(sent, percent, rate):
+        """Estimated seconds until the transfer is finished.
+
+        Returns:
+            float: seconds or ``None`` if it can't be estimated.
+        """
+        if not 0 < percent < 100 or not rate or rate <= 0:
+            return None
+
+        total = sent * 100 / percent
+
+        return max(total - sent, 0) / rate
+
+    def flush(self):
+        """Write the latest values now."""
+        if self.values is None:
+            return
+
+        self.lastWrite = self.clock()
+        tmp = self.filename + '.tmp'
+
+        if self.publish:
+            self.publish(dict(self.values))
+
+        try:
+            with open(tmp, 'wt') as f:
+                for key in sorted(self.values):
+                    f.write('%s=%s\n' % (key, self.values[key]))
+
+            os.replace(tmp, self.filename)
+
+        except OSError as e:
+            logger.debug('Failed to write progress file %s: %s'
+                         % (self.filename, str(e)), self)
+
+        self.values = None
+
+
+def formatEta(seconds):
+    """Format seconds like rsync does (e.g. ``0:02:36``). Unknown values
+    are shown as ``??:??:??``."""
+    if seconds is None:
+        return '??:??:??'
+
+    seconds = int(seconds)
+
+    return '%d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60,
+                             seconds % 60)
+
+
+_RSYNC_UNITS = ('', 'K', 'M', 'G', 'T')
+
+
+def parseRsyncSize(value):
+    """
+    Parse a human readable size printed by rsync (e.g. ``517.38K``).
+
+    Args:
+        value (str): the size
+
+    Returns:
+        float: size in bytes
+    """
+    value = value.strip().replace(',', '.')
+    unit = value[-1:].upper()
+
+    if unit in _RSYNC_UNITS[1:]:
+        return float(value[:-1] or 0) * 1000 ** _RSYNC_UNITS.index(unit)
+
+    return float(value or 0)
+
+
+def formatRsyncSize(value):
+    """
+    Format ``value`` like rsync's ``--human-readable`` output.
+
+    Args:
+        value (float): size in bytes
+
+    Returns:
+        str: e.g. ``517.38K``
+    """
+    for unit in _RSYNC_UNITS:
+        if abs(value) < 1000 or unit == _RSYNC_UNITS[-1]:
+            break
+        value /= 1000
+
+    if not unit:
+        return '{:.0f}'.format(value)
+
+    return '{:.2f}{}'.format(value, unit)
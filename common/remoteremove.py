@@ -0,0 +1,207 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Remove snapshots on the remote host of SSH profiles.
+
+A small helper script (:py:data:`SCRIPT`) is copied to the remote snapshot
+folder once. It is verified by its SHA-256 checksum before every use and
+copied again if it is missing or differs.
+
+The snapshot paths are passed to the helper on stdin, separated by NUL
+bytes. So there is no limit on the number of snapshots because of the
+maximum length of SSH commands. The helper takes the same exclusive
+``smartremove.lck`` flock as before, removes the snapshots with parallel
+workers and reports each one on stdout. It ignores ``SIGHUP`` and keeps
+going if the connection to the client breaks.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import shlex
+import subprocess
+from typing import Callable, Optional
+import logger
+
+SCRIPT_NAME = 'backintime-remove.sh'
+LOCK_NAME = 'smartremove.lck'
+
+SCRIPT = r'''#!/bin/bash
+# Back In Time: remove snapshots on this host.
+# Usage: bash backintime-remove.sh LOCKFILE WORKERS < NUL separated paths
+# Output: "start", then "removed PATH" or "failed PATH" for each snapshot and
+# "done REMOVED FAILED" at the end.
+lock="$1"
+workers="${2:-4}"
+
+# keep going if the connection to the client breaks
+trap '' HUP PIPE
+
+exec 9>"$lock" || exit 1
+flock -x 9 || exit 1
+echo "start"
+
+remove() {
+    local tmp
+    if [ ! -e "$1" ]; then
+        echo "removed $1"
+        return 0
+    fi
+    tmp=$(mktemp -d) || { echo "failed $1"; return 0; }
+    if rsync -a --delete -s "$tmp/" "$1/" >/dev/null 2>&1 && rmdir "$1"; then
+        echo "removed $1"
+    else
+        echo "failed $1"
+    fi
+    rmdir "$tmp"
+}
+export -f remove
+
+removed=0
+failed=0
+while IFS= read -r line; do
+    echo "$line"
+    case "$line" in
+        "removed "*) removed=$((removed + 1)) ;;
+        "failed "*) failed=$((failed + 1)) ;;
+    esac
+done < <(xargs -0 -r -n 1 -P "$workers" bash -c 'remove "$1"' _)
+
+echo "done $removed $failed"
+'''
+
+CHECKSUM = hashlib.sha256(SCRIPT.encode()).hexdigest()
+
+
+class RemoteRemove:
+    """Remove snapshots with the helper script on the remote host.
+
+    Args:
+        cfg (config.Config): Current config.
+        folder: Remote folder containing the snapshots, the lock file and
+            the helper script.
+        profile_id: Profile to use. Default is the current profile.
+    """
+
+    def __init__(self, cfg, folder: str, profile_id: Optional[str] = None):
+        self.config = cfg
+        self.profileID = profile_id
+        self.script = os.path.join(folder, SCRIPT_NAME)
+        self.lock = os.path.join(folder, LOCK_NAME)
+
+    def command(self, cmd: str, **kwargs) -> list[str]:
+        """SSH command running the shell command ``cmd`` on the remote
+        host."""
+        return self.config.sshCommand([cmd],
+                                      profile_id=self.profileID,
+                                      **kwargs)
+
+    def isInstalled(self) -> bool:
+        """``True`` if the helper exists on the remote host and its checksum
+        is valid."""
+        path = shlex.quote(self.script)
+        cmd = f'test "$(sha256sum {path} 2>/dev/null | cut -d" " -f1)" ' \
+              f'= "{CHECKSUM}"'
+        proc = subprocess.run(self.command(cmd, nice=False, ionice=False),
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL,
+                              check=False)
+
+        return proc.returncode == 0
+
+    def install(self) -> bool:
+        """Copy the helper to the remote host if necessary.
+
+        Returns:
+            bool: ``True`` if the helper is installed and valid.
+        """
+        if self.isInstalled():
+            return True
+
+        logger.debug(f'Copy {SCRIPT_NAME} to remote host', self)
+        tmp = shlex.quote(self.script + '.tmp')
+        cmd = f'cat > {tmp} && mv {tmp} {shlex.quote(self.script)}'
+        proc = subprocess.run(self.command(cmd, nice=False, ionice=False),
+                              input=SCRIPT,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE,
+                              universal_newlines=True,
+                              check=False)
+
+        if proc.returncode:
+            logger.error(f'Failed to copy {SCRIPT_NAME} to remote host: '
+                         f'{proc.stderr.strip()}', self)
+            return False
+
+        if not self.isInstalled():
+            logger.error(f'Checksum of {SCRIPT_NAME} on remote host is '
+                         'invalid', self)
+            return False
+
+        return True
+
+    def run(self,
+            paths: list[str],
+            workers: int = 4,
+            log: Optional[Callable[[int, int, str], None]] = None
+            ) -> Optional[tuple[int, int]]:
+        """Remove the remote snapshot folders ``paths``.
+
+        Args:
+            paths: Remote snapshot folders.
+            workers: Number of snapshots removed at the same time.
+            log: Called with the number of finished snapshots, the number of
+                all snapshots and the latest path after each snapshot.
+
+        Returns:
+            tuple: Number of removed and failed snapshots or ``None`` if the
+                helper did not finish.
+        """
+        cmd = 'bash {} {} {}'.format(shlex.quote(self.script),
+                                     shlex.quote(self.lock),
+                                     int(workers))
+        finished = 0
+        result = None
+
+        with subprocess.Popen(self.command(cmd),
+                              stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE,
+                              universal_newlines=True) as proc:
+            try:
+                proc.stdin.write(''.join(f'{path}\0' for path in paths))
+                proc.stdin.close()
+
+            # The helper exited early, e.g. it is missing or ssh failed
+            except OSError as exc:
+                logger.error(f'Failed to pass snapshots to {SCRIPT_NAME} on '
+                             f'remote host: {exc}', self)
+                proc.kill()
+                proc.wait()
+                return None
+
+            for line in proc.stdout:
+                event, value = line.rstrip('\n').partition(' ')[::2]
+
+                if event in ('removed', 'failed'):
+                    finished += 1
+
+                    if event == 'failed':
+                        logger.error(
+                            f'Failed to remove {value} on remote host', self)
+
+                    if log:
+                        log(finished, len(paths), value)
+
+                elif event == 'done':
+                    removed, failed = value.split()
+                    result = (int(removed), int(failed))
+
+        if proc.returncode or result is None:
+            logger.error(f'{SCRIPT_NAME} on remote host exited with code '
+                         f'{proc.returncode}', self)
+            return None
+
+        return result
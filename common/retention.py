@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Retention rules of Smart Removal.
+
+Each rule keeps the youngest healthy snapshot of a period (day, week, month,
+year). If all snapshots of a period failed, the youngest of them is kept.
+
+Instead of scanning the whole snapshot list once per period, the snapshots
+are sorted once and distributed into period buckets in a single pass. The
+failed flag is only read while a bucket has no healthy candidate and it is
+read at most once per snapshot.
+"""
+from __future__ import annotations
+import datetime
+from typing import Callable, Iterable
+
+
+def _months(now: datetime.date, count: int) -> set[tuple[int, int]]:
+    """``(year, month)`` of the current and the ``count - 1`` previous
+    months."""
+    year, month = now.year, now.month
+    result = set()
+
+    for _ in range(count):
+        result.add((year, month))
+        month -= 1
+
+        if month == 0:
+            year, month = year - 1, 12
+
+    return result
+
+
+def keepSet(snapshots: Iterable,
+            now: datetime.date,
+            keep_all: int,
+            keep_one_per_day: int,
+            keep_one_per_week: int,
+            keep_one_per_month: int,
+            failed: Callable[[object], bool]) -> set:
+    """Snapshots to keep according to the Smart Removal rules.
+
+    The youngest snapshot and one snapshot per year are always kept.
+
+    Args:
+        snapshots: Snapshots (e.g. :py:class:`snapshots.SID`). They need to
+            be sortable by age and have a ``date`` attribute
+            (``datetime.datetime``).
+        now: Day the rules are relative to.
+        keep_all: Keep all snapshots of the last ``keep_all`` days.
+        keep_one_per_day: Keep one snapshot per day for the last
+            ``keep_one_per_day`` days.
+        keep_one_per_week: Keep one snapshot per week (starting on Monday)
+            for the last ``keep_one_per_week`` weeks.
+        keep_one_per_month: Keep one snapshot per month for the last
+            ``keep_one_per_month`` months.
+        failed: Return ``True`` if a snapshot is marked as failed.
+
+    Returns:
+        set: The snapshots to keep.
+    """
+    # youngest first
+    snapshots = sorted(snapshots, reverse=True)
+
+    if len(snapshots) <= 1:
+        return set(snapshots)
+
+    keep = {snapshots[0]}
+
+    days = {now - datetime.timedelta(days=i) for i in range(keep_one_per_day)}
+    monday = now - datetime.timedelta(days=now.weekday())
+    weeks = {monday - datetime.timedelta(weeks=i)
+             for i in range(keep_one_per_week)}
+    months = _months(now, keep_one_per_month)
+    keep_all_from = now - datetime.timedelta(days=keep_all - 1)
+
+    failed_cache = {}
+
+    def isFailed(sid):
+        try:
+            return failed_cache[sid]
+
+        except KeyError:
+            failed_cache[sid] = result = failed(sid)
+            return result
+
+    # period key: [youngest snapshot, youngest healthy snapshot]
+    buckets = {}
+
+    for sid in snapshots:
+        date = sid.date.date()
+
+        if keep_all > 0 and keep_all_from <= date <= now:
+            keep.add(sid)
+
+        keys = []
+
+        if date in days:
+            keys.append(('day', date))
+
+        week = date - datetime.timedelta(days=date.weekday())
+        if week in weeks:
+            keys.append(('week', week))
+
+        if (date.year, date.month) in months:
+            keys.append(('month', date.year, date.month))
+
+        if date.year <= now.year:
+            keys.append(('year', date.year))
+
+        for key in keys:
+            bucket = buckets.get(key)
+
+            if bucket is None:
+                bucket = buckets[key] = [sid, None]
+
+            if bucket[1] is None and not isFailed(sid):
+                bucket[1] = sid
+
+    for first, healthy in buckets.values():
+        keep.add(healthy if healthy is not None else first)
+
+    return keep
@@ -0,0 +1,418 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Persistent catalog of the snapshots in a profiles snapshot folder.
+
+Listing snapshots means one ``os.listdir()`` of the snapshot folder and two
+``isdir()`` calls per entry. On remote (sshfs) destinations with thousands of
+snapshots each listing costs several seconds of round trips. The catalog is a
+small SQLite database stored next to the snapshots. It is validated with one
+``stat()`` of the snapshot folder (modification time and link count) and
+updated in place when Back In Time itself adds or removes a snapshot.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+import logger
+
+
+@dataclass
+class CatalogEntry:
+    """One snapshot as recorded in the catalog."""
+    sid: str
+    name: str = ''
+    failed: bool = False
+    tag: str = ''
+    last_checked: float = 0.0
+
+
+class SnapshotCatalog:
+    """Catalog of snapshots stored in ``FILENAME`` inside the snapshot folder.
+
+    All methods are failure tolerant. If the database can not be read or
+    written (e.g. read-only destination or a filesystem without locking
+    support) the catalog behaves as if it is invalid and the caller has to
+    fall back to scanning the folder.
+
+    Args:
+        path: The full snapshot path of the profile (the folder containing the
+            snapshot folders).
+    """
+    FILENAME = 'catalog.sqlite'
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.filename = os.path.join(path, self.FILENAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if needed.
+
+        The rollback journal is kept in memory. Otherwise SQLite would create
+        and delete a ``-journal`` file next to the database on each transaction
+        which itself would modify the snapshot folder and invalidate the
+        catalog.
+        """
+        conn = sqlite3.connect(self.filename, timeout=10)
+        conn.execute('PRAGMA journal_mode=MEMORY')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS meta '
+            '(key TEXT PRIMARY KEY, value)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            'sid TEXT PRIMARY KEY, '
+            "name TEXT NOT NULL DEFAULT '', "
+            'failed INTEGER NOT NULL DEFAULT 0, '
+            "tag TEXT NOT NULL DEFAULT '', "
+            'last_checked REAL NOT NULL DEFAULT 0)')
+
+        return conn
+
+    def _folderKey(self) -> Optional[tuple[int, int]]:
+        """Cheap fingerprint of the snapshot folder.
+
+        Creating, renaming or deleting a snapshot folder changes the
+        modification time of its parent. Creating or deleting one also changes
+        the link count which protects against coarse timestamp resolution.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+
+        return (st.st_mtime_ns, st.st_nlink)
+
+    def fingerprint(self) -> Optional[tuple[int, int]]:
+        """Fingerprint of the snapshot folder which changes whenever a
+        snapshot is added, renamed or removed. ``None`` if the folder can't
+        be accessed. Costs one ``stat()``."""
+        return self._folderKey()
+
+    @staticmethod
+    def _storedKey(conn: sqlite3.Connection) -> Optional[tuple[int, int]]:
+        rows = dict(conn.execute(
+            'SELECT key, value FROM meta WHERE key IN (?, ?, ?)',
+            ('version', 'mtime_ns', 'nlink')))
+
+        if rows.get('version') != SnapshotCatalog.SCHEMA_VERSION:
+            return None
+
+        try:
+            return (int(rows['mtime_ns']), int(rows['nlink']))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _storeKey(self,
+                  conn: sqlite3.Connection,
+                  key: Optional[tuple[int, int]] = None) -> None:
+        if key is None:
+            key = self._folderKey()
+
+        if key is None:
+            conn.execute('DELETE FROM meta')
+            return
+
+        conn.executemany(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            (('version', self.SCHEMA_VERSION),
+             ('mtime_ns', key[0]),
+             ('nlink', key[1])))
+
+    def exists(self) -> bool:
+        """``True`` if the database file is present."""
+        return os.path.isfile(self.filename)
+
+    def isValid(self) -> bool:
+        """Check if the catalog still reflects the snapshot folder.
+
+        Returns:
+            ``False`` if there is no catalog, it is unreadable or the snapshot
+            folder was modified since the catalog was written.
+        """
+        if not self.exists():
+            return False
+
+        try:
+            with self._open() as conn:
+                stored = self._storedKey(conn)
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Snapshot catalog {self.filename} not usable: '
+                         f'{exc}', self)
+            return False
+
+        return stored is not None and stored == self._folderKey()
+
+    @contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        """Connection as a context manager committing on success."""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def entries(self) -> Optional[list[CatalogEntry]]:
+        """All catalog entries ordered by snapshot ID.
+
+        Returns:
+            The entries or ``None`` if the catalog is not valid.
+        """
+        if not self.isValid():
+            return None
+
+        try:
+            with self._open() as conn:
+                rows = conn.execute(
+                    'SELECT sid, name, failed, tag, last_checked '
+                    'FROM snapshots ORDER BY sid').fetchall()
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to read snapshot catalog {self.filename}: '
+                         f'{exc}', self)
+            return None
+
+        return [CatalogEntry(sid, name, bool(failed), tag, last_checked)
+                for sid, name, failed, tag, last_checked in rows]
+
+    def get(self, sid: str) -> Optional[CatalogEntry]:
+        """The entry of snapshot ``sid`` if the catalog is valid."""
+        if not self.isValid():
+            return None
+
+        try:
+            with self._open() as conn:
+                row = conn.execute(
+                    'SELECT sid, name, failed, tag, last_checked '
+                    'FROM snapshots WHERE sid = ?', (sid, )).fetchone()
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to read snapshot catalog {self.filename}: '
+                         f'{exc}', self)
+            return None
+
+        if row is None:
+            return None
+
+        return CatalogEntry(row[0], row[1], bool(row[2]), row[3], row[4])
+
+    def rebuild(self,
+                entries: Iterable[CatalogEntry],
+                key: Optional[tuple[int, int]] = None) -> bool:
+        """Replace the whole catalog with ``entries``.
+
+        Args:
+            entries: The snapshots currently existing in the folder. The
+                iterable is consumed before the folder fingerprint is stored.
+            key: Folder fingerprint taken before ``entries`` were collected.
+                If ``None`` the current fingerprint is used.
+
+        Returns:
+            ``True`` if the catalog was written.
+        """
+        entries = list(entries)
+
+        try:
+            # Creating the database file modifies the folder. So the
+            # fingerprint has to be taken afterwards.
+            with self._open() as conn:
+                conn.execute('DELETE FROM snapshots')
+                conn.executemany(
+                    'INSERT INTO snapshots '
+                    '(sid, name, failed, tag, last_checked) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    ((e.sid, e.name or '', int(e.failed), e.tag,
+                      e.last_checked) for e in entries))
+                self._storeKey(conn, key)
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to write snapshot catalog {self.filename}: '
+                         f'{exc}', self)
+            return False
+
+        logger.debug(f'Snapshot catalog rebuilt with {len(entries)} '
+                     'snapshots', self)
+
+        return True
+
+    def sync(self,
+             probe: Callable[[str], Optional[CatalogEntry]]
+             ) -> Optional[list[CatalogEntry]]:
+        """Bring an outdated catalog up to date with few filesystem calls.
+
+        Only one ``os.listdir()`` of the snapshot folder is done. Entries
+        which disappeared are dropped. Only folder items unknown to the
+        catalog are given to ``probe``. If there is no usable catalog yet all
+        items are probed which is the same amount of work as a plain scan.
+
+        Args:
+            probe: Called with the name of an unknown folder item. Return a
+                :py:class:`CatalogEntry` if it is a valid snapshot, otherwise
+                ``None``.
+
+        Returns:
+            The up to date entries ordered by snapshot ID or ``None`` if the
+            snapshot folder can not be listed.
+        """
+        # Take the fingerprint before listing. A modification happening in
+        # between is then detected by the next validation.
+        key = self._folderKey()
+
+        try:
+            items = set(os.listdir(self.path))
+        except OSError as exc:
+            logger.debug(f'Can not list {self.path}: {exc}', self)
+            return None
+
+        existed = self.exists()
+        known = {}
+        if existed:
+            try:
+                with self._open() as conn:
+                    known = {row[0]: CatalogEntry(row[0], row[1],
+                                                  bool(row[2]), row[3],
+                                                  row[4])
+                             for row in conn.execute(
+                                 'SELECT sid, name, failed, tag, '
+                                 'last_checked FROM snapshots')}
+
+            except sqlite3.Error as exc:
+                logger.debug(f'Failed to read snapshot catalog '
+                             f'{self.filename}: {exc}', self)
+
+        entries = {sid: entry for sid, entry in known.items() if sid in items}
+
+        for item in items - set(known) - {self.FILENAME}:
+            entry = probe(item)
+            if entry is not None:
+                entries[entry.sid] = entry
+
+        result = [entries[sid] for sid in sorted(entries)]
+
+        # Creating the catalog file modifies the folder itself. In that case
+        # the fingerprint has to be taken after writing.
+        self.rebuild(result, key if existed else None)
+
+        return result
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next read."""
+        if not self.exists():
+            return
+
+        try:
+            with self._open() as conn:
+                conn.execute('DELETE FROM meta')
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to invalidate snapshot catalog '
+                         f'{self.filename}: {exc}', self)
+
+    @contextmanager
+    def expectChange(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """Wrap a modification of the snapshot folder done by ourself.
+
+        The catalog is updated in the same transaction as the new folder
+        fingerprint is stored. This only happens if the catalog was valid
+        before the modification. Otherwise it stays invalid and is rebuilt
+        on the next read.
+
+        Yields:
+            A database connection to apply the matching catalog changes or
+            ``None`` if the catalog is not maintained.
+
+        Example::
+
+            with catalog.expectChange() as conn:
+                os.rename(new_path, sid_path)
+                catalog.addEntry(conn, entry)
+        """
+        if not self.isValid():
+            yield None
+            return
+
+        try:
+            conn = self._connect()
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to open snapshot catalog {self.filename}: '
+                         f'{exc}', self)
+            yield None
+            return
+
+        try:
+            with conn:
+                yield conn
+                self._storeKey(conn)
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to update snapshot catalog '
+                         f'{self.filename}: {exc}', self)
+            self.invalidate()
+
+        finally:
+            conn.close()
+
+    @staticmethod
+    def addEntry(conn: Optional[sqlite3.Connection],
+                 entry: CatalogEntry) -> None:
+        """Insert or replace ``entry`` using a connection from
+        :py:func:`expectChange`."""
+        if conn is None:
+            return
+
+        conn.execute(
+            'INSERT OR REPLACE INTO snapshots '
+            '(sid, name, failed, tag, last_checked) VALUES (?, ?, ?, ?, ?)',
+            (entry.sid, entry.name or '', int(entry.failed), entry.tag,
+             entry.last_checked))
+
+    @staticmethod
+    def removeEntry(conn: Optional[sqlite3.Connection], sid: str) -> None:
+        """Delete the entry ``sid`` using a connection from
+        :py:func:`expectChange`."""
+        if conn is None:
+            return
+
+        conn.execute('DELETE FROM snapshots WHERE sid = ?', (sid, ))
+
+    def update(self, sid: str, **values) -> None:
+        """Update single fields of an existing entry.
+
+        Changes of a snapshots name, failed flag or last check do not modify
+        the snapshot folder itself. So the fingerprint is left untouched.
+
+        Args:
+            sid: The snapshot ID.
+            values: Field names of :py:class:`CatalogEntry` and their new
+                values.
+        """
+        if not self.exists():
+            return
+
+        columns = ('name', 'failed', 'tag', 'last_checked')
+        unknown = set(values) - set(columns)
+        if unknown:
+            raise KeyError(f'Unknown catalog fields: {unknown}')
+
+        if 'failed' in values:
+            values['failed'] = int(values['failed'])
+
+        assignment = ', '.join(f'{key} = ?' for key in values)
+
+        try:
+            with self._open() as conn:
+                conn.execute(
+                    f'UPDATE snapshots SET {assignment} WHERE sid = ?',
+                    (*values.values(), sid))
+
+        except sqlite3.Error as exc:
+            logger.debug(f'Failed to update snapshot catalog '
+                         f'{self.filename}: {exc}', self)
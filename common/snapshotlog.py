@@ -94,8 +94,17 @@ class LogFilter:
                  r')'
              )}
 
+    # Tags of the lines passing the filter next to untagged lines. Used to
+    # skip blocks of indexed snapshot logs (see :py:mod:`logarchive`).
+    # ``None`` if blocks can't be skipped.
+    TAGS = {ERROR:             ('E', ),
+            CHANGES:           ('C', ),
+            INFORMATION:       ('I', ),
+            ERROR_AND_CHANGES: ('E', 'C')}
+
     def __init__(self, mode = 0, decode = None):
         self.regex = self.REGEX[mode]
+        self.tags = self.TAGS.get(mode)
         self.decode = decode
 
         if decode:
@@ -113,6 +122,20 @@ class LogFilter:
         else:
             self.header = ''
 
+    def prefetch(self, lines):
+        """
+        Decode the paths of all ``lines`` passing the filter in batches. See
+        :py:func:`encfstools.Decode.prefetch`.
+
+        Args:
+            lines (list):   log lines read from disk
+        """
+        if self.decode:
+            self.decode.prefetch(
+                self.decode.log,
+                [line for line in lines
+                 if line and (not self.regex or self.regex.match(line))])
+
     def filter(self, line):
         """
         Filter and decode ``line`` with predefined ``mode`` and
@@ -135,6 +158,86 @@ class LogFilter:
             return line
 
 
+class LogTail:
+    """
+    Incremental reader for a growing log file. It remembers the byte offset
+    of the last complete line it read. Each call of :py:func:`lines` only
+    reads the bytes appended since then, filters and decodes them.
+
+    If the file got truncated or replaced (e.g. by :py:func:`SnapshotLog.new`)
+    reading starts over from the beginning and :py:attr:`restarted` is set.
+    A replaced file often gets the same inode and soon grows beyond the old
+    offset. So the first bytes read (up to :py:attr:`HEAD_BYTES`, starting
+    with the header of the log) are compared too.
+
+    Args:
+        filename (str):             log file to read
+        mode (int):                 Mode used for filtering. Take a look at
+                                    :py:class:`snapshotlog.LogFilter`
+        decode (encfstools.Decode): instance used for decoding lines or ``None``
+    """
+    # Number of bytes at the beginning of the file used to recognize it
+    HEAD_BYTES = 4096
+
+    def __init__(self, filename, mode = None, decode = None):
+        self.filename = filename
+        self.logFilter = LogFilter(mode, decode)
+        self.offset = 0
+        self.inode = None
+        self.head = b''
+        self.restarted = False
+
+    def read(self):
+        """
+        Read all complete lines appended since the last call. An incomplete
+        last line is left for the next call.
+
+        Returns:
+            list:   raw log lines without line breaks
+        """
+        try:
+            with open(self.filename, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                self.restarted = (stat.st_ino != self.inode
+                                  or stat.st_size < self.offset
+                                  or f.read(len(self.head)) != self.head)
+                if self.restarted:
+                    self.inode = stat.st_ino
+                    self.offset = 0
+                    self.head = b''
+                f.seek(self.offset)
+                data = f.read()
+        except FileNotFoundError:
+            self.restarted = self.inode is not None
+            self.inode = None
+            self.offset = 0
+            self.head = b''
+            return []
+
+        end = data.rfind(b'\n') + 1
+        if len(self.head) < self.HEAD_BYTES:
+            self.head += data[:min(end, self.HEAD_BYTES - len(self.head))]
+        self.offset += end
+        return data[:end].decode('utf-8', 'replace').split('\n')[:-1]
+
+    def lines(self):
+        """
+        Read the new lines, filter and decode them and yield them. After a
+        restart the header of :py:class:`LogFilter` is yielded first.
+
+        Yields:
+            str:    filtered and decoded log lines
+        """
+        lines = self.read()
+        if self.restarted and self.logFilter.header:
+            yield self.logFilter.header
+        self.logFilter.prefetch(lines)
+        for line in lines:
+            line = self.logFilter.filter(line)
+            if not line is None:
+                yield line
+
+
 class SnapshotLog:
     """
     Read and write Snapshot log to "~/.local/share/backintime/takesnapshot_<N>.log".
@@ -187,8 +290,10 @@ class SnapshotLog:
             with open(self.logFileName, 'rt') as f:
                 if logFilter.header and not skipLines:
                     yield logFilter.header
-                for line in f.readlines():
-                    line = logFilter.filter(line.rstrip('\n'))
+                lines = [line.rstrip('\n') for line in f.readlines()]
+                logFilter.prefetch(lines)
+                for line in lines:
+                    line = logFilter.filter(line)
                     if not line is None:
                         count += 1
                         if count <= skipLines:
@@ -200,6 +305,20 @@ class SnapshotLog:
             for line in msg:
                 yield line
 
+    def tail(self, mode = None, decode = None):
+        """
+        Incremental reader for this log. See :py:class:`LogTail`.
+
+        Args:
+            mode (int):                 Mode used for filtering. Take a look at
+                                        :py:class:`snapshotlog.LogFilter`
+            decode (encfstools.Decode): instance used for decoding lines or ``None``
+
+        Returns:
+            LogTail:                    reader starting at the beginning
+        """
+        return LogTail(self.logFileName, mode, decode)
+
     def new(self, date):
         """
         Create a new log file or - if the last new_snapshot can be continued -
@@ -15,9 +15,10 @@ import os
 from pathlib import Path
 import stat
 import datetime
-import calendar
+import math
 import gettext
 import bz2
+import hashlib
 import pwd
 import getpass
 import grp
@@ -25,7 +26,13 @@ import subprocess
 import shutil
 import time
 import re
-from tempfile import TemporaryDirectory
+import shlex
+import signal
+import threading
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory, NamedTemporaryFile
 import config
 import configfile
 import logger
@@ -34,10 +41,27 @@ import encfstools
 import mount
 import progress
 import snapshotlog
+import statuspublisher
+import statussocket
 import flock
+import deletion
+import changeindex
+import fileinfo
+import logarchive
+import remoteremove
+import retention
+import snapshotsize
 from applicationinstance import ApplicationInstance
 from exceptions import MountException, LastSnapshotSymlink
 from uniquenessset import UniquenessSet
+from snapshotcatalog import SnapshotCatalog, CatalogEntry
+
+# Threads doing chown/chmod in Snapshots.restorePermissions()
+RESTORE_PERMISSION_WORKERS = 8
+# Number of items handed to a thread at once
+RESTORE_PERMISSION_BATCH = 256
+# Failed changes reported one by one if not in verbose mode
+RESTORE_PERMISSION_MAX_FAILED = 10
 
 
 class Snapshots:
@@ -62,6 +86,10 @@ class Snapshots:
         if self.config is None:
             self.config = config.Config()
         self.snapshotLog = snapshotlog.SnapshotLog(self.config)
+        self.statusPublisher = statuspublisher.StatusPublisher(
+            write=self._writeTakeSnapshotMessage,
+            deliver=self._deliverTakeSnapshotMessages,
+            rate=self.config.takeSnapshotMessageRate())
 
         self.clearIdCache()
         self.clearNameCache()
@@ -78,12 +106,32 @@ class Snapshots:
                                           r'([\d\?]+:[\d\?]{2}:[\d\?]{2})'  #estimated time of arrival
                                           r'(.*$)')                         #trash at the end
 
+        #rsync --out-format=BACKINTIME: %i %B %U %G %n%L
+        #search for:     BACKINTIME: >f+++++++++ rw-r--r-- 1000 1000 foo/bar
+        self.reRsyncItem = re.compile(r'^BACKINTIME: (.{11}) '             #itemized changes
+                                      r'([-rwxsStT]{9}) '                  #permission bits
+                                      r'(\d+) (\d+|DEFAULT) '              #uid and gid
+                                      r'(.*)$')                            #name and link target
+
+        # Permissions collected from the rsync output while taking a
+        # snapshot. See rsyncCallback() and backupPermissions().
+        self.transferFileInfo = None
+        self.transferDirs = None
+
+        # Throttled writer of the progress file. See updateProgress()
+        self.progressWriter = None
+
+        # Status socket while taking a snapshot. See startStatusServer()
+        self.statusServer = None
+
         self.lastBusyCheck = datetime.datetime(1, 1, 1)
         self.restorePermissionFailed = False
 
     # TODO: make own class for takeSnapshotMessage
     def clearTakeSnapshotMessage(self):
         """Delete message and progress file"""
+        # A pending message would recreate the file afterwards
+        self.statusPublisher.close()
         Path(self.config.takeSnapshotMessageFile()).unlink(missing_ok=True)
         Path(self.config.takeSnapshotProgressFile()).unlink(missing_ok=True)
 
@@ -150,6 +198,12 @@ class Snapshots:
         processing for the GUI, plug-ins (like user-callback)
         and desktop notifications.
 
+        The message is added to the snapshot log immediately. Message file
+        and plug-ins are updated through :py:attr:`statusPublisher` which
+        coalesces messages to at most
+        :py:func:`config.Config.takeSnapshotMessageRate` updates per second.
+        Errors are passed on immediately.
+
         Args:
             type_id: Simplified severity level of the status message:
                      0: INFO
@@ -164,6 +218,19 @@ class Snapshots:
                      ignore the timeout value!
         """
 
+        # Error message?
+        if type_id == 1:
+            self.snapshotLog.append('[E] ' + message, 1)
+        else:
+            self.snapshotLog.append('[I] ' + message, 3)
+
+        self.statusPublisher.publish(type_id, message, timeout)
+
+    def _writeTakeSnapshotMessage(self, type_id, message):
+        """Write the latest status message into the message file.
+
+        See :py:func:`setTakeSnapshotMessage` for the arguments.
+        """
         message_fn = self.config.takeSnapshotMessageFile()
 
         try:
@@ -175,21 +242,54 @@ class Snapshots:
             logger.debug('Failed to set takeSnapshot message '
                          f'to {message_fn}: {str(exc)}', self)
 
-        # Error message?
-        if type_id == 1:
-            self.snapshotLog.append('[E] ' + message, 1)
-        else:
-            self.snapshotLog.append('[I] ' + message, 3)
+        if self.statusServer:
+            self.statusServer.publish(
+                statussocket.MESSAGE, type_id=type_id, message=message)
 
+    def _deliverTakeSnapshotMessages(self, messages):
+        """Send a batch of status messages to the plug-ins.
+
+        Args:
+            messages (list): ``(type_id, message, timeout)`` tuples.
+        """
         try:
             profile_id = self.config.currentProfile()
             profile_name = self.config.profileName(profile_id)
-            self.config.PLUGIN_MANAGER.message(
-                profile_id, profile_name, type_id, message, timeout)
+            self.config.PLUGIN_MANAGER.messages(
+                profile_id, profile_name, messages)
 
         except Exception as exc:
             logger.debug(f'Failed to send message to plugins: {str(exc)}', self)
 
+    def startStatusServer(self):
+        """Push the status of the running snapshot to subscribers (GUI,
+        systray icons, ``backintime status``) through a Unix socket. See
+        :py:mod:`statussocket`. The message and progress files are still
+        written for readers without socket support."""
+        server = statussocket.StatusServer(
+            self.config.takeSnapshotSocketFile(),
+            profile_id=self.config.currentProfile())
+
+        if server.start():
+            self.statusServer = server
+            self.publishPhase(statussocket.STARTED)
+
+    def publishPhase(self, phase):
+        """Tell subscribers of the status socket about a new phase.
+
+        Pending status messages of the previous phase are flushed first.
+        """
+        self.statusPublisher.flush()
+
+        if self.statusServer:
+            self.statusServer.publish(statussocket.PHASE, phase=phase)
+
+    def stopStatusServer(self, error=False):
+        """Tell subscribers the snapshot finished and remove the socket."""
+        if self.statusServer:
+            self.statusServer.close(error)
+            self.statusServer = None
+
     def busy(self):
         instance = ApplicationInstance(self.config.takeSnapshotInstanceFile(), False)
         return instance.busy()
@@ -377,11 +477,12 @@ class Snapshots:
             key_path (bytes):       original path during backup.
                                     Same as in fileInfoDict.
             path (bytes):           current path of file that should be changed.
-            fileInfoDict (FileInfoDict):    FileInfoDict
+            fileInfoDict (FileInfoDict):    FileInfoDict or
+                                    :py:class:`fileinfo.FileInfo`
         """
         assert isinstance(key_path, bytes), 'key_path is not bytes type: %s' % key_path
         assert isinstance(path, bytes), 'path is not bytes type: %s' % path
-        assert isinstance(fileInfoDict, FileInfoDict), 'fileInfoDict is not FileInfoDict type: %s' % fileInfoDict
+        assert isinstance(fileInfoDict, (FileInfoDict, fileinfo.FileInfo)), 'fileInfoDict is not FileInfoDict type: %s' % fileInfoDict
         if key_path not in fileInfoDict or not os.path.exists(path):
             return
         info = fileInfoDict[key_path]
@@ -390,49 +491,171 @@ class Snapshots:
         uid = self.uid(info[1], callback)
         gid = self.gid(info[2], callback)
 
-        #current file stats
-        st = os.stat(path)
+        for ok, msg in applyPermission(path, info[0], uid, gid):
+            self.restoreCallback(callback, ok, msg)
 
-        # logger.debug('%(path)s: uid %(target_uid)s/%(cur_uid)s, gid %(target_gid)s/%(cur_gid)s, mod %(target_mod)s/%(cur_mod)s'
-        #              %{'path': path.decode(),
-        #                'target_uid': uid,
-        #                'cur_uid': st.st_uid,
-        #                'target_gid': gid,
-        #                'cur_gid': st.st_gid,
-        #                'target_mod': info[0],
-        #                'cur_mod': st.st_mode
-        #                })
+    def restorePermissions(self,
+                           sid,
+                           restored_paths,
+                           restore_to,
+                           fileInfoDict,
+                           callback = None,
+                           verbose = False):
+        """
+        Restore permissions of all files and folders in ``restored_paths``.
 
-        if uid != -1 or gid != -1:
-            ok = False
-            if uid != st.st_uid:
-                try:
-                    os.chown(path, uid, gid)
-                    ok = True
-                except:
-                    pass
-                self.restoreCallback(callback, ok, "chown %s %s : %s" % (path.decode(errors = 'ignore'), uid, gid))
-                st = os.stat(path)
+        The restored trees are walked with :py:func:`os.scandir`. Folders
+        are collected in an ordered dict (used as ordered set) and restored
+        after all files, deepest first. The ``chown``/``chmod`` syscalls
+        run in a pool of :py:data:`RESTORE_PERMISSION_WORKERS` threads.
 
-            #if restore uid/gid failed try to restore at least gid
-            if not ok and gid != st.st_gid:
-                try:
-                    os.chown(path, -1, gid)
-                    ok = True
-                except:
-                    pass
-                self.restoreCallback(callback, ok, "chgrp %s %s" % (path.decode(errors = 'ignore'), gid))
-                st = os.stat(path)
+        Only a summary is sent to ``callback`` plus the first
+        :py:data:`RESTORE_PERMISSION_MAX_FAILED` failed changes. With
+        ``verbose`` every single change is reported like
+        :py:func:`restorePermission` does.
 
-        #restore perms
-        ok = False
-        if info[0] != st.st_mode:
-            try:
-                os.chmod(path, info[0])
-                ok = True
-            except:
-                pass
-            self.restoreCallback(callback, ok, "chmod %s %04o" % (path.decode(errors = 'ignore'), info[0]))
+        Args:
+            sid (SID):              snapshot from whom files were restored
+            restored_paths (list):  ``(path, src_delta)`` tuples of all
+                                    restored paths
+            restore_to (bytes):     destination folder or empty for the
+                                    original destination
+            fileInfoDict (FileInfoDict):    FileInfoDict or
+                                    :py:class:`fileinfo.FileInfo`
+            callback (method):      callable instance which will handle
+                                    messages
+            verbose (bool):         report every change
+
+        Returns:
+            dict: counters ``checked``, ``changed`` and ``failed``
+        """
+        stats = {'checked': 0, 'changed': 0, 'failed': 0}
+        root_snapshot_path_to = sid.pathBackup().rstrip('/').encode()
+        head = len(root_snapshot_path_to)
+
+        def report(actions):
+            stats['checked'] += 1
+            if actions:
+                stats['changed'] += 1
+
+            for ok, msg in actions:
+                if not ok:
+                    stats['failed'] += 1
+                    if verbose or stats['failed'] <= RESTORE_PERMISSION_MAX_FAILED:
+                        self.restoreCallback(callback, ok, msg)
+                    else:
+                        self.restorePermissionFailed = True
+
+                elif verbose:
+                    self.restoreCallback(callback, ok, msg)
+
+        def job(key_path, src_delta):
+            """Arguments for applyPermission() or None if unknown."""
+            info = fileInfoDict.get(key_path)
+            if info is None:
+                return None
+
+            return (restore_to + key_path[src_delta:],
+                    info[0],
+                    self.uid(info[1], callback),
+                    self.gid(info[2], callback))
+
+        # restore dir permissions after all files are done
+        all_dirs = {}
+
+        with ThreadPoolExecutor(
+                max_workers=RESTORE_PERMISSION_WORKERS,
+                thread_name_prefix='restorePermissions') as pool:
+            pending = collections.deque()
+
+            def submit(batch):
+                while len(pending) >= RESTORE_PERMISSION_WORKERS * 4:
+                    for actions in pending.popleft().result():
+                        report(actions)
+
+                pending.append(pool.submit(applyPermissions, batch))
+
+            for path, src_delta in restored_paths:
+                #use bytes instead of string from here
+                if isinstance(path, str):
+                    path = path.encode()
+
+                if not restore_to:
+                    curr_path = b'/'
+                    for path_item in path.strip(b'/').split(b'/'):
+                        curr_path = os.path.join(curr_path, path_item)
+                        all_dirs.setdefault(curr_path, src_delta)
+                else:
+                    all_dirs.setdefault(path, src_delta)
+
+                snapshot_path_to = root_snapshot_path_to + path.rstrip(b'/')
+                if not os.path.isdir(snapshot_path_to) \
+                        or os.path.islink(snapshot_path_to):
+                    continue
+
+                batch = []
+                stack = [snapshot_path_to]
+                while stack:
+                    try:
+                        with os.scandir(stack.pop()) as it:
+                            entries = list(it)
+                    except OSError as e:
+                        logger.error(f'Failed to list {e.filename}: {e}',
+                                     self)
+                        continue
+
+                    for entry in entries:
+                        item_path = entry.path[head:]
+
+                        if entry.is_dir(follow_symlinks=False):
+                            all_dirs.setdefault(item_path, src_delta)
+                            stack.append(entry.path)
+                            continue
+
+                        args = job(item_path, src_delta)
+                        if args is None:
+                            continue
+
+                        batch.append(args)
+                        if len(batch) >= RESTORE_PERMISSION_BATCH:
+                            submit(batch)
+                            batch = []
+
+                if batch:
+                    submit(batch)
+
+            while pending:
+                for actions in pending.popleft().result():
+                    report(actions)
+
+            # folders level by level, deepest first, so a folder is never
+            # made inaccessible before its content is done
+            levels = {}
+            for item_path, src_delta in all_dirs.items():
+                args = job(item_path, src_delta)
+                if args is not None:
+                    levels.setdefault(item_path.count(b'/'), []).append(args)
+
+            for depth in sorted(levels, reverse=True):
+                batches = [levels[depth][i:i + RESTORE_PERMISSION_BATCH]
+                           for i in range(0, len(levels[depth]),
+                                          RESTORE_PERMISSION_BATCH)]
+                for result in pool.map(applyPermissions, batches):
+                    for actions in result:
+                        report(actions)
+
+        if stats['failed'] > RESTORE_PERMISSION_MAX_FAILED and not verbose:
+            self.restoreCallback(
+                callback,
+                True,
+                _('{count} more failed changes not shown.').format(
+                    count=stats['failed'] - RESTORE_PERMISSION_MAX_FAILED))
+
+        if callback is not None:
+            callback(_('{checked} items checked, {changed} changed, '
+                       '{failed} failed.').format(**stats))
+
+        return stats
 
     def restore(self,
                 sid,
@@ -441,7 +664,8 @@ class Snapshots:
                 restore_to = '',
                 delete = False,
                 backup = True,
-                only_new = False):
+                only_new = False,
+                verbose_permissions = False):
         """
         Restore one or more files from snapshot ``sid`` to either original
         or a different destination. Restore is done with rsync. If available
@@ -452,8 +676,12 @@ class Snapshots:
             paths (:py:class:`list`, :py:class:`tuple` or :py:class:`str`):
                                         single path (str) or multiple
                                         paths (list, tuple) that should be
-                                        restored. For every path this will run
-                                        a new rsync process. Permissions will be
+                                        restored. Paths are grouped by their
+                                        source folder (see
+                                        :py:func:`groupRestorePaths`) and
+                                        every group is restored with one
+                                        rsync process using
+                                        ``--files-from``. Permissions will be
                                         restored for all paths in one run
             callback (method):          callable instance which will handle
                                         messages
@@ -466,6 +694,8 @@ class Snapshots:
             only_new (bool):            Only restore files which do not exist
                                         or are newer than those in destination.
                                         Using ``rsync --update`` option.
+            verbose_permissions (bool): Report every single permission
+                                        change instead of a summary.
         """
         instance = ApplicationInstance(
             pidFile=self.config.restoreInstanceFile(),
@@ -507,51 +737,36 @@ class Snapshots:
 
         restored_paths = []
 
-        for path in paths:
-            tools.makeDirs(os.path.dirname(path))
-            src_path = path
-            src_delta = 0
-            src_base = sid.pathBackup(use_mode = ['ssh'])
-
-            if not src_base.endswith(os.sep):
-                src_base += os.sep
-
-            cmd = cmd_prefix[:]
-
-            if restore_to:
-                items = os.path.split(src_path)
-                aux = items[0].lstrip(os.sep)
-
-                # bugfix: restore system root ended in <src_base>//.<src_path>
-                if aux:
-                    src_base = os.path.join(src_base, aux) + '/'
+        # One rsync run per source folder. With ``restore_to`` paths from
+        # different folders need their own run because only the last
+        # component is kept at the destination.
+        for src_base, items in self.groupRestorePaths(
+                sid, paths, restore_to).items():
+            for item in items:
+                tools.makeDirs(os.path.dirname(item[0]))
 
-                src_path = '/' + items[1]
+            with NamedTemporaryFile(prefix='backintime_restore_') as files_from:
+                files_from.write(b'\0'.join(
+                    os.fsencode(item[1]) for item in items))
+                files_from.flush()
 
-                if items[0] == '/':
-                    src_delta = 0
-                else:
-                    src_delta = len(items[0])
+                cmd = cmd_prefix[:]
+                cmd.extend(('--from0', '--files-from=%s' % files_from.name))
+                cmd.append(self.rsyncRemotePath(src_base, use_mode=['ssh'], quote=''))
+                cmd.append('%s/' % restore_to)
 
-            cmd.append(self.rsyncRemotePath('%s.%s' % (src_base, src_path), use_mode=['ssh'], quote=''))
-            cmd.append('%s/' % restore_to)
+                proc = tools.Execute(cmd,
+                                     callback=callback,
+                                     filters=(self.filterRsyncProgress,),
+                                     parent=self)
 
-            proc = tools.Execute(cmd,
-                                 callback=callback,
-                                 filters=(self.filterRsyncProgress,),
-                                 parent=self)
+                self.restoreCallback(callback, True, proc.printable_cmd)
+                proc.run()
+                self.restoreCallback(callback, True, ' ')
 
-            self.restoreCallback(callback, True, proc.printable_cmd)
-            proc.run()
-            self.restoreCallback(callback, True, ' ')
-            restored_paths.append((path, src_delta))
+            restored_paths.extend((item[0], item[2]) for item in items)
 
-        try:
-            os.remove(self.config.takeSnapshotProgressFile())
-        except Exception as e:
-            logger.debug('Failed to remove snapshot progress file %s: %s'
-                         %(self.config.takeSnapshotProgressFile(), str(e)),
-                         self)
+        self.removeProgressFile()
 
         #restore permissions
         logger.info('Restore permissions', self)
@@ -559,77 +774,97 @@ class Snapshots:
         self.restoreCallback(
             callback, True, '{}:'.format(_('Restore permissions')))
         self.restorePermissionFailed = False
-        fileInfoDict = sid.fileInfo
-
-        #cache uids/gids
-        for uid, name in info.listValue('user', ('int:uid', 'str:name')):
-            self.uid(name.encode(), callback = callback, backup = uid)
-        for gid, name in info.listValue('group', ('int:gid', 'str:name')):
-            self.gid(name.encode(), callback = callback, backup = gid)
-
-        if fileInfoDict:
-            all_dirs = [] #restore dir permissions after all files are done
-            for path, src_delta in restored_paths:
-                #explore items
-                snapshot_path_to = sid.pathBackup(path).rstrip('/')
-                root_snapshot_path_to = sid.pathBackup().rstrip('/')
-                #use bytes instead of string from here
-                if isinstance(path, str):
-                    path = path.encode()
+        with sid.openFileInfo() as fileInfoDict:
+            #cache uids/gids
+            for uid, name in info.listValue('user', ('int:uid', 'str:name')):
+                self.uid(name.encode(), callback = callback, backup = uid)
+            for gid, name in info.listValue('group', ('int:gid', 'str:name')):
+                self.gid(name.encode(), callback = callback, backup = gid)
+
+            if fileInfoDict:
                 if isinstance(restore_to, str):
                     restore_to = restore_to.encode()
 
-                if not restore_to:
-                    path_items = path.strip(b'/').split(b'/')
-                    curr_path = b'/'
-                    for path_item in path_items:
-                        curr_path = os.path.join(curr_path, path_item)
-                        if curr_path not in all_dirs:
-                            all_dirs.append(curr_path)
-                else:
-                    if path not in all_dirs:
-                        all_dirs.append(path)
-
-                if os.path.isdir(snapshot_path_to) and not os.path.islink(snapshot_path_to):
-                    head = len(root_snapshot_path_to.encode())
-                    for explore_path, dirs, files in os.walk(snapshot_path_to.encode()):
-                        for item in dirs:
-                            item_path = os.path.join(explore_path, item)[head:]
-                            if item_path not in all_dirs:
-                                all_dirs.append(item_path)
-
-                        for item in files:
-                            item_path = os.path.join(explore_path, item)[head:]
-                            real_path = restore_to + item_path[src_delta:]
-                            self.restorePermission(item_path, real_path, fileInfoDict, callback)
-
-            all_dirs.reverse()
-            for item_path in all_dirs:
-                real_path = restore_to + item_path[src_delta:]
-                self.restorePermission(item_path, real_path, fileInfoDict, callback)
-
-            self.restoreCallback(callback, True, '')
-
-            if self.restorePermissionFailed:
-                # TODO
-                # This string might appear in a message dialog.
-                # Let us know the steps to reproduce that behavior.
-                status = _('FAILED')
+                self.restorePermissions(sid,
+                                        restored_paths,
+                                        restore_to,
+                                        fileInfoDict,
+                                        callback,
+                                        verbose_permissions)
 
-            else:
-                # TODO
-                # This string might appear in a message dialog.
-                # Let us know the steps to reproduce that behavior.
-                status = _('Done')
+                self.restoreCallback(callback, True, '')
 
-            self.restoreCallback(
-                callback,
-                True,
-                '{}: {}'.format(_('Restore permissions'), status)
-            )
+                if self.restorePermissionFailed:
+                    # TODO
+                    # This string might appear in a message dialog.
+                    # Let us know the steps to reproduce that behavior.
+                    status = _('FAILED')
+
+                else:
+                    # TODO
+                    # This string might appear in a message dialog.
+                    # Let us know the steps to reproduce that behavior.
+                    status = _('Done')
+
+                self.restoreCallback(
+                    callback,
+                    True,
+                    '{}: {}'.format(_('Restore permissions'), status)
+                )
 
         instance.exitApplication()
 
+    def groupRestorePaths(self, sid, paths, restore_to=''):
+        """
+        Group the paths of a restore by their rsync source folder.
+
+        If restoring to the original destination all paths share the root of
+        the snapshot as source. With ``restore_to`` only the last component
+        of a path is recreated in the destination. So its parent folder in
+        the snapshot becomes the source.
+
+        Args:
+            sid (SID):          snapshot from whom to restore
+            paths (list):       paths to restore
+            restore_to (str):   destination folder or empty for the original
+                                destination
+
+        Returns:
+            dict: source folder (str) as key and a list of
+                ``(path, relative path, src_delta)`` tuples as value. The
+                relative paths are used for rsync's ``--files-from``.
+                ``src_delta`` is the length of the path prefix which is not
+                recreated in the destination.
+        """
+        groups = {}
+        root = sid.pathBackup(use_mode=['ssh'])
+
+        if not root.endswith(os.sep):
+            root += os.sep
+
+        for path in paths:
+            src_base = root
+            relative = path
+            src_delta = 0
+
+            if restore_to:
+                head, tail = os.path.split(path)
+                aux = head.lstrip(os.sep)
+
+                # bugfix: restore system root ended in <src_base>//.<src_path>
+                if aux:
+                    src_base = os.path.join(src_base, aux) + '/'
+
+                relative = tail
+
+                if head != '/':
+                    src_delta = len(head)
+
+            groups.setdefault(src_base, []).append(
+                (path, relative.lstrip(os.sep) or '.', src_delta))
+
+        return groups
+
     def backupSuffix(self):
         """
         Get suffix for backup files.
@@ -639,24 +874,24 @@ class Snapshots:
         """
         return '.backup.' + datetime.date.today().strftime('%Y%m%d')
 
-    def remove(self, sid):
+    def remove(self, sid, progress=None):
         """
         Remove snapshot ``sid``.
 
-        BUHTZ 2022-10-11: From my understanding rsync is used here to sync the
-        directory of a concrete snapshot (``sid``) against an empty temporary
-        directory. In the consequence the sid directory is empty but not
-        deleted.
-        To delete that directory simple `rm` call (via `shutil` package) is
-        used to delete the directory. No need to do this via SSH because the
-        directory is temporary mounted.
+        Local snapshots are removed with :py:func:`deletion.removeTree`
+        which walks the tree once and unlinks files with a pool of threads.
 
-        It is not clear for me why it is done that way. Why not simply "rm"
-        the directory when it is mounted instead of using rsync in a previous
-        step?! But I won't change it yet.
+        In mode ``ssh`` and ``ssh_encfs`` unlinking every file through the
+        sshfs mount would cost one network round trip per file. Instead the
+        snapshot is cleared on the remote host first by syncing an empty
+        temporary directory into it with ``rsync --delete``. The empty
+        leftovers are then removed through the mounted path.
 
         Args:
             sid (SID):              snapshot to remove
+            progress (method):      called with
+                                    :py:class:`deletion.DeletionStats` while
+                                    removing
 
         Returns:
             (bool): ``True`` if succeeded otherwise ``False``.
@@ -665,44 +900,58 @@ class Snapshots:
         if isinstance(sid, RootSnapshot):
             return
 
-        # build the rsync command and it's arguments
-        rsync = tools.rsyncRemove(self.config)
-
-        # an empty temporary directory
-        # e.g. /tmp/tmp8g59onuz
-        with TemporaryDirectory() as d:
-            # the temp dir
-            rsync.append(d + os.sep)
-
-            # the real remote path of a concrete snapshot (a "sid")
-            # e.g. user@myserver:"/MyBackup/.backintime/backintime/HOST/user/ \
-            # MyProfile/20221005-000003-880"
-            rsync.append(
-                self.rsyncRemotePath(
-                    sid.path(use_mode=['ssh', 'ssh_encfs']),
-                    # No quoting because of new argument protection of rsync.
-                    quote=''
+        if self.config.snapshotsMode() in ('ssh', 'ssh_encfs'):
+            # build the rsync command and it's arguments
+            rsync = tools.rsyncRemove(self.config)
+
+            # an empty temporary directory
+            # e.g. /tmp/tmp8g59onuz
+            with TemporaryDirectory() as d:
+                # the temp dir
+                rsync.append(d + os.sep)
+
+                # the real remote path of a concrete snapshot (a "sid")
+                # e.g. user@myserver:"/MyBackup/.backintime/backintime/HOST/ \
+                # user/MyProfile/20221005-000003-880"
+                rsync.append(
+                    self.rsyncRemotePath(
+                        sid.path(use_mode=['ssh', 'ssh_encfs']),
+                        # No quoting because of new argument protection of
+                        # rsync.
+                        quote=''
+                    )
                 )
-            )
 
-            # Syncing the empty tmp directory against the sid directory
-            # will clear the sid directory.
-            rc = tools.Execute(rsync).run()
+                # Syncing the empty tmp directory against the sid directory
+                # will clear the sid directory.
+                rc = tools.Execute(rsync).run()
 
-            #
             if rc != 0:
                 logger.error(
                     f'Last rsync command failed with return code "{rc}". '
                     'See previous WARNING message in the logs for details.')
                 return False
 
-            # Delete the sid dir. BUT here isn't the remote path used but the
-            # temporary mounted variant of it.
-            # e.g. /home/user/.local/share/backintime/mnt/4_8030/backintime/ \
-            # HOST/user/MyProfile/20221005-000003-880
-            shutil.rmtree(sid.path())
+        # Delete the sid dir. In remote modes this isn't the remote path but
+        # the temporary mounted variant of it.
+        # e.g. /home/user/.local/share/backintime/mnt/4_8030/backintime/ \
+        # HOST/user/MyProfile/20221005-000003-880
+        catalog = snapshotCatalog(self.config)
+        with catalog.expectChange() as conn:
+            stats = deletion.removeTree(sid.path(),
+                                        workers=self.config.removeWorkers(),
+                                        progress=progress)
+
+            if stats.errors:
+                logger.error(f'Failed to remove snapshot {sid} completely: '
+                             f'{stats.errors} errors', self)
+                return False
+
+            catalog.removeEntry(conn, sid.sid)
 
-            return True
+        logger.info(f'Removed snapshot {sid}: {stats}', self)
+
+        return True
 
     # TODO Refactor: This functions is extremely difficult to understand:
     #  - Nested "if"s
@@ -785,6 +1034,7 @@ class Snapshots:
                                    'status is not available', self)
 
                 instance.startApplication()
+                self.startStatusServer()
 
                 # Global flock to block backups from other profiles or users
                 # (and run them serialized). The argument "disabled" is a
@@ -805,6 +1055,7 @@ class Snapshots:
 
                     except MountException as ex:
                         logger.error(str(ex), self)
+                        self.stopStatusServer(error=True)
                         instance.exitApplication()
                         logger.info('Unlock', self)
                         time.sleep(2)
@@ -941,6 +1192,7 @@ class Snapshots:
 
                             if not ret_error:
                                 # Start auto- and smart-remove
+                                self.publishPhase(statussocket.FINALIZING)
                                 self.freeSpace(now)
                                 self.setTakeSnapshotMessage(
                                     0, _('Please be patient. Finalizing…'))
@@ -954,6 +1206,7 @@ class Snapshots:
                                 sid, sid.path())
 
                         # Take snapshot process end
+                        self.statusPublisher.flush()
                         self.config.PLUGIN_MANAGER.processEnd()
 
                     if sleep:
@@ -968,9 +1221,12 @@ class Snapshots:
                     except MountException as ex:
                         logger.error(str(ex), self)
 
+                    self.statusPublisher.close()
+
                     if not ret_error:
                         self.clearTakeSnapshotMessage()
 
+                    self.stopStatusServer(ret_error)
                     instance.exitApplication()
 
                     logger.info('Unlock', self)
@@ -1001,22 +1257,55 @@ class Snapshots:
         """
         ret = []
         for l in line.split('\n'):
-            m = self.reRsyncProgress.match(l)
+            # cheap pre-check before the regular expression
+            m = '%' in l and self.reRsyncProgress.match(l)
             if m:
-                # if m.group(5).strip():
-                #     return
-                pg = progress.ProgressFile(self.config)
-                pg.setIntValue('status', pg.RSYNC)
-                pg.setStrValue('sent', m.group(1))
-                pg.setIntValue('percent', int(m.group(2)))
-                pg.setStrValue('speed', m.group(3))
-                #pg.setStrValue('eta', m.group(4))
-                pg.save()
-                del pg
+                self.updateProgress(
+                    progress.parseRsyncSize(m.group(1)),
+                    int(m.group(2)),
+                    progress.parseRsyncSize(m.group(3)[:-len('B/s')]))
             else:
                 ret.append(l)
         return '\n'.join(ret)
 
+    def updateProgress(self, sent, percent, speed):
+        """
+        Pass a progress sample to :py:attr:`progressWriter`, which is
+        created on first use.
+
+        Args:
+            sent (float):   bytes transferred so far
+            percent (int):  percentage done
+            speed (float):  speed in bytes per second reported by rsync
+        """
+        if self.progressWriter is None:
+            self.progressWriter = progress.ProgressWriter(
+                self.config.takeSnapshotProgressFile(),
+                rate=self.config.progressRate(),
+                publish=self._publishProgress)
+
+        self.progressWriter.update(sent, percent, speed)
+
+    def _publishProgress(self, values):
+        if self.statusServer:
+            self.statusServer.publish(statussocket.PROGRESS, progress=values)
+
+    def removeProgressFile(self):
+        """
+        Forget the progress of the last rsync run and remove the progress
+        file.
+        """
+        self.progressWriter = None
+        self._publishProgress(None)
+
+        try:
+            os.remove(self.config.takeSnapshotProgressFile())
+
+        except Exception as e:
+            logger.debug('Failed to remove snapshot progress file %s: %s'
+                         % (self.config.takeSnapshotProgressFile(), str(e)),
+                         self)
+
     def rsyncCallback(self, line, params):
         """
         Parse rsync's stdout, send it to takeSnapshotMessage and
@@ -1036,6 +1325,11 @@ class Snapshots:
         if not line:
             return
 
+        # Strip the permission fields so message and log keep the format
+        # "BACKINTIME: %i %n%L"
+        if line.startswith('BACKINTIME: '):
+            line = self.collectTransferPermission(line)
+
         # Warning (2023-11): Do not modify the source string.
         # See #1559 for details.
         self.setTakeSnapshotMessage(
@@ -1057,6 +1351,62 @@ class Snapshots:
                     params[1] = True
                     self.snapshotLog.append('[C] ' + line[12:], 2)
 
+    def collectTransferPermission(self, line):
+        """
+        Parse permissions from a rsync output line in format
+        ``BACKINTIME: %i %B %U %G %n%L`` and store them into
+        :py:attr:`transferFileInfo`.
+
+        Regular files get their mode from the permission bits reported by
+        rsync. Directories are stat'ed in the source because
+        ``--chmod=Du+wx`` modifies the bits rsync reports for them. Symlinks,
+        devices and special files are stat'ed in the source, too, to keep the
+        same behavior as :py:func:`collectPermission`.
+
+        Args:
+            line (str): Output line of rsync.
+
+        Returns:
+            str: ``line`` in format ``BACKINTIME: %i %n%L``. Lines which don't
+                match the extended format are returned unchanged.
+        """
+        m = self.reRsyncItem.match(line)
+        if not m:
+            return line
+
+        itemize, perms, uid, gid, name = m.groups()
+        line = 'BACKINTIME: {} {}'.format(itemize, name)
+
+        if self.transferFileInfo is None or itemize.startswith('*'):
+            return line
+
+        # strip %L
+        if itemize[1] == 'L':
+            name = name.split(' -> ', 1)[0]
+        elif itemize[0] == 'h':
+            name = name.split(' => ', 1)[0]
+
+        name = name.rstrip('/')
+        if name in ('', '.'):
+            # root is collected in backupPermissions()
+            return line
+
+        path = b'/' + name.encode()
+
+        if itemize[1] == 'f' and gid != 'DEFAULT':
+            self.transferFileInfo[path] = (
+                stat.S_IFREG | permissionBits(perms),
+                self.userName(int(uid)).encode('utf-8', 'replace'),
+                self.groupName(int(gid)).encode('utf-8', 'replace'))
+
+        else:
+            self.collectPermission(self.transferFileInfo, path)
+
+            if itemize[1] == 'd':
+                self.transferDirs.add(path)
+
+        return line
+
     def makeDirs(self, path):
         """
         Wrapper for :py:func:`tools.makeDirs()`. Create directories ``path``
@@ -1132,13 +1482,15 @@ class Snapshots:
                         f' command was {cmd}. Also see the previous '
                         'WARNING message for a more details.', parent=self)
 
-    def _backup_info_file(self, sid):
+    def _backup_info_file(self, sid, filter_hash=None):
         """
         Save infos about the snapshot into the 'info' file. The result is
         stored in 'sid.info' also.
 
         Args:
             sid (SID): Snapshot that should get the info file.
+            filter_hash (str): Fingerprint of the rsync arguments which select
+                the files of this snapshot. See :py:func:`rsyncFilterHash`.
         """
         logger.debug(
             f'Create info file for snapshot "{sid.displayName}".', self)
@@ -1153,6 +1505,8 @@ class Snapshots:
         i.setStrValue('snapshot_user', user)
         i.setIntValue('snapshot_profile_id', profile_id)
         i.setIntValue('snapshot_tag', sid.tag)
+        if filter_hash:
+            i.setStrValue('snapshot_filter_hash', filter_hash)
         i.setListValue(
             'user', ('int:uid', 'str:name'), list(self.userCache.items()))
         i.setListValue(
@@ -1160,13 +1514,21 @@ class Snapshots:
 
         sid.info = i
 
-    def backupPermissions(self, sid):
+    def backupPermissions(self, sid, prev_sid=None, filter_hash=None):
         """
         Save permissions (owner, group, read-, write- and executable)
         for all files in Snapshot ``sid`` into snapshots fileInfoDict.
 
+        If permissions were collected from the output of the main rsync run
+        (see :py:func:`collectTransferPermission`) they are merged with the
+        permissions of the unchanged files from ``prev_sid``. Only if that is
+        not possible a second rsync run lists all files in ``sid``.
+
         Args:
             sid (SID):  snapshot that should be scanned
+            prev_sid (SID): Snapshot used as ``--link-dest`` for ``sid``.
+            filter_hash (str): Fingerprint of the rsync arguments used for
+                ``sid``. See :py:func:`rsyncFilterHash`.
 
         Returns:
             int: Return code of rsync.
@@ -1174,6 +1536,16 @@ class Snapshots:
         logger.info('Save permissions', self)
         self.setTakeSnapshotMessage(0, _('Saving permissions…'))
 
+        if self.transferFileInfo is not None:
+            fileInfoDict = self.mergeTransferPermissions(prev_sid,
+                                                         filter_hash)
+            self.transferFileInfo = None
+            self.transferDirs = None
+
+            if fileInfoDict is not None:
+                sid.fileInfo = fileInfoDict
+                return 0
+
         fileInfoDict = FileInfoDict()
 
         if self.config.snapshotsMode() == 'ssh_encfs':
@@ -1212,6 +1584,82 @@ class Snapshots:
 
         return rc
 
+    def mergeTransferPermissions(self, prev_sid, filter_hash):
+        """
+        Complete the permissions collected from the main rsync run.
+
+        Only new or modified files are reported by rsync. Unchanged files
+        are hard linked from ``prev_sid`` and are listed by its fileinfo.
+        Because the new snapshot started empty every directory is reported.
+        So inherited files are only kept if their parent directory was part
+        of this snapshot and the file still exists.
+
+        rsync runs with ``--no-perms --no-owner --no-group`` by default. A
+        file whose mode or owner changed but not its size or modification
+        time is not reported. So the permissions of inherited files are read
+        from the source, not from the old fileinfo.
+
+        Args:
+            prev_sid (SID): Snapshot used as ``--link-dest`` or ``None``.
+            filter_hash (str): Fingerprint of the current rsync arguments.
+
+        Returns:
+            FileInfoDict: The permissions of all files in the new snapshot or
+                ``None`` if ``prev_sid`` can not be used to complete them.
+        """
+        fileInfoDict = FileInfoDict()
+
+        # backup permissions of /
+        # bugfix for https://github.com/bit-team/backintime/issues/708
+        self.collectPermission(fileInfoDict, b'/')
+
+        if prev_sid is not None:
+            # Include or exclude settings changed since the previous
+            # snapshot or it has no fileinfo. Unchanged files can't be
+            # distinguished from excluded ones.
+            if not filter_hash \
+               or not os.path.exists(prev_sid.path(SID.FILEINFO)) \
+               or prev_sid.info.strValue('snapshot_filter_hash') != filter_hash:
+                logger.debug('Can not merge permissions with previous '
+                             f'snapshot {prev_sid}', self)
+                return None
+
+            dirs = self.transferDirs | {b'/'}
+            with prev_sid.openFileInfo() as prev_info:
+                for path, _info in prev_info.iterPrefix(b'/'):
+                    if path in self.transferFileInfo or path == b'/':
+                        continue
+
+                    if os.path.dirname(path) in dirs:
+                        self.collectPermission(fileInfoDict, path)
+
+        for path, info in self.transferFileInfo.items():
+            fileInfoDict[path] = info
+
+        logger.debug(f'Collected {len(self.transferFileInfo)} permissions '
+                     f'from rsync, {len(fileInfoDict)} in total', self)
+
+        return fileInfoDict
+
+    def rsyncFilterHash(self, rsync_args):
+        """
+        Fingerprint of rsync arguments which select the files of a snapshot.
+
+        Arguments not influencing the selection of files (SSH, bandwidth,
+        progress and output) are ignored.
+
+        Args:
+            rsync_args (list): rsync arguments without source and destination
+
+        Returns:
+            str: Hexadecimal md5 hash.
+        """
+        ignore = ('--rsh=', '--rsync-path=', '--bwlimit=', '--info=',
+                  '--out-format=', '--link-dest=')
+        args = [arg for arg in rsync_args if not arg.startswith(ignore)]
+
+        return hashlib.md5('\0'.join(args).encode()).hexdigest()
+
     def backupPermissionsCallback(self, line, user_data):
         """
         Rsync callback for :py:func:`Snapshots.backupPermissions`.
@@ -1355,11 +1803,29 @@ class Snapshots:
         # make it parsable e.g. in rsyncCallback()
         # %i = itemized list (11 characters) of what is being updated
         # (see "--itemize-changes" in "man rsync")
+        # %B = the permission bits of the file (e.g. rwxrwxrwt)
+        # %U = the UID of the file (decimal)
+        # %G = the GID of the file (decimal)
         # %n = the filename (short form; trailing "/" on dir)
         # %L = the string " -> SYMLINK", " => HARDLINK", or ""
         # (where SYMLINK or HARDLINK is a filename)
         # (see log format section in "man rsyncd.conf")
-        rsync_prefix.extend(('-i', '--out-format=BACKINTIME: %i %n%L'))
+        rsync_prefix.extend(('-i',
+                             '--out-format=BACKINTIME: %i %B %U %G %n%L'))
+
+        filter_hash = self.rsyncFilterHash(rsync_prefix + rsync_suffix)
+
+        # Collect permissions of transferred files from rsync output.
+        # Not possible if paths are encrypted or if files were transferred
+        # in a previous run.
+        if self.config.snapshotsMode() != 'ssh_encfs' \
+           and not new_snapshot.saveToContinue:
+            self.transferFileInfo = {}
+            self.transferDirs = set()
+
+        else:
+            self.transferFileInfo = None
+            self.transferDirs = None
 
         if prev_sid:
             link_dest = encode.path(os.path.join(prev_sid.sid, 'backup'))
@@ -1376,47 +1842,52 @@ class Snapshots:
             new_snapshot.pathBackup(use_mode=['ssh', 'ssh_encfs']),
             quote=''))
 
+        self.publishPhase(statussocket.TRANSFER)
         self.setTakeSnapshotMessage(0, _('Taking snapshot'))
 
-        # run rsync
-        proc = tools.Execute(cmd,
-                             # TODO
-                             # interprets the user_data in params as: list of
-                             # two bool [error, changes] but params is reused
-                             # as return value of this function with [changes,
-                             # error]. Use a separate variable to avoid
-                             # confusion!
-                             callback=self.rsyncCallback,
-                             user_data=params,
-                             filters=(self.filterRsyncProgress,),
-                             parent=self)
+        shards = []
+        if self.config.parallelTransferEnabled():
+            shards = shardIncludeFolders(include_folders)
 
-        # TODO
-        # introduce centralized log msg builder to avoid spread severity level
-        # indicators like "[I]" here?
-        self.snapshotLog.append('[I] ' + proc.printable_cmd, 3)
+        if len(shards) > 1:
+            rsync_exit_code = self.takeSnapshotShards(
+                rsync_prefix, shards, new_snapshot, params)
 
-        # TODO
-        # Process return value with rsync exit code to recognize errors that
-        # cannot be recognized by parsing the rsync output currently
-
-        rsync_exit_code = proc.run()
-            # Fix for #1491 and #489
-            # Note that the return value (containing the exit code) of the
-            # rsync child process is not the only way to detect errors (and
-            # sometimes not reliably delivers <> 0 in case of an error):
-            # Errors are also indicated via the pass-by-ref argument
-            # user_data="params" list (updated by the callback function that
-            # parses the rsync output for error message patterns).
+        else:
+            # run rsync
+            proc = tools.Execute(cmd,
+                                 # TODO
+                                 # interprets the user_data in params as: list of
+                                 # two bool [error, changes] but params is reused
+                                 # as return value of this function with [changes,
+                                 # error]. Use a separate variable to avoid
+                                 # confusion!
+                                 callback=self.rsyncCallback,
+                                 user_data=params,
+                                 filters=(self.filterRsyncProgress,),
+                                 parent=self)
 
-        # cleanup
-        try:
-            os.remove(self.config.takeSnapshotProgressFile())
+            # TODO
+            # introduce centralized log msg builder to avoid spread severity level
+            # indicators like "[I]" here?
+            self.snapshotLog.append('[I] ' + proc.printable_cmd, 3)
 
-        except Exception as e:
-            logger.debug('Failed to remove snapshot progress file %s: %s'
-                         % (self.config.takeSnapshotProgressFile(), str(e)),
-                         self)
+            # TODO
+            # Process return value with rsync exit code to recognize errors that
+            # cannot be recognized by parsing the rsync output currently
+
+            rsync_exit_code = proc.run()
+                # Fix for #1491 and #489
+                # Note that the return value (containing the exit code) of the
+                # rsync child process is not the only way to detect errors (and
+                # sometimes not reliably delivers <> 0 in case of an error):
+                # Errors are also indicated via the pass-by-ref argument
+                # user_data="params" list (updated by the callback function that
+                # parses the rsync output for error message patterns).
+
+        # cleanup
+        self.removeProgressFile()
+        self.statusPublisher.flush()
 
         # handle errors
         # TODO
@@ -1490,13 +1961,13 @@ class Snapshots:
             return [False, has_errors]
 
         self.backupConfig(new_snapshot)
-        self.backupPermissions(new_snapshot)
+        self.backupPermissions(new_snapshot, prev_sid, filter_hash)
 
         # copy snapshot log
         try:
             self.snapshotLog.flush()
             with open(self.snapshotLog.logFileName, 'rb') as logfile:
-                new_snapshot.setLog(logfile.read())
+                new_snapshot.setLog(logfile)
 
         except Exception as e:
             logger.debug('Failed to write takeSnapshot log %s into '
@@ -1512,7 +1983,10 @@ class Snapshots:
         new_snapshot.saveToContinue = False
 
         # rename snapshot
-        os.rename(new_snapshot.path(), sid.path())
+        catalog = snapshotCatalog(self.config)
+        with catalog.expectChange() as conn:
+            os.rename(new_snapshot.path(), sid.path())
+            catalog.addEntry(conn, catalogEntry(sid))
 
         if not sid.exists():
             logger.error(
@@ -1527,7 +2001,7 @@ class Snapshots:
 
             return [False, True]
 
-        self._backup_info_file(sid)
+        self._backup_info_file(sid, filter_hash)
 
         if not has_errors:
             tools.writeTimeStamp(self.config.anacronSpoolFile())
@@ -1535,117 +2009,266 @@ class Snapshots:
         # create last_snapshot symlink
         self.createLastSnapshotSymlink(sid)
 
+        self.indexChanges(sid, prev_sid)
+
+        # Walking the snapshot over sshfs would be too slow
+        if (self.config.sizeAccounting()
+                and 'ssh' not in self.config.snapshotsMode()):
+            self.updateSnapshotSize(sid)
+
         return [True, has_errors]
 
-    def smartRemoveKeepAll(self,
-                           snapshots: list[SID],
-                           min_date: datetime.date,
-                           max_date: datetime.date) -> set[SID]:
+    def indexChanges(self, sid, prev_sid):
         """
-        Return all snapshots in the timedelta beginning with ``min_date`` and
-        ending before ``max_date``.
+        Add the paths changed by the new snapshot ``sid`` (the ``[C]`` lines
+        of its log) to the change index. See :py:mod:`changeindex`.
 
         Args:
-            snapshots (list): Full list of :py:class:`SID` objects.
-            min_date (datetime.date): Minimum date (included in the range).
-            max_date (datetime.date): Maximum date (excluded from the range).
-
-        Returns:
-            set: Set of snapshots that should be kept.
+            sid (SID):      the new snapshot
+            prev_sid (SID): snapshot used for ``--link-dest`` or ``None``
         """
-        logger.debug(f'Keep all >= {min_date} < {max_date}', self)
+        # Encrypted paths can't be looked up and without "[C]" lines the
+        # snapshot would look unchanged.
+        if (self.config.snapshotsMode() in ('local_encfs', 'ssh_encfs')
+                or self.config.logLevel() < snapshotlog.SnapshotLog.CHANGES_AND_ERRORS):
+            return
 
-        result = filter(lambda sid: sid.date.date() >= min_date
-                        and sid.date.date() < max_date,
-                        snapshots)
+        try:
+            with open(self.snapshotLog.logFileName,
+                      'rt', errors='replace') as f:
+                _, changes = changeindex.readLog(
+                    line.rstrip('\n') for line in f)
+
+        except OSError as e:
+            logger.debug('Failed to read changes from {}: {}'.format(
+                         self.snapshotLog.logFileName, str(e)),
+                         self)
+            return
 
-        return set(result)
+        index = changeIndex(self.config)
+        index.add(sid.sid, prev_sid.sid if prev_sid else '', changes)
 
-    def smartRemoveKeepFirst(self,
-                             snapshots,
-                             min_date,
-                             max_date,
-                             keep_healthy=False):
-        """Return the first snapshot between ``min_date`` and ``max_date``.
+        sids = listSnapshots(self.config, reverse=False)
+        if sids:
+            index.prune(sids[0].sid)
 
-        The first snapshot in ``snapshots`` that hit the timedetla beginning
-        with ``min_date`` and ending before ``max_date`` will be returned.
-        Snapshots outthat that range are also lost. The list is not ordered by
-        date.
+    def updateSnapshotSize(self, sid):
+        """
+        Measure the space held exclusively by the new snapshot ``sid`` and
+        update the cached size of the previous snapshot incrementally. See
+        :py:mod:`snapshotsize`.
 
         Args:
-            snapshots (list): Full list of :py:class:`SID` objects.
-            min_date (datetime.date): Minimum date (included in the range).
-            max_date (datetime.date): Maximum date (excluded from the range).
-            keep_healthy (bool): Return the first healthy snapshot (not marked
-                as failed) instead of the first at all. If all snapshots failed
-                this will again return the very first snapshot.
+            sid (SID): the new snapshot
 
         Returns:
-            set: Set of one snapshot that should be kept or an empty set.
+            snapshotsize.SnapshotSize: size of ``sid`` or ``None`` on errors
+        """
+        sids = listSnapshots(self.config, reverse=False)
+
+        try:
+            index = sids.index(sid)
+
+        except ValueError:
+            return None
 
-        TODO: It should compare datest not SIDs because of their tag.
+        prev, prevprev, nxt = (_neighbour(sids, index - 1),
+                               _neighbour(sids, index - 2),
+                               _neighbour(sids, index + 1))
+
+        try:
+            sid.makeWritable()
+            if prev:
+                prev.makeWritable()
+
+            size = snapshotsize.addSnapshot(
+                sid.path(),
+                (prev, nxt),
+                prev_path=prev.path() if prev else None,
+                prev_neighbours=(prevprev, nxt),
+                prev_new_neighbours=(prevprev, sid.sid))
+
+        except OSError as exc:
+            logger.warning(f'Failed to measure size of {sid}: {exc}', self)
+            return None
+
+        logger.info('Snapshot {} holds {} exclusively ({} inodes)'.format(
+            sid, snapshotsize.formatSize(size.exclusive_bytes),
+            size.exclusive_inodes), self)
+
+        return size
+
+    def takeSnapshotShards(self, rsync_prefix, shards, new_snapshot, params):
         """
-        logger.debug('Keep first >= {} and < {}'.format(
-            min_date.strftime('%c'), max_date.strftime('%c')), self)
+        Transfer ``shards`` of include folders with concurrent rsync
+        processes into the same ``new_snapshot``.
 
-        for sid in snapshots:
-            # try to keep the first healthy snapshot
-            if keep_healthy and sid.failed:
-                logger.debug(f'Do not keep failed snapshot {sid}', self)
-                continue
+        Each process gets protect filters for the folders of all other
+        shards. Otherwise ``--delete-excluded`` would remove them again.
+        Output of all processes is handled by :py:func:`rsyncCallback`
+        one line at a time.
+
+        Args:
+            rsync_prefix (list): rsync command and arguments without
+                include, exclude, source and destination
+            shards (list): list of include folder lists, see
+                :py:func:`shardIncludeFolders`
+            new_snapshot (NewSnapshot): destination snapshot
+            params (list): ``[error, changes]`` as in
+                :py:func:`rsyncCallback`
+
+        Returns:
+            int: Combined exit code, see :py:func:`combineRsyncExitCodes`.
+        """
+        workers = max(1, min(self.config.parallelTransferWorkers(),
+                             len(shards)))
+        logger.info(f'Transfer {len(shards)} shards with {workers} '
+                    'concurrent rsync processes', self)
 
-            if sid.date.date() >= min_date and sid.date.date() < max_date:
-                return set([sid])
+        dest = self.rsyncRemotePath(
+            new_snapshot.pathBackup(use_mode=['ssh', 'ssh_encfs']),
+            quote='')
+
+        # Create folders shared by multiple shards upfront. Concurrent rsync
+        # processes would race on creating them.
+        for folder in sharedParentFolders(shards):
+            path = new_snapshot.pathBackup(folder.lstrip(os.sep))
+            os.makedirs(path, exist_ok=True)
+            if self.transferDirs is not None:
+                encoded = folder.encode()
+                self.transferDirs.add(encoded)
+                self.collectPermission(self.transferFileInfo, encoded)
+
+        lock = threading.Lock()
+        self.shardProgress = {}
+
+        def callback(line, user_data):
+            with lock:
+                self.rsyncCallback(line, user_data)
+
+        procs = []
+        for idx, shard in enumerate(shards):
+            protect = []
+            for other in shards:
+                if other is not shard:
+                    protect.extend(self.rsyncProtect(other))
+
+            cmd = rsync_prefix + protect + self.rsyncSuffix(shard) + [dest]
+            proc = tools.Execute(
+                cmd,
+                callback=callback,
+                user_data=params,
+                filters=(functools.partial(self.filterShardProgress,
+                                           idx, len(shards), lock),),
+                parent=self)
+            self.snapshotLog.append('[I] ' + proc.printable_cmd, 3)
+            procs.append(proc)
+
+        killed = threading.Event()
+
+        def run(proc):
+            if killed.is_set():
+                return -signal.SIGHUP
+            return proc.run()
+
+        # Signals are only delivered to the main thread. Forward them to all
+        # rsync processes like tools.Execute does for a single one.
+        def forward(signum, frame):
+            if signum == signal.SIGHUP:
+                killed.set()
+            for proc in procs:
+                {signal.SIGTSTP: proc.pause,
+                 signal.SIGCONT: proc.resume,
+                 signal.SIGHUP: proc.kill}[signum](signum, frame)
+
+        handlers = {}
+        for signum in (signal.SIGTSTP, signal.SIGCONT, signal.SIGHUP):
+            try:
+                handlers[signum] = signal.signal(signum, forward)
+            except ValueError:
+                # not running in main thread
+                pass
 
-        # if all snapshots failed return the first snapshot
-        # no matter if it has errors
-        if keep_healthy:
-            return self.smartRemoveKeepFirst(snapshots,
-                                             min_date,
-                                             max_date,
-                                             keep_healthy=False)
-        return set()
+        try:
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix='rsync') as pool:
+                codes = list(pool.map(run, procs))
 
-    def incMonth(self, date):
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum,
+                              signal.SIG_DFL if handler is None else handler)
+
+        logger.debug(f'rsync exit codes of shards: {codes}', self)
+
+        return combineRsyncExitCodes(codes)
+
+    def rsyncProtect(self, includeFolders):
         """
-        First day of next month of ``date`` with respect on new years. So if
-        ``date`` is December this will return 1st of January next year.
+        Protect filters for rsync to not delete ``includeFolders`` and their
+        parent folders in the destination.
 
         Args:
-            date (datetime.date):   old date that should be increased
+            includeFolders (list): list of tuples (item, int) where ``int``
+                is ``0`` if ``item`` is a folder or ``1`` if it is a file.
 
         Returns:
-            datetime.date:          1st day of next month
+            list: rsync ``--filter`` arguments.
         """
-        # Last day in current month
-        last = datetime.date(
-            year=date.year,
-            month=date.month,
-            day=calendar.monthrange(date.year, date.month)[1])
+        encode = self.config.ENCODE
+        ret = []
 
-        return last + datetime.timedelta(days=1)
+        for item, item_type in includeFolders:
+            path = encode.include(item)
 
-    def decMonth(self, date):
+            if item_type == 0:
+                ret.append('--filter=P {}/***'.format(path))
+            else:
+                ret.append('--filter=P {}'.format(path))
+
+            parent = os.path.dirname(path)
+            while len(parent) > 1:
+                ret.append('--filter=P {}/'.format(parent))
+                parent = os.path.dirname(parent)
+
+        # remove duplicates but keep order
+        return list(dict.fromkeys(ret))
+
+    def filterShardProgress(self, shard, count, lock, line):
         """
-        First day of previous month of ``date`` with respect on previous years.
-        So if ``date`` is January this will return 1st of December previous
-        year.
+        Like :py:func:`filterRsyncProgress` but for one of ``count``
+        concurrent rsync processes. The progress file gets the sum of sent
+        bytes and speed and the average percentage of all processes.
 
         Args:
-            date (datetime.date):   old date that should be decreased
+            shard (int): index of the rsync process
+            count (int): number of rsync processes
+            lock (threading.Lock): lock shared by all processes
+            line (str): stdout line from rsync
 
         Returns:
-            datetime.date:          1st day of previous month
+            str:        ``line`` without progress infos
         """
-        # First day of current month
-        first = datetime.date(year=date.year, month=date.month, day=1)
+        ret = []
+        for l in line.split('\n'):
+            m = '%' in l and self.reRsyncProgress.match(l)
+            if not m:
+                ret.append(l)
+                continue
 
-        # Last day of previous month
-        prev = first - datetime.timedelta(days=1)
+            with lock:
+                self.shardProgress[shard] = (
+                    progress.parseRsyncSize(m.group(1)),
+                    int(m.group(2)),
+                    progress.parseRsyncSize(m.group(3)[:-len('B/s')]))
 
-        # First day of previous month
-        return datetime.date(year=prev.year, month=prev.month, day=1)
+                sent = sum(v[0] for v in self.shardProgress.values())
+                percent = sum(v[1] for v in self.shardProgress.values())
+                speed = sum(v[2] for v in self.shardProgress.values())
+
+                self.updateProgress(sent, percent // count, speed)
+
+        return '\n'.join(ret)
 
     def smartRemoveList(self,
                         now_full,
@@ -1655,6 +2278,8 @@ class Snapshots:
                         keep_one_per_month):
         """Get list of backups to be removed based on configurable intervals.
 
+        The rules are applied by :py:func:`retention.keepSet`.
+
         Args:
             now_full (datetime.datetime):   date and time when takeSnapshot was
                                             started
@@ -1684,73 +2309,24 @@ class Snapshots:
 
         now = now_full.date()
 
-        # keep the last/youngest backup
-        keep = set([snapshots[0]])
-
-        # keep all for the last keep_all days
-        if keep_all > 0:
-            keep |= self.smartRemoveKeepAll(
-                snapshots,
-                now - datetime.timedelta(days=keep_all-1),
-                now + datetime.timedelta(days=1))
-
-        # keep one per day for the last keep_one_per_day days
-        if keep_one_per_day > 0:
-            d = now
-            for i in range(0, keep_one_per_day):
-                keep |= self.smartRemoveKeepFirst(
-                    snapshots,
-                    d,
-                    d + datetime.timedelta(days=1),
-                    keep_healthy=True)
-                d -= datetime.timedelta(days=1)
-
-        # keep one per week for the last keep_one_per_week weeks
-        if keep_one_per_week > 0:
-            # Make sure the period always starts on Monday
-            # Step back in time to the last Monday
-            d = now - datetime.timedelta(days=now.weekday())
-
-            for i in range(0, keep_one_per_week):
-                keep |= self.smartRemoveKeepFirst(
-                    snapshots,
-                    # Monday
-                    d,
-                    # Step one week into the future
-                    d + datetime.timedelta(days=7),
-                    keep_healthy=True)
-                # One week back in time
-                d -= datetime.timedelta(days=7)
-
-        # keep one per month for the last keep_one_per_month months
-        if keep_one_per_month > 0:
-            d1 = datetime.date(now.year, now.month, 1)
-            d2 = self.incMonth(d1)
-
-            for i in range(0, keep_one_per_month):
-                keep |= self.smartRemoveKeepFirst(
-                    snapshots, d1, d2, keep_healthy=True)
-                d2 = d1
-                d1 = self.decMonth(d1)
-
-        # keep one per year for all years
-        first_year = int(snapshots[-1].sid[:4])
-
-        for i in range(first_year, now.year+1):
-            keep |= self.smartRemoveKeepFirst(snapshots,
-                                              datetime.date(i, 1, 1),
-                                              datetime.date(i+1, 1, 1),
-                                              keep_healthy=True)
+        keep = retention.keepSet(snapshots,
+                                 now,
+                                 keep_all,
+                                 keep_one_per_day,
+                                 keep_one_per_week,
+                                 keep_one_per_month,
+                                 failed=lambda sid: sid.failed)
 
         logger.debug(f'Keep snapshots: {keep}', self)
 
         del_snapshots = []
+        dont_remove_named = self.config.dontRemoveNamedSnapshots()
 
         for sid in snapshots:
             if sid in keep:
                 continue
 
-            if self.config.dontRemoveNamedSnapshots():
+            if dont_remove_named:
                 if sid.name:
                     logger.debug(
                         f'Keep snapshot: {sid}, because it has a name', self)
@@ -1763,9 +2339,10 @@ class Snapshots:
     def smartRemove(self, del_snapshots, log = None):
         """
         Remove multiple snapshots either with
-        :py:func:`Snapshots.remove` or in background on the remote host
-        if mode is `ssh` or `ssh_encfs` and smart-remove in background is
-        activated.
+        :py:func:`Snapshots.remove` or directly on the remote host with
+        :py:class:`remoteremove.RemoteRemove` if mode is `ssh` or `ssh_encfs`
+        and smart-remove in background is activated. The remote helper
+        removes several snapshots in parallel and reports its progress.
 
         Args:
             del_snapshots (list):   list of :py:class:`SID` that should be removed
@@ -1778,82 +2355,41 @@ class Snapshots:
             log = lambda x: self.setTakeSnapshotMessage(0, x)
 
         if self.config.snapshotsMode() in ['ssh', 'ssh_encfs'] and self.config.smartRemoveRunRemoteInBackground():
-            logger.info('[smart remove] remove snapshots in background: %s'
+            logger.info('[smart remove] remove snapshots on remote host: %s'
                         % del_snapshots, self)
-            lckFile = os.path.normpath(
-                os.path.join(
-                    del_snapshots[0].path(use_mode=['ssh', 'ssh_encfs']),
-                    os.pardir,
-                    'smartremove.lck'
-                )
-            )
+            folder = os.path.normpath(os.path.join(
+                del_snapshots[0].path(use_mode=['ssh', 'ssh_encfs']),
+                os.pardir))
+            remote = remoteremove.RemoteRemove(self.config, folder)
 
-            maxLength = self.config.sshMaxArgLength()
-            if not maxLength:
-                import ssh_max_arg
-                user_host = '%s@%s' % (self.config.sshUser(),
-                                       self.config.sshHost())
-                maxLength = ssh_max_arg.probe_max_ssh_command_size(self.config)
-                self.config.setSshMaxArgLength(maxLength)
-                self.config.save()
-                ssh_max_arg.report_result(user_host, maxLength)
-
-            additionalChars = len(self.config.sshPrefixCmd(cmd_type = str))
-
-            head = 'screen -d -m bash -c "('
-            # create temp dir used for delete files with rsync
-            head += 'TMP=\\$(mktemp -d); '
-            # make sure $TMP dir was created
-            head += 'test -z \\\"\\$TMP\\\" && exit 1; '
-            # make sure $TMP is empty
-            head += 'test -n \\\"\\$(ls \\$TMP)\\\" && exit 1; '
-            if logger.DEBUG:
-                head += 'logger -t \\\"backintime smart-remove [$BASHPID]\\\" \\\"start\\\"; '
-            head += 'flock -x 9; '
-            if logger.DEBUG:
-                head += 'logger -t \\\"backintime smart-remove [$BASHPID]\\\" \\\"got exclusive flock\\\"; '
-
-            tail = 'rmdir \\$TMP) 9>\\\"%s\\\""' %lckFile
-
-            cmds = []
-
-            for sid in del_snapshots:
-                remote = self.rsyncRemotePath(sid.path(use_mode = ['ssh', 'ssh_encfs']), use_mode = [], quote = '\\\"')
-                rsync = ' '.join(tools.rsyncRemove(self.config, run_local = False))
-                rsync += ' \\\"\\$TMP/\\\" {}; '.format(remote)
-
-                s = 'test -e \\\"%s\\\" && (' %sid.path(use_mode = ['ssh', 'ssh_encfs'])
-
-                if logger.DEBUG:
-                    s += 'logger -t \\\"backintime smart-remove [$BASHPID]\\\" '
-                    s += '\\\"snapshot %s still exist\\\"; ' %sid
-                    s += 'sleep 1; ' #add one second delay because otherwise you might not see serialized process with small snapshots
-
-                s += rsync
-                s += 'rmdir \\\"%s\\\"; ' %sid.path(use_mode = ['ssh', 'ssh_encfs'])
-
-                if logger.DEBUG:
-                    s += 'logger -t \\\"backintime smart-remove [$BASHPID]\\\" '
-                    s += '\\\"snapshot %s remove done\\\"' %sid
-
-                s += '); '
-                cmds.append(s)
-
-            for cmd in tools.splitCommands(cmds,
-                                           head = head,
-                                           tail = tail,
-                                           maxLength = maxLength - additionalChars):
-                tools.Execute(self.config.sshCommand([cmd,],
-                                                     quote = False,
-                                                     nice = False,
-                                                     ionice = False)).run()
-        else:
-            logger.info("[smart remove] remove snapshots: %s"
-                        %del_snapshots, self)
+            def remoteProgress(done, count, path):
+                log(_('Smart removal') + ' %s/%s' % (done, count))
+
+            if remote.install():
+                result = remote.run(
+                    [sid.path(use_mode=['ssh', 'ssh_encfs'])
+                     for sid in del_snapshots],
+                    workers=self.config.removeWorkers(),
+                    log=remoteProgress)
+
+                # The catalog notices the change of the snapshot folder
+                if result is not None:
+                    return
+
+            logger.warning('Removing snapshots on remote host failed. '
+                           'Remove them from here.', self)
+
+        logger.info("[smart remove] remove snapshots: %s"
+                    %del_snapshots, self)
 
-            for i, sid in enumerate(del_snapshots, 1):
-                log(_('Smart removal') + ' %s/%s' %(i, len(del_snapshots)))
-                self.remove(sid)
+        for i, sid in enumerate(del_snapshots, 1):
+            msg = _('Smart removal') + ' %s/%s' %(i, len(del_snapshots))
+            log(msg)
+
+            def progress(stats, msg=msg):
+                log(f'{msg}: {removeProgressMessage(stats)}')
+
+            self.remove(sid, progress=progress)
 
     def freeSpace(self, now):
         """Remove old backups based on several rules (if enabled).
@@ -1937,9 +2473,6 @@ class Snapshots:
             snapshots = listSnapshots(self.config, reverse=False)
 
             while True:
-                if len(snapshots) <= 1:
-                    break
-
                 free_space = self.statFreeSpaceLocal(self.config.snapshotsFullPath())
 
                 if free_space is None:
@@ -1952,15 +2485,18 @@ class Snapshots:
                 if free_space >= minFreeSpace:
                     break
 
-                if self.config.dontRemoveNamedSnapshots():
-                    if snapshots[0].name:
-                        del snapshots[0]
-                        continue
+                batch = self.freeSpaceBatch(
+                    snapshots,
+                    needed_bytes=(minFreeSpace - free_space) * 1024 * 1024)
 
-                msg = "free disk space: {} MiB. Remove snapshot {}"
-                logger.debug(msg.format(free_space, snapshots[0].withoutTag), self)
-                self.remove(snapshots[0])
-                del snapshots[0]
+                if not batch:
+                    break
+
+                msg = "free disk space: {} MiB. Remove snapshots {}"
+                logger.debug(msg.format(
+                    free_space, [sid.withoutTag for sid in batch]), self)
+                self.removeBatch(batch)
+                snapshots = [sid for sid in snapshots if sid not in batch]
 
         # Try to keep free inodes
         if self.config.minFreeInodesEnabled():
@@ -1978,9 +2514,6 @@ class Snapshots:
             snapshots = listSnapshots(self.config, reverse = False)
 
             while True:
-                if len(snapshots) <= 1:
-                    break
-
                 try:
                     info = os.statvfs(self.config.snapshotsPath())
                     free_inodes = info.f_favail
@@ -1991,24 +2524,198 @@ class Snapshots:
                                  self)
                     break
 
-                if free_inodes >= max_inodes * (minFreeInodes / 100.0):
+                min_inodes = math.ceil(max_inodes * (minFreeInodes / 100.0))
+
+                if free_inodes >= min_inodes:
                     break
 
-                if self.config.dontRemoveNamedSnapshots():
-                    if snapshots[0].name:
-                        del snapshots[0]
-                        continue
+                batch = self.freeSpaceBatch(
+                    snapshots, needed_inodes=min_inodes - free_inodes)
+
+                if not batch:
+                    break
 
-                logger.debug("free inodes: %.2f%%. Remove snapshot %s"
-                            %((100.0 / max_inodes * free_inodes), snapshots[0].withoutTag),
+                logger.debug("free inodes: %.2f%%. Remove snapshots %s"
+                            %((100.0 / max_inodes * free_inodes),
+                              [sid.withoutTag for sid in batch]),
                             self)
-                self.remove(snapshots[0])
-                del snapshots[0]
+                self.removeBatch(batch)
+                snapshots = [sid for sid in snapshots if sid not in batch]
 
         # Set correct last snapshot again
         if last_snapshot is not snapshots[-1]:
             self.createLastSnapshotSymlink(snapshots[-1])
 
+    def freeSpaceBatch(self, snapshots, needed_bytes=0, needed_inodes=0):
+        """
+        Oldest snapshots which need to be removed to release ``needed_bytes``
+        and ``needed_inodes``.
+
+        The cached exclusive sizes (see :py:func:`snapshotSizes`) are used
+        first. Removing several snapshots together releases at least the sum
+        of them. On SSH profiles sizes are not cached, so they are estimated
+        with one ``du`` on the remote host (see
+        :py:func:`_sshFreeSpaceBatch`) instead of asking for the free space
+        after each removed snapshot. Otherwise only the oldest candidate is
+        returned and the caller checks the free space again. The youngest
+        snapshot and named snapshots (if configured) are never part of the
+        batch.
+
+        Args:
+            snapshots (list):       :py:class:`SID` objects, oldest first
+            needed_bytes (int):     space to release
+            needed_inodes (int):    inodes to release
+
+        Returns:
+            list: :py:class:`SID` objects to remove, oldest first. All
+            candidates if they don't release enough.
+        """
+        dont_remove_named = self.config.dontRemoveNamedSnapshots()
+        candidates = [sid for sid in snapshots[:-1]
+                      if not (dont_remove_named and sid.name)]
+
+        if not candidates:
+            return []
+
+        batch = self._cachedFreeSpaceBatch(
+            snapshots, candidates, needed_bytes, needed_inodes)
+
+        if batch is None and self.config.snapshotsMode() in ('ssh',
+                                                             'ssh_encfs'):
+            batch = self._sshFreeSpaceBatch(
+                snapshots, candidates, needed_bytes, needed_inodes)
+
+        if batch is None:
+            logger.debug('Sizes of snapshots are unknown. Remove the oldest '
+                         'one', self)
+            return candidates[:1]
+
+        return batch
+
+    def _cachedFreeSpaceBatch(self, snapshots, candidates, needed_bytes,
+                              needed_inodes):
+        """
+        Oldest ``candidates`` whose cached exclusive sizes sum up to
+        ``needed_bytes`` and ``needed_inodes``, all of them if they don't or
+        ``None`` if a size is not cached.
+        """
+        index = {sid: i for i, sid in enumerate(snapshots)}
+        released = snapshotsize.SnapshotSize()
+        batch = []
+
+        for sid in candidates:
+            i = index[sid]
+            neighbours = (_neighbour(snapshots, i - 1),
+                          _neighbour(snapshots, i + 1))
+
+            try:
+                size = snapshotsize.exclusiveSize(sid.path(),
+                                                  neighbours,
+                                                  compute=False)
+
+            except OSError as exc:
+                logger.debug(f'Failed to read cached size of {sid}: {exc}',
+                             self)
+                size = None
+
+            if size is None:
+                return None
+
+            batch.append(sid)
+            released.exclusive_bytes += size.exclusive_bytes
+            released.exclusive_inodes += size.exclusive_inodes
+
+            if (released.exclusive_bytes >= needed_bytes
+                    and released.exclusive_inodes >= needed_inodes):
+                logger.debug(
+                    'Removing {} snapshots releases at least {} and {} '
+                    'inodes'.format(
+                        len(batch),
+                        snapshotsize.formatSize(released.exclusive_bytes),
+                        released.exclusive_inodes), self)
+
+                return batch
+
+        return batch
+
+    def _sshFreeSpaceBatch(self, snapshots, candidates, needed_bytes,
+                           needed_inodes):
+        """
+        Oldest ``candidates`` which release ``needed_bytes`` and
+        ``needed_inodes`` estimated with one ``du`` on the remote host or
+        ``None`` if ``du`` failed.
+
+        ``du`` counts hard linked files only for the first given folder
+        which contains them. The snapshots are given youngest first, so each
+        snapshot only counts the files which no younger snapshot contains.
+        Those are released when the snapshot is removed together with all
+        older ones. A file is hard linked from one snapshot to the next, so
+        younger snapshots than the one following the youngest candidate are
+        not needed.
+        """
+        # The candidates and the snapshot following the youngest of them
+        measured = snapshots[:snapshots.index(candidates[-1]) + 2]
+        paths = [sid.path(use_mode=['ssh', 'ssh_encfs'])
+                 for sid in reversed(measured)]
+        needed = {'-k': math.ceil(needed_bytes / 1024),
+                  '--inodes': needed_inodes}
+        released = {}
+
+        for option in [option for option in needed if needed[option]]:
+            cmd = 'du -s {} {}'.format(
+                option, ' '.join(shlex.quote(path) for path in paths))
+            proc = subprocess.run(self.config.sshCommand([cmd]),
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  universal_newlines=True,
+                                  check=False)
+            sizes = [int(m.group(1)) for m in
+                     re.finditer(r'^(\d+)\t', proc.stdout, re.M)]
+
+            if proc.returncode or len(sizes) != len(paths):
+                logger.warning('Failed to estimate the size of snapshots on '
+                               f'remote: {proc.stderr.strip()}', self)
+                return None
+
+            released[option] = dict(zip(reversed(measured), sizes))
+
+        batch = []
+        total = dict.fromkeys(released, 0)
+
+        for sid in candidates:
+            batch.append(sid)
+
+            for option in released:
+                total[option] += released[option][sid]
+
+            if all(total[option] >= needed[option] for option in released):
+                break
+
+        logger.debug('Removing {} snapshots releases about {} and {} '
+                     'inodes'.format(
+                         len(batch),
+                         snapshotsize.formatSize(total.get('-k', 0) * 1024),
+                         total.get('--inodes', 0)), self)
+
+        return batch
+
+    def removeBatch(self, batch):
+        """
+        Remove all snapshots in ``batch`` with :py:func:`Snapshots.remove`.
+
+        Args:
+            batch (list):   :py:class:`SID` objects
+        """
+        for i, sid in enumerate(batch, 1):
+            msg = _('Removing snapshot') + f' {i}/{len(batch)}'
+            self.setTakeSnapshotMessage(0, msg)
+
+            def progress(stats, msg=msg):
+                self.setTakeSnapshotMessage(
+                    0, f'{msg}: {removeProgressMessage(stats)}')
+
+            self.remove(sid, progress=progress)
+
     def statFreeSpaceLocal(self, path):
         """
         Get free space on filesystem containing ``path`` in MiB using
@@ -2153,9 +2860,14 @@ class Snapshots:
 
             return snapshotsFiltered
 
+        if not flag_deep_check and not list_equal_to:
+            indexed = self.filterByChangeIndex(base_path, snapshotsList)
+            if indexed is not None:
+                return indexed
+
         # check for duplicates
         uniqueness = UniquenessSet(
-            flag_deep_check, follow_symlink=False, list_equal_to=list_equal_to)
+            flag_deep_check, follow_symlink=False, equal_to=list_equal_to)
 
         for sid in allSnapshotsList:
             path = sid.pathBackup(base_path)
@@ -2168,6 +2880,61 @@ class Snapshots:
 
         return snapshotsFiltered
 
+    def filterByChangeIndex(self, base_path, snapshotsList):
+        """
+        Like :py:func:`filter` with ``list_diff_only`` for a regular file,
+        but answered by the change index (see :py:mod:`changeindex`) instead
+        of looking at the file in every snapshot. Only the oldest snapshot,
+        the newest version and the current file are looked at.
+
+        Args:
+            base_path (str):        path to file on root filesystem.
+            snapshotsList (list):   List of :py:class:`SID` objects that
+                                    should be filtered
+
+        Returns:
+            list:                   filtered list of :py:class:`SID` objects
+                                    or ``None`` if the index can't answer
+        """
+        if (not snapshotsList
+                or self.config.snapshotsMode() in ('local_encfs', 'ssh_encfs')
+                or not changeindex.isIndexable(base_path)):
+            return None
+
+        sids = sorted(snapshotsList)
+        index = changeIndex(self.config)
+        chain = index.chain(sids[0].sid, sids[-1].sid)
+        if chain is None:
+            return None
+
+        changes = index.changes(base_path)
+        if changes is None:
+            return None
+
+        path = sids[0].pathBackup(base_path)
+        exists = os.path.isfile(path) and not os.path.islink(path)
+        bySid = {sid.sid: sid for sid in sids}
+        found = [bySid[sid] for sid in changeindex.versions(
+            chain, changes, bySid, exists)]
+
+        # compare the current file with the newest version like filter()
+        snapshotsFiltered = []
+        uniqueness = UniquenessSet(follow_symlink=False)
+        root = RootSnapshot(self.config)
+        path = root.pathBackup(base_path)
+        if (os.path.exists(path)
+                and not os.path.islink(path)
+                and os.path.isfile(path)
+                and uniqueness.check(path)):
+            snapshotsFiltered.append(root)
+
+        if found and not uniqueness.check(found[0].pathBackup(base_path)):
+            found = found[1:]
+
+        logger.debug('Filtered {} snapshots by change index'.format(
+                     len(snapshotsList)), self)
+        return snapshotsFiltered + found
+
     def rsyncRemotePath(self, path, use_mode = ['ssh', 'ssh_encfs'], quote = '"'):
         """
         Format the destination string for rsync depending on which profile is
@@ -2254,12 +3021,15 @@ class Snapshots:
             if os.path.islink(symlink):
                 if os.path.basename(os.path.realpath(symlink)) == sid.sid:
                     return True
-                os.remove(symlink)
-            if os.path.exists(symlink):
-                logger.error('Could not remove symlink %s' %symlink, self)
-                return False
-            logger.debug('Create symlink %s => %s' %(symlink, sid), self)
-            os.symlink(sid.sid, symlink)
+            catalog = snapshotCatalog(self.config)
+            with catalog.expectChange():
+                if os.path.islink(symlink):
+                    os.remove(symlink)
+                if os.path.exists(symlink):
+                    logger.error('Could not remove symlink %s' %symlink, self)
+                    return False
+                logger.debug('Create symlink %s => %s' %(symlink, sid), self)
+                os.symlink(sid.sid, symlink)
             return True
         except Exception as e:
             logger.error('Failed to create symlink %s: %s' %(symlink, str(e)), self)
@@ -2322,6 +3092,8 @@ class Snapshots:
         if excludeFolders is None:
             excludeFolders = self.config.exclude()
 
+        encode.prefetch(encode.exclude, excludeFolders)
+
         for exclude in excludeFolders:
             exclude = encode.exclude(exclude)
 
@@ -2358,6 +3130,9 @@ class Snapshots:
         if includeFolders is None:
             includeFolders = self.config.include()
 
+        encode.prefetch(encode.include,
+                        [item[0] for item in includeFolders if item[0] != '/'])
+
         for include_folder in includeFolders:
             folder = include_folder[0]
 
@@ -2460,7 +3235,13 @@ class SID:
     NAME = 'name'
     FAILED = 'failed'
     FILEINFO = 'fileinfo.bz2'
+    FILEINFO_INDEX = 'fileinfo.idx'
     LOG = 'takesnapshot.log.bz2'
+    LOG_INDEX = 'takesnapshot.log.idx'
+
+    # snapshotcatalog.CatalogEntry with name, failed flag and last check read
+    # from the catalog instead of the snapshot folder. See listSnapshots().
+    catalogEntry = None
 
     def __init__(self, date, cfg):
         self.config = cfg
@@ -2749,6 +3530,9 @@ class SID:
         Returns:
             str:        name of this snapshot
         """
+        if self.catalogEntry is not None:
+            return self.catalogEntry.name
+
         nameFile = self.path(self.NAME)
         if not os.path.isfile(nameFile):
             return ''
@@ -2772,6 +3556,10 @@ class SID:
             logger.debug('Failed to set snapshot {} name: {}'.format(
                          self.sid, str(e)),
                          self)
+        else:
+            if self.catalogEntry is not None:
+                self.catalogEntry.name = name
+            snapshotCatalog(self.config).update(self.sid, name=name)
 
     @property
     def lastChecked(self):
@@ -2783,6 +3571,13 @@ class SID:
         Returns:
             str:    date and time of last check (YYYY-MM-DD HH:MM:SS)
         """
+        if self.catalogEntry is not None:
+            if self.catalogEntry.last_checked:
+                return time.strftime(
+                    '%Y-%m-%d %H:%M:%S',
+                    time.localtime(self.catalogEntry.last_checked))
+            return self.displayID
+
         info = self.path(self.INFO)
         if os.path.exists(info):
             return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getatime(info)))
@@ -2798,6 +3593,11 @@ class SID:
         info = self.path(self.INFO)
         if os.path.exists(info):
             os.utime(info, None)
+            last_checked = os.path.getatime(info)
+            if self.catalogEntry is not None:
+                self.catalogEntry.last_checked = last_checked
+            snapshotCatalog(self.config).update(
+                self.sid, last_checked=last_checked)
 
     @property
     def failed(self):
@@ -2810,6 +3610,9 @@ class SID:
         Returns:
             bool:           ``True`` if flag is set
         """
+        if self.catalogEntry is not None:
+            return self.catalogEntry.failed
+
         failedFile = self.path(self.FAILED)
         return os.path.isfile(failedFile)
 
@@ -2825,8 +3628,12 @@ class SID:
                 logger.debug('Failed to mark snapshot {} failed: {}'.format(
                              self.sid, str(e)),
                              self)
+                return
         elif os.path.exists(failedFile):
             os.remove(failedFile)
+        if self.catalogEntry is not None:
+            self.catalogEntry.failed = bool(enable)
+        snapshotCatalog(self.config).update(self.sid, failed=enable)
 
     @property
     def info(self):
@@ -2900,11 +3707,55 @@ class SID:
         except PermissionError as e:
             logger.error('Failed to write {}: {}'.format(self.FILEINFO, str(e)))
 
+        try:
+            fileinfo.writeIndex(self.path(self.FILEINFO_INDEX), d)
+        except OSError as e:
+            logger.error('Failed to write {}: {}'.format(
+                self.FILEINFO_INDEX, str(e)))
+
+    def openFileInfo(self):
+        """
+        Open the permission manifest for lookups without loading it
+        completely. Uses "fileinfo.idx" if available and falls back to
+        "fileinfo.bz2" of snapshots taken by older versions.
+
+        Returns:
+            fileinfo.FileInfo: read-only mapping of
+                                {path: (permission, user, group)}
+        """
+        return fileinfo.openFileInfo(self.path(self.FILEINFO_INDEX),
+                                     self.path(self.FILEINFO))
+
+    def convertFileInfo(self, force=False):
+        """
+        Create "fileinfo.idx" from "fileinfo.bz2".
+
+        Args:
+            force (bool):   convert even if "fileinfo.idx" already exists
+
+        Returns:
+            int:            number of converted entries or ``None`` if
+                            nothing was converted
+        """
+        index = self.path(self.FILEINFO_INDEX)
+        legacy = self.path(self.FILEINFO)
+
+        if not os.path.isfile(legacy):
+            return None
+
+        if os.path.exists(index) and not force:
+            return None
+
+        self.makeWritable()
+        return fileinfo.convert(legacy, index)
+
     # TODO use @property decorator? IMHO not because it is not a "getter" but processes data
     # TODO Should have an action name like "loadLogFile"
     def log(self, mode = None, decode = None):
         """
-        Load log from "takesnapshot.log.bz2"
+        Load log from "takesnapshot.log.bz2". Only the blocks listed in
+        "takesnapshot.log.idx" which can contain lines passing the filter
+        are decompressed, one at a time. Logs without index are streamed.
 
         Args:
             mode (int):                 Mode used for filtering. Take a look at
@@ -2917,13 +3768,21 @@ class SID:
         logFile = self.path(self.LOG)
         logFilter = snapshotlog.LogFilter(mode, decode)
         try:
-            with bz2.BZ2File(logFile, 'rb') as f:
-                if logFilter.header:
-                    yield logFilter.header
-                for line in f.readlines():
-                    line = logFilter.filter(line.decode('utf-8').rstrip('\n'))
+            archive = logarchive.LogArchive(logFile, self.path(self.LOG_INDEX))
+            chunks = archive.chunks(logFilter.tags)
+            # raises if the log does not exist before yielding the header
+            lines = next(chunks, [])
+            if logFilter.header:
+                yield logFilter.header
+            while True:
+                logFilter.prefetch(lines)
+                for line in lines:
+                    line = logFilter.filter(line)
                     if not line is None:
                         yield line
+                lines = next(chunks, None)
+                if lines is None:
+                    break
         except Exception as e:
             msg = ('Failed to get snapshot log from {}:'.format(logFile), str(e))
             logger.debug(' '.join(msg), self)
@@ -2932,17 +3791,16 @@ class SID:
 
     def setLog(self, log):
         """
-        Write log to "takesnapshot.log.bz2"
+        Write log to "takesnapshot.log.bz2" in independently compressed
+        blocks and their index to "takesnapshot.log.idx".
 
         Args:
-            log: full snapshot log
+            log: full snapshot log (:py:class:`str` or :py:class:`bytes`)
+                 or a file opened in binary mode
         """
-        if isinstance(log, str):
-            log = log.encode('utf-8', 'replace')
         logFile = self.path(self.LOG)
         try:
-            with bz2.BZ2File(logFile, 'wb') as f:
-                f.write(log)
+            logarchive.write(logFile, self.path(self.LOG_INDEX), log)
         except Exception as e:
             logger.error('Failed to write log into compressed file {}: {}'.format(
                          logFile, str(e)),
@@ -3145,6 +4003,9 @@ def iterSnapshots(cfg, includeNewSnapshot=False):
 
     for item in os.listdir(path):
 
+        if item == SnapshotCatalog.FILENAME:
+            continue
+
         if item == NewSnapshot.NEWSNAPSHOT:
             newSid = NewSnapshot(cfg)
 
@@ -3168,20 +4029,380 @@ def iterSnapshots(cfg, includeNewSnapshot=False):
                     "'{}' is not a snapshot ID: {}".format(item, str(e)))
 
 
-def listSnapshots(cfg, includeNewSnapshot=False, reverse=True):
+def shardIncludeFolders(include_folders):
+    """
+    Split include folders into shards which can be transferred
+    independently.
+
+    Nested items stay together with their top most parent. These trees are
+    grouped by the device they are stored on. Concurrent processes on the
+    same disk would only compete for it.
+
+    Args:
+        include_folders (list): list of tuples (item, int) where ``int`` is
+            ``0`` if ``item`` is a folder or ``1`` if it is a file.
+
+    Returns:
+        list: List of shards. Each shard is a list of include tuples. A list
+            with one shard if the items can't be split (e.g. ``/`` is
+            included).
+    """
+    trees = []
+    for item in sorted(include_folders, key=lambda i: i[0]):
+        path = item[0]
+
+        for tree in trees:
+            root = tree[0][0].rstrip(os.sep) + os.sep
+            if path == tree[0][0] or path.startswith(root):
+                tree.append(item)
+                break
+
+        else:
+            trees.append([item])
+
+    shards = {}
+    for tree in trees:
+        try:
+            device = os.stat(tree[0][0]).st_dev
+        except OSError:
+            device = None
+
+        shards.setdefault(device, []).extend(tree)
+
+    return list(shards.values())
+
+
+def sharedParentFolders(shards):
+    """
+    Parent folders of include items which are used by more than one shard.
+
+    Args:
+        shards (list): see :py:func:`shardIncludeFolders`
+
+    Returns:
+        list: Sorted folder paths.
+    """
+    count = {}
+    for shard in shards:
+        parents = set()
+
+        for path, _ in shard:
+            parent = os.path.dirname(path.rstrip(os.sep))
+            while len(parent) > 1:
+                parents.add(parent)
+                parent = os.path.dirname(parent)
+
+        for parent in parents:
+            count[parent] = count.get(parent, 0) + 1
+
+    return sorted(path for path, n in count.items() if n > 1)
+
+
+def combineRsyncExitCodes(codes):
+    """
+    Combine exit codes of multiple rsync processes into one.
+
+    A real error (neither ``0`` nor one of the partial transfer codes ``23``
+    and ``24``) wins. Otherwise a partial transfer is reported.
+
+    Args:
+        codes (list): rsync exit codes. Negative values are signals.
+
+    Returns:
+        int: The combined exit code.
+    """
+    errors = [code for code in codes if code not in (0, 23, 24)]
+    if errors:
+        return errors[0]
+
+    for code in (23, 24):
+        if code in codes:
+            return code
+
+    return 0
+
+
+def _neighbour(sids, index):
+    """ID (str) of ``sids[index]`` or ``None`` if out of range."""
+    if 0 <= index < len(sids):
+        return sids[index].sid
+
+    return None
+
+
+def snapshotSizes(cfg, compute=False):
+    """
+    Space held exclusively by each snapshot. See :py:mod:`snapshotsize`.
+
+    Args:
+        cfg (config.Config): current config
+        compute (bool): walk snapshots which don't have a valid cached size.
+            Otherwise their size is ``None``.
+
+    Returns:
+        dict: :py:class:`SID` as key and
+            :py:class:`snapshotsize.SnapshotSize` or ``None`` as value
+    """
+    sids = listSnapshots(cfg, reverse=False)
+    ret = {}
+
+    for index, sid in enumerate(sids):
+        neighbours = (_neighbour(sids, index - 1),
+                      _neighbour(sids, index + 1))
+
+        try:
+            if compute:
+                sid.makeWritable()
+
+            ret[sid] = snapshotsize.exclusiveSize(sid.path(),
+                                                  neighbours,
+                                                  compute=compute)
+
+        except OSError as exc:
+            logger.warning(f'Failed to measure size of {sid}: {exc}')
+            ret[sid] = None
+
+    return ret
+
+
+def removeProgressMessage(stats):
+    """Human readable progress of removing a snapshot.
+
+    Args:
+        stats (deletion.DeletionStats): current counters
+
+    Returns:
+        str: e.g. ``12345 files removed (2345 files/s)``
+    """
+    return _('{files} files removed ({rate} files/s)').format(
+        files=stats.files, rate=round(stats.rate))
+
+
+def applyPermission(path, mode, uid, gid):
+    """
+    Change owner, group and mode of ``path`` if they differ. If changing the
+    owner fails try to change at least the group.
+
+    Args:
+        path (bytes):   file to change
+        mode (int):     new mode
+        uid (int):      new owner or -1
+        gid (int):      new group or -1
+
+    Returns:
+        list: ``(ok, message)`` for every change that was tried. Empty if
+            ``path`` doesn't exist.
+    """
+    actions = []
+    name = path.decode(errors = 'ignore')
+
+    def change(func, *args):
+        try:
+            func(path, *args)
+            return True
+        except OSError:
+            return False
+
+    try:
+        #current file stats
+        st = os.stat(path)
+
+        if uid != -1 or gid != -1:
+            ok = False
+            if uid != st.st_uid:
+                ok = change(os.chown, uid, gid)
+                actions.append((ok, "chown %s %s : %s" % (name, uid, gid)))
+                st = os.stat(path)
+
+            #if restore uid/gid failed try to restore at least gid
+            if not ok and gid != st.st_gid:
+                ok = change(os.chown, -1, gid)
+                actions.append((ok, "chgrp %s %s" % (name, gid)))
+                st = os.stat(path)
+
+        #restore perms
+        if mode != st.st_mode:
+            ok = change(os.chmod, mode)
+            actions.append((ok, "chmod %s %04o" % (name, mode)))
+
+    except OSError as e:
+        logger.debug(f'Failed to restore permissions of {name}: {e}')
+
+    return actions
+
+
+def applyPermissions(batch):
+    """
+    Call :py:func:`applyPermission` for every item in ``batch``.
+
+    Args:
+        batch (list):   ``(path, mode, uid, gid)`` tuples
+
+    Returns:
+        list: results of :py:func:`applyPermission` in the same order
+    """
+    return [applyPermission(*args) for args in batch]
+
+
+def permissionBits(perms):
+    """
+    Convert a symbolic permission string like ``rwxr-sr-t`` (as printed by
+    ``ls -l`` or rsync's ``%B``) into mode bits.
+
+    Args:
+        perms (str): Nine characters of permission bits.
+
+    Returns:
+        int: Mode bits without file type.
+    """
+    bits = (stat.S_IRUSR, stat.S_IWUSR, stat.S_IXUSR,
+            stat.S_IRGRP, stat.S_IWGRP, stat.S_IXGRP,
+            stat.S_IROTH, stat.S_IWOTH, stat.S_IXOTH)
+
+    # "S" and "T" are special bits without executable bit
+    mode = sum(bit for char, bit in zip(perms, bits) if char not in '-ST')
+
+    if perms[2] in 'sS':
+        mode |= stat.S_ISUID
+
+    if perms[5] in 'sS':
+        mode |= stat.S_ISGID
+
+    if perms[8] in 'tT':
+        mode |= stat.S_ISVTX
+
+    return mode
+
+
+def snapshotCatalog(cfg):
+    """The snapshot catalog of the current profile.
+
+    Args:
+        cfg (config.Config): Current config instance.
+
+    Returns:
+        snapshotcatalog.SnapshotCatalog: The catalog.
+    """
+    return SnapshotCatalog(cfg.snapshotsFullPath())
+
+
+def changeIndex(cfg):
+    """The change index of the current profile.
+
+    Args:
+        cfg (config.Config): Current config instance.
+
+    Returns:
+        changeindex.ChangeIndex: The index.
+    """
+    return changeindex.ChangeIndex(cfg.changeIndexFile())
+
+
+def catalogEntry(sid):
+    """Collect the catalog record of snapshot ``sid`` from its folder.
+
+    Args:
+        sid (SID): The snapshot.
+
+    Returns:
+        snapshotcatalog.CatalogEntry: The record.
+    """
+    try:
+        last_checked = os.path.getatime(sid.path(SID.INFO))
+    except OSError:
+        last_checked = 0.0
+
+    return CatalogEntry(sid=sid.sid,
+                        name=sid.name or '',
+                        failed=sid.failed,
+                        tag=sid.tag,
+                        last_checked=last_checked)
+
+
+def _probeCatalogItem(cfg, item):
+    """Catalog record of the snapshot folder item ``item`` or ``None`` if it
+    isn't a snapshot. See :py:func:`snapshotcatalog.SnapshotCatalog.sync`.
+    """
+    if item in (NewSnapshot.NEWSNAPSHOT, 'last_snapshot'):
+        return None
+
+    try:
+        sid = SID(item, cfg)
+    except (ValueError, LastSnapshotSymlink):
+        return None
+
+    if not sid.exists():
+        return None
+
+    return catalogEntry(sid)
+
+
+def rebuildCatalog(cfg):
+    """Rebuild the snapshot catalog of the current profile from scratch.
+
+    Args:
+        cfg (config.Config): Current config instance.
+
+    Returns:
+        bool: ``True`` if the catalog was written.
+    """
+    catalog = snapshotCatalog(cfg)
+
+    if not os.path.isdir(catalog.path):
+        return False
+
+    return catalog.rebuild(catalogEntry(sid) for sid in iterSnapshots(cfg))
+
+
+def listSnapshots(cfg, includeNewSnapshot=False, reverse=True,
+                  useCatalog=True):
     """
     List of snapshots in current snapshot path.
 
+    By default the snapshot catalog (see
+    :py:class:`snapshotcatalog.SnapshotCatalog`) is used. It is validated with
+    one ``stat()`` call and only brought up to date if the snapshot folder was
+    modified outside of Back In Time. Name, failed flag and last check of the
+    returned snapshots are taken from it, too.
+
     Args:
         cfg (config.Config): Current config instance.
         includeNewSnapshot (bool): Include a NewSnapshot instance if
             'new_snapshot' directory is available (default: False).
         reverse (bool): Sort reverse (default: True).
+        useCatalog (bool): Use the snapshot catalog instead of scanning the
+            snapshot folder (default: True).
 
     Returns:
         list: List of :py:class:`SID` objects.
     """
-    ret = list(iterSnapshots(cfg, includeNewSnapshot))
+    catalog = snapshotCatalog(cfg)
+    entries = None
+
+    if useCatalog and os.path.isdir(catalog.path):
+        entries = catalog.entries()
+
+        if entries is None:
+            entries = catalog.sync(lambda item: _probeCatalogItem(cfg, item))
+
+    if entries is None:
+        ret = list(iterSnapshots(cfg, includeNewSnapshot))
+
+    else:
+        ret = []
+
+        for entry in entries:
+            sid = SID(entry.sid, cfg)
+            # name, failed flag and last check without opening files
+            sid.catalogEntry = entry
+            ret.append(sid)
+
+        if includeNewSnapshot:
+            newSid = NewSnapshot(cfg)
+
+            if newSid.exists():
+                ret.append(newSid)
+
     ret.sort(reverse=reverse)
 
     return ret
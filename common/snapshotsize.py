@@ -0,0 +1,342 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Space held exclusively by a snapshot.
+
+Unchanged files are hardlinked between snapshots (``rsync --link-dest``).
+So the size of a snapshot folder says nothing about the space which is
+freed when it is removed. A file is exclusive to a snapshot if all its
+hardlinks (``st_nlink``) are inside that snapshot. Folders are always
+exclusive.
+
+Hardlinks only exist between neighbouring snapshots: a file unchanged from
+snapshot A to C is linked in A, B and C. Therefore the exclusive size of a
+snapshot only changes if its direct neighbours change. The result is cached
+inside the snapshot folder together with the IDs of both neighbours.
+
+Next to the summary the cache keeps the inode numbers of all exclusive
+items. When a new snapshot is taken only the new snapshot is walked. The
+exclusive items of the previous snapshot which the new one links to are
+removed from its cache without walking it again.
+"""
+from __future__ import annotations
+import os
+import stat
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+import configfile
+import logger
+
+# Summary of the cache in ConfigFile format
+SIZE_FILE = 'size'
+# Inode numbers and sizes of all exclusive items as pairs of little endian
+# uint64
+INODES_FILE = 'size.inodes'
+VERSION = 1
+CACHE_FILES = (SIZE_FILE, INODES_FILE, INODES_FILE + '.tmp')
+
+
+@dataclass
+class SnapshotSize:
+    """Size of a snapshot in bytes (allocated blocks) and inodes.
+
+    ``exclusive_*`` is what gets freed when removing the snapshot.
+    ``total_*`` counts every inode once, including the shared ones.
+    """
+    exclusive_bytes: int = 0
+    exclusive_inodes: int = 0
+    total_bytes: int = 0
+    total_inodes: int = 0
+
+
+class Usage:
+    """Space held exclusively by a set of snapshots.
+
+    Snapshots are added one after another. An item counts as exclusive as
+    soon as all its hardlinks were found in the added snapshots. So this is
+    also the space released by removing all of them together, which is more
+    than the sum of their single exclusive sizes.
+    """
+
+    def __init__(self):
+        self.size = SnapshotSize()
+        # inode: bytes of all exclusive items
+        self.exclusive = {}
+        # inode: number of links found so far
+        self._linked = {}
+
+    @property
+    def shared(self) -> set:
+        """Inodes which have hardlinks outside of the added snapshots."""
+        return set(self._linked)
+
+    def add(self, path: str) -> SnapshotSize:
+        """Walk the snapshot folder ``path``.
+
+        The cache files are not counted.
+
+        Args:
+            path: Snapshot folder.
+
+        Returns:
+            SnapshotSize: Size of all snapshots added so far.
+        """
+        size = self.size
+        stack = [path]
+
+        while stack:
+            current = stack.pop()
+
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+
+            except OSError as exc:
+                logger.warning(f'Failed to scan {current}: {exc}')
+                continue
+
+            for entry in entries:
+                if current == path and entry.name in CACHE_FILES:
+                    continue
+
+                try:
+                    st = entry.stat(follow_symlinks=False)
+
+                except OSError:
+                    continue
+
+                blocks = st.st_blocks * 512
+                is_dir = stat.S_ISDIR(st.st_mode)
+
+                if is_dir:
+                    stack.append(entry.path)
+
+                count = self._linked.pop(st.st_ino, 0) + 1
+
+                if count == 1:
+                    size.total_bytes += blocks
+                    size.total_inodes += 1
+
+                if is_dir or count >= st.st_nlink:
+                    # all links are inside the added snapshots
+                    self.exclusive[st.st_ino] = blocks
+                    size.exclusive_bytes += blocks
+                    size.exclusive_inodes += 1
+
+                else:
+                    self._linked[st.st_ino] = count
+
+        return size
+
+
+def measure(path: str) -> tuple[SnapshotSize, dict, set]:
+    """Walk the snapshot folder ``path``.
+
+    Args:
+        path: Snapshot folder.
+
+    Returns:
+        tuple: The :py:class:`SnapshotSize`, a dict ``{inode: bytes}`` of
+            all exclusive items and a set of the inodes which have hardlinks
+            outside of ``path``.
+    """
+    usage = Usage()
+    size = usage.add(path)
+
+    return size, usage.exclusive, usage.shared
+
+
+def _key(neighbours) -> str:
+    return '|'.join(sid or '' for sid in neighbours)
+
+
+class SizeCache:
+    """Cached :py:class:`SnapshotSize` of one snapshot.
+
+    Args:
+        path: Snapshot folder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sizeFile = os.path.join(path, SIZE_FILE)
+        self.inodesFile = os.path.join(path, INODES_FILE)
+
+    def load(self, neighbours: tuple) -> Optional[SnapshotSize]:
+        """Cached size if it was computed with the same neighbours.
+
+        Args:
+            neighbours: IDs (str or ``None``) of the previous and the next
+                snapshot.
+
+        Returns:
+            SnapshotSize: The size or ``None`` if not cached or outdated.
+        """
+        if not os.path.exists(self.sizeFile):
+            return None
+
+        cfg = configfile.ConfigFile()
+        cfg.load(self.sizeFile)
+
+        if (cfg.intValue('version') != VERSION
+                or cfg.strValue('neighbours') != _key(neighbours)):
+            return None
+
+        return SnapshotSize(
+            exclusive_bytes=cfg.intValue('exclusive.bytes'),
+            exclusive_inodes=cfg.intValue('exclusive.inodes'),
+            total_bytes=cfg.intValue('total.bytes'),
+            total_inodes=cfg.intValue('total.inodes'))
+
+    def loadExclusive(self, neighbours: tuple) -> Optional[dict]:
+        """Cached ``{inode: bytes}`` of the exclusive items.
+
+        Returns:
+            dict: Exclusive items or ``None`` if not cached or outdated.
+        """
+        if self.load(neighbours) is None:
+            return None
+
+        try:
+            with open(self.inodesFile, 'rb') as handle:
+                data = array('Q', handle.read())
+
+        except OSError:
+            return None
+
+        if data.itemsize != 8 or len(data) % 2:
+            return None
+
+        if sys.byteorder != 'little':
+            data.byteswap()
+
+        return dict(zip(data[::2], data[1::2]))
+
+    def save(self,
+             size: SnapshotSize,
+             neighbours: tuple,
+             exclusive: Optional[dict] = None) -> bool:
+        """Store the size.
+
+        Args:
+            size: The size.
+            neighbours: IDs of the previous and the next snapshot.
+            exclusive: ``{inode: bytes}`` of the exclusive items.
+
+        Returns:
+            bool: ``True`` if successful.
+        """
+        cfg = configfile.ConfigFile()
+        cfg.setIntValue('version', VERSION)
+        cfg.setStrValue('neighbours', _key(neighbours))
+        cfg.setIntValue('exclusive.bytes', size.exclusive_bytes)
+        cfg.setIntValue('exclusive.inodes', size.exclusive_inodes)
+        cfg.setIntValue('total.bytes', size.total_bytes)
+        cfg.setIntValue('total.inodes', size.total_inodes)
+
+        try:
+            if exclusive is not None:
+                data = array('Q')
+                for item in exclusive.items():
+                    data.extend(item)
+
+                if sys.byteorder != 'little':
+                    data.byteswap()
+
+                with open(self.inodesFile + '.tmp', 'wb') as handle:
+                    data.tofile(handle)
+                os.replace(self.inodesFile + '.tmp', self.inodesFile)
+
+            elif os.path.exists(self.inodesFile):
+                os.remove(self.inodesFile)
+
+        except OSError as exc:
+            logger.warning(f'Failed to write {self.inodesFile}: {exc}')
+            return False
+
+        return cfg.save(self.sizeFile)
+
+
+def exclusiveSize(path: str,
+                  neighbours: tuple,
+                  compute: bool = True) -> Optional[SnapshotSize]:
+    """Size of the snapshot ``path`` from the cache or by walking it.
+
+    Args:
+        path: Snapshot folder.
+        neighbours: IDs of the previous and the next snapshot.
+        compute: Walk the snapshot if there is no valid cache.
+
+    Returns:
+        SnapshotSize: The size or ``None`` if not cached and ``compute`` is
+            ``False``.
+    """
+    cache = SizeCache(path)
+    size = cache.load(neighbours)
+
+    if size is None and compute:
+        size, exclusive, _ = measure(path)
+        cache.save(size, neighbours, exclusive)
+
+    return size
+
+
+def addSnapshot(path: str,
+                neighbours: tuple,
+                prev_path: Optional[str] = None,
+                prev_neighbours: tuple = (None, None),
+                prev_new_neighbours: tuple = (None, None)) -> SnapshotSize:
+    """Measure a new snapshot and update the cache of the previous one.
+
+    Only the new snapshot is walked. If the previous snapshot has a valid
+    cache (computed with ``prev_neighbours``) its exclusive items which are
+    linked by the new snapshot are removed. Otherwise its cache is left
+    outdated and gets recomputed on the next request.
+
+    Args:
+        path: Folder of the new snapshot.
+        neighbours: IDs of the neighbours of the new snapshot.
+        prev_path: Folder of the previous snapshot.
+        prev_neighbours: Neighbours of the previous snapshot before the new
+            one was taken.
+        prev_new_neighbours: Neighbours of the previous snapshot now.
+
+    Returns:
+        SnapshotSize: Size of the new snapshot.
+    """
+    size, exclusive, shared = measure(path)
+    SizeCache(path).save(size, neighbours, exclusive)
+
+    if prev_path:
+        cache = SizeCache(prev_path)
+        prev_exclusive = cache.loadExclusive(prev_neighbours)
+
+        if prev_exclusive is not None:
+            prev_size = cache.load(prev_neighbours)
+            prev_exclusive = {ino: blocks
+                              for ino, blocks in prev_exclusive.items()
+                              if ino not in shared}
+            prev_size.exclusive_bytes = sum(prev_exclusive.values())
+            prev_size.exclusive_inodes = len(prev_exclusive)
+            cache.save(prev_size, prev_new_neighbours, prev_exclusive)
+
+    return size
+
+
+def formatSize(value: int) -> str:
+    """Human readable size (e.g. ``1.5 GiB``)."""
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if value < 1024 or unit == 'TiB':
+            break
+        value /= 1024
+
+    if unit == 'B':
+        return f'{value} {unit}'
+
+    return f'{value:.1f} {unit}'
@@ -0,0 +1,249 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Benchmark of the SSH transfer speed with different ciphers.
+
+For each combination of cipher, MAC and compression a given amount of
+random data is streamed through ``ssh ... cat > /dev/null``. No temporary
+file is written on either side. The throughput and the CPU time of the
+local ``ssh`` process and of the remote ``sshd`` session are measured.
+
+The CPU time of the remote side is read from ``/proc/<sshd>/stat`` before
+and after the transfer. It is not available if the remote host is no Linux
+system.
+"""
+from __future__ import annotations
+import os
+import re
+import resource
+import subprocess
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Callable, Iterable, Optional
+import logger
+
+# Size of the data block written repeatedly
+BLOCK_SIZE = 1024 * 1024
+
+# Remote shell command. Its parent process is the sshd session which does
+# the decryption. The fields after "pid (comm) " start with the state, so
+# utime and stime are the fields 12 and 13.
+REMOTE_COMMAND = (
+    "cpu() { sed 's/.*) //' /proc/$PPID/stat 2>/dev/null"
+    " | awk '{print $12 + $13}'; }; "
+    "a=$(cpu); cat > /dev/null; b=$(cpu); "
+    "echo \"backintime-cpu ${a:--} ${b:--} $(getconf CLK_TCK)\"")
+
+
+@dataclass
+class Result:
+    """Measurement of one combination.
+
+    Attributes:
+        cipher: Cipher or ``default``.
+        mac: MAC or ``default``.
+        compression: ``True`` if compression was enabled.
+        size: Transferred bytes.
+        seconds: Wall clock time of the transfer.
+        local_cpu: CPU seconds (user and system) of the local ``ssh``.
+        remote_cpu: CPU seconds of the remote ``sshd`` or ``None`` if not
+            available.
+        error: Error message if the combination failed.
+    """
+    cipher: str
+    mac: str = 'default'
+    compression: bool = False
+    size: int = 0
+    seconds: float = 0.0
+    local_cpu: float = 0.0
+    remote_cpu: Optional[float] = None
+    error: str = ''
+
+    @property
+    def mbPerSecond(self) -> float:
+        """Throughput in MiB per second. ``0`` if the combination failed."""
+        if self.error or self.seconds <= 0:
+            return 0.0
+
+        return self.size / self.seconds / 1024 / 1024
+
+    def toDict(self) -> dict:
+        """Dictionary of all attributes including the throughput."""
+        result = asdict(self)
+        result['mb_per_second'] = round(self.mbPerSecond, 3)
+
+        return result
+
+
+def supported(query: str) -> Optional[set[str]]:
+    """Algorithms of type ``query`` (``cipher`` or ``mac``) supported by the
+    local ``ssh`` or ``None`` if that is unknown."""
+    try:
+        proc = subprocess.run(['ssh', '-Q', query],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              universal_newlines=True,
+                              check=False)
+
+    except OSError:
+        return None
+
+    if proc.returncode:
+        return None
+
+    return set(proc.stdout.split())
+
+
+def combinations(ciphers: Iterable[str],
+                 macs: Iterable[str] = ('default', ),
+                 compression: bool = False) -> list[tuple[str, str, bool]]:
+    """All combinations of ``ciphers`` and ``macs``, each without and, if
+    ``compression`` is set, with compression."""
+    modes = (False, True) if compression else (False, )
+
+    return [(cipher, mac, mode)
+            for cipher in ciphers
+            for mac in macs
+            for mode in modes]
+
+
+def sshArgs(cipher: str, mac: str, compression: bool) -> list[str]:
+    """``ssh`` arguments to use the given combination."""
+    # A running master connection would ignore the arguments below.
+    args = ['-S', 'none']
+
+    if cipher != 'default':
+        args += ['-o', f'Ciphers={cipher}']
+
+    if mac != 'default':
+        args += ['-o', f'MACs={mac}']
+
+    args += ['-o', 'Compression={}'.format('yes' if compression else 'no')]
+
+    return args
+
+
+def parseRemoteCpu(output: str) -> Optional[float]:
+    """CPU seconds of the remote session from the output of
+    :py:data:`REMOTE_COMMAND`."""
+    match = re.search(r'^backintime-cpu (\S+) (\S+) (\d+)$', output, re.M)
+
+    if not match:
+        return None
+
+    try:
+        before, after = float(match.group(1)), float(match.group(2))
+        ticks = int(match.group(3))
+
+    except ValueError:
+        return None
+
+    if ticks <= 0 or after < before:
+        return None
+
+    return (after - before) / ticks
+
+
+def measure(cmd: list[str], size: int) -> Result:
+    """Stream ``size`` bytes of random data into ``cmd``.
+
+    Args:
+        cmd: Command reading the data from stdin and running
+            :py:data:`REMOTE_COMMAND`.
+        size: Number of bytes.
+
+    Returns:
+        Result: Measurement without cipher, MAC and compression set.
+    """
+    block = os.urandom(BLOCK_SIZE)
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = perf_counter()
+    written = 0
+
+    with subprocess.Popen(cmd,
+                          stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE) as proc:
+        try:
+            while written < size:
+                chunk = block[:size - written]
+                proc.stdin.write(chunk)
+                written += len(chunk)
+
+        except BrokenPipeError:
+            pass
+
+        # closes stdin and waits for the remote CPU time
+        output, error = proc.communicate()
+
+    seconds = perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    local_cpu = (after.ru_utime - before.ru_utime
+                 + after.ru_stime - before.ru_stime)
+
+    if proc.returncode:
+        return Result('', size=written, seconds=seconds, local_cpu=local_cpu,
+                      error=error.decode(errors='replace').strip()
+                      or f'Exit code {proc.returncode}')
+
+    return Result('',
+                  size=written,
+                  seconds=seconds,
+                  local_cpu=local_cpu,
+                  remote_cpu=parseRemoteCpu(output.decode(errors='replace')))
+
+
+def benchmark(cfg,
+              size: int,
+              ciphers: Iterable[str],
+              macs: Iterable[str] = ('default', ),
+              compression: bool = False,
+              profile_id: Optional[str] = None,
+              log: Optional[Callable[[Result], None]] = None
+              ) -> list[Result]:
+    """Measure all combinations.
+
+    Args:
+        cfg (config.Config): Current config.
+        size: Bytes to transfer for each combination.
+        ciphers: Ciphers to measure. ``default`` is the ``ssh`` default.
+        macs: MACs to measure. ``default`` is the ``ssh`` default.
+        compression: Measure each combination also with compression.
+        profile_id: Profile to use. Default is the current profile.
+        log: Called with each result.
+
+    Returns:
+        list: One result per combination.
+    """
+    results = []
+
+    for cipher, mac, mode in combinations(ciphers, macs, compression):
+        cmd = cfg.sshCommand(cmd=[REMOTE_COMMAND],
+                             custom_args=sshArgs(cipher, mac, mode),
+                             cipher=False,
+                             nice=False,
+                             ionice=False,
+                             prefix=False,
+                             profile_id=profile_id)
+        logger.debug(f'Benchmark cipher {cipher}, MAC {mac}, '
+                     f'compression {mode}')
+
+        result = measure(cmd, size)
+        result.cipher, result.mac, result.compression = cipher, mac, mode
+        results.append(result)
+
+        if log:
+            log(result)
+
+    return results
+
+
+def winner(results: Iterable[Result]) -> Optional[Result]:
+    """Fastest successful result or ``None``."""
+    ok = [result for result in results if not result.error]
+
+    return max(ok, key=lambda result: result.mbPerSecond, default=None)
@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Cache of successful checks before mounting SSH profiles.
+
+Some checks of :py:meth:`sshtools.SSH.preMountCheck` (cipher support and the
+remote commands including the hard-link test) need several connections and
+transfers. Their success is remembered in a small JSON file for a limited
+time. The cache key is a hash of all settings the checks depend on. So
+changing one of them (e.g. host, port, path or cipher) makes the cache miss
+and the checks run again. Failed checks are never cached.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+import logger
+
+
+def cacheKey(**settings) -> str:
+    """Hash of the settings a check depends on."""
+    data = json.dumps(settings, sort_keys=True, default=str)
+
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CheckCache:
+    """Timestamps of successful checks stored in ``filename``.
+
+    Reading and writing is failure tolerant. A broken or unreadable file
+    behaves like an empty cache.
+
+    Args:
+        filename: JSON file of the cache.
+        ttl: Seconds a successful check stays valid. ``0`` disables the
+            cache.
+    """
+
+    def __init__(self, filename: str, ttl: float):
+        self.filename = filename
+        self.ttl = ttl
+
+    def _load(self) -> dict:
+        try:
+            with open(self.filename, 'rt', encoding='utf-8') as handle:
+                data = json.load(handle)
+
+        except (OSError, ValueError):
+            return {}
+
+        return data if isinstance(data, dict) else {}
+
+    def _save(self, data: dict) -> None:
+        tmp = self.filename + '.tmp'
+
+        try:
+            with open(tmp, 'wt', encoding='utf-8') as handle:
+                json.dump(data, handle)
+
+            os.replace(tmp, self.filename)
+
+        except OSError as exc:
+            logger.debug(f'Failed to write {self.filename}: {exc}', self)
+
+    def valid(self, check: str, key: str, now: Optional[float] = None) -> bool:
+        """``True`` if ``check`` succeeded with the settings ``key`` within
+        the TTL."""
+        if self.ttl <= 0:
+            return False
+
+        now = time.time() if now is None else now
+        stamp = self._load().get(key, {}).get(check)
+
+        return isinstance(stamp, (int, float)) and 0 <= now - stamp < self.ttl
+
+    def store(self, check: str, key: str, now: Optional[float] = None) -> None:
+        """Remember that ``check`` succeeded with the settings ``key``.
+
+        Expired entries are dropped on the way.
+        """
+        if self.ttl <= 0:
+            return
+
+        now = time.time() if now is None else now
+        data = {}
+
+        for old_key, checks in self._load().items():
+            if not isinstance(checks, dict):
+                continue
+
+            checks = {name: stamp for name, stamp in checks.items()
+                      if isinstance(stamp, (int, float))
+                      and 0 <= now - stamp < self.ttl}
+
+            if checks:
+                data[old_key] = checks
+
+        data.setdefault(key, {})[check] = now
+        self._save(data)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Forget the checks of settings ``key`` or all checks."""
+        data = self._load()
+
+        if key is None:
+            data = {}
+
+        else:
+            data.pop(key, None)
+
+        self._save(data)
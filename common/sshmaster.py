@@ -0,0 +1,214 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Shared SSH connection (OpenSSH ``ControlMaster``) of SSH profiles.
+
+Taking a snapshot of an SSH profile runs many SSH commands: the checks
+before mounting, ``sshfs``, ``rsync``, ``df`` and the smart-remove helper.
+Each of them would do its own TCP and SSH handshake. Instead one master
+connection is started before mounting and all other commands are
+multiplexed over its socket.
+
+While the socket of the master exists all SSH commands get ``ControlPath``
+and ``ControlMaster=no`` and use it. Otherwise they connect directly. The
+socket name is a hash of user, host, port and proxy of the profile. So a
+command never uses the master of another host, user or port. The master
+is not used at all if the socket folder is not a private folder of the
+current user.
+
+The master is stopped when ``sshfs`` gets unmounted. It also exits by itself
+after :py:data:`CONTROL_PERSIST` seconds without any connection.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import stat
+import subprocess
+import tempfile
+import logger
+
+# Seconds the master stays alive without any multiplexed connection.
+CONTROL_PERSIST = 60
+
+
+def socketFolder() -> str:
+    """Private folder for the master sockets. It is created by
+    :py:func:`start`.
+
+    Unix sockets have a short maximum path length, so the user's runtime
+    folder is preferred over the local data folder.
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    uid = os.getuid()
+
+    if not runtime and os.path.isdir(f'/run/user/{uid}'):
+        runtime = f'/run/user/{uid}'
+
+    if runtime:
+        folder = os.path.join(runtime, 'backintime')
+    else:
+        folder = os.path.join(tempfile.gettempdir(), f'backintime-{uid}')
+
+    return folder
+
+
+def isPrivateFolder(path: str) -> bool:
+    """``True`` if ``path`` is a real folder (not a symlink) owned by the
+    current user and accessible only by them (mode ``0700``).
+
+    The fallback folder in ``/tmp`` has a predictable name. Another user
+    could create it before us, so it is not trusted without this check.
+    """
+    try:
+        info = os.lstat(path)
+
+    except OSError:
+        return False
+
+    return (stat.S_ISDIR(info.st_mode)
+            and info.st_uid == os.getuid()
+            and stat.S_IMODE(info.st_mode) == 0o700)
+
+
+def socketPath(cfg, profile_id=None) -> str:
+    """Socket of the master connection of the profile."""
+    target = '{}@{}:{}'.format(cfg.sshUser(profile_id),
+                               cfg.sshHost(profile_id),
+                               cfg.sshPort(profile_id))
+
+    if cfg.sshProxyHost(profile_id):
+        target += ' via {}@{}:{}'.format(cfg.sshProxyUser(profile_id),
+                                         cfg.sshProxyHost(profile_id),
+                                         cfg.sshProxyPort(profile_id))
+
+    name = hashlib.sha1(target.encode()).hexdigest()[:20]
+
+    return os.path.join(socketFolder(), name)
+
+
+def controlArgs(cfg, profile_id=None, master: bool = False) -> list[str]:
+    """Arguments for ``ssh`` and ``sshfs`` to use the shared connection.
+
+    Args:
+        cfg (config.Config): Current config.
+        profile_id (str): Profile to use. Default is the current profile.
+        master: Arguments to start the master itself.
+
+    Returns:
+        list: ``-o`` arguments or an empty list if the master is disabled,
+            its socket doesn't exist or the socket folder is not private.
+    """
+    if not cfg.sshControlMaster(profile_id):
+        return []
+
+    path = socketPath(cfg, profile_id)
+
+    if not master and not (os.path.exists(path)
+                           and isPrivateFolder(socketFolder())):
+        return []
+
+    args = ['-o', f'ControlPath={path}']
+
+    if master:
+        args += ['-o', 'ControlMaster=yes',
+                 '-o', f'ControlPersist={CONTROL_PERSIST}']
+
+    else:
+        args += ['-o', 'ControlMaster=no']
+
+    return args
+
+
+def _control(cfg, command: str, profile_id=None) -> int:
+    """Send a control ``command`` (``check`` or ``exit``) to the master.
+
+    Returns:
+        int: Return code of ``ssh``.
+    """
+    cmd = cfg.sshCommand(custom_args=['-O', command], profile_id=profile_id)
+
+    return subprocess.run(cmd,
+                          stdin=subprocess.DEVNULL,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL,
+                          check=False).returncode
+
+
+def isRunning(cfg, profile_id=None) -> bool:
+    """``True`` if the master of the profile is running."""
+    if not os.path.exists(socketPath(cfg, profile_id)):
+        return False
+
+    return _control(cfg, 'check', profile_id) == 0
+
+
+def start(cfg, profile_id=None) -> bool:
+    """Start the master connection of the profile if not running yet.
+
+    Errors are not raised. Without master every command connects on its
+    own, which is what the checks before mounting report.
+
+    Args:
+        cfg (config.Config): Current config.
+        profile_id (str): Profile to use. Default is the current profile.
+
+    Returns:
+        bool: ``True`` if the master is running.
+    """
+    if not cfg.sshControlMaster(profile_id):
+        return False
+
+    if isRunning(cfg, profile_id):
+        return True
+
+    folder = socketFolder()
+
+    try:
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+
+        if not isPrivateFolder(folder):
+            logger.warning(f'SSH master socket folder {folder} is not a '
+                           'private folder of the current user. Connect '
+                           'without SSH master.')
+            return False
+
+        # stale socket of a master which didn't exit cleanly
+        if os.path.exists(socketPath(cfg, profile_id)):
+            os.remove(socketPath(cfg, profile_id))
+
+    except OSError as exc:
+        logger.debug(f'Failed to create SSH master socket folder: {exc}')
+        return False
+
+    cmd = cfg.sshCommand(custom_args=['-N', '-f'],
+                         master=True,
+                         profile_id=profile_id)
+    logger.debug(f'Start SSH master connection: {cmd}')
+
+    # A pipe would be kept open by the master running in background.
+    with tempfile.TemporaryFile('w+t') as err:
+        proc = subprocess.run(cmd,
+                              stdin=subprocess.DEVNULL,
+                              stdout=subprocess.DEVNULL,
+                              stderr=err,
+                              check=False)
+
+        if proc.returncode:
+            err.seek(0)
+            logger.debug('Failed to start SSH master connection: '
+                         f'{err.read().strip()}')
+            return False
+
+    return True
+
+
+def stop(cfg, profile_id=None) -> None:
+    """Stop the master connection of the profile. All connections which are
+    multiplexed over it are closed too."""
+    if cfg.sshControlMaster(profile_id) and isRunning(cfg, profile_id):
+        logger.debug('Stop SSH master connection')
+        _control(cfg, 'exit', profile_id)
@@ -16,15 +16,18 @@ import re
 import atexit
 import signal
 from pathlib import Path
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
 import logger
 import tools
 import password
 import password_ipc
 from mount import MountControl
 from exceptions import MountException, NoPubKeyLogin, KnownHost
-import bcolors
 import version
+import sshmaster
+import sshcheckcache
+import sshbenchmark
 
 
 class SSH(MountControl):
@@ -234,6 +237,16 @@ class SSH(MountControl):
             )
         )
 
+    def _umount(self):
+        """
+        Unmount ``sshfs`` and stop the shared SSH connection.
+
+        Raises:
+            exceptions.MountException: If unmount failed.
+        """
+        super()._umount()
+        sshmaster.stop(self.config, self.profile_id)
+
     def preMountCheck(self, first_run=False):
         """
         Check that everything is prepared and ready for successfully mount the
@@ -242,7 +255,9 @@ class SSH(MountControl):
         the remote folder is available.
 
         After changing settings this should be run with ``first_run = True``
-        to run a full check with all tests.
+        to run a full check with all tests. The expensive checks of cipher and
+        remote commands are skipped if they succeeded with the same settings
+        before (see :py:func:`config.Config.sshCheckCacheHours`).
 
         Args:
             first_run (bool): Run a full test with all checks.
@@ -253,30 +268,103 @@ class SSH(MountControl):
         """
 
         # Most of the called methods will raise an exception if something is
-        # wrong.
+        # wrong. Checks within one call of _runChecks() do not depend on each
+        # other and run concurrently.
 
-        # try to open SSH socket
-        self.checkPingHost()
-
-        # sshfs (self.mountproc) installed?
-        self.checkFuse()
+        # try to open SSH socket, sshfs (self.mountproc) installed?
+        checks = [self.checkPingHost, self.checkFuse]
 
         if first_run:
-            self.unlockSshAgent(force=True)
-            self.checkKnownHosts()
+            checks.append(self.checkKnownHosts)
 
-        self.checkLogin()
+        self._runChecks(*checks)
 
         if first_run:
-            self.checkCipher()
+            self.unlockSshAgent(force=True)
 
-        self.checkRemoteFolder()
+        # all following ssh commands, sshfs and rsync share this connection
+        sshmaster.start(self.config, self.profile_id)
+
+        self._runChecks(self.checkLogin)
 
         if first_run:
-            self.checkRemoteCommands()
+            self._runChecks(self._cachedCheck(self.checkCipher),
+                            self.checkRemoteFolder)
+            self._runChecks(self._cachedCheck(self.checkRemoteCommands))
+
+        else:
+            self._runChecks(self.checkRemoteFolder)
 
         return True
 
+    def _runChecks(self, *checks):
+        """Run ``checks`` concurrently and log the duration of each.
+
+        Raises:
+            exceptions.MountException: The exception of the first failed
+                check in the order of ``checks``.
+        """
+        def timed(check):
+            start = perf_counter()
+
+            try:
+                return check()
+
+            finally:
+                logger.debug(f'{check.__name__} took '
+                             f'{perf_counter() - start:.3f}s', self)
+
+        if len(checks) == 1:
+            return timed(checks[0])
+
+        with ThreadPoolExecutor(max_workers=len(checks),
+                                thread_name_prefix='preMountCheck') as pool:
+            futures = [pool.submit(timed, check) for check in checks]
+
+        for future in futures:
+            future.result()
+
+    def _checkCacheKey(self):
+        """Hash of all settings the cached checks depend on."""
+        return sshcheckcache.cacheKey(
+            profile_id=self.profile_id,
+            user=self.user,
+            host=self.host,
+            port=self.port,
+            path=self.path,
+            cipher=self.cipher,
+            proxy=(self.proxy_user, self.proxy_host, self.proxy_port),
+            private_key=self.private_key_fingerprint,
+            nice=self.nice,
+            ionice=self.ionice,
+            nocache=self.nocache,
+            prefix=self.config.sshPrefixCmd(self.profile_id, cmd_type=str),
+            check_commands=self.config.sshCheckCommands(self.profile_id),
+            remote_remove=self.config.smartRemoveRunRemoteInBackground(
+                self.profile_id))
+
+    def _cachedCheck(self, check):
+        """Wrap ``check`` to skip it if it succeeded with the same settings
+        before (see :py:mod:`sshcheckcache`)."""
+        cache = sshcheckcache.CheckCache(
+            self.config.sshCheckCacheFile(),
+            self.config.sshCheckCacheHours(self.profile_id) * 3600)
+        key = self._checkCacheKey()
+        name = check.__name__
+
+        def cached():
+            if cache.valid(name, key):
+                logger.debug(f'{name} succeeded before with the same '
+                             'settings. Skip it.', self)
+                return
+
+            check()
+            cache.store(name, key)
+
+        cached.__name__ = name
+
+        return cached
+
     def startSshAgent(self):
         """
         Start a new ``ssh-agent`` if it is not already running.
@@ -562,61 +650,35 @@ class SSH(MountControl):
 
                 raise MountException(f'{msg}:\n{err}')
 
-    def benchmarkCipher(self, size=40):
+    def benchmarkCipher(self, size=40, macs=('default', ), compression=False,
+                        log=None):
         """
-        Rudimental benchmark to compare transfer speed of all available
-        ciphers.
+        Benchmark the transfer speed of all ciphers supported by ``ssh``
+        and by Back In Time (see :py:mod:`sshbenchmark`).
 
         Args:
-            size (int):     size of the testfile in MiB
-        """
-
-        temp = tempfile.mkstemp()[1]
-
-        print('create random data file')
-
-        subprocess.call([
-            'dd',
-            'if=/dev/urandom',
-            'of=%s' % temp,
-            'bs=1M',
-            'count=%s' % size
-        ])
-
-        keys = list(self.config.SSH_CIPHERS.keys())
-        keys.sort()
-
-        for cipher in keys:
-
-            if cipher == 'default':
-                continue
-
-            print('%s%s:%s' % (bcolors.BOLD, cipher, bcolors.ENDC))
+            size (int):         MiB transferred per combination
+            macs (list):        MACs combined with each cipher
+            compression (bool): measure each combination with compression too
+            log (method):       called with each :py:class:`sshbenchmark.Result`
 
-            for _ in range(2):
-                # scp uses -P instead of -p for port
-                subprocess.call([
-                    'scp',
-                    '-P',
-                    str(self.port),
-                    '-c',
-                    cipher,
-                    temp,
-                    self.user_host_path
-                ])
+        Returns:
+            list:               :py:class:`sshbenchmark.Result` instances
+        """
+        ciphers = sorted(self.config.SSH_CIPHERS)
+        available = sshbenchmark.supported('cipher')
 
-        ssh = self.config.sshCommand(
-            cmd=['rm', os.path.join(self.path, os.path.basename(temp))],
-            custom_args=['-p', str(self.port), self.user_host],
-            port=False,
-            cipher=False,
-            user_host=False,
-            nice=False,
-            ionice=False,
-            profile_id=self.profile_id)
+        if available is not None:
+            ciphers = [cipher for cipher in ciphers
+                       if cipher == 'default' or cipher in available]
 
-        subprocess.call(ssh)
-        os.remove(temp)
+        return sshbenchmark.benchmark(self.config,
+                                      size * 1024 * 1024,
+                                      ciphers,
+                                      macs,
+                                      compression,
+                                      profile_id=self.profile_id,
+                                      log=log)
 
     def checkKnownHosts(self):
         """Check if the remote host is in current users ``known_hosts`` file.
@@ -913,10 +975,11 @@ class SSH(MountControl):
             cmd += 'test $err_nocache -ne 0 && cleanup $err_nocache; '
             tail.append(cmd)
 
-        # try screen, bash and flock used by smart-remove running in background
+        # try bash, xargs and flock used by smart-remove running on remote
+        # host (see remoteremove.py)
         if self.config.smartRemoveRunRemoteInBackground(self.profile_id):
-            cmd = 'echo \"screen -d -m bash -c ...\"; screen -d -m bash -c \"true\" >/dev/null; err_screen=$?; '
-            cmd += 'test $err_screen -ne 0 && cleanup $err_screen; '
+            cmd = 'echo \"xargs -0 -r -P 2 bash -c ...\"; printf \"a\\0\" | xargs -0 -r -n 1 -P 2 bash -c \"true\" >/dev/null; err_xargs=$?; '
+            cmd += 'test $err_xargs -ne 0 && cleanup $err_xargs; '
             tail.append(cmd)
 
             cmd = 'echo \"(flock -x 9) 9>smr.lock\"; bash -c \"(flock -x 9) 9>smr.lock\" >/dev/null; err_flock=$?; '
@@ -1001,7 +1064,7 @@ class SSH(MountControl):
         if returncode or not output_split[-1].startswith('done'):
 
             for command in ('rm', 'nice', 'ionice',
-                            'nocache', 'screen', '(flock'):
+                            'nocache', 'xargs', '(flock'):
 
                 if output_split[-1].startswith(command):
                     command = f"'{output_split[-1]}':\n{err}"
@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Coalescing, rate limited publisher of status messages.
+
+While taking a snapshot every line rsync prints becomes a status message.
+Rewriting the message file and calling all plugins for each of them costs
+a noticeable part of the backup time if many files change. The publisher
+keeps the latest message in memory and passes it on at most ``rate`` times
+per second. Plugins get all messages since the last flush as one batch.
+Errors are always passed on immediately. Messages are passed on by the
+thread publishing them. There is no background thread calling plugins.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Callable
+
+# Message types. See Snapshots.setTakeSnapshotMessage()
+INFO = 0
+ERROR = 1
+
+# Flush earlier if that many messages are waiting for the plugins.
+MAX_BATCH = 1000
+
+
+class StatusPublisher:
+    """Publish status messages at a bounded rate.
+
+    Args:
+        write: Called with ``(type_id, message)`` of the latest message on
+            every flush. Used to write the message file.
+        deliver: Called with a list of ``(type_id, message, timeout)``
+            tuples of all messages since the last flush. Used to pass them
+            to the plugins.
+        rate: Maximum number of flushes per second. ``0`` disables
+            coalescing and every message is flushed immediately.
+        clock: Monotonic time source (for tests).
+
+    A message which is not flushed immediately is flushed with the next
+    message after ``1 / rate`` seconds or by calling :py:func:`flush`. Call
+    it before a step which publishes nothing for a while, so the latest
+    status doesn't get stuck.
+    """
+
+    def __init__(self,
+                 write: Callable[[int, str], None],
+                 deliver: Callable[[list], None],
+                 rate: float = 4,
+                 clock: Callable[[], float] = time.monotonic):
+        self._write = write
+        self._deliver = deliver
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._latest = None
+        self._batch = []
+        self._lastFlush = None
+
+    def publish(self, type_id: int, message: str, timeout: int = -1) -> None:
+        """Queue a new status message.
+
+        Args:
+            type_id: ``INFO`` or ``ERROR``.
+            message: Message text.
+            timeout: Requested processing timeout for plugins.
+        """
+        with self._lock:
+            self._latest = (type_id, message)
+            self._batch.append((type_id, message, timeout))
+
+            now = self._clock()
+            due = (self._lastFlush is None
+                   or now - self._lastFlush >= self.interval)
+
+            if type_id == ERROR or due or len(self._batch) >= MAX_BATCH:
+                self._flush(now)
+
+    @property
+    def pending(self) -> bool:
+        """``True`` if there are messages which were not flushed yet."""
+        with self._lock:
+            return bool(self._batch)
+
+    def flush(self) -> None:
+        """Pass on all pending messages now."""
+        with self._lock:
+            if self._batch:
+                self._flush(self._clock())
+
+    def close(self) -> None:
+        """Flush pending messages."""
+        self.flush()
+
+    def _flush(self, now):
+        self._lastFlush = now
+
+        latest, self._latest = self._latest, None
+        batch, self._batch = self._batch, []
+
+        if latest is not None:
+            self._write(*latest)
+
+        if batch:
+            self._deliver(batch)
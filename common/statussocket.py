@@ -0,0 +1,341 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Push the status of a running snapshot to subscribers.
+
+While taking a snapshot the backup process listens on a Unix domain socket
+(see :py:func:`config.Config.takeSnapshotSocketFile`, one per profile next
+to the message and progress files). Any number of GUI windows, systray
+icons and command line watchers can connect. Each of them gets one JSON
+object per line::
+
+    {"event": "hello", "version": 1, "pid": 4242, "profile_id": "1",
+     "phase": "transfer", "message": [0, "Taking snapshot"],
+     "progress": {"percent": 26, "sent": "517.38K", ...}}
+    {"event": "phase", "phase": "finalizing"}
+    {"event": "message", "type_id": 1, "message": "Error: ..."}
+    {"event": "progress", "progress": null}
+    {"event": "finished", "error": false}
+
+The first event is always :py:data:`HELLO` with the current state. So a
+subscriber connecting late, or again, doesn't need any history. The other
+events update single fields of that state (see :py:func:`applyEvent`).
+``progress`` is ``null`` after a transfer ended. The connection is closed
+after :py:data:`FINISHED`.
+
+The backup never waits for subscribers. One whose socket buffer is full is
+disconnected. It may connect again and gets the current state.
+
+The message and progress files are still written. Readers fall back to
+them if the socket is missing, e.g. while a backup of an older version is
+running.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import threading
+from typing import Iterator, Optional
+import logger
+
+VERSION = 1
+
+# Events
+HELLO = 'hello'
+PHASE = 'phase'
+MESSAGE = 'message'
+PROGRESS = 'progress'
+FINISHED = 'finished'
+
+# Phases of taking a snapshot
+STARTED = 'started'
+TRANSFER = 'transfer'
+FINALIZING = 'finalizing'
+
+# Seconds the server waits in accept() before checking if it was closed
+ACCEPT_TIMEOUT = 0.5
+
+RECV_BYTES = 64 * 1024
+
+
+def encode(event: str, **fields) -> bytes:
+    """One event as a line of JSON."""
+    return json.dumps(dict(fields, event=event)).encode() + b'\n'
+
+
+def applyEvent(state: dict, event: dict) -> dict:
+    """Update ``state`` (the fields of :py:data:`HELLO`) with ``event``.
+
+    Returns:
+        dict: ``state``
+    """
+    kind = event.get('event')
+
+    if kind == HELLO:
+        state.clear()
+        state.update(event)
+
+    elif kind == PHASE:
+        state['phase'] = event.get('phase')
+
+    elif kind == MESSAGE:
+        state['message'] = [event.get('type_id', 0), event.get('message', '')]
+
+    elif kind == PROGRESS:
+        state['progress'] = event.get('progress')
+
+    elif kind == FINISHED:
+        state['finished'] = True
+        state['error'] = bool(event.get('error'))
+
+    return state
+
+
+class StatusServer:
+    """Socket of the backup process publishing its status.
+
+    Args:
+        path: Filename of the socket.
+        profile_id: Profile of the backup.
+        pid: Process ID of the backup. Default is the current process.
+    """
+
+    def __init__(self, path: str, profile_id: str = '', pid: int = None):
+        self.path = path
+        self.state = {
+            'version': VERSION,
+            'pid': pid or os.getpid(),
+            'profile_id': profile_id,
+            'phase': None,
+            'message': None,
+            'progress': None,
+        }
+        self._lock = threading.Lock()
+        self._clients = []
+        self._sock = None
+        self._thread = None
+        self._closed = threading.Event()
+
+    def start(self) -> bool:
+        """Listen for subscribers in a background thread.
+
+        Returns:
+            bool: ``False`` if the socket can't be created. Subscribers have
+                to read the status files then.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            # Left over by a crashed backup. Only one backup per profile is
+            # running, which is this one.
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+            sock.bind(self.path)
+            # Only the user may connect. Nobody can connect before listen(),
+            # so there is no window with wider permissions.
+            os.chmod(self.path, 0o600)
+            sock.listen()
+            sock.settimeout(ACCEPT_TIMEOUT)
+
+        except OSError as exc:
+            logger.debug(f'Failed to create status socket {self.path}: '
+                         f'{exc}', self)
+            sock.close()
+            return False
+
+        self._sock = sock
+        self._thread = threading.Thread(
+            target=self._accept, name='StatusServer', daemon=True)
+        self._thread.start()
+
+        return True
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._sock.accept()
+
+            except socket.timeout:
+                continue
+
+            except OSError:
+                break
+
+            if self._closed.is_set():
+                conn.close()
+                break
+
+            conn.setblocking(False)
+
+            # holding the lock keeps HELLO in front of all further events
+            with self._lock:
+                if self._send(conn, encode(HELLO, **self.state)):
+                    self._clients.append(conn)
+
+    @staticmethod
+    def _send(conn: socket.socket, data: bytes) -> bool:
+        try:
+            conn.sendall(data)
+
+        except OSError:
+            # gone or not reading (buffer full)
+            conn.close()
+            return False
+
+        return True
+
+    @property
+    def subscribers(self) -> int:
+        """Number of connected subscribers."""
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, event: str, **fields) -> None:
+        """Update the state and send ``event`` to all subscribers."""
+        with self._lock:
+            if event != FINISHED:
+                applyEvent(self.state, dict(fields, event=event))
+
+            if not self._clients:
+                return
+
+            data = encode(event, **fields)
+            self._clients = [conn for conn in self._clients
+                             if self._send(conn, data)]
+
+    def close(self, error: bool = False) -> None:
+        """Send :py:data:`FINISHED`, disconnect all subscribers and remove
+        the socket."""
+        if self._sock is None:
+            return
+
+        self.publish(FINISHED, error=error)
+        self._closed.set()
+
+        # wake up accept() instead of waiting for its timeout
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as wakeup:
+            try:
+                wakeup.connect(self.path)
+
+            except OSError:
+                pass
+
+        self._thread.join(ACCEPT_TIMEOUT * 2)
+
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+
+            self._clients = []
+
+        self._sock.close()
+        self._sock = None
+
+        try:
+            os.unlink(self.path)
+
+        except OSError as exc:
+            logger.debug(f'Failed to remove status socket {self.path}: '
+                         f'{exc}', self)
+
+
+class StatusClient:
+    """Subscriber of a :py:class:`StatusServer`.
+
+    Args:
+        path: Filename of the socket.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock = None
+        self._buffer = b''
+
+    def connect(self) -> bool:
+        """Connect to the backup process.
+
+        Returns:
+            bool: ``False`` if no backup with status socket is running.
+        """
+        # cheap check while no backup is running
+        if not os.path.exists(self.path):
+            return False
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(self.path)
+
+        except OSError:
+            sock.close()
+            return False
+
+        self._sock = sock
+        self._buffer = b''
+
+        return True
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def setBlocking(self, flag: bool) -> None:
+        self._sock.setblocking(flag)
+
+    def receive(self) -> Optional[list[dict]]:
+        """Read the available events. Blocks if the socket is blocking.
+
+        Returns:
+            list: Events (might be empty) or ``None`` if the connection was
+                closed.
+        """
+        try:
+            data = self._sock.recv(RECV_BYTES)
+
+        except BlockingIOError:
+            return []
+
+        except OSError:
+            data = b''
+
+        if not data:
+            self.close()
+            return None
+
+        *lines, self._buffer = (self._buffer + data).split(b'\n')
+        events = []
+
+        for line in lines:
+            try:
+                event = json.loads(line)
+
+            except ValueError:
+                continue
+
+            if isinstance(event, dict) and 'event' in event:
+                events.append(event)
+
+        return events
+
+    def events(self) -> Iterator[dict]:
+        """Yield events until the connection is closed."""
+        while self._sock is not None:
+            events = self.receive()
+
+            if events is None:
+                return
+
+            yield from events
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
@@ -0,0 +1,312 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Benchmark of listing snapshots, retention and housekeeping.
+
+Synthetic snapshot folders (empty ``backup`` folders, random IDs, some of
+them named or marked as failed) are generated in a temporary directory.
+Each housekeeping stage is timed for every requested number of snapshots.
+The minimum free space is set above the free space of the temporary
+directory, so the ``free_space`` stage removes all snapshots it may remove.
+Its fixture is generated again before each repetition.
+The results are stored as JSON and two result files can be compared to
+catch regressions.
+
+This is not part of the unit tests. Run it from the ``common`` folder::
+
+    python3 test/benchmark_housekeeping.py run --counts 1000 10000 \\
+        --output before.json
+    python3 test/benchmark_housekeeping.py run --output after.json
+    python3 test/benchmark_housekeeping.py compare before.json after.json
+"""
+# pylint: disable=wrong-import-position,C0411,import-outside-toplevel,R0801
+from __future__ import annotations
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import config  # noqa: E402,RUF100
+import logger  # noqa: E402,RUF100
+import snapshots  # noqa: E402,RUF100
+
+FORMAT_VERSION = 1
+DEFAULT_COUNTS = (1000, 10000, 100000)
+# Stages in the order they run
+STAGES = ('list_scan',
+          'catalog_rebuild',
+          'list_catalog',
+          'sort_sids',
+          'smart_remove_list',
+          'free_space')
+# Smart Removal rules: keep all, per day, per week, per month
+RULES = (2, 7, 4, 24)
+# Date of the youngest synthetic snapshot
+NOW = datetime(2026, 1, 1)
+
+CONFIG = '''
+    config.version=6
+    profile1.snapshots.include.1.type=0
+    profile1.snapshots.include.1.value={path}/source
+    profile1.snapshots.include.size=1
+    profile1.snapshots.path={path}/destination
+    profile1.snapshots.path.host=host
+    profile1.snapshots.path.profile=1
+    profile1.snapshots.path.user=user
+    profile1.snapshots.remove_old_snapshots.enabled=false
+    profile1.snapshots.smart_remove=false
+    profile1.snapshots.min_free_space.enabled=true
+    profile1.snapshots.min_free_space.value={free_space}
+    profile1.snapshots.min_free_space.unit=10
+    profile1.snapshots.min_free_inodes.enabled=true
+    profile1.snapshots.min_free_inodes.value=15
+    profile1.snapshots.size_accounting.enabled=false
+    profiles.version=1
+'''
+
+
+def createConfig(path: Path) -> config.Config:
+    """Config of a local profile with its data below ``path``. Its minimum
+    free space is 1 GiB more than currently free."""
+    info = os.statvfs(path)
+    free_space = info.f_frsize * info.f_bavail // (1024 * 1024) + 1024
+    config_file = path / 'config'
+    config_file.write_text(
+        inspect.cleandoc(CONFIG.format(path=path, free_space=free_space)),
+        'utf-8')
+    (path / 'source').mkdir()
+
+    return config.Config(str(config_file), str(path / 'data'))
+
+
+def generate(cfg: config.Config,
+             count: int,
+             seed: int = 0,
+             named: float = 0.01,
+             failed: float = 0.05) -> None:
+    """Create ``count`` synthetic snapshot folders before :py:data:`NOW`.
+
+    Snapshots are taken about hourly with some jitter. A share of ``named``
+    snapshots gets a name and a share of ``failed`` is marked as failed.
+    """
+    rnd = random.Random(seed)
+    root = Path(cfg.snapshotsFullPath())
+    root.mkdir(parents=True)
+    date = NOW
+
+    for _ in range(count):
+        date -= timedelta(minutes=rnd.randint(30, 90))
+        sid = date.strftime('%Y%m%d-%H%M%S-') + f'{rnd.randrange(1000):03}'
+        folder = root / sid
+        (folder / 'backup').mkdir(parents=True)
+
+        if rnd.random() < named:
+            (folder / snapshots.SID.NAME).write_text(f'name of {sid}')
+
+        if rnd.random() < failed:
+            (folder / snapshots.SID.FAILED).write_text('')
+
+
+def timeit(func, repeat: int, setup=None) -> float:
+    """Best time of ``repeat`` calls of ``func`` in seconds. ``setup`` is
+    called untimed before each of them."""
+    best = None
+
+    for _ in range(repeat):
+        if setup:
+            setup()
+
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+
+    return best
+
+
+def benchmark(count: int, repeat: int = 3, seed: int = 0) -> dict:
+    """Time all housekeeping stages with ``count`` snapshots.
+
+    Returns:
+        dict: Seconds per stage (see :py:data:`STAGES`) and ``generate``.
+    """
+    with TemporaryDirectory(prefix='bit-benchmark.') as tmp:
+        cfg = createConfig(Path(tmp))
+        sn = snapshots.Snapshots(cfg)
+        result = {}
+
+        start = time.perf_counter()
+        generate(cfg, count, seed)
+        result['generate'] = time.perf_counter() - start
+
+        sids = snapshots.listSnapshots(cfg, useCatalog=False)
+        shuffled = list(sids)
+        random.Random(seed).shuffle(shuffled)
+
+        stages = {
+            'list_scan': lambda: snapshots.listSnapshots(cfg,
+                                                         useCatalog=False),
+            'catalog_rebuild': lambda: snapshots.rebuildCatalog(cfg),
+            'list_catalog': lambda: snapshots.listSnapshots(cfg),
+            'sort_sids': lambda: sorted(shuffled, reverse=True),
+            'smart_remove_list': lambda: sn.smartRemoveList(NOW, *RULES),
+            'free_space': lambda: sn.freeSpace(NOW),
+        }
+
+        def regenerate():
+            shutil.rmtree(cfg.snapshotsFullPath())
+            generate(cfg, count, seed)
+            snapshots.rebuildCatalog(cfg)
+
+        for stage in STAGES:
+            if stage == 'free_space':
+                if len(snapshots.listSnapshots(cfg)) != count:
+                    raise RuntimeError('Snapshots were removed during the '
+                                       'benchmark')
+
+                result[stage] = timeit(stages[stage], repeat, regenerate)
+
+                if len(snapshots.listSnapshots(cfg)) == count:
+                    raise RuntimeError('No snapshots were removed to keep '
+                                       'the minimum free space')
+
+            else:
+                result[stage] = timeit(stages[stage], repeat)
+
+    return result
+
+
+def run(args) -> int:
+    """Run the benchmark and write the results."""
+    results = {}
+
+    for count in args.counts:
+        print(f'{count} snapshots ...', flush=True)
+        results[str(count)] = benchmark(count, args.repeat, args.seed)
+
+        for stage, seconds in results[str(count)].items():
+            print(f'  {stage:<20}{seconds:10.4f}s')
+
+    data = {
+        'version': FORMAT_VERSION,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'wt', encoding='utf-8') as handle:
+            json.dump(data, handle, indent=2)
+
+    return 0
+
+
+def compare(old: dict, new: dict, threshold: float,
+            min_seconds: float = 0.005) -> list[tuple]:
+    """Compare two benchmark results.
+
+    Args:
+        old: Baseline results (as written by :py:func:`run`).
+        new: Results to check.
+        threshold: Maximum allowed ratio ``new / old``.
+        min_seconds: Differences below this are ignored as noise.
+
+    Returns:
+        list: ``(count, stage, old, new, ratio, regression)`` for each stage
+            found in both results.
+    """
+    rows = []
+
+    for count, stages in new['results'].items():
+        for stage, seconds in stages.items():
+            try:
+                before = old['results'][count][stage]
+
+            except KeyError:
+                continue
+
+            ratio = seconds / before if before > 0 else float('inf')
+            regression = (ratio > threshold
+                          and seconds - before > min_seconds)
+            rows.append((count, stage, before, seconds, ratio, regression))
+
+    return rows
+
+
+def compareFiles(args) -> int:
+    """Print the comparison of two result files.
+
+    Returns:
+        int: ``1`` if there is a regression, otherwise ``0``.
+    """
+    with open(args.old, 'rt', encoding='utf-8') as handle:
+        old = json.load(handle)
+
+    with open(args.new, 'rt', encoding='utf-8') as handle:
+        new = json.load(handle)
+
+    rows = compare(old, new, args.threshold)
+
+    for count, stage, before, seconds, ratio, regression in rows:
+        mark = '  REGRESSION' if regression else ''
+        print(f'{count:>8} {stage:<20}{before:10.4f}s {seconds:10.4f}s '
+              f'{ratio:6.2f}x{mark}')
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    runParser = subparsers.add_parser('run', help='Run the benchmark.')
+    runParser.add_argument('--counts',
+                           type=int,
+                           nargs='+',
+                           default=list(DEFAULT_COUNTS),
+                           help='Numbers of snapshots to benchmark.')
+    runParser.add_argument('--repeat',
+                           type=int,
+                           default=3,
+                           help='Repeat each stage and keep the best time.')
+    runParser.add_argument('--seed',
+                           type=int,
+                           default=0,
+                           help='Seed for the synthetic snapshots.')
+    runParser.add_argument('--output', '-o',
+                           help='Write the results to this JSON file.')
+    runParser.set_defaults(func=run)
+
+    compareParser = subparsers.add_parser(
+        'compare', help='Compare two result files.')
+    compareParser.add_argument('old', help='Baseline results.')
+    compareParser.add_argument('new', help='Results to check.')
+    compareParser.add_argument('--threshold',
+                               type=float,
+                               default=1.25,
+                               help='Maximum allowed ratio new/old before it '
+                                    'counts as regression.')
+    compareParser.set_defaults(func=compareFiles)
+
+    args = parser.parse_args(argv)
+    logger.openlog()
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
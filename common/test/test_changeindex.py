@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the changeindex module."""
+import unittest
+from pathlib import Path
+from test import generic
+import changeindex
+import logarchive
+
+S1 = '20240101-000000-123'
+S2 = '20240102-000000-123'
+S3 = '20240103-000000-123'
+S4 = '20240104-000000-123'
+
+LOG = '''========== Take snapshot (profile 1): Thu Jan  4 00:00:00 2024 ==========
+
+[I] rsync --recursive --link-dest=../../20240103-000000-123/backup / dest
+[C] >f+++++++++ home/user/new
+[C] >f.st...... home/user/foo
+[C] cL+++++++++ home/user/link -> foo
+[C] *deleting   home/user/old/
+[E] Error: rsync: send_files failed to open "/home/user/bar"
+'''
+
+
+class Parse(unittest.TestCase):
+    """Parsing snapshot log lines."""
+
+    def test_parseLine(self):
+        """Flags and absolute paths of [C] lines."""
+        self.assertEqual(changeindex.parseLine('[C] >f+++++++++ a b/c'),
+                         ('>f+++++++++', '/a b/c'))
+        self.assertEqual(changeindex.parseLine('[C] cL+++++++++ a -> b'),
+                         ('cL+++++++++', '/a'))
+        self.assertEqual(changeindex.parseLine('[C] *deleting   a/'),
+                         ('*deleting  ', '/a'))
+        self.assertIsNone(changeindex.parseLine('[I] >f+++++++++ a'))
+
+    def test_classify(self):
+        """Content changes are new versions, permissions are not."""
+        self.assertEqual(changeindex.classify('>f+++++++++'), changeindex.NEW)
+        self.assertEqual(changeindex.classify('>f..t......'), changeindex.NEW)
+        self.assertEqual(changeindex.classify('.f...p.....'),
+                         changeindex.ATTRIBUTES)
+        self.assertEqual(changeindex.classify('*deleting  '),
+                         changeindex.DELETED)
+        self.assertEqual(changeindex.classify('cL+++++++++'),
+                         changeindex.DELETED)
+
+    def test_readLog(self):
+        """Changes and --link-dest of a whole log."""
+        link_dest, changes = changeindex.readLog(LOG.split('\n'))
+
+        self.assertEqual(link_dest, S3)
+        self.assertEqual([path for _, path in changes],
+                         ['/home/user/new', '/home/user/foo',
+                          '/home/user/link', '/home/user/old'])
+
+    def test_isIndexable(self):
+        """Paths escaped by rsync are not indexable."""
+        self.assertTrue(changeindex.isIndexable('/home/user/foo bar'))
+        self.assertFalse(changeindex.isIndexable('/home/user/foo\nbar'))
+
+
+class Versions(unittest.TestCase):
+    """Finding snapshots with different versions."""
+
+    def test_unchanged(self):
+        """An unchanged file has one version, the newest snapshot."""
+        self.assertEqual(
+            changeindex.versions([S1, S2, S3], {}, [S1, S2, S3], True),
+            [S3])
+
+    def test_changed(self):
+        """Each content change starts a new version."""
+        changes = {S2: '>f.st......', S3: '.f...p.....'}
+
+        self.assertEqual(
+            changeindex.versions([S1, S2, S3, S4], changes,
+                                 [S1, S2, S3, S4], True),
+            [S4, S1])
+
+    def test_deleted_and_created(self):
+        """Snapshots without the file are skipped."""
+        changes = {S2: '*deleting  ', S4: '>f+++++++++'}
+
+        self.assertEqual(
+            changeindex.versions([S1, S2, S3, S4], changes,
+                                 [S1, S2, S3, S4], True),
+            [S4, S1])
+        self.assertEqual(
+            changeindex.versions([S2, S3, S4], changes, [S2, S3, S4], False),
+            [S4])
+
+    def test_removed_snapshot(self):
+        """Changes of snapshots which are not listed anymore count."""
+        changes = {S2: '>f.st......'}
+
+        self.assertEqual(
+            changeindex.versions([S1, S2, S3], changes, [S1, S3], True),
+            [S3, S1])
+
+
+class Index(generic.TestCase):
+    """Storing and querying changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.index = changeindex.ChangeIndex(str(self.path / 'changes.sqlite'))
+
+    def test_add(self):
+        """Changes are found by path."""
+        self.assertTrue(self.index.add(S1, '', [('>f+++++++++', '/foo'),
+                                                ('>f+++++++++', '/bar')]))
+        self.assertTrue(self.index.add(S2, S1, [('>f.st......', '/foo')]))
+
+        self.assertEqual(self.index.indexed(), {S1, S2})
+        self.assertEqual(self.index.changes('/foo'),
+                         {S1: '>f+++++++++', S2: '>f.st......'})
+        self.assertEqual(self.index.changes('/baz'), {})
+
+    def test_chain(self):
+        """The chain links snapshots by their previous snapshot."""
+        self.index.add(S1, '', [])
+        self.index.add(S2, S1, [])
+        self.index.add(S4, S2, [])
+
+        self.assertEqual(self.index.chain(S1, S4), [S1, S2, S4])
+        self.assertEqual(self.index.chain(S2, S4), [S2, S4])
+        self.assertIsNone(self.index.chain(S3, S4))
+
+        # S3 with unknown previous snapshot breaks the chain
+        self.index.add(S3, None, [])
+        self.assertIsNone(self.index.chain(S1, S3))
+
+    def test_missing(self):
+        """A missing index can't answer."""
+        self.assertIsNone(self.index.chain(S1, S2))
+        self.assertEqual(self.index.indexed(), set())
+
+    def test_prune(self):
+        """Snapshots older than the oldest existing one are removed."""
+        self.index.add(S1, '', [('>f+++++++++', '/foo')])
+        self.index.add(S2, S1, [('>f.st......', '/bar')])
+
+        self.index.prune(S2)
+
+        self.assertEqual(self.index.indexed(), {S2})
+        self.assertEqual(self.index.changes('/foo'), {})
+        self.assertEqual(self.index.changes('/bar'), {S2: '>f.st......'})
+
+    def test_readSnapshotLog(self):
+        """Changes are read from compressed snapshot logs."""
+        log = str(self.path / 'takesnapshot.log.bz2')
+        idx = str(self.path / 'takesnapshot.log.idx')
+        logarchive.write(log, idx, LOG)
+
+        link_dest, changes = changeindex.readSnapshotLog(log, idx)
+
+        self.assertEqual(link_dest, S3)
+        self.assertEqual(len(changes), 4)
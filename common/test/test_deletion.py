@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the deletion module."""
+import os
+import stat
+import unittest
+from pathlib import Path
+from test import generic
+import deletion
+
+
+class RemoveTree(generic.TestCase):
+    """Behavior of removeTree()."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.tree = self.path / 'snapshot'
+
+        for sub in ('a', 'a/b', 'a/b/c', 'd'):
+            (self.tree / sub).mkdir(parents=True)
+
+        for i in range(deletion.BATCH_SIZE + 10):
+            (self.tree / 'a' / f'file{i}').write_text('foo')
+
+        (self.tree / 'a' / 'b' / 'c' / 'bar').write_text('bar')
+        os.link(self.tree / 'a' / 'file0', self.tree / 'd' / 'hardlink')
+
+    def tearDown(self):
+        for root, dirs, _ in os.walk(self.path):
+            for name in dirs:
+                os.chmod(os.path.join(root, name), 0o755)
+
+        super().tearDown()
+
+    def test_remove(self):
+        stats = deletion.removeTree(str(self.tree), workers=3)
+
+        self.assertFalse(self.tree.exists())
+        self.assertEqual(stats.files, deletion.BATCH_SIZE + 12)
+        self.assertEqual(stats.dirs, 5)
+        self.assertEqual(stats.errors, 0)
+
+    def test_read_only_folders(self):
+        for sub in ('a/b/c', 'a/b', 'd'):
+            os.chmod(self.tree / sub, stat.S_IRUSR | stat.S_IXUSR)
+        os.chmod(self.tree / 'a', 0)
+
+        stats = deletion.removeTree(str(self.tree))
+
+        self.assertFalse(self.tree.exists())
+        self.assertEqual(stats.errors, 0)
+
+    def test_symlink_not_followed(self):
+        outside = self.path / 'outside'
+        outside.mkdir()
+        (outside / 'keep').write_text('keep')
+        (self.tree / 'link').symlink_to(outside)
+
+        deletion.removeTree(str(self.tree))
+
+        self.assertFalse(self.tree.exists())
+        self.assertTrue((outside / 'keep').exists())
+
+    def test_single_file_and_missing(self):
+        target = self.tree / 'a' / 'file1'
+
+        self.assertEqual(deletion.removeTree(str(target)).files, 1)
+        self.assertFalse(target.exists())
+        self.assertEqual(deletion.removeTree(str(target)).files, 0)
+
+    def test_progress(self):
+        reports = []
+
+        stats = deletion.removeTree(str(self.tree),
+                                    progress=reports.append,
+                                    interval=0)
+
+        self.assertGreater(len(reports), 1)
+        self.assertIs(reports[-1], stats)
+        self.assertGreater(stats.rate, 0)
+        self.assertIn('files/s', str(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
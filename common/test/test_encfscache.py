@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the encfscache module."""
+import unittest
+import encfscache
+
+
+class PathCache(unittest.TestCase):
+    """LRU cache in both directions."""
+
+    def test_both_directions(self):
+        sut = encfscache.PathCache()
+        sut.add('home/foo', 'AbC/dEf')
+
+        self.assertEqual(sut.encode('home/foo'), 'AbC/dEf')
+        self.assertEqual(sut.decode('AbC/dEf'), 'home/foo')
+        self.assertIsNone(sut.encode('home'))
+        self.assertIsNone(sut.decode('home/foo'))
+
+    def test_lru(self):
+        sut = encfscache.PathCache(maxsize=2)
+        sut.add('a', 'A')
+        sut.add('b', 'B')
+        # use 'a', so 'b' is the least recently used
+        sut.encode('a')
+        sut.add('c', 'C')
+
+        self.assertEqual(sut.encode('a'), 'A')
+        self.assertIsNone(sut.encode('b'))
+        self.assertEqual(sut.encode('c'), 'C')
+        self.assertEqual(len(sut), 2)
+
+    def test_shared_until_dropped(self):
+        key = '/foo/.encfs6.xml'
+        encfscache.cache(key).add('a', 'A')
+
+        self.assertIs(encfscache.cache(key), encfscache.cache(key))
+        self.assertEqual(encfscache.cache(key).decode('A'), 'a')
+
+        encfscache.drop(key)
+
+        self.assertIsNone(encfscache.cache(key).decode('A'))
+        encfscache.drop(key)
+
+
+class Translate(unittest.TestCase):
+    """Batching of uncached paths."""
+
+    def test_batches(self):
+        paths = ['a' * 10, 'b' * 10, 'c' * 30, 'd']
+
+        self.assertEqual(list(encfscache.batches(paths, max_bytes=22)),
+                         [paths[:2], paths[2:3], paths[3:]])
+        self.assertEqual(list(encfscache.batches([])), [])
+
+    def test_translate(self):
+        sut = encfscache.PathCache()
+        sut.add('cached', 'CACHED')
+        calls = []
+
+        def run(batch):
+            calls.append(batch)
+            result = [path.upper() for path in batch]
+            for plain, cipher in zip(batch, result):
+                sut.add(plain, cipher)
+            return result
+
+        paths = ['foo', 'cached', 'bar', 'foo']
+        result = encfscache.translate(paths, sut.encode, run)
+
+        self.assertEqual(result,
+                         {'foo': 'FOO', 'cached': 'CACHED', 'bar': 'BAR'})
+        self.assertEqual(calls, [['foo', 'bar']])
+
+        encfscache.translate(paths, sut.encode, run)
+
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
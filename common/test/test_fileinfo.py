@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the fileinfo module."""
+import bz2
+import unittest
+from pathlib import Path
+from test import generic
+import fileinfo
+
+DATA = {
+    b'/': (0o40755, b'root', b'root'),
+    b'/home': (0o40755, b'root', b'root'),
+    b'/home/user': (0o40700, b'user', b'user'),
+    b'/home/user/foo': (0o100644, b'user', b'user'),
+    b'/home/user/foo bar': (0o100600, b'user', b'users'),
+    b'/home/user-x': (0o40700, b'user-x', b'user-x'),
+    b'/home/user/sub/\xff': (0o100640, b'user', b'adm'),
+}
+
+
+class Index(generic.TestCase):
+    """Writing and reading the indexed format."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.idx = str(self.path / 'fileinfo.idx')
+
+    def test_roundtrip(self):
+        fileinfo.writeIndex(self.idx, DATA)
+
+        with fileinfo.FileInfoIndex(self.idx) as sut:
+            self.assertEqual(len(sut), len(DATA))
+            self.assertEqual(list(sut), sorted(DATA))
+            self.assertDictEqual(dict(sut.items()), DATA)
+
+    def test_lookup(self):
+        fileinfo.writeIndex(self.idx, DATA)
+
+        with fileinfo.FileInfoIndex(self.idx) as sut:
+            self.assertIn(b'/home/user/foo', sut)
+            self.assertNotIn(b'/home/user/fo', sut)
+            self.assertNotIn(b'/zzz', sut)
+            self.assertEqual(sut[b'/home/user/foo bar'],
+                             (0o100600, b'user', b'users'))
+            self.assertIsNone(sut.get(b'/nope'))
+
+    def test_tree(self):
+        fileinfo.writeIndex(self.idx, DATA)
+
+        with fileinfo.FileInfoIndex(self.idx) as sut:
+            self.assertEqual(
+                [path for path, _ in sut.iterTree(b'/home/user/')],
+                [b'/home/user',
+                 b'/home/user/foo',
+                 b'/home/user/foo bar',
+                 b'/home/user/sub/\xff'])
+            self.assertEqual(len(list(sut.iterTree(b'/'))), len(DATA))
+
+    def test_many_blocks(self):
+        data = {b'/f/%06d' % i: (0o100644, b'u%d' % (i % 3), b'g')
+                for i in range(fileinfo.BLOCK_SIZE * 5 + 7)}
+        fileinfo.writeIndex(self.idx, data)
+
+        with fileinfo.FileInfoIndex(self.idx) as sut:
+            for path in (b'/f/000000', b'/f/000128', b'/f/000500',
+                         b'/f/000646'):
+                self.assertEqual(sut[path], data[path])
+
+            self.assertNotIn(b'/f/000647', sut)
+            self.assertEqual(len(list(sut.iterPrefix(b'/f/0001'))), 100)
+
+    def test_empty(self):
+        fileinfo.writeIndex(self.idx, {})
+
+        with fileinfo.FileInfoIndex(self.idx) as sut:
+            self.assertEqual(len(sut), 0)
+            self.assertNotIn(b'/', sut)
+            self.assertEqual(list(sut.iterTree(b'/')), [])
+
+    def test_corrupt(self):
+        Path(self.idx).write_bytes(b'x' * 200)
+
+        with self.assertRaises(ValueError):
+            fileinfo.FileInfoIndex(self.idx)
+
+
+class Legacy(generic.TestCase):
+    """Reading and converting fileinfo.bz2."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.bz2 = str(self.path / 'fileinfo.bz2')
+        self.idx = str(self.path / 'fileinfo.idx')
+
+        with bz2.BZ2File(self.bz2, 'wb') as handle:
+            for path, info in DATA.items():
+                handle.write(b' '.join((str(info[0]).encode(), info[1],
+                                        info[2], path)) + b'\n')
+
+    def test_legacy_reader(self):
+        sut = fileinfo.LegacyFileInfo(self.bz2)
+
+        self.assertDictEqual(dict(sut), DATA)
+        self.assertEqual(
+            [path for path, _ in sut.iterTree(b'/home/user')],
+            [b'/home/user',
+             b'/home/user/foo',
+             b'/home/user/foo bar',
+             b'/home/user/sub/\xff'])
+
+    def test_open_falls_back_to_legacy(self):
+        with fileinfo.openFileInfo(self.idx, self.bz2) as sut:
+            self.assertIsInstance(sut, fileinfo.LegacyFileInfo)
+            self.assertDictEqual(dict(sut), DATA)
+
+    def test_convert(self):
+        self.assertEqual(fileinfo.convert(self.bz2, self.idx), len(DATA))
+
+        with fileinfo.openFileInfo(self.idx, self.bz2) as sut:
+            self.assertIsInstance(sut, fileinfo.FileInfoIndex)
+            self.assertDictEqual(dict(sut.items()), DATA)
+
+    def test_missing(self):
+        with fileinfo.openFileInfo(self.idx, str(self.path / 'nope')) as sut:
+            self.assertEqual(len(sut), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
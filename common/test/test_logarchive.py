@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the logarchive module."""
+import bz2
+import unittest
+from pathlib import Path
+from test import generic
+import logarchive
+
+# 50 changes followed by one error, ten times
+LOG = b''.join(
+    b'[E] error %d\n' % i if i % 51 == 50 else b'[C] change %d\n' % i
+    for i in range(510))
+
+
+class LogArchive(generic.TestCase):
+    """Writing and reading compressed logs."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.log = str(self.path / 'takesnapshot.log.bz2')
+        self.idx = str(self.path / 'takesnapshot.log.idx')
+
+    def _lines(self, archive, tags=None):
+        return [line for chunk in archive.chunks(tags) for line in chunk]
+
+    def test_roundtrip(self):
+        """Blocks are concatenated bz2 streams of the whole log."""
+        count = logarchive.write(self.log, self.idx, LOG, block_bytes=512)
+
+        self.assertGreater(count, 1)
+        with bz2.open(self.log, 'rb') as handle:
+            self.assertEqual(handle.read(), LOG)
+
+        archive = logarchive.LogArchive(self.log, self.idx)
+        self.assertTrue(archive.indexed)
+        self.assertEqual(len(archive.blocks), count)
+        self.assertEqual(self._lines(archive),
+                         LOG.decode().rstrip('\n').split('\n'))
+
+    def test_counts(self):
+        """Each block counts its tagged lines."""
+        logarchive.write(self.log, self.idx, LOG, block_bytes=512)
+        blocks = logarchive.LogArchive(self.log, self.idx).blocks
+
+        self.assertEqual(sum(b.counts['E'] for b in blocks), 10)
+        self.assertEqual(sum(b.counts['C'] for b in blocks), 500)
+        self.assertEqual(sum(b.lines for b in blocks), 510)
+        self.assertEqual([b.first_line for b in blocks],
+                         [sum(b.lines for b in blocks[:i])
+                          for i in range(len(blocks))])
+
+    def test_skip_blocks(self):
+        """Blocks without matching tags are not read."""
+        logarchive.write(self.log, self.idx, LOG, block_bytes=512)
+        archive = logarchive.LogArchive(self.log, self.idx)
+
+        errors = [line for line in self._lines(archive, ('E', ))
+                  if line.startswith('[E]')]
+        self.assertEqual(len(errors), 10)
+        self.assertLess(len(list(archive.chunks(('E', )))),
+                        len(archive.blocks))
+        self.assertEqual(list(archive.chunks(('I', ))), [])
+
+    def test_untagged_lines(self):
+        """Blocks with untagged lines are read for every filter."""
+        logarchive.write(self.log, self.idx,
+                         'header\n[C] foo\n[E] bar\n', block_bytes=1)
+        archive = logarchive.LogArchive(self.log, self.idx)
+
+        self.assertEqual(self._lines(archive, ('I', )), ['header'])
+
+    def test_legacy(self):
+        """Logs without or with outdated index are read as one stream."""
+        with bz2.open(self.log, 'wb') as handle:
+            handle.write(b'foo\n[E] bar\nbaz')
+
+        archive = logarchive.LogArchive(self.log, self.idx)
+        self.assertFalse(archive.indexed)
+        self.assertEqual(self._lines(archive, ('I', )),
+                         ['foo', '[E] bar', 'baz'])
+
+        logarchive.write(self.log, self.idx, LOG)
+        with bz2.open(self.log, 'wb') as handle:
+            handle.write(b'foo\n')
+
+        archive = logarchive.LogArchive(self.log, self.idx)
+        self.assertFalse(archive.indexed)
+        self.assertEqual(self._lines(archive), ['foo'])
+
+    def test_missing(self):
+        """Reading a missing log raises."""
+        archive = logarchive.LogArchive(self.log, self.idx)
+
+        with self.assertRaises(OSError):
+            list(archive.chunks())
+
+    def test_file_source(self):
+        """The log can be written from an open file."""
+        src = self.path / 'takesnapshot_.log'
+        src.write_bytes(LOG)
+
+        with src.open('rb') as handle:
+            logarchive.write(self.log, self.idx, handle, block_bytes=512)
+
+        archive = logarchive.LogArchive(self.log, self.idx)
+        self.assertEqual('\n'.join(self._lines(archive)) + '\n', LOG.decode())
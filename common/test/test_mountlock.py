@@ -0,0 +1,102 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the mountlock module."""
+import os
+import sys
+import fcntl
+import subprocess
+import unittest
+from pathlib import Path
+from test import generic
+import mountlock
+
+
+class MountLock(generic.TestCase):
+    """Acquire, release and detect stale locks."""
+
+    def setUp(self):
+        super().setUp()
+        self.lock = str(Path(self.sharePath) / '123.lock')
+
+    def _foreign(self, shared=False):
+        """Lock the file with another open file description. For flock this
+        is like a lock of another process."""
+        # pylint: disable-next=consider-using-with
+        handle = open(self.lock, 'a')
+        self.addCleanup(handle.close)
+        fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+        return handle
+
+    def test_acquire_release(self):
+        mountlock.acquire(self.lock, info={'pid': 42})
+
+        self.assertTrue(mountlock.isHeld(self.lock))
+        self.assertEqual(mountlock.owner(self.lock), {'pid': 42})
+        self.assertFalse(mountlock.removeIfStale(self.lock))
+
+        mountlock.release(self.lock)
+
+        self.assertFalse(mountlock.isHeld(self.lock))
+        self.assertTrue(mountlock.removeIfStale(self.lock))
+        self.assertFalse(os.path.exists(self.lock))
+
+    def test_reentrant(self):
+        mountlock.acquire(self.lock, timeout=0)
+        mountlock.acquire(self.lock, timeout=0)
+        mountlock.release(self.lock)
+
+        self.assertTrue(mountlock.isHeld(self.lock))
+
+        mountlock.release(self.lock, remove=True)
+
+        self.assertFalse(mountlock.isHeld(self.lock))
+        self.assertFalse(os.path.exists(self.lock))
+
+    def test_timeout(self):
+        handle = self._foreign()
+
+        with self.assertRaises(TimeoutError):
+            mountlock.acquire(self.lock, timeout=0.1)
+
+        handle.close()
+        mountlock.acquire(self.lock, timeout=0.1)
+        mountlock.release(self.lock)
+
+    def test_shared(self):
+        self._foreign(shared=True)
+
+        mountlock.acquire(self.lock, shared=True, timeout=0)
+        mountlock.release(self.lock)
+
+        with self.assertRaises(TimeoutError):
+            mountlock.acquire(self.lock, timeout=0)
+
+    def test_released_on_process_death(self):
+        code = ('import sys; sys.path.insert(0, sys.argv[1]); '
+                'import mountlock; '
+                'mountlock.acquire(sys.argv[2], shared=True); '
+                'print("locked", flush=True); sys.stdin.read()')
+        with subprocess.Popen(
+                [sys.executable, '-c', code,
+                 os.path.join(os.path.dirname(__file__), '..'), self.lock],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                universal_newlines=True) as proc:
+            self.assertEqual(proc.stdout.readline(), 'locked\n')
+            self.assertFalse(mountlock.removeIfStale(self.lock))
+            self.assertEqual(mountlock.owner(self.lock)['pid'], proc.pid)
+
+            proc.kill()
+
+        self.assertTrue(mountlock.removeIfStale(self.lock))
+        self.assertFalse(os.path.exists(self.lock))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -123,6 +123,18 @@ class UserCallback(unittest.TestCase):
             func_callback.assert_called_once()
             func_callback.assert_called_with('8', profileID='987')
 
+    def test_messages_latest_per_level(self):
+        sut = UserCallbackPlugin()
+
+        with mock.patch.object(sut, 'message') as func_message:
+            sut.messages('1', 'Main', [(0, 'foo', -1),
+                                       (1, 'failed', 5),
+                                       (0, 'bar', -1)])
+
+        self.assertEqual(func_message.call_args_list,
+                         [mock.call('1', 'Main', 1, 'failed', 5),
+                          mock.call('1', 'Main', 0, 'bar', -1)])
+
 
 class SystemTest(unittest.TestCase):
     """Full backup run and parsing the log output for the expected
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the progress module."""
+import os
+import unittest
+from pathlib import Path
+from test import generic
+import progress
+
+
+class Writer(generic.TestCase):
+    """Behavior of class ProgressWriter."""
+
+    def setUp(self):
+        super().setUp()
+        self.filename = str(Path(self.sharePath) / 'worker.progress')
+        self.now = 100.0
+
+    def _sut(self, rate=2):
+        return progress.ProgressWriter(self.filename, rate=rate,
+                                       clock=lambda: self.now)
+
+    def _load(self):
+        pg = progress.ProgressFile(None, self.filename)
+        pg.load()
+
+        return pg
+
+    def test_same_keys(self):
+        sut = self._sut()
+
+        sut.update(517380, 26, 14460000)
+
+        pg = self._load()
+        self.assertEqual(pg.intValue('status'), progress.ProgressFile.RSYNC)
+        self.assertEqual(pg.strValue('sent'), '517.38K')
+        self.assertEqual(pg.intValue('percent'), 26)
+        # only one sample, so rsync's speed is used
+        self.assertEqual(pg.strValue('speed'), '14.46MB/s')
+        self.assertEqual(pg.strValue('eta'), '0:00:00')
+        self.assertEqual(os.listdir(os.path.dirname(self.filename)),
+                         ['worker.progress'])
+
+    def test_throttled(self):
+        sut = self._sut()
+        sut.update(1000, 1, 0)
+
+        self.now += 0.1
+        sut.update(2000, 2, 0)
+
+        self.assertEqual(self._load().intValue('percent'), 1)
+
+        self.now += 0.5
+        sut.update(3000, 3, 0)
+
+        self.assertEqual(self._load().intValue('percent'), 3)
+
+    def test_flush(self):
+        sut = self._sut()
+        sut.update(1000, 1, 0)
+        sut.update(2000, 2, 0)
+
+        sut.flush()
+
+        self.assertEqual(self._load().intValue('percent'), 2)
+
+    def test_smoothed_rate_and_eta(self):
+        sut = self._sut(rate=0)
+
+        for i in range(11):
+            # 1 MB per second, one huge rsync speed outlier
+            sut.update(i * 1000000, 10 + i, 10 ** 12 if i == 5 else 1000000)
+            self.now += 1
+
+        pg = self._load()
+        self.assertEqual(pg.strValue('speed'), '1.00MB/s')
+        # 10 MB are 20%, so 40 MB are left
+        self.assertEqual(pg.strValue('eta'), '0:00:40')
+
+    def test_new_transfer_resets_samples(self):
+        sut = self._sut(rate=0)
+        sut.update(5000000, 50, 0)
+        self.now += 1
+
+        sut.update(1000, 1, 2000)
+
+        self.assertIsNone(sut.rate())
+        self.assertEqual(self._load().strValue('speed'), '2.00KB/s')
+
+    def test_unknown_eta(self):
+        self.assertIsNone(progress.ProgressWriter.eta(1000, 0, 100))
+        self.assertIsNone(progress.ProgressWriter.eta(1000, 50, 0))
+        self.assertEqual(progress.formatEta(None), '??:??:??')
+        self.assertEqual(progress.formatEta(3725.5), '1:02:05')
+
+
+class RsyncSize(unittest.TestCase):
+    """Parse and format sizes like rsync prints them."""
+
+    def test_parse(self):
+        self.assertEqual(progress.parseRsyncSize('517.38K'), 517380)
+        self.assertEqual(progress.parseRsyncSize('1,5M'), 1500000)
+        self.assertEqual(progress.parseRsyncSize('-449.39k'), -449390)
+
+    def test_format(self):
+        self.assertEqual(progress.formatRsyncSize(1720000), '1.72M')
+        self.assertEqual(progress.formatRsyncSize(12), '12')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the remoteremove module."""
+import os
+import shutil
+import unittest
+from pathlib import Path
+from test import generic
+import remoteremove
+
+
+class LocalRemove(remoteremove.RemoteRemove):
+    """Run the helper on the local host instead of via SSH."""
+
+    def command(self, cmd, **kwargs):
+        return ['bash', '-c', cmd]
+
+
+class RemoteRemove(generic.TestCase):
+    """Install and run the helper script."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.sut = LocalRemove(None, str(self.path))
+
+    def test_install(self):
+        script = self.path / remoteremove.SCRIPT_NAME
+
+        self.assertFalse(self.sut.isInstalled())
+        self.assertTrue(self.sut.install())
+        self.assertEqual(script.read_text(), remoteremove.SCRIPT)
+
+        # modified script is replaced
+        script.write_text('echo foo')
+        self.assertFalse(self.sut.isInstalled())
+        self.assertTrue(self.sut.install())
+        self.assertTrue(self.sut.isInstalled())
+
+    @unittest.skipUnless(shutil.which('rsync'), 'rsync not available')
+    def test_run(self):
+        paths = []
+        for i in range(5):
+            snapshot = self.path / f'2026010{i}-000000-123'
+            (snapshot / 'backup' / 'sub').mkdir(parents=True)
+            (snapshot / 'backup' / 'sub' / 'foo').write_text('foo')
+            paths.append(str(snapshot))
+        paths.append(str(self.path / 'missing'))
+        progress = []
+
+        self.sut.install()
+        result = self.sut.run(paths,
+                              workers=3,
+                              log=lambda *args: progress.append(args))
+
+        self.assertEqual(result, (6, 0))
+        self.assertEqual([done for done, _, _ in progress], list(range(1, 7)))
+        self.assertEqual(sorted(path for _, _, path in progress),
+                         sorted(paths))
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertTrue((self.path / remoteremove.LOCK_NAME).exists())
+
+    def test_run_without_helper(self):
+        self.assertIsNone(self.sut.run([str(self.path)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
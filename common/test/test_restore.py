@@ -138,6 +138,26 @@ class TestRestore(RestoreTestCase):
         with open(restoreFile, 'rt') as f:
             self.assertEqual(f.read(), 'fooooooooooooooooooo')
 
+    def test_group_paths(self):
+        root = self.sid.pathBackup() + os.sep
+        paths = ['/home/user/foo', '/home/user/bar', '/etc/baz', '/']
+
+        groups = self.sn.groupRestorePaths(self.sid, paths)
+        self.assertDictEqual(
+            groups,
+            {root: [('/home/user/foo', 'home/user/foo', 0),
+                    ('/home/user/bar', 'home/user/bar', 0),
+                    ('/etc/baz', 'etc/baz', 0),
+                    ('/', '.', 0)]})
+
+        groups = self.sn.groupRestorePaths(self.sid, paths, '/tmp/dest')
+        self.assertDictEqual(
+            groups,
+            {root + 'home/user/': [('/home/user/foo', 'foo', 10),
+                                   ('/home/user/bar', 'bar', 10)],
+             root + 'etc/': [('/etc/baz', 'baz', 4)],
+             root: [('/', '.', 0)]})
+
 class TestRestoreLocal(RestoreTestCase):
     """
     Tests which should run on local and ssh profile
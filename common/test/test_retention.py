@@ -0,0 +1,203 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the retention module."""
+import random
+import unittest
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+import retention
+
+
+@dataclass(frozen=True, order=True)
+class FakeSID:
+    """Minimal stand-in for snapshots.SID."""
+    sid: str
+    date: datetime = field(compare=False)
+    failed: bool = field(default=False, compare=False)
+
+
+def fake_sid(dt, failed=False):
+    return FakeSID(dt.strftime('%Y%m%d-%H%M%S-123'), dt, failed)
+
+
+def reference(sids, now, keep_all, per_day, per_week, per_month):
+    """One linear scan per period, like Snapshots.smartRemoveList() did
+    before the retention module."""
+    sids = sorted(sids, reverse=True)
+
+    def first(min_date, max_date):
+        in_range = [sid for sid in sids
+                    if min_date <= sid.date.date() < max_date]
+        healthy = [sid for sid in in_range if not sid.failed]
+
+        return set((healthy or in_range)[:1])
+
+    def inc_month(d):
+        return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+    def dec_month(d):
+        prev = d - timedelta(days=1)
+        return date(prev.year, prev.month, 1)
+
+    keep = {sids[0]}
+
+    if keep_all > 0:
+        keep |= {sid for sid in sids
+                 if now - timedelta(days=keep_all - 1) <= sid.date.date()
+                 < now + timedelta(days=1)}
+
+    d = now
+    for _ in range(per_day):
+        keep |= first(d, d + timedelta(days=1))
+        d -= timedelta(days=1)
+
+    d = now - timedelta(days=now.weekday())
+    for _ in range(per_week):
+        keep |= first(d, d + timedelta(days=7))
+        d -= timedelta(days=7)
+
+    d1 = date(now.year, now.month, 1)
+    d2 = inc_month(d1)
+    for _ in range(per_month):
+        keep |= first(d1, d2)
+        d1, d2 = dec_month(d1), d1
+
+    for year in range(int(sids[-1].sid[:4]), now.year + 1):
+        keep |= first(date(year, 1, 1), date(year + 1, 1, 1))
+
+    return keep
+
+
+class KeepSet(unittest.TestCase):
+    """Behavior of keepSet()."""
+
+    def _keep(self, sids, now, *rules):
+        return retention.keepSet(sids, now, *rules,
+                                 failed=lambda sid: sid.failed)
+
+    def test_empty_and_single(self):
+        self.assertEqual(self._keep([], date(2025, 1, 1), 1, 1, 1, 1), set())
+
+        sid = fake_sid(datetime(2020, 1, 1))
+        self.assertEqual(self._keep([sid], date(2025, 1, 1), 0, 0, 0, 0),
+                         {sid})
+
+    def test_one_per_day(self):
+        sids = [fake_sid(dt) for dt in (datetime(2025, 4, 17, 22, 0),
+                                        datetime(2025, 4, 17, 4, 0),
+                                        datetime(2025, 4, 16, 8, 30),
+                                        datetime(2025, 4, 15, 16, 0),
+                                        datetime(2025, 4, 15, 0, 0))]
+
+        keep = self._keep(sids, date(2025, 4, 17), 0, 3, 0, 0)
+
+        self.assertEqual(sorted(keep, reverse=True),
+                         [sids[0], sids[2], sids[3]])
+
+    def test_healthy_preferred(self):
+        sids = [fake_sid(datetime(2025, 4, 16, 22, 0), failed=True),
+                fake_sid(datetime(2025, 4, 16, 12, 0)),
+                fake_sid(datetime(2025, 4, 15, 22, 0), failed=True),
+                fake_sid(datetime(2025, 4, 15, 12, 0), failed=True),
+                fake_sid(datetime(2025, 4, 17, 10, 0))]
+
+        keep = self._keep(sids, date(2025, 4, 17), 0, 3, 0, 0)
+
+        # all failed on the 15th: the youngest of them is kept
+        self.assertEqual(keep, {sids[4], sids[1], sids[2]})
+
+    def test_keep_all_border(self):
+        """The current day counts as the first of the keep_all days."""
+        sids = [fake_sid(dt) for dt in (datetime(2025, 4, 17, 22, 0),
+                                        datetime(2025, 4, 17, 4, 0),
+                                        datetime(2025, 4, 16, 8, 30),
+                                        datetime(2025, 4, 15, 16, 0),
+                                        datetime(2025, 4, 15, 0, 0),
+                                        datetime(2025, 4, 14, 23, 59))]
+
+        keep = self._keep(sids, date(2025, 4, 17), 2, 0, 0, 0)
+
+        self.assertEqual(keep, set(sids[:3]))
+
+    def test_keep_all_range(self):
+        """Snapshots younger than now are kept, but not by keep_all."""
+        sids = [fake_sid(datetime(2024, 2, 10, 7, 42) + timedelta(days=i))
+                for i in range(15)]
+
+        keep = self._keep(sids, date(2024, 2, 19), 8, 0, 0, 0)
+
+        # 12th to 19th and the youngest
+        self.assertEqual(keep, set(sids[2:10]) | {sids[-1]})
+
+    def test_period_starts_at_midnight(self):
+        """A snapshot at midnight belongs to the day and week starting
+        then."""
+        # Monday, 14th April 2025
+        monday = fake_sid(datetime(2025, 4, 14, 0, 0))
+        sunday = fake_sid(datetime(2025, 4, 13, 23, 59))
+        sids = [fake_sid(datetime(2025, 4, 17, 12, 0)), monday, sunday]
+
+        self.assertEqual(self._keep(sids, date(2025, 4, 17), 0, 4, 0, 0),
+                         {sids[0], monday})
+        self.assertEqual(self._keep(sids, date(2025, 4, 17), 0, 0, 2, 0),
+                         {sids[0], sunday})
+
+    def test_months_over_year_change(self):
+        sids = [fake_sid(dt) for dt in (datetime(2021, 1, 16),
+                                        datetime(2021, 1, 2),
+                                        datetime(2020, 12, 31),
+                                        datetime(2020, 12, 1),
+                                        datetime(2020, 11, 30))]
+
+        keep = self._keep(sids, date(2021, 1, 16), 0, 0, 0, 3)
+
+        self.assertEqual(keep, {sids[0], sids[2], sids[4]})
+
+    def test_months_leap_year(self):
+        sids = [fake_sid(dt) for dt in (datetime(2020, 3, 1),
+                                        datetime(2020, 2, 29),
+                                        datetime(2020, 2, 1),
+                                        datetime(2020, 1, 31))]
+
+        keep = self._keep(sids, date(2020, 3, 1), 0, 0, 0, 2)
+
+        self.assertEqual(keep, {sids[0], sids[1]})
+
+    def test_failed_read_once(self):
+        calls = []
+        sids = [fake_sid(datetime(2025, 4, 17) - timedelta(hours=i))
+                for i in range(500)]
+
+        def failed(sid):
+            calls.append(sid)
+            return True
+
+        retention.keepSet(sids, date(2025, 4, 17), 0, 30, 10, 12,
+                          failed=failed)
+
+        self.assertEqual(len(calls), len(set(calls)))
+
+    def test_identical_to_reference(self):
+        rnd = random.Random(1945)
+        now = date(2025, 3, 2)
+
+        for _ in range(50):
+            start = datetime(2021, 11, 28)
+            sids = {fake_sid(start + timedelta(hours=rnd.randrange(30000)),
+                             failed=rnd.random() < 0.3)
+                    for _ in range(rnd.randrange(2, 300))}
+            rules = (rnd.randrange(0, 5), rnd.randrange(0, 20),
+                     rnd.randrange(0, 10), rnd.randrange(0, 30))
+
+            self.assertEqual(self._keep(sids, now, *rules),
+                             reference(sids, now, *rules),
+                             rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@
 # General Public License v2 (GPLv2). See LICENSES directory or go to
 # <https://spdx.org/licenses/GPL-2.0-or-later.html>.
 import os
+import bz2
 import sys
 import unittest
 import stat
@@ -364,6 +365,23 @@ class TestSID(generic.SnapshotsTestCase):
 
         self.assertEqual('\n'.join(sid.log()), 'foo bar\nbaz')
 
+    def test_log_index(self):
+        sid = snapshots.SID('20151219-010324-123', self.cfg)
+        os.makedirs(os.path.join(self.snapshotPath, '20151219-010324-123'))
+
+        sid.setLog('foo bar\n[I] 123\n[C] baz\n[E] bla')
+        self.assertIsFile(sid.path(sid.LOG_INDEX))
+        self.assertEqual('\n'.join(sid.log(mode = LogFilter.ERROR)), 'foo bar\n[E] bla')
+
+    def test_log_legacy(self):
+        sid = snapshots.SID('20151219-010324-123', self.cfg)
+        os.makedirs(os.path.join(self.snapshotPath, '20151219-010324-123'))
+
+        # written as one stream without index by older versions
+        with bz2.BZ2File(sid.path(sid.LOG), 'wb') as f:
+            f.write(b'foo bar\n[I] 123\n[C] baz\n[E] bla')
+        self.assertEqual('\n'.join(sid.log(mode = LogFilter.CHANGES)), 'foo bar\n[C] baz')
+
     def test_makeWritable(self):
         sid = snapshots.SID('20151219-010324-123', self.cfg)
         sidPath = os.path.join(self.snapshotPath,   '20151219-010324-123')
@@ -526,6 +544,24 @@ class TestIterSnapshots(generic.SnapshotsTestCase):
         self.assertIsInstance(l7[0], snapshots.SID)
         self.assertIsInstance(l7[-1], snapshots.NewSnapshot)
 
+    def test_list_cached_values(self):
+        """Name and failed flag are read from the catalog."""
+        sid = snapshots.SID('20151219-010324-123', self.cfg)
+        sid.name = 'foo'
+        sid.failed = True
+        snapshots.listSnapshots(self.cfg)
+
+        # modify the folder behind the catalogs back
+        os.remove(sid.path(snapshots.SID.NAME))
+        os.remove(sid.path(snapshots.SID.FAILED))
+
+        cached = snapshots.listSnapshots(self.cfg)[-1]
+        self.assertEqual(cached.name, 'foo')
+        self.assertTrue(cached.failed)
+
+        cached.name = 'bar'
+        self.assertEqual(snapshots.listSnapshots(self.cfg)[-1].name, 'bar')
+
     def test_iter_snapshots(self):
         for i, sid in enumerate(snapshots.iterSnapshots(self.cfg)):
             self.assertIn(sid, ['20151219-040324-123',
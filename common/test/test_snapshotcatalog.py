@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the snapshotcatalog module."""
+import os
+import unittest
+from pathlib import Path
+from test import generic
+from snapshotcatalog import SnapshotCatalog, CatalogEntry
+
+
+class Catalog(generic.TestCase):
+    """Behavior of class SnapshotCatalog."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+        self.probed = []
+
+        for sid in ('20151219-010324-123', '20151219-020324-123'):
+            (self.path / sid / 'backup').mkdir(parents=True)
+
+    def _probe(self, item):
+        self.probed.append(item)
+
+        if not (self.path / item / 'backup').is_dir():
+            return None
+
+        return CatalogEntry(sid=item, tag=item[16:])
+
+    def _touch_folder(self):
+        """Make sure the folders mtime differs from the stored one."""
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_invalid_without_file(self):
+        sut = SnapshotCatalog(str(self.path))
+
+        self.assertFalse(sut.exists())
+        self.assertFalse(sut.isValid())
+        self.assertIsNone(sut.entries())
+
+    def test_sync_creates_catalog(self):
+        sut = SnapshotCatalog(str(self.path))
+
+        result = sut.sync(self._probe)
+
+        self.assertEqual([e.sid for e in result],
+                         ['20151219-010324-123', '20151219-020324-123'])
+        self.assertTrue(sut.isValid())
+        self.assertEqual([e.sid for e in sut.entries()],
+                         ['20151219-010324-123', '20151219-020324-123'])
+        self.assertNotIn(SnapshotCatalog.FILENAME, self.probed)
+
+    def test_no_journal_files(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+        sut.update('20151219-010324-123', name='foo')
+
+        self.assertTrue(sut.isValid())
+        self.assertEqual(
+            sorted(os.listdir(self.path)),
+            ['20151219-010324-123',
+             '20151219-020324-123',
+             SnapshotCatalog.FILENAME])
+
+    def test_outside_modification_invalidates(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+
+        (self.path / '20151219-030324-123' / 'backup').mkdir(parents=True)
+        self._touch_folder()
+
+        self.assertFalse(sut.isValid())
+        self.assertIsNone(sut.entries())
+
+    def test_sync_probes_only_new_items(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+        self.probed.clear()
+
+        (self.path / '20151219-030324-123' / 'backup').mkdir(parents=True)
+        (self.path / '20151219-010324-123' / 'backup').rmdir()
+        (self.path / '20151219-010324-123').rmdir()
+        self._touch_folder()
+
+        result = sut.sync(self._probe)
+
+        self.assertEqual(self.probed, ['20151219-030324-123'])
+        self.assertEqual([e.sid for e in result],
+                         ['20151219-020324-123', '20151219-030324-123'])
+        self.assertTrue(sut.isValid())
+
+    def test_expect_change(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+
+        with sut.expectChange() as conn:
+            self.assertIsNotNone(conn)
+            (self.path / '20151219-030324-123' / 'backup').mkdir(parents=True)
+            self._touch_folder()
+            sut.addEntry(conn, CatalogEntry('20151219-030324-123'))
+
+        with sut.expectChange() as conn:
+            (self.path / '20151219-020324-123' / 'backup').rmdir()
+            (self.path / '20151219-020324-123').rmdir()
+            sut.removeEntry(conn, '20151219-020324-123')
+
+        self.assertTrue(sut.isValid())
+        self.assertEqual([e.sid for e in sut.entries()],
+                         ['20151219-010324-123', '20151219-030324-123'])
+
+    def test_expect_change_on_invalid_catalog(self):
+        sut = SnapshotCatalog(str(self.path))
+
+        with sut.expectChange() as conn:
+            self.assertIsNone(conn)
+            sut.addEntry(conn, CatalogEntry('20151219-030324-123'))
+
+        self.assertFalse(sut.isValid())
+
+    def test_update(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+
+        sut.update('20151219-020324-123', name='foo', failed=True)
+
+        entry = sut.get('20151219-020324-123')
+        self.assertEqual(entry.name, 'foo')
+        self.assertTrue(entry.failed)
+
+        with self.assertRaises(KeyError):
+            sut.update('20151219-020324-123', foo='bar')
+
+    def test_invalidate(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+
+        sut.invalidate()
+
+        self.assertFalse(sut.isValid())
+
+    def test_corrupt_file(self):
+        (self.path / SnapshotCatalog.FILENAME).write_text('no database')
+        sut = SnapshotCatalog(str(self.path))
+
+        self.assertFalse(sut.isValid())
+        self.assertIsNone(sut.entries())
+        # The broken file can not be replaced but the folder is still listed
+        self.assertEqual(len(sut.sync(self._probe)), 2)
+
+    def test_fingerprint(self):
+        sut = SnapshotCatalog(str(self.path))
+        sut.sync(self._probe)
+        before = sut.fingerprint()
+
+        sut.update('20151219-010324-123', name='foo')
+        self.assertEqual(sut.fingerprint(), before)
+
+        (self.path / '20151219-030324-123').mkdir()
+        self.assertNotEqual(sut.fingerprint(), before)
+
+        self.assertIsNone(SnapshotCatalog(str(self.path / 'foo')).fingerprint())
+
+
+if __name__ == '__main__':
+    unittest.main()
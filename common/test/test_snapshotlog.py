@@ -194,3 +194,46 @@ Last snapshot didn't finish but can be continued.
 
         self.assertEqual('\n'.join(log.get(mode = snapshotlog.LogFilter.CHANGES, skipLines = 2)),
                          '[C] 456\n[C] 789\n[C] asd')
+
+    def test_tail(self):
+        log = snapshotlog.SnapshotLog(self.cfg)
+        tail = log.tail(mode = snapshotlog.LogFilter.CHANGES)
+
+        log.append('foo bar', 1)
+        log.append('[I] 123', 1)
+        log.flush()
+        self.assertEqual(list(tail.lines()), ['foo bar'])
+        self.assertTrue(tail.restarted)
+
+        log.append('[C] baz', 1)
+        log.append('[E] bla', 1)
+        log.flush()
+        self.assertEqual(list(tail.lines()), ['[C] baz'])
+        self.assertFalse(tail.restarted)
+        self.assertEqual(list(tail.lines()), [])
+
+    def test_tail_incomplete_line(self):
+        tail = snapshotlog.LogTail(self.logFile)
+
+        with open(self.logFile, 'wt') as f:
+            f.write('foo\nba')
+        self.assertEqual(list(tail.lines()), ['foo'])
+
+        with open(self.logFile, 'at') as f:
+            f.write('r\n')
+        self.assertEqual(list(tail.lines()), ['bar'])
+
+    def test_tail_new_log(self):
+        log = snapshotlog.SnapshotLog(self.cfg)
+        tail = log.tail()
+
+        log.append('foo', 1)
+        log.append('bar', 1)
+        log.flush()
+        self.assertEqual(list(tail.lines()), ['foo', 'bar'])
+
+        log.new(datetime.today())
+        log.flush()
+        lines = list(tail.lines())
+        self.assertTrue(tail.restarted)
+        self.assertRegex(lines[0], r'^========== Take snapshot')
@@ -15,6 +15,7 @@ import shutil
 import stat
 import grp
 import re
+import subprocess
 import random
 import string
 import unittest
@@ -29,6 +30,7 @@ import config
 import snapshots
 import tools
 import mount
+import snapshotsize
 
 
 # all groups the current user is member in
@@ -73,6 +75,20 @@ class SetTakeSnapshotMessage(generic.SnapshotsTestCase):
         self.assertEqual('\n'.join(self.sn.snapshotLog.get()), '[E] second message')
 
 
+    def test_coalesce(self):
+        self.sn.setTakeSnapshotMessage(0, 'first message')
+        self.sn.setTakeSnapshotMessage(0, 'second message')
+
+        with open(self.sn.config.takeSnapshotMessageFile(), 'rt') as f:
+            self.assertEqual(f.read(), '0\nfirst message')
+
+        self.sn.statusPublisher.flush()
+
+        with open(self.sn.config.takeSnapshotMessageFile(), 'rt') as f:
+            self.assertEqual(f.read(), '0\nsecond message')
+        self.assertEqual(self.mockNotifyPlugin.call_count, 2)
+
+
 class UserAndGroups(generic.SnapshotsTestCase):
     def test_uid_valid(self):
         self.assertEqual(self.sn.uid('root'), 0)
@@ -286,6 +302,32 @@ class Callbacks(generic.SnapshotsTestCase):
         with open(self.cfg.takeSnapshotLogFile(), 'rt') as f:
             self.assertEqual('[I] Take snapshot (rsync: BACKINTIME: cd..t...... /foo/bar)\n', f.read())
 
+    def test_transfer_permissions(self):
+        params = [False, False]
+        self.sn.transferFileInfo = {}
+        self.sn.transferDirs = set()
+
+        self.sn.rsyncCallback(
+            'BACKINTIME: >f+++++++++ rwsr-x--T {} {} foo/bar'.format(
+                CURRENTUID, CURRENTGID),
+            params)
+
+        self.assertListEqual([False, True], params)
+        self.sn.snapshotLog.flush()
+        with open(self.cfg.takeSnapshotLogFile(), 'rt') as f:
+            self.assertEqual('[I] Take snapshot (rsync: BACKINTIME: >f+++++++++ foo/bar)\n'
+                             '[C] >f+++++++++ foo/bar\n', f.read())
+        self.assertDictEqual(
+            self.sn.transferFileInfo,
+            {b'/foo/bar': (stat.S_IFREG | 0o5750,
+                           CURRENTUSER.encode(),
+                           CURRENTGROUP.encode())})
+
+    def test_permission_bits(self):
+        self.assertEqual(snapshots.permissionBits('rwxr-xr-x'), 0o755)
+        self.assertEqual(snapshots.permissionBits('rw-r-Sr-t'), 0o3645)
+        self.assertEqual(snapshots.permissionBits('--S------'), 0o4000)
+
     def test_error(self):
         params = [False, False]
 
@@ -299,6 +341,47 @@ class Callbacks(generic.SnapshotsTestCase):
                              '[E] Error: rsync: send_files failed to open "/foo/bar": Operation not permitted (1)\n', f.read())
 
 
+class ParallelTransfer(generic.SnapshotsTestCase):
+    def test_shard_nested(self):
+        with TemporaryDirectory() as tmp:
+            shards = snapshots.shardIncludeFolders([
+                (os.path.join(tmp, 'foo', 'bar'), 0),
+                (os.path.join(tmp, 'foo'), 0),
+                (os.path.join(tmp, 'foobar'), 1)])
+
+        # same device
+        self.assertEqual(len(shards), 1)
+        self.assertCountEqual(
+            shards[0],
+            [(os.path.join(tmp, 'foo'), 0),
+             (os.path.join(tmp, 'foo', 'bar'), 0),
+             (os.path.join(tmp, 'foobar'), 1)])
+
+    def test_shard_root(self):
+        shards = snapshots.shardIncludeFolders([('/', 0), ('/proc', 0)])
+        self.assertEqual(len(shards), 1)
+
+    def test_shared_parents(self):
+        self.assertListEqual(
+            snapshots.sharedParentFolders([[('/srv/a/b', 0)],
+                                           [('/srv/a/c', 0), ('/home', 0)]]),
+            ['/srv', '/srv/a'])
+
+    def test_exit_codes(self):
+        self.assertEqual(snapshots.combineRsyncExitCodes([0, 0]), 0)
+        self.assertEqual(snapshots.combineRsyncExitCodes([0, 24, 23]), 23)
+        self.assertEqual(snapshots.combineRsyncExitCodes([24, 0]), 24)
+        self.assertEqual(snapshots.combineRsyncExitCodes([24, 12, -9]), 12)
+
+    def test_protect(self):
+        self.assertListEqual(
+            self.sn.rsyncProtect([('/srv/data', 0),
+                                  ('/srv/file', 1)]),
+            ['--filter=P /srv/data/***',
+             '--filter=P /srv/',
+             '--filter=P /srv/file'])
+
+
 class SnapshotWithSID(generic.SnapshotsWithSidTestCase):
     def test_backup_config(self):
         self.sn.backupConfig(self.sid)
@@ -352,6 +435,34 @@ user.size=.+''', re.MULTILINE))
             self.assertIn(tmp.encode(), fileInfo)
             self.assertIn(file_path.encode(), fileInfo)
 
+    def test_merge_permissions_changed_mode(self):
+        """Inherited files get their current permissions, not the ones of
+        the previous snapshot."""
+        include = self.cfg.include()[0][0]
+        with TemporaryDirectory(dir = include) as tmp:
+            file_path = os.path.join(tmp, 'foo')
+            with open(file_path, 'wt') as f:
+                f.write('bar')
+            os.chmod(file_path, stat.S_IRUSR | stat.S_IWUSR)
+
+            # previous snapshot knows the old mode
+            prev = snapshots.FileInfoDict()
+            self.sn.collectPermission(prev, file_path.encode())
+            self.sid.fileInfo = prev
+            info = self.sid.info
+            info.setStrValue('snapshot_filter_hash', 'abc')
+            self.sid.info = info
+
+            # unchanged content, so rsync reports only the folder
+            os.chmod(file_path, stat.S_IRUSR)
+            self.sn.transferFileInfo = {}
+            self.sn.transferDirs = {tmp.encode()}
+
+            fileInfo = self.sn.mergeTransferPermissions(self.sid, 'abc')
+
+            self.assertEqual(stat.S_IMODE(fileInfo[file_path.encode()][0]),
+                             stat.S_IRUSR)
+
     def test_collect_permission(self):
         # force permissions because different distributions will have different umask
         os.chmod(self.testDirFullPath, stat.S_IRWXU | stat.S_IRWXG | stat.S_IROTH | stat.S_IXOTH)
@@ -496,6 +607,21 @@ class RestorePathInfo(generic.SnapshotsTestCase):
         self.assertEqual(s.st_uid, CURRENTUID)
         self.assertEqual(s.st_gid, CURRENTGID)
 
+    def test_apply_permission(self):
+        newModeFile = 33152 #rw-------
+
+        actions = snapshots.applyPermission(
+            b'/tmp/test/bar', newModeFile, -1, -1)
+
+        self.assertListEqual(actions, [(True, 'chmod /tmp/test/bar 100600')])
+        self.assertEqual(os.stat(self.pathFile).st_mode, newModeFile)
+        self.assertListEqual(
+            snapshots.applyPermission(b'/tmp/test/bar', newModeFile, -1, -1),
+            [])
+        self.assertListEqual(
+            snapshots.applyPermission(b'/tmp/test/nope', newModeFile, -1, -1),
+            [])
+
 
 class DeletePath(generic.SnapshotsWithSidTestCase):
     def test_file(self):
@@ -545,6 +671,96 @@ class RemoveSnapshot(generic.SnapshotsWithSidTestCase):
         self.assertFalse(self.sid.exists())
 
 
+class FreeSpaceBatch(generic.SnapshotsTestCase):
+    """Selecting the snapshots removed to keep min free space."""
+
+    def setUp(self):
+        super().setUp()
+        self.sids = []
+
+        for i in range(4):
+            sid = snapshots.SID(f'2015121{i}-010324-123', self.cfg)
+            sid.makeDirs()
+            self.sids.append(sid)
+
+    def _cache(self, *sizes):
+        """Cache the exclusive size in MiB of the oldest snapshots."""
+        for i, mib in enumerate(sizes):
+            neighbours = (snapshots._neighbour(self.sids, i - 1),
+                          snapshots._neighbour(self.sids, i + 1))
+            snapshotsize.SizeCache(self.sids[i].path()).save(
+                snapshotsize.SnapshotSize(exclusive_bytes=mib * 1024 * 1024,
+                                          exclusive_inodes=mib),
+                neighbours)
+
+    def test_cached(self):
+        """Cached sizes are summed up to the needed space."""
+        self._cache(1, 2, 4, 8)
+
+        self.assertEqual(
+            self.sn.freeSpaceBatch(self.sids, needed_bytes=3 * 1024 * 1024),
+            self.sids[:2])
+        self.assertEqual(
+            self.sn.freeSpaceBatch(self.sids, needed_inodes=1),
+            self.sids[:1])
+
+    def test_youngest_and_named(self):
+        """The youngest and named snapshots are not removed."""
+        self._cache(1, 2, 4, 8)
+        self.sids[1].name = 'foo'
+        self.cfg.setDontRemoveNamedSnapshots(True)
+
+        self.assertEqual(
+            self.sn.freeSpaceBatch(self.sids, needed_bytes=100 * 1024 * 1024),
+            [self.sids[0], self.sids[2]])
+
+    def test_not_cached(self):
+        """Without cached sizes local snapshots are removed one by one."""
+        self._cache(1)
+
+        with patch.object(snapshotsize.Usage, 'add') as add:
+            self.assertEqual(
+                self.sn.freeSpaceBatch(self.sids,
+                                       needed_bytes=2 * 1024 * 1024),
+                self.sids[:1])
+            add.assert_not_called()
+
+    def test_not_cached_ssh(self):
+        """Without cached sizes SSH snapshots are measured with one du."""
+        # Released KiB, youngest first like the du arguments
+        du = subprocess.CompletedProcess(
+            [], 0, stdout='4096\ta\n3072\tb\n2048\tc\n1024\td\n',
+            stderr='')
+
+        with patch.object(self.cfg, 'snapshotsMode', return_value='ssh'), \
+                patch.object(self.cfg, 'sshCommand',
+                             side_effect=lambda cmd: cmd), \
+                patch('subprocess.run', return_value=du) as run:
+            self.assertEqual(
+                self.sn.freeSpaceBatch(self.sids,
+                                       needed_bytes=2 * 1024 * 1024),
+                self.sids[:2])
+
+        run.assert_called_once()
+        cmd = run.call_args.args[0][0]
+        self.assertTrue(cmd.startswith('du -s -k '))
+        self.assertLess(cmd.index(self.sids[3].sid),
+                        cmd.index(self.sids[0].sid))
+
+    def test_not_cached_ssh_failed(self):
+        """The oldest SSH snapshot is removed if du fails."""
+        du = subprocess.CompletedProcess([], 1, stdout='', stderr='failed')
+
+        with patch.object(self.cfg, 'snapshotsMode', return_value='ssh'), \
+                patch.object(self.cfg, 'sshCommand',
+                             side_effect=lambda cmd: cmd), \
+                patch('subprocess.run', return_value=du):
+            self.assertEqual(
+                self.sn.freeSpaceBatch(self.sids,
+                                       needed_bytes=2 * 1024 * 1024),
+                self.sids[:1])
+
+
 @unittest.skipIf(not generic.LOCAL_SSH, generic.SKIP_SSH_TEST_MESSAGE)
 class SshSnapshots(generic.SSHTestCase):
     def setUp(self):
@@ -12,18 +12,14 @@
 """Tests related to Remove & Retention, formally known as Auto- and
 Smart-remove.
 
-About the current state of this test module:
-
-    Most of the tests in this module are pseudo-tests. The do not test
-    productive code but surrogates (e.g. method name `_org()` in each class).
-    Because the productive code is in an untestable state and needs refactoring
-    or totally rewrite. This is on the projects todo list. See meta issue
-    #1945.
+The examples of the user manual are checked against
+:py:func:`retention.keepSet` with only one rule enabled (see method
+`_org()` in each class). The youngest snapshot and one snapshot per year
+are always kept in addition.
 """
 import os
 import sys
 import inspect
-from unittest import mock
 from typing import Union
 from datetime import date, time, datetime, timedelta
 from pathlib import Path
@@ -32,6 +28,7 @@ import pyfakefs.fake_filesystem_unittest as pyfakefs_ut
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import config  # noqa: E402,RUF100
 import snapshots  # noqa: E402,RUF100
+import retention  # noqa: E402,RUF100
 
 
 def dt2sidstr(d: Union[date, datetime], t: time = None, tag: int = 123):
@@ -81,317 +78,9 @@ def create_SIDs(start_date: Union[date, datetime, list[date]],
     return sorted(sids, reverse=True)
 
 
-class KeepFirst(pyfakefs_ut.TestCase):
-    """Test Snapshot.removeKeepFirst().
-
-    PyFakeFS is used here because of Config file dependency."""
-
-    def setUp(self):
-        """Setup a fake filesystem."""
-        self.setUpPyfakefs(allow_root_user=False)
-
-        # cleanup() happens automatically
-        self._temp_dir = TemporaryDirectory(prefix='bit.')
-        # Workaround: tempfile and pathlib not compatible yet
-        self.temp_path = Path(self._temp_dir.name)
-
-        self._config_fp = self._create_config_file(parent_path=self.temp_path)
-        self.cfg = config.Config(str(self._config_fp))
-
-        self.sn = snapshots.Snapshots(self.cfg)
-
-    def _create_config_file(self, parent_path):
-        """Minimal config file"""
-        # pylint: disable-next=R0801
-        cfg_content = inspect.cleandoc('''
-            config.version=6
-            profile1.snapshots.include.1.type=0
-            profile1.snapshots.include.1.value=rootpath/source
-            profile1.snapshots.include.size=1
-            profile1.snapshots.no_on_battery=false
-            profile1.snapshots.notify.enabled=true
-            profile1.snapshots.path=rootpath/destination
-            profile1.snapshots.path.host=test-host
-            profile1.snapshots.path.profile=1
-            profile1.snapshots.path.user=test-user
-            profile1.snapshots.preserve_acl=false
-            profile1.snapshots.preserve_xattr=false
-            profile1.snapshots.remove_old_snapshots.enabled=true
-            profile1.snapshots.remove_old_snapshots.unit=80
-            profile1.snapshots.remove_old_snapshots.value=10
-            profile1.snapshots.rsync_options.enabled=false
-            profile1.snapshots.rsync_options.value=
-            profiles.version=1
-        ''')
-
-        # config file location
-        config_fp = parent_path / 'config_path' / 'config'
-        config_fp.parent.mkdir()
-        config_fp.write_text(cfg_content, 'utf-8')
-
-        return config_fp
-
-    def test_one_but_set(self):
-        """Return value is always a set with always only one element."""
-        # One SID for each of 20 days beginning with 5th March 2022 07:42:31
-        sids = create_SIDs(
-            datetime(2020, 3, 5, 7, 42, 31), 700, self.cfg)
-
-        sut = self.sn.smartRemoveKeepFirst(
-            sids, date(2021, 8, 5), datetime.now().date())
-
-        self.assertIsInstance(sut, set)
-        self.assertTrue(len(sut), 1)
-
-    def test_simple_one(self):
-        """First element in a range of SIDs"""
-        sids = create_SIDs(
-            datetime(2022, 3, 5, 7, 42, 31), 20, self.cfg)
-
-        sut = self.sn.smartRemoveKeepFirst(
-            sids, date(2022, 3, 5), datetime.now().date())
-
-        sut = sut.pop()
-
-        self.assertTrue(str(sut).startswith('20220324-074231-'))
-
-    def test_min_included_max_not(self):
-        """Minimum date is included in range, but max date not"""
-        sids = create_SIDs(
-            [
-                datetime(2022, 3, 5),
-                datetime(2022, 3, 3),
-            ],
-            None,
-            self.cfg)
-
-        sut = self.sn.smartRemoveKeepFirst(
-            snapshots=sids,
-            min_date=date(2022, 3, 3),
-            max_date=date(2022, 3, 5),
-        )
-
-        self.assertEqual(len(sut), 1)
-
-        sut = sut.pop()
-
-        # the min_date is included
-        self.assertEqual(sut.date.date(), date(2022, 3, 3))
-
-    def test_no_date_ordering(self):
-        """Hit first in the list and ignoring its date ordering.
-
-        The list of snapshots is not ordered anywhere."""
-        sids = []
-        # April, 2016...
-        for timestamp_string in ['20160424-215134-123',  # …24th
-                                 # This SID will hit because it is the first
-                                 # in the range specified.
-                                 '20160422-030324-123',  # …22th
-                                 '20160422-020324-123',  # …22th
-                                 '20160422-010324-123',  # …22th
-                                 # This might be the earliest/first SID in the
-                                 # date range specified but it is not the first
-                                 # in the list. So it won't be hit.
-                                 '20160421-013218-123',  # …21th
-                                 '20160410-134327-123']:  # …10th
-            sids.append(snapshots.SID(timestamp_string, self.cfg))
-
-        sut = self.sn.smartRemoveKeepFirst(sids,
-                                            date(2016, 4, 20),
-                                            date(2016, 4, 23))
-
-        self.assertEqual(str(sut.pop()), '20160422-030324-123')
-
-    def test_keep_first_range_outside(self):
-        """No SID inside the specified range"""
-        sids = []
-        # April, 2016...
-        for timestamp_string in ['20160424-215134-123',  # …24th
-                                 '20160422-030324-123',  # …22th
-                                 '20160422-020324-123',  # …22th
-                                 '20160422-010324-123',  # …22th
-                                 '20160421-013218-123',  # …21th
-                                 '20160410-134327-123']:  # …10th
-            sids.append(snapshots.SID(timestamp_string, self.cfg))
-
-        # Between 11th and 18th April
-        sut = self.sn.smartRemoveKeepFirst(sids,
-                                           date(2016, 4, 11),
-                                           date(2016, 4, 18))
-
-        # None will hit, because no SID in that range.
-        self.assertEqual(len(sut), 0)
-
-    @mock.patch.object(snapshots.SID, 'failed', new_callable=lambda: True)
-    def test_all_invalid(self, _mock_failed):
-        """All SIDS invalid (not healthy)"""
-        sids = create_SIDs(
-            datetime(2022, 3, 5, 7, 42, 31), 20, self.cfg)
-
-        # By default healthy/invalid status is irrelevant
-        sut = self.sn.smartRemoveKeepFirst(
-            sids, date(2022, 3, 5), datetime.now().date())
-        self.assertTrue(len(sut), 1)
-
-        # Now make it relevant
-        sut = self.sn.smartRemoveKeepFirst(
-            sids, date(2022, 3, 5), datetime.now().date(),
-            keep_healthy=True)
-        self.assertTrue(len(sut), 0)
-
-    @mock.patch.object(snapshots.SID, 'failed', new_callable=mock.PropertyMock)
-    def test_ignore_unhealthy(self, mock_failed):
-        # The second call to failed-property returns True
-        mock_failed.side_effect = [False, True, False, False, False, False]
-        sids = []
-        for timestamp_string in ['20160424-215134-123',
-                                 # could be hit, but is NOT healthy
-                                 '20160422-030324-123',
-                                 # hit this
-                                 '20160422-020324-123',
-                                 '20160422-010324-123',
-                                 '20160421-013218-123',
-                                 '20160410-134327-123']:
-            sids.append(snapshots.SID(timestamp_string, self.cfg))
-
-        # keep the first healthy snapshot
-        sut = self.sn.smartRemoveKeepFirst(sids,
-                                           date(2016, 4, 20),
-                                           date(2016, 4, 23),
-                                           keep_healthy=True)
-        self.assertEqual(str(sut.pop()), '20160422-020324-123')
-
-
-class KeepAllForLast(pyfakefs_ut.TestCase):
-    """Test Snapshot.removeKeepAll().
-
-    Keep all snapshots for the last N days.
-    PyFakeFS is used here because of Config file dependency."""
-
-    def setUp(self):
-        """Setup a fake filesystem."""
-        self.setUpPyfakefs(allow_root_user=False)
-
-        # cleanup() happens automatically
-        self._temp_dir = TemporaryDirectory(prefix='bit.')
-        # Workaround: tempfile and pathlib not compatible yet
-        self.temp_path = Path(self._temp_dir.name)
-
-        self._config_fp = self._create_config_file(parent_path=self.temp_path)
-        self.cfg = config.Config(str(self._config_fp))
-
-        self.sn = snapshots.Snapshots(self.cfg)
-
-    def _create_config_file(self, parent_path):
-        """Minimal config file"""
-        # pylint: disable-next=R0801
-        cfg_content = inspect.cleandoc('''
-            config.version=6
-            profile1.snapshots.include.1.type=0
-            profile1.snapshots.include.1.value=rootpath/source
-            profile1.snapshots.include.size=1
-            profile1.snapshots.no_on_battery=false
-            profile1.snapshots.notify.enabled=true
-            profile1.snapshots.path=rootpath/destination
-            profile1.snapshots.path.host=test-host
-            profile1.snapshots.path.profile=1
-            profile1.snapshots.path.user=test-user
-            profile1.snapshots.preserve_acl=false
-            profile1.snapshots.preserve_xattr=false
-            profile1.snapshots.remove_old_snapshots.enabled=true
-            profile1.snapshots.remove_old_snapshots.unit=80
-            profile1.snapshots.remove_old_snapshots.value=10
-            profile1.snapshots.rsync_options.enabled=false
-            profile1.snapshots.rsync_options.value=
-            profiles.version=1
-        ''')
-
-        # config file location
-        config_fp = parent_path / 'config_path' / 'config'
-        config_fp.parent.mkdir()
-        config_fp.write_text(cfg_content, 'utf-8')
-
-        return config_fp
-
-    def _org(self, snapshots, now, days_to_keep):
-        """Simulated production code. Refactoring is on the todo list."""
-
-        keep_all = days_to_keep
-        keep = self.sn.smartRemoveKeepAll(
-            snapshots,
-            now - timedelta(days=keep_all-1),
-            now + timedelta(days=1))
-
-        return sorted(keep, reverse=True)
-
-    def test_border(self):
-        """The dates used in the user manual example.
-
-        Here the current (just running incomplete) day is contained in the
-        calculation.
-        """
-        sids = create_SIDs([
-            datetime(2025, 4, 17, 22, 0),
-            datetime(2025, 4, 17, 18, 1),
-            datetime(2025, 4, 17, 12, 0),
-            datetime(2025, 4, 17, 4, 0),
-            datetime(2025, 4, 16, 8, 30),
-            datetime(2025, 4, 15, 16, 0),
-            datetime(2025, 4, 15, 0, 0),
-            datetime(2025, 4, 14, 23, 59),
-            datetime(2025, 4, 14, 9, 0),
-            ],
-            None,
-            self.cfg)
-
-        sut = self._org(
-            snapshots=sids,
-            now=datetime(2025, 4, 17, 22, 00).date(),
-            days_to_keep=2)
-
-        self.assertEqual(sut[0].date, datetime(2025, 4, 17, 22, 0))
-        self.assertEqual(sut[1].date, datetime(2025, 4, 17, 18, 1))
-        self.assertEqual(sut[2].date, datetime(2025, 4, 17, 12, 0))
-        self.assertEqual(sut[3].date, datetime(2025, 4, 17, 4, 0))
-        self.assertEqual(sut[4].date, datetime(2025, 4, 16, 8, 30))
-
-    def test_simple(self):
-        """Simple"""
-        # 10th to 25th
-
-        sids = create_SIDs(datetime(2024, 2, 10), 15, self.cfg)
-
-        # keep...
-        sut = self.sn.smartRemoveKeepAll(
-            sids,
-            # ... from 12th ...
-            date(2024, 2, 12),
-            # ... to 19th.
-            date(2024, 2, 20)
-        )
-
-        self.assertEqual(len(sut), 8)
-
-        sut = sorted(sut)
-
-        self.assertEqual(sut[0].date.date(), date(2024, 2, 12))
-        self.assertEqual(sut[1].date.date(), date(2024, 2, 13))
-        self.assertEqual(sut[2].date.date(), date(2024, 2, 14))
-        self.assertEqual(sut[3].date.date(), date(2024, 2, 15))
-        self.assertEqual(sut[4].date.date(), date(2024, 2, 16))
-        self.assertEqual(sut[5].date.date(), date(2024, 2, 17))
-        self.assertEqual(sut[6].date.date(), date(2024, 2, 18))
-        self.assertEqual(sut[7].date.date(), date(2024, 2, 19))
-
-
 class KeepOneForLastNDays(pyfakefs_ut.TestCase):
     """Covering the smart remove setting 'Keep the last snapshot of each day
     for the last N  days.'.
-
-    That logic is implemented in 'Snapshots.smartRemoveList()' but not testable
-    in isolation. So for a first shot we just duplicate that code in this
-    tests (see self._org()).
     """
 
     def setUp(self):
@@ -406,8 +95,6 @@ class KeepOneForLastNDays(pyfakefs_ut.TestCase):
         self._config_fp = self._create_config_file(parent_path=self.temp_path)
         self.cfg = config.Config(str(self._config_fp))
 
-        self.sn = snapshots.Snapshots(self.cfg)
-
     def _create_config_file(self, parent_path):
         """Minimal config file"""
         # pylint: disable-next=R0801
@@ -440,19 +127,9 @@ class KeepOneForLastNDays(pyfakefs_ut.TestCase):
         return config_fp
 
     def _org(self, now, n_days, snapshots):
-        """Copied and slightly refactored from inside
-        'Snapshots.smartRemoveList()'.
-        """
-
-        keep = set()
-        d = now
-        for _ in range(0, n_days):
-            keep |= self.sn.smartRemoveKeepFirst(
-                snapshots,
-                d,
-                d + timedelta(days=1),
-                keep_healthy=True)
-            d -= timedelta(days=1)
+        """Keep one per day for the last n_days days."""
+        keep = retention.keepSet(snapshots, now, 0, n_days, 0, 0,
+                                 failed=lambda sid: sid.failed)
 
         return sorted(keep, reverse=True)
 
@@ -487,12 +164,7 @@ class KeepOneForLastNDays(pyfakefs_ut.TestCase):
 
 class KeepOneForLastNWeeks(pyfakefs_ut.TestCase):
     """Covering the smart remove setting 'Keep the last snapshot for each week for the
-    last N weeks'.
-
-    That logic is implemented in 'Snapshots.smartRemoveList()' but not testable
-    in isolation. So for a first shot we just duplicate that code in this
-    tests (see self._org()).
-    """
+    last N weeks'."""
 
     def setUp(self):
         """Setup a fake filesystem."""
@@ -506,8 +178,6 @@ class KeepOneForLastNWeeks(pyfakefs_ut.TestCase):
         self._config_fp = self._create_config_file(parent_path=self.temp_path)
         self.cfg = config.Config(str(self._config_fp))
 
-        self.sn = snapshots.Snapshots(self.cfg)
-
     def _create_config_file(self, parent_path):
         """Minimal config file"""
         # pylint: disable-next=R0801
@@ -539,29 +209,10 @@ class KeepOneForLastNWeeks(pyfakefs_ut.TestCase):
 
         return config_fp
 
-    def _org(self, now, n_weeks, snapshots, keep_healthy=True):
-        """Keep one per week for the last n_weeks weeks.
-
-        Copied and slightly refactored from inside
-        'Snapshots.smartRemoveList()'.
-        """
-        keep = set()
-
-        # Sunday ??? (Sonntag) of previous week
-        idx_date = now - timedelta(days=now.weekday())
-
-        for _ in range(0, n_weeks):
-
-            min_date = idx_date
-            max_date = idx_date + timedelta(days=7)
-
-            keep |= self.sn.smartRemoveKeepFirst(
-                snapshots,
-                min_date,
-                max_date,
-                keep_healthy=keep_healthy)
-
-            idx_date -= timedelta(days=7)
+    def _org(self, now, n_weeks, snapshots):
+        """Keep one per week for the last n_weeks weeks."""
+        keep = retention.keepSet(snapshots, now, 0, 0, n_weeks, 0,
+                                 failed=lambda sid: sid.failed)
 
         return sorted(keep, reverse=True)
 
@@ -605,11 +256,6 @@ class KeepOneForLastNWeeks(pyfakefs_ut.TestCase):
 class KeepOneForLastNMonths(pyfakefs_ut.TestCase):
     """Covering the smart remove setting 'Keep the last snapshot for each month
     for the last N months'.
-
-    That logic is implemented in 'Snapshots.smartRemoveList()' but not testable
-    in isolation. So for a first shot we just duplicate that code in this
-    tests (see self._org()).
-
     """
 
     def setUp(self):
@@ -624,8 +270,6 @@ class KeepOneForLastNMonths(pyfakefs_ut.TestCase):
         self._config_fp = self._create_config_file(parent_path=self.temp_path)
         self.cfg = config.Config(str(self._config_fp))
 
-        self.sn = snapshots.Snapshots(self.cfg)
-
     def _create_config_file(self, parent_path):
         """Minimal config file"""
         # pylint: disable-next=R0801
@@ -657,23 +301,10 @@ class KeepOneForLastNMonths(pyfakefs_ut.TestCase):
 
         return config_fp
 
-    def _org(self, now, n_months, snapshots, keep_healthy=True):
-        """Keep one per months for the last n_months months.
-
-        Copied and slightly refactored from inside
-        'Snapshots.smartRemoveList()'.
-        """
-        keep = set()
-
-        d1 = date(now.year, now.month, 1)
-        d2 = self.sn.incMonth(d1)
-
-        # each months
-        for _ in range(0, n_months):
-            keep |= self.sn.smartRemoveKeepFirst(
-                snapshots, d1, d2, keep_healthy=keep_healthy)
-            d2 = d1
-            d1 = self.sn.decMonth(d1)
+    def _org(self, now, n_months, snapshots):
+        """Keep one per months for the last n_months months."""
+        keep = retention.keepSet(snapshots, now, 0, 0, 0, n_months,
+                                 failed=lambda sid: sid.failed)
 
         return sorted(keep, reverse=True)
 
@@ -711,6 +342,8 @@ class KeepOneForLastNMonths(pyfakefs_ut.TestCase):
             date(2025, 7, 31),
             date(2025, 6, 30),
             date(2025, 3, 18),
+            # one per year
+            date(2024, 12, 26),
         ]
         self.assertEqual(len(sut), len(expect))
         for idx, expect_date in enumerate(expect):
@@ -720,10 +353,6 @@ class KeepOneForLastNMonths(pyfakefs_ut.TestCase):
 class KeepOnePerYearForAllYears(pyfakefs_ut.TestCase):
     """Covering the smart remove setting 'Keep the last snapshot for each year
     for all years.'
-
-    That logic is implemented in 'Snapshots.smartRemoveList()' but not testable
-    in isolation. So for a first shot we just duplicate that code in this
-    tests (see self._org()).
     """
 
     def setUp(self):
@@ -738,8 +367,6 @@ class KeepOnePerYearForAllYears(pyfakefs_ut.TestCase):
         self._config_fp = self._create_config_file(parent_path=self.temp_path)
         self.cfg = config.Config(str(self._config_fp))
 
-        self.sn = snapshots.Snapshots(self.cfg)
-
     def _create_config_file(self, parent_path):
         """Minimal config file"""
         # pylint: disable-next=R0801
@@ -771,22 +398,10 @@ class KeepOnePerYearForAllYears(pyfakefs_ut.TestCase):
 
         return config_fp
 
-    def _org(self, now, snapshots, keep_healthy=True):
-        """Keep one per year
-
-        Copied and slightly refactored from inside
-        'Snapshots.smartRemoveList()'.
-        """
-        first_year = int(snapshots[-1].sid[:4])
-
-        keep = set()
-
-        for i in range(first_year, now.year+1):
-            keep |= self.sn.smartRemoveKeepFirst(
-                snapshots,
-                date(i, 1, 1),
-                date(i+1, 1, 1),
-                keep_healthy=keep_healthy)
+    def _org(self, now, snapshots):
+        """Keep one per year"""
+        keep = retention.keepSet(snapshots, now, 0, 0, 0, 0,
+                                 failed=lambda sid: sid.failed)
 
         return sorted(keep, reverse=True)
 
@@ -821,80 +436,3 @@ class KeepOnePerYearForAllYears(pyfakefs_ut.TestCase):
         self.assertEqual(len(sut), len(expect))
         for idx, expect_date in enumerate(expect):
             self.assertTrue(sut[idx].date.date(), expect_date)
-
-
-class IncDecMonths(pyfakefs_ut.TestCase):
-    """PyFakeFS is used here because of Config file dependency."""
-
-    def setUp(self):
-        """Setup a fake filesystem."""
-        self.setUpPyfakefs(allow_root_user=False)
-
-        # cleanup() happens automatically
-        self._temp_dir = TemporaryDirectory(prefix='bit.')
-        # Workaround: tempfile and pathlib not compatible yet
-        self.temp_path = Path(self._temp_dir.name)
-
-        self._config_fp = self._create_config_file(parent_path=self.temp_path)
-        self.cfg = config.Config(str(self._config_fp))
-
-        self.sn = snapshots.Snapshots(self.cfg)
-
-    def _create_config_file(self, parent_path):
-        """Minimal config file"""
-        # pylint: disable-next=R0801
-        cfg_content = inspect.cleandoc('''
-            config.version=6
-            profile1.snapshots.include.1.type=0
-            profile1.snapshots.include.1.value=rootpath/source
-            profile1.snapshots.include.size=1
-            profile1.snapshots.no_on_battery=false
-            profile1.snapshots.notify.enabled=true
-            profile1.snapshots.path=rootpath/destination
-            profile1.snapshots.path.host=test-host
-            profile1.snapshots.path.profile=1
-            profile1.snapshots.path.user=test-user
-            profile1.snapshots.preserve_acl=false
-            profile1.snapshots.preserve_xattr=false
-            profile1.snapshots.remove_old_snapshots.enabled=true
-            profile1.snapshots.remove_old_snapshots.unit=80
-            profile1.snapshots.remove_old_snapshots.value=10
-            profile1.snapshots.rsync_options.enabled=false
-            profile1.snapshots.rsync_options.value=
-            profiles.version=1
-        ''')
-
-        # config file location
-        config_fp = parent_path / 'config_path' / 'config'
-        config_fp.parent.mkdir()
-        config_fp.write_text(cfg_content, 'utf-8')
-
-        return config_fp
-
-    def test_inc_simple(self):
-        sut = self.sn.incMonth(date(1982, 8, 6))
-        self.assertEqual(sut, date(1982, 9, 1))
-
-    def test_inc_next_year(self):
-        sut = self.sn.incMonth(date(1982, 12, 16))
-        self.assertEqual(sut, date(1983, 1, 1))
-
-    def test_inc_leap_year(self):
-        sut = self.sn.incMonth(date(2020, 12, 16))
-        self.assertEqual(sut, date(2021, 1, 1))
-
-    def test_inc_leap_months(self):
-        sut = self.sn.incMonth(date(2020, 2, 29))
-        self.assertEqual(sut, date(2020, 3, 1))
-
-    def test_dec_simple(self):
-        sut = self.sn.decMonth(date(1982, 8, 6))
-        self.assertEqual(sut, date(1982, 7, 1))
-
-    def test_dec_year(self):
-        sut = self.sn.decMonth(date(1982, 1, 6))
-        self.assertEqual(sut, date(1981, 12, 1))
-
-    def test_dec_leap_months(self):
-        sut = self.sn.decMonth(date(2020, 2, 29))
-        self.assertEqual(sut, date(2020, 1, 1))
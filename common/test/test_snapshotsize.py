@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the snapshotsize module."""
+import os
+import unittest
+from pathlib import Path
+from test import generic
+import snapshotsize
+
+
+class SnapshotSize(generic.TestCase):
+    """Measure and cache the exclusive size of hardlinked snapshots."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = Path(self.sharePath)
+
+        # first snapshot: 'shared' and 'changed'
+        self.first = self.path / '20260101-000000-001'
+        (self.first / 'backup').mkdir(parents=True)
+        (self.first / 'backup' / 'shared').write_bytes(b'x' * 8192)
+        (self.first / 'backup' / 'changed').write_bytes(b'a' * 8192)
+
+    def _second(self):
+        """Second snapshot linking 'shared' from the first one."""
+        second = self.path / '20260102-000000-002'
+        (second / 'backup').mkdir(parents=True)
+        os.link(self.first / 'backup' / 'shared',
+                second / 'backup' / 'shared')
+        (second / 'backup' / 'changed').write_bytes(b'b' * 8192)
+
+        return second
+
+    def _blocks(self, *paths):
+        return sum(os.lstat(path).st_blocks * 512 for path in paths)
+
+    def test_measure(self):
+        self._second()
+
+        size, exclusive, shared = snapshotsize.measure(str(self.first))
+
+        # 'backup' and 'changed'
+        self.assertEqual(size.exclusive_inodes, 2)
+        self.assertEqual(size.total_inodes, 3)
+        self.assertEqual(len(exclusive), 2)
+        self.assertEqual(
+            shared, {os.lstat(self.first / 'backup' / 'shared').st_ino})
+        self.assertEqual(
+            size.exclusive_bytes,
+            self._blocks(self.first / 'backup',
+                         self.first / 'backup' / 'changed'))
+
+    def test_cache_neighbours(self):
+        neighbours = (None, '20260102-000000-002')
+        size = snapshotsize.exclusiveSize(str(self.first), neighbours)
+        cache = snapshotsize.SizeCache(str(self.first))
+
+        self.assertEqual(cache.load(neighbours), size)
+        self.assertIsNone(cache.load((None, '20260103-000000-003')))
+        self.assertIsNone(snapshotsize.exclusiveSize(
+            str(self.first), (None, None), compute=False))
+
+        # cache files don't count
+        self.assertEqual(
+            snapshotsize.exclusiveSize(str(self.first), (None, None)), size)
+
+    def test_add_snapshot(self):
+        first_id = self.first.name
+        before = snapshotsize.exclusiveSize(str(self.first), (None, None))
+        self.assertEqual(before.exclusive_inodes, 3)
+
+        second = self._second()
+        size = snapshotsize.addSnapshot(str(second),
+                                        (first_id, None),
+                                        prev_path=str(self.first),
+                                        prev_neighbours=(None, None),
+                                        prev_new_neighbours=(None,
+                                                             second.name))
+
+        self.assertEqual(size.exclusive_inodes, 2)
+
+        # the previous snapshot was updated without walking it again
+        cache = snapshotsize.SizeCache(str(self.first))
+        after = cache.load((None, second.name))
+        measured, _, _ = snapshotsize.measure(str(self.first))
+        self.assertEqual(after, measured)
+        self.assertEqual(len(cache.loadExclusive((None, second.name))), 2)
+
+    def test_usage_of_several(self):
+        second = self._second()
+        usage = snapshotsize.Usage()
+
+        first_size = usage.add(str(self.first))
+        self.assertEqual(first_size.exclusive_inodes, 2)
+
+        # 'shared' is released only if both snapshots are removed
+        both = usage.add(str(second))
+        self.assertEqual(both.exclusive_inodes, 5)
+        self.assertEqual(both.total_inodes, 5)
+        self.assertEqual(usage.shared, set())
+
+    def test_format_size(self):
+        self.assertEqual(snapshotsize.formatSize(512), '512 B')
+        self.assertEqual(snapshotsize.formatSize(1536), '1.5 KiB')
+        self.assertEqual(snapshotsize.formatSize(3 * 1024 ** 3), '3.0 GiB')
+
+
+if __name__ == '__main__':
+    unittest.main()
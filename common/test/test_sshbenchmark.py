@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the sshbenchmark module."""
+import os
+import unittest
+import sshbenchmark
+from sshbenchmark import Result
+
+
+class Benchmark(unittest.TestCase):
+    """Combinations, measurement and choice of the winner."""
+
+    def test_combinations(self):
+        self.assertEqual(
+            sshbenchmark.combinations(['aes128-ctr', 'default'],
+                                      ['hmac-sha2-256'],
+                                      compression=True),
+            [('aes128-ctr', 'hmac-sha2-256', False),
+             ('aes128-ctr', 'hmac-sha2-256', True),
+             ('default', 'hmac-sha2-256', False),
+             ('default', 'hmac-sha2-256', True)])
+
+    def test_ssh_args(self):
+        self.assertEqual(
+            sshbenchmark.sshArgs('default', 'default', False),
+            ['-S', 'none', '-o', 'Compression=no'])
+        self.assertEqual(
+            sshbenchmark.sshArgs('aes128-ctr', 'hmac-sha1', True),
+            ['-S', 'none', '-o', 'Ciphers=aes128-ctr', '-o', 'MACs=hmac-sha1',
+             '-o', 'Compression=yes'])
+
+    def test_parse_remote_cpu(self):
+        self.assertEqual(
+            sshbenchmark.parseRemoteCpu('foo\nbackintime-cpu 100 350 100\n'),
+            2.5)
+        self.assertIsNone(
+            sshbenchmark.parseRemoteCpu('backintime-cpu - - 100\n'))
+        self.assertIsNone(sshbenchmark.parseRemoteCpu(''))
+
+    def test_measure(self):
+        """Run the remote command on the local host."""
+        size = 3 * sshbenchmark.BLOCK_SIZE + 10
+
+        result = sshbenchmark.measure(
+            ['sh', '-c', sshbenchmark.REMOTE_COMMAND], size)
+
+        self.assertEqual(result.error, '')
+        self.assertEqual(result.size, size)
+        self.assertGreater(result.mbPerSecond, 0)
+        if os.path.exists('/proc/self/stat'):
+            self.assertIsInstance(result.remote_cpu, float)
+
+    def test_measure_failed(self):
+        result = sshbenchmark.measure(['sh', '-c', 'echo foo >&2; exit 3'],
+                                      sshbenchmark.BLOCK_SIZE)
+
+        self.assertEqual(result.error, 'foo')
+        self.assertEqual(result.mbPerSecond, 0)
+
+    def test_winner(self):
+        results = [Result('a', size=100, seconds=2),
+                   Result('b', size=100, seconds=1, error='failed'),
+                   Result('c', size=100, seconds=1)]
+
+        self.assertEqual(sshbenchmark.winner(results).cipher, 'c')
+        self.assertIsNone(sshbenchmark.winner(results[1:2]))
+        self.assertEqual(results[2].toDict()['mb_per_second'],
+                         round(100 / 1024 / 1024, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the sshcheckcache module."""
+import os
+import json
+import unittest
+from pathlib import Path
+from test import generic
+import sshcheckcache
+
+
+class CheckCache(generic.TestCase):
+    """Store and validate successful checks."""
+
+    def setUp(self):
+        super().setUp()
+        self.filename = str(Path(self.sharePath) / 'ssh_checks.json')
+        self.key = sshcheckcache.cacheKey(host='foo', port=22)
+        self.sut = sshcheckcache.CheckCache(self.filename, ttl=100)
+
+    def test_key(self):
+        self.assertEqual(self.key,
+                         sshcheckcache.cacheKey(port=22, host='foo'))
+        self.assertNotEqual(self.key,
+                            sshcheckcache.cacheKey(host='foo', port=2222))
+
+    def test_ttl(self):
+        self.assertFalse(self.sut.valid('checkCipher', self.key, now=1000))
+
+        self.sut.store('checkCipher', self.key, now=1000)
+
+        self.assertTrue(self.sut.valid('checkCipher', self.key, now=1099))
+        self.assertFalse(self.sut.valid('checkCipher', self.key, now=1100))
+        self.assertFalse(self.sut.valid('checkRemoteCommands', self.key,
+                                        now=1000))
+        self.assertFalse(self.sut.valid('checkCipher', 'other', now=1000))
+
+    def test_expired_dropped(self):
+        self.sut.store('checkCipher', 'old', now=1000)
+        self.sut.store('checkCipher', self.key, now=2000)
+
+        data = json.loads(Path(self.filename).read_text())
+
+        self.assertEqual(list(data), [self.key])
+
+    def test_invalidate(self):
+        self.sut.store('checkCipher', self.key, now=1000)
+        self.sut.invalidate(self.key)
+
+        self.assertFalse(self.sut.valid('checkCipher', self.key, now=1000))
+
+    def test_disabled_and_broken(self):
+        disabled = sshcheckcache.CheckCache(self.filename, ttl=0)
+        disabled.store('checkCipher', self.key, now=1000)
+
+        self.assertFalse(os.path.exists(self.filename))
+
+        Path(self.filename).write_text('no json')
+
+        self.assertFalse(self.sut.valid('checkCipher', self.key, now=1000))
+        self.sut.store('checkCipher', self.key, now=1000)
+        self.assertTrue(self.sut.valid('checkCipher', self.key, now=1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
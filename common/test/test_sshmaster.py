@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the sshmaster module."""
+import os
+import unittest
+from unittest import mock
+from test import generic
+import sshmaster
+
+
+class ControlArgs(generic.TestCaseCfg):
+    """Arguments and socket folder of the shared connection."""
+
+    def setUp(self):
+        super().setUp()
+        self.runtime = os.path.join(self.sharePath, 'run')
+        os.mkdir(self.runtime)
+        patcher = mock.patch.dict(os.environ,
+                                  {'XDG_RUNTIME_DIR': self.runtime})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cfg.setSshControlMaster(True)
+        self.cfg.setSshUser('user')
+        self.cfg.setSshHost('host')
+        self.cfg.setSshPort(22)
+
+    def test_socket_folder(self):
+        """The folder is not created while building arguments."""
+        folder = sshmaster.socketFolder()
+
+        self.assertEqual(folder, os.path.join(self.runtime, 'backintime'))
+        self.assertEqual(sshmaster.controlArgs(self.cfg), [])
+        self.assertFalse(os.path.exists(folder))
+
+    def test_socket_path(self):
+        """Each host, port and user has its own socket."""
+        path = sshmaster.socketPath(self.cfg)
+
+        self.cfg.setSshPort(2222)
+        self.assertNotEqual(sshmaster.socketPath(self.cfg), path)
+
+        self.cfg.setSshPort(22)
+        self.cfg.setSshProxyHost('proxy')
+        self.assertNotEqual(sshmaster.socketPath(self.cfg), path)
+        self.assertEqual(os.path.dirname(path), sshmaster.socketFolder())
+
+    def test_client(self):
+        """Clients use the master only while its socket exists."""
+        path = sshmaster.socketPath(self.cfg)
+
+        self.assertEqual(sshmaster.controlArgs(self.cfg), [])
+
+        os.makedirs(os.path.dirname(path), mode=0o700)
+        with open(path, 'w'):
+            pass
+
+        self.assertEqual(
+            sshmaster.controlArgs(self.cfg),
+            ['-o', f'ControlPath={path}', '-o', 'ControlMaster=no'])
+
+    def test_folder_not_private(self):
+        """The master is not used if another user could access the
+        socket folder."""
+        path = sshmaster.socketPath(self.cfg)
+        folder = os.path.dirname(path)
+        os.makedirs(folder)
+        os.chmod(folder, 0o755)
+        with open(path, 'w'):
+            pass
+
+        self.assertEqual(sshmaster.controlArgs(self.cfg), [])
+
+        with mock.patch('subprocess.run') as run:
+            self.assertFalse(sshmaster.start(self.cfg))
+            self.assertTrue(os.path.exists(path))
+
+        # only 'ssh -O check' of isRunning(), the master isn't started
+        self.assertEqual(run.call_count, 1)
+
+    def test_folder_symlink(self):
+        target = os.path.join(self.runtime, 'target')
+        os.mkdir(target, mode=0o700)
+        os.symlink(target, sshmaster.socketFolder())
+
+        self.assertFalse(sshmaster.isPrivateFolder(sshmaster.socketFolder()))
+        self.assertTrue(sshmaster.isPrivateFolder(target))
+
+    def test_master(self):
+        args = sshmaster.controlArgs(self.cfg, master=True)
+
+        self.assertIn('ControlMaster=yes', args)
+        self.assertIn(f'ControlPersist={sshmaster.CONTROL_PERSIST}', args)
+
+    def test_disabled(self):
+        self.cfg.setSshControlMaster(False)
+
+        with mock.patch.object(self.cfg, 'sshCommand') as sshCommand:
+            self.assertFalse(sshmaster.start(self.cfg))
+            sshmaster.stop(self.cfg)
+
+        sshCommand.assert_not_called()
+        self.assertEqual(sshmaster.controlArgs(self.cfg, master=True), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the statuspublisher module."""
+import time
+import unittest
+import statuspublisher
+from statuspublisher import StatusPublisher, INFO, ERROR
+
+
+class Publisher(unittest.TestCase):
+    """Behavior of class StatusPublisher."""
+
+    def setUp(self):
+        self.now = 100.0
+        self.written = []
+        self.delivered = []
+
+    def _sut(self, rate=4):
+        sut = StatusPublisher(write=lambda *args: self.written.append(args),
+                              deliver=self.delivered.append,
+                              rate=rate,
+                              clock=lambda: self.now)
+        self.addCleanup(sut.close)
+
+        return sut
+
+    def test_first_message_immediately(self):
+        sut = self._sut()
+
+        sut.publish(INFO, 'foo')
+
+        self.assertEqual(self.written, [(INFO, 'foo')])
+        self.assertEqual(self.delivered, [[(INFO, 'foo', -1)]])
+        self.assertFalse(sut.pending)
+
+    def test_coalesce(self):
+        sut = self._sut()
+        sut.publish(INFO, 'first')
+
+        for i in range(5):
+            sut.publish(INFO, f'line {i}')
+
+        self.assertEqual(self.written, [(INFO, 'first')])
+        self.assertTrue(sut.pending)
+
+        # next message after the interval flushes everything
+        self.now += 0.25
+        sut.publish(INFO, 'last')
+
+        self.assertEqual(self.written, [(INFO, 'first'), (INFO, 'last')])
+        self.assertEqual(len(self.delivered), 2)
+        self.assertEqual([msg for _, msg, _ in self.delivered[1]],
+                         ['line 0', 'line 1', 'line 2', 'line 3', 'line 4',
+                          'last'])
+
+    def test_error_immediately(self):
+        sut = self._sut()
+        sut.publish(INFO, 'first')
+        sut.publish(INFO, 'second')
+
+        sut.publish(ERROR, 'failed', 5)
+
+        self.assertEqual(self.written[-1], (ERROR, 'failed'))
+        self.assertEqual(self.delivered[-1],
+                         [(INFO, 'second', -1), (ERROR, 'failed', 5)])
+
+    def test_no_background_flush(self):
+        sut = self._sut()
+        sut.publish(INFO, 'first')
+        sut.publish(INFO, 'second')
+
+        # Nothing is passed on from another thread after the interval
+        self.now += 1
+        time.sleep(0.05)
+
+        self.assertTrue(sut.pending)
+        self.assertEqual(self.written, [(INFO, 'first')])
+
+        sut.flush()
+
+        self.assertFalse(sut.pending)
+        self.assertEqual(self.written[-1], (INFO, 'second'))
+
+    def test_batch_limit(self):
+        sut = self._sut()
+        sut.publish(INFO, 'first')
+
+        for i in range(statuspublisher.MAX_BATCH):
+            sut.publish(INFO, str(i))
+
+        self.assertEqual(len(self.written), 2)
+        self.assertEqual(len(self.delivered[1]), statuspublisher.MAX_BATCH)
+
+    def test_rate_zero_disables(self):
+        sut = self._sut(rate=0)
+
+        for i in range(3):
+            sut.publish(INFO, str(i))
+
+        self.assertEqual(len(self.written), 3)
+
+    def test_close(self):
+        sut = self._sut()
+        sut.publish(INFO, 'first')
+        sut.publish(INFO, 'second')
+
+        sut.close()
+
+        self.assertFalse(sut.pending)
+        self.assertEqual(self.written[-1], (INFO, 'second'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See file/folder LICENSE or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Tests about the statussocket module."""
+import os
+import stat
+import unittest
+from pathlib import Path
+from test import generic
+import statussocket
+from statussocket import StatusServer, StatusClient
+
+
+class Socket(generic.TestCase):
+    """Publishing events to subscribers."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = str(Path(self.sharePath) / 'worker.sock')
+        self.server = StatusServer(self.path, profile_id='2', pid=42)
+        self.assertTrue(self.server.start())
+
+    def tearDown(self):
+        self.server.close()
+        super().tearDown()
+
+    def _subscribe(self):
+        client = StatusClient(self.path)
+        self.assertTrue(client.connect())
+        self.addCleanup(client.close)
+
+        return client
+
+    def _next(self, events):
+        return next(events)
+
+    def test_hello(self):
+        """New subscribers get the current state first."""
+        self.server.publish(statussocket.PHASE, phase=statussocket.TRANSFER)
+        self.server.publish(statussocket.MESSAGE, type_id=0, message='foo')
+
+        events = self._subscribe().events()
+        hello = self._next(events)
+
+        self.assertEqual(hello['event'], statussocket.HELLO)
+        self.assertEqual(hello['pid'], 42)
+        self.assertEqual(hello['profile_id'], '2')
+        self.assertEqual(hello['phase'], statussocket.TRANSFER)
+        self.assertEqual(hello['message'], [0, 'foo'])
+        self.assertIsNone(hello['progress'])
+
+    def test_permissions(self):
+        """Only the user may connect."""
+        mode = os.stat(self.server.path).st_mode
+
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_events(self):
+        """All subscribers get the events until the backup finished."""
+        subscribers = [self._subscribe().events() for _ in range(2)]
+
+        for events in subscribers:
+            self._next(events)
+
+        self.assertEqual(self.server.subscribers, 2)
+
+        self.server.publish(statussocket.PROGRESS, progress={'percent': 26})
+        self.server.publish(statussocket.MESSAGE, type_id=1, message='bar')
+        self.server.close(error=True)
+
+        for events in subscribers:
+            state = {}
+            for event in events:
+                statussocket.applyEvent(state, event)
+
+            self.assertEqual(state['progress'], {'percent': 26})
+            self.assertEqual(state['message'], [1, 'bar'])
+            self.assertTrue(state['finished'])
+            self.assertTrue(state['error'])
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_no_server(self):
+        """Without a running backup there is nothing to connect to."""
+        self.server.close()
+
+        self.assertFalse(StatusClient(self.path).connect())
+
+    def test_stale_socket(self):
+        """A socket left over by a crashed backup is replaced."""
+        server = StatusServer(self.path)
+
+        self.assertTrue(server.start())
+        server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
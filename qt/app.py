@@ -38,6 +38,7 @@ import config
 import tools
 import logger
 import snapshots
+import snapshotsize
 import guiapplicationinstance
 import mount
 import progress
@@ -88,6 +89,8 @@ from PyQt6.QtCore import (QDir,
                           QThread,
                           QUrl)
 import snapshotsdialog
+import snapshotwatcher
+import statussubscriber
 import logviewdialog
 import languagedialog
 import messagebox
@@ -292,6 +295,14 @@ class MainWindow(QMainWindow):
         self.status.setText(_('Done'))
 
         self.snapshotsList = []
+        # snapshots added or removed since the last snapshot was started
+        self.snapshotsListChanged = False
+        self.snapshotWatcher = snapshotwatcher.SnapshotWatcher(
+            self.config, self)
+        self.snapshotWatcher.snapshotsChanged.connect(self.snapshotsChanged)
+        self.statusSubscriber = statussubscriber.StatusSubscriber(
+            self.config, self)
+        self.statusSubscriber.changed.connect(self.updateTakeSnapshot)
         self.sid = snapshots.RootSnapshot(self.config)
         self.path = self.config.profileStrValue('qt.last_path', '/')
         self.widget_current_path.setText(self.path)
@@ -960,6 +971,7 @@ class MainWindow(QMainWindow):
         self.disableProfileChanged = False
 
     def updateProfile(self):
+        self.statusSubscriber.unsubscribe()
         self.updateTimeLine()
         self.updatePlaces()
         self.updateFilesView(0)
@@ -1052,17 +1064,24 @@ class MainWindow(QMainWindow):
         This method is called via a timeout event. See
         `self.timerUpdateTakeSnapshot`. Also see
         `Snapshots.takeSnapshotMessage()` for further details.
+
+        While a backup with status socket is running the status is pushed
+        by it (see `self.statusSubscriber`) and no file is read.
         """
         if force_wait_lock:
             self.forceWaitLockCounter = 10
 
-        busy = self.snapshots.busy()
+        subscribed = self.statusSubscriber.subscribe()
+
+        if subscribed:
+            busy = True
+            paused = self.statusSubscriber.paused()
+        else:
+            busy = self.snapshots.busy()
+            paused = busy and tools.processPaused(self.snapshots.pid())
 
         if busy:
             self.forceWaitLockCounter = 0
-            paused = tools.processPaused(self.snapshots.pid())
-        else:
-            paused = False
 
         if self.forceWaitLockCounter > 0:
             self.forceWaitLockCounter = self.forceWaitLockCounter - 1
@@ -1070,7 +1089,10 @@ class MainWindow(QMainWindow):
         fake_busy = busy or self.forceWaitLockCounter > 0
 
         message = _('Working:')
-        takeSnapshotMessage = self.snapshots.takeSnapshotMessage()
+        if subscribed:
+            takeSnapshotMessage = self.statusSubscriber.message()
+        else:
+            takeSnapshotMessage = self.snapshots.takeSnapshotMessage()
 
         if fake_busy:
             if takeSnapshotMessage is None:
@@ -1086,6 +1108,7 @@ class MainWindow(QMainWindow):
         if fake_busy:  # What is this?
             if self.act_take_snapshot.isEnabled():
                 self.act_take_snapshot.setEnabled(False)
+                self.snapshotsListChanged = False
 
             if not self.act_stop_take_snapshot.isVisible():
                 for action in (self.act_pause_take_snapshot,
@@ -1107,13 +1130,12 @@ class MainWindow(QMainWindow):
                            self.act_stop_take_snapshot):
                 action.setVisible(False)
 
-            # TODO: check if there is a more elegant way than always get a
-            # new snapshot list which is very expensive (time)
-            snapshotsList = snapshots.listSnapshots(self.config)
+            # The timeline is updated by the snapshot watcher. Don't wait
+            # for events which are not handled yet.
+            self.snapshotWatcher.check()
 
-            if snapshotsList != self.snapshotsList:
-                self.snapshotsList = snapshotsList
-                self.updateTimeLine(False)
+            if self.snapshotsListChanged:
+                self.snapshotsListChanged = False
                 takeSnapshotMessage = (0, _('Done'))
             else:
                 if takeSnapshotMessage[0] == 0:
@@ -1141,11 +1163,18 @@ class MainWindow(QMainWindow):
 
             self.status.setText(message)
 
-        pg = progress.ProgressFile(self.config)
-        if pg.fileReadable():
+        if subscribed:
+            pg = self.statusSubscriber.progressFile()
+        else:
+            pg = progress.ProgressFile(self.config)
+            if pg.fileReadable():
+                pg.load()
+            else:
+                pg = None
+
+        if pg is not None:
             self.progressBar.setVisible(True)
             self.progressBarDummy.setVisible(False)
-            pg.load()
             self.progressBar.setValue(pg.intValue('percent'))
             message = ' | '.join(self.getProgressBarFormat(pg, message))
             self.status.setText(message)
@@ -1192,7 +1221,7 @@ class MainWindow(QMainWindow):
     def addPlace(self, name, path, icon):
         """
         Dev note (buhtz, 2024-01-14): Parts of that code are redundant with
-        qttools.py::HeaderItem.__init__().
+        qttools.py::TimeLineModel.data().
         """
         item = QTreeWidgetItem()
 
@@ -1272,14 +1301,14 @@ class MainWindow(QMainWindow):
 
         self.updatePlaces()
 
-    def updateSnapshotActions(self, item = None):
+    def updateSnapshotActions(self, sid = None):
         enabled = False
 
-        if item is None:
-            item = self.timeLine.currentItem()
+        if sid is None:
+            sid = self.timeLine.currentSnapshotID()
 
-        if not item is None:
-            if not item.snapshotID().isRoot:
+        if not sid is None:
+            if not sid.isRoot:
                 enabled = True
 
         # update remove/name snapshot buttons
@@ -1288,13 +1317,9 @@ class MainWindow(QMainWindow):
         self.act_snapshot_logview.setEnabled(enabled)
 
     def timeLineChanged(self):
-        item = self.timeLine.currentItem()
-        self.updateSnapshotActions(item)
+        sid = self.timeLine.currentSnapshotID()
+        self.updateSnapshotActions(sid)
 
-        if item is None:
-            return
-
-        sid = item.snapshotID()
         if not sid or sid == self.sid:
             return
 
@@ -1309,14 +1334,31 @@ class MainWindow(QMainWindow):
         if refreshSnapshotsList:
             self.snapshotsList = []
             thread = FillTimeLineThread(self)
-            thread.addSnapshot.connect(self.timeLine.addSnapshot)
+            thread.snapshotsListed.connect(self.timeLine.setSnapshots)
+            thread.snapshotsListed.connect(self.snapshotWatcher.setSnapshots)
+            thread.sizes.connect(self.timeLine.setSizes)
             thread.finished.connect(self.timeLine.checkSelection)
             thread.start()
 
         else:
-            for sid in self.snapshotsList:
-                item = self.timeLine.addSnapshot(sid)
+            self.timeLine.setSnapshots(self.snapshotsList)
             self.timeLine.checkSelection()
+            self.snapshotWatcher.setSnapshots(self.snapshotsList)
+
+    def snapshotsChanged(self, added, removed):
+        """Update the timeline with snapshots the snapshot watcher found
+        added to or removed from the snapshot folder."""
+        self.snapshotsListChanged = True
+        self.snapshotsList = sorted(
+            set(self.snapshotsList).difference(removed).union(added))
+
+        if self.timeLine.currentSnapshotID() in removed:
+            self.timeLine.selectRootItem()
+
+        for sid in removed:
+            self.timeLine.hideSnapshot(sid)
+
+        self.timeLine.addSnapshots(added)
 
     def btnTakeSnapshotClicked(self):
         backintime.takeSnapshotAsync(self.config)
@@ -1338,12 +1380,8 @@ class MainWindow(QMainWindow):
         self.updateFilesView(2)
 
     def btnNameSnapshotClicked(self):
-        item = self.timeLine.currentItem()
-        if item is None:
-            return
-
-        sid = item.snapshotID()
-        if sid.isRoot:
+        sid = self.timeLine.currentSnapshotID()
+        if sid is None or sid.isRoot:
             return
 
         name = sid.name
@@ -1357,19 +1395,15 @@ class MainWindow(QMainWindow):
             return
 
         sid.name = new_name
-        item.updateText()
+        self.timeLine.updateSnapshot(sid)
 
     def btnLastLogViewClicked (self):
         with self.suspendMouseButtonNavigation():
             logviewdialog.LogViewDialog(self).show()  # no SID argument in constructor means "show last log"
 
     def btnSnapshotLogViewClicked (self):
-        item = self.timeLine.currentItem()
-        if item is None:
-            return
-
-        sid = item.snapshotID()
-        if sid.isRoot:
+        sid = self.timeLine.currentSnapshotID()
+        if sid is None or sid.isRoot:
             return
 
         with self.suspendMouseButtonNavigation():
@@ -1379,43 +1413,33 @@ class MainWindow(QMainWindow):
                 self.timeLine.setCurrentSnapshotID(dlg.sid)
 
     def btnRemoveSnapshotClicked (self):
-        def hideItem(item):
-            try:
-                item.setHidden(True)
-            except RuntimeError:
-                #item has been deleted
-                #probably because user pressed refresh
-                pass
-
-        # try to use filter(..)
-        items = [item for item in self.timeLine.selectedItems() if not isinstance(item, snapshots.RootSnapshot)]
-
-        if not items:
+        sids = [sid for sid in self.timeLine.selectedSnapshotIDs() if not sid.isRoot]
+
+        if not sids:
             return
 
         question_msg = '{}\n{}'.format(
             ngettext(
                 'Are you sure you want to remove this snapshot?',
                 'Are you sure you want to remove these snapshots?',
-                len(items)
+                len(sids)
             ),
-            '\n'.join([item.snapshotID().displayName for item in items]))
+            '\n'.join([sid.displayName for sid in sids]))
 
         answer = messagebox.warningYesNo(self, question_msg)
 
         if answer != QMessageBox.StandardButton.Yes:
             return
 
-        for item in items:
-
-            item.setDisabled(True)
+        self.timeLine.setSnapshotsDisabled(sids)
 
-            if item is self.timeLine.currentItem():
-                self.timeLine.selectRootItem()
+        if self.timeLine.currentSnapshotID() in sids:
+            self.timeLine.selectRootItem()
 
-        thread = RemoveSnapshotThread(self, items)
+        thread = RemoveSnapshotThread(self, sids)
         thread.refreshSnapshotList.connect(self.updateTimeLine)
-        thread.hideTimelineItem.connect(hideItem)
+        thread.hideTimelineItem.connect(self.timeLine.hideSnapshot)
+        thread.removeProgress.connect(self.status.setText)
         thread.start()
 
     def btnSettingsClicked(self):
@@ -2220,11 +2244,12 @@ class RemoveSnapshotThread(QThread):
     remove snapshots in background thread so GUI will not freeze
     """
     refreshSnapshotList = pyqtSignal()
-    hideTimelineItem = pyqtSignal(qttools.SnapshotItem)
-    def __init__(self, parent, items):
+    hideTimelineItem = pyqtSignal(snapshots.SID)
+    removeProgress = pyqtSignal(str)
+    def __init__(self, parent, sids):
         self.config = parent.config
         self.snapshots = parent.snapshots
-        self.items = items
+        self.sids = sids
         super(RemoveSnapshotThread, self).__init__(parent)
 
     def run(self):
@@ -2234,12 +2259,20 @@ class RemoveSnapshotThread(QThread):
         self.config.inhibitCookie = tools.inhibitSuspend(toplevel_xid = self.config.xWindowId,
                                                          reason = 'deleting snapshots')
 
-        for item, sid in [(x, x.snapshotID()) for x in self.items]:
-            self.snapshots.remove(sid)
-            self.hideTimelineItem.emit(item)
+        for sid in self.sids:
+
+            def progress(stats, sid=sid):
+                self.removeProgress.emit('{} {}: {}'.format(
+                    _('Removing'),
+                    sid.displayName,
+                    snapshots.removeProgressMessage(stats)))
+
+            self.snapshots.remove(sid, progress=progress)
+            self.hideTimelineItem.emit(sid)
             if sid == last_snapshot:
                 renew_last_snapshot = True
 
+        self.removeProgress.emit(_('Done'))
         self.refreshSnapshotList.emit()
 
         #set correct last snapshot again
@@ -2253,9 +2286,10 @@ class RemoveSnapshotThread(QThread):
 
 class FillTimeLineThread(QThread):
     """
-    add snapshot IDs to timeline in background
+    List snapshot IDs in background and add them to the timeline at once
     """
-    addSnapshot = pyqtSignal(snapshots.SID)
+    snapshotsListed = pyqtSignal(list)
+    sizes = pyqtSignal(dict)
 
     def __init__(self, parent):
         self.parent = parent
@@ -2263,11 +2297,19 @@ class FillTimeLineThread(QThread):
         super(FillTimeLineThread, self).__init__(parent)
 
     def run(self):
-        for sid in snapshots.iterSnapshots(self.config):
-            self.addSnapshot.emit(sid)
-            self.parent.snapshotsList.append(sid)
-
-        self.parent.snapshotsList.sort()
+        sids = snapshots.listSnapshots(self.config)
+        self.snapshotsListed.emit(sids)
+        self.parent.snapshotsList = sorted(sids)
+
+        # Sizes are not computed for SSH profiles. Don't probe for them
+        # over sshfs.
+        if (self.config.sizeAccounting()
+                and 'ssh' not in self.config.snapshotsMode()):
+            # Only cached sizes. Walking snapshots would take too long.
+            sizes = snapshots.snapshotSizes(self.config)
+            self.sizes.emit({
+                sid: snapshotsize.formatSize(size.exclusive_bytes)
+                for sid, size in sizes.items() if size is not None})
 
 
 class SetupCron(QThread):
@@ -8,9 +8,11 @@
 # This file is part of the program "Back In Time" which is released under GNU
 # General Public License v2 (GPLv2). See LICENSES directory or go to
 # <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+import itertools
 from PyQt6.QtGui import QFont
 from PyQt6.QtWidgets import (QDialog,
                              QLabel,
+                             QPushButton,
                              QPlainTextEdit,
                              QVBoxLayout,
                              QHBoxLayout,
@@ -18,7 +20,7 @@ from PyQt6.QtWidgets import (QDialog,
                              QDialogButtonBox,
                              QCheckBox,
                              )
-from PyQt6.QtCore import QFileSystemWatcher
+from PyQt6.QtCore import QFileSystemWatcher, QRegularExpression
 import qttools
 import snapshots
 import encfstools
@@ -27,6 +29,9 @@ import tools
 import qttools
 from statedata import StateData
 
+# Number of snapshot log lines added to the view at once
+LOG_PAGE_LINES = 5000
+
 
 class LogViewDialog(QDialog):
     def __init__(self, parent, sid=None, systray=False):
@@ -50,6 +55,10 @@ class LogViewDialog(QDialog):
         self.sid = sid
         self.enableUpdate = False
         self.decode = None
+        # incremental reader of the shown log file (see updateLog())
+        self.logTail = None
+        # lines of the shown snapshot log not added to the view yet
+        self.logPages = None
 
         state_data = StateData()
         self.resize(*state_data.logview_dims)
@@ -114,11 +123,17 @@ class LogViewDialog(QDialog):
             _('rsync transfer failures (experimental)'),
             snapshotlog.LogFilter.RSYNC_TRANSFER_FAILURES)
 
+        self.btnNextError = QPushButton(_('Next error'), self)
+        self.btnNextError.clicked.connect(self.nextError)
+        layout.addWidget(self.btnNextError)
+
         # text view
         self.txtLogView = QPlainTextEdit(self)
         self.txtLogView.setFont(QFont('Monospace'))
         self.txtLogView.setReadOnly(True)
         self.txtLogView.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.txtLogView.verticalScrollBar().valueChanged.connect(
+            self.logScrolled)
         self.mainLayout.addWidget(self.txtLogView)
 
         #
@@ -235,12 +250,15 @@ class LogViewDialog(QDialog):
             # time
             self.watcher.removePath(watchPath)
             # append only new lines to txtLogView
-            log = snapshotlog.SnapshotLog(
-                self.config, self.comboProfiles.currentProfileID())
-            for line in log.get(mode=mode,
-                                decode=self.decode,
-                                skipLines=self.txtLogView.document().lineCount()-1):
-                self.txtLogView.appendPlainText(line)
+            if self.logTail is None:
+                self.logTail = snapshotlog.SnapshotLog(
+                    self.config, self.comboProfiles.currentProfileID()).tail(
+                        mode=mode, decode=self.decode)
+            lines = list(self.logTail.lines())
+            if self.logTail.restarted:
+                self.txtLogView.setPlainText('\n'.join(lines))
+            elif lines:
+                self.txtLogView.appendPlainText('\n'.join(lines))
 
             # re-add path to watch after 5sec delay
             alarm = tools.Alarm(
@@ -249,14 +267,59 @@ class LogViewDialog(QDialog):
             alarm.start(5)
 
         elif self.sid is None:
-            log = snapshotlog.SnapshotLog(
-                self.config, self.comboProfiles.currentProfileID())
-            self.txtLogView.setPlainText(
-                '\n'.join(log.get(mode=mode, decode=self.decode)))
+            # remember the read position for appending new lines later
+            self.logTail = snapshotlog.SnapshotLog(
+                self.config, self.comboProfiles.currentProfileID()).tail(
+                    mode=mode, decode=self.decode)
+            self.txtLogView.setPlainText('\n'.join(self.logTail.lines()))
+
+        else:
+            self.logTail = None
+            # show the first page only. Further pages are decompressed and
+            # added while scrolling down
+            self.logPages = self.sid.log(mode, decode=self.decode)
+            self.txtLogView.clear()
+            self.loadLogPage()
+
+    def loadLogPage(self):
+        """
+        Add the next page of the snapshot log to the view without moving
+        the visible part.
 
+        Returns:
+            bool:   ``False`` if there were no more lines
+        """
+        if self.logPages is None:
+            return False
+
+        lines = list(itertools.islice(self.logPages, LOG_PAGE_LINES))
+        if len(lines) < LOG_PAGE_LINES:
+            self.logPages = None
+        if not lines:
+            return False
+
+        bar = self.txtLogView.verticalScrollBar()
+        value = bar.value()
+        if self.txtLogView.document().isEmpty():
+            self.txtLogView.setPlainText('\n'.join(lines))
         else:
-            self.txtLogView.setPlainText(
-                '\n'.join(self.sid.log(mode, decode=self.decode)))
+            self.txtLogView.appendPlainText('\n'.join(lines))
+        bar.setValue(value)
+        return True
+
+    def logScrolled(self, value):
+        if value == self.txtLogView.verticalScrollBar().maximum():
+            self.loadLogPage()
+
+    def nextError(self):
+        """
+        Select the next line tagged with [E] after the cursor. Further pages
+        of the snapshot log are loaded until one is found.
+        """
+        regex = QRegularExpression(r'^\[E\]')
+        while not self.txtLogView.find(regex):
+            if not self.loadLogPage():
+                break
 
     def closeEvent(self, event):
         state_data = StateData()
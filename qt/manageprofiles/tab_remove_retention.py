@@ -291,13 +291,14 @@ class RemoveRetentionTab(QDialog):
         checkbox_group.setLayout(layout)
 
         cb_in_background = QCheckBox(
-            _('Run in background on remote host.'), self)
+            _('Run on remote host.'), self)
         qttools.set_wrapped_tooltip(
             cb_in_background,
             (_('The smart remove procedure will run directly on the remote '
-               'machine, not locally. The commands "bash", "screen", and '
-               '"flock" must be installed and available on the '
-               'remote machine.'),
+               'machine, not locally. Several snapshots are removed in '
+               'parallel. The backup waits until this has finished. The '
+               'commands "bash", "xargs", and "flock" must be installed '
+               'and available on the remote machine.'),
              _('If selected, Back In Time will first test the '
                'remote machine.')))
         layout.addWidget(cb_in_background, 0, 0, 1, 2)
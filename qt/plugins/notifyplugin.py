@@ -26,6 +26,12 @@ class NotifyPlugin(pluginmanager.Plugin):
     def isGui(self):
         return True
 
+    def messages(self, profile_id, profile_name, messages):
+        # Show only the latest message of each level instead of one
+        # notification bubble per message
+        for level, message, timeout in pluginmanager.latestMessages(messages):
+            self.message(profile_id, profile_name, level, message, timeout)
+
     # pylint: disable-next=too-many-arguments,too-many-positional-arguments
     def message(self,
                 profile_id,
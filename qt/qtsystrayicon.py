@@ -34,6 +34,7 @@ import snapshots
 import progress
 import logviewdialog
 import encfstools
+import statussubscriber
 
 from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QProgressBar, QWidget
@@ -119,11 +120,15 @@ class QtSysTrayIcon:
         self.popup = None
         self.last_message = None
 
+        self.statusSubscriber = statussubscriber.StatusSubscriber(self.config)
+        self.statusSubscriber.changed.connect(self.updateInfo)
+
         self.timer = QTimer()
         self.timer.timeout.connect(self.updateInfo)
 
     def prepareExit(self):
         self.timer.stop()
+        self.statusSubscriber.unsubscribe()
 
         if not self.status_icon is None:
             self.status_icon.hide()
@@ -151,17 +156,25 @@ class QtSysTrayIcon:
 
     def updateInfo(self):
 
+        # Status pushed by the snapshot process, if it has a status socket
+        subscribed = self.statusSubscriber.subscribe()
+
         # Exit this systray icon "app" when the snapshots is taken
-        if not self.snapshots.busy():
+        if not subscribed and not self.snapshots.busy():
             self.prepareExit()
             self.qapp.exit(0)
             return
 
-        paused = tools.processPaused(self.snapshots.pid())
+        if subscribed:
+            paused = self.statusSubscriber.paused()
+            message = self.statusSubscriber.message()
+        else:
+            paused = tools.processPaused(self.snapshots.pid())
+            message = self.snapshots.takeSnapshotMessage()
+
         self.btnPause.setVisible(not paused)
         self.btnResume.setVisible(paused)
 
-        message = self.snapshots.takeSnapshotMessage()
         if message is None and self.last_message is None:
             message = (0, _('Working…'))
 
@@ -175,9 +188,16 @@ class QtSysTrayIcon:
                                                          ))
                 self.status_icon.setToolTip(message[1])
 
-        pg = progress.ProgressFile(self.config)
-        if pg.fileReadable():
-            pg.load()
+        if subscribed:
+            pg = self.statusSubscriber.progressFile()
+        else:
+            pg = progress.ProgressFile(self.config)
+            if pg.fileReadable():
+                pg.load()
+            else:
+                pg = None
+
+        if pg is not None:
             percent = pg.intValue('percent')
             ## disable progressbar in icon until BiT has it's own icon
             ## fixes bug #902
@@ -16,7 +16,7 @@
     - FiledialogShowHidden
     - MyTreeView (used RestoreConfigDialog)
     - TimeLine (might be the snapshot list in the left part of the GUI)
-        - TimeLineItem, SnapshotItem, HeaderItem
+        - TimeLineModel, GroupHeaders
     - SortedcomboBox, SnapshotCombo, ProfileCombo
     - Menu (tooltips in menus)
 
@@ -33,6 +33,9 @@ from PyQt6.QtGui import (QAction,
                          QPalette)
 from PyQt6.QtCore import (QDir,
                           Qt,
+                          QAbstractListModel,
+                          QItemSelection,
+                          QItemSelectionModel,
                           pyqtSlot,
                           pyqtSignal,
                           QModelIndex,
@@ -50,8 +53,6 @@ from PyQt6.QtWidgets import (QFrame,
                              QDialog,
                              QApplication,
                              QStyleFactory,
-                             QTreeWidget,
-                             QTreeWidgetItem,
                              QComboBox,
                              QSystemTrayIcon)
 
@@ -470,30 +471,312 @@ class MyTreeView(QTreeView):
         super(MyTreeView, self).currentChanged(current, previous)
 
 
-class TimeLine(QTreeWidget):
-    updateFilesView = pyqtSignal(int)
+class TimeLineModel(QAbstractListModel):
+    """Flat list of the snapshots shown in the :py:class:`TimeLine`.
 
-    def __init__(self, parent):
-        super(TimeLine, self).__init__(parent)
-        self.setRootIsDecorated(False)
-        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.setSelectionMode(
-            QAbstractItemView.SelectionMode.ExtendedSelection)
-        self.setHeaderLabels([_('Snapshots'), 'foo'])
-        self.setSortingEnabled(True)
-        self.sortByColumn(1, Qt.SortOrder.DescendingOrder)
-        self.hideColumn(1)
-        self.header().setSectionsClickable(False)
+    The root snapshot ("Now") comes first, followed by the snapshots newest
+    first. A header row (e.g. "Today", "Last week", "March") is put in front
+    of each group of snapshots. The groups are computed once when the
+    snapshots are set.
 
-        self.parent = parent
-        self.snapshots = parent.snapshots
-        self._resetHeaderData()
+    Display names need the name and failed flag of a snapshot, which are
+    files inside of it. They are read only when the view asks for a row,
+    which it does for the visible rows only, and cached.
+    """
+
+    def __init__(self, config, parent=None):
+        super(TimeLineModel, self).__init__(parent)
+        self.config = config
+
+        # list of tuples (sid, header text). Text is None for snapshots.
+        self._rows = []
+        self._rowOf = {}
+        self._root = None
+        self._snapshots = []
+        self._groups = GroupHeaders()
+        self._names = {}
+        self._sizes = {}
+        self._disabled = set()
+
+        self._headerFont = fontBold(QFont(QApplication.font()))
+        palette = QApplication.instance().palette()
+        self._headerForeground = palette.color(
+            QPalette.ColorRole.PlaceholderText)
+        self._headerBackground = palette.color(QPalette.ColorRole.Window)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._rows)
+
+    def headerData(self, section, orientation,
+                   role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole):
+            return _('Snapshots')
+
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+
+        sid, header = self._rows[index.row()]
+
+        if header is not None or sid in self._disabled:
+            return Qt.ItemFlag.NoItemFlags
+
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        sid, header = self._rows[index.row()]
+
+        if role == Qt.ItemDataRole.UserRole:
+            return sid
+
+        if header is not None:
+            # Dev note (buhtz, 2024-01-14): Parts of that code are redundant
+            # with app.py::MainWindow.addPlace().
+            if role == Qt.ItemDataRole.DisplayRole:
+                return header
+
+            if role == Qt.ItemDataRole.FontRole:
+                return self._headerFont
+
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self._headerForeground
+
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return self._headerBackground
+
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.displayName(sid)
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.toolTip(sid)
+
+        return None
+
+    def displayName(self, sid):
+        """Display name of ``sid``, read on first use."""
+        name = self._names.get(sid)
+
+        if name is None:
+            name = sid.displayName
+            self._names[sid] = name
+
+        return name
+
+    def toolTip(self, sid):
+        if sid.isRoot:
+            return _('This is NOT a snapshot but a live view of your local '
+                     'files')
+
+        tip = _('Last check {time}').format(time=sid.lastChecked)
+        size = self._sizes.get(sid)
+
+        if size:
+            tip += '\n' + _('Exclusive size: {size}').format(size=size)
+
+        return tip
+
+    @property
+    def root(self):
+        """The root snapshot or ``None``."""
+        return self._root
+
+    def sid(self, row):
+        """Snapshot ID of ``row`` (also for header rows)."""
+        return self._rows[row][0]
+
+    def isHeader(self, row):
+        return self._rows[row][1] is not None
+
+    def rowOf(self, sid):
+        """Row of snapshot ``sid`` or ``None`` if it isn't listed."""
+        return self._rowOf.get(sid)
 
     def clear(self):
-        self._resetHeaderData()
-        return super(TimeLine, self).clear()
+        self.beginResetModel()
+        self._root = None
+        self._snapshots = []
+        self._names.clear()
+        self._sizes.clear()
+        self._disabled.clear()
+        self._rows = []
+        self._rowOf = {}
+        self.endResetModel()
+
+    def setRoot(self, sid):
+        self.beginResetModel()
+        self._root = sid
+        self._build()
+        self.endResetModel()
+
+    def setSnapshots(self, sids):
+        """Replace all snapshots below the root by ``sids``. A
+        :py:class:`snapshots.RootSnapshot` in ``sids`` replaces the root.
+        """
+        self.beginResetModel()
+        self._snapshots = []
+
+        for sid in sids:
+            if sid.isRoot:
+                self._root = sid
+            else:
+                self._snapshots.append(sid)
+
+        self._snapshots.sort(reverse=True)
+        self._names.clear()
+        self._disabled.clear()
+        self._build()
+        self.endResetModel()
+
+    def _build(self):
+        """Compute the rows including the group headers in one pass over
+        the (sorted) snapshots."""
+        self._groups = groups = GroupHeaders()
+        rows = []
+
+        if self._root is not None:
+            rows.append((self._root, None))
+
+        startDate = None
+
+        for sid in self._snapshots:
+            # snapshots are sorted newest first, so a group ends with the
+            # first snapshot older than its start
+            if startDate is None or sid.date < startDate:
+                text, startDate, endDate = groups.group(sid.date)
+                rows.append((snapshots.SID(endDate, self.config), text))
+
+            rows.append((sid, None))
+
+        self._rows = rows
+        self._indexRows()
+
+    def _indexRows(self):
+        self._rowOf = {sid: row
+                       for row, (sid, header) in enumerate(self._rows)
+                       if header is None}
+
+    def setSizes(self, sizes):
+        """Show the exclusive size of snapshots in their tooltips.
+
+        Args:
+            sizes (dict): :py:class:`snapshots.SID` as key and a human
+                readable size as value.
+        """
+        self._sizes = dict(sizes)
+        self._rowsChanged(0, len(self._rows) - 1)
+
+    def refreshSnapshot(self, sid):
+        """Read display name of ``sid`` again, e.g. after renaming it."""
+        self._names.pop(sid, None)
+        row = self.rowOf(sid)
+
+        if row is not None:
+            self._rowsChanged(row, row)
+
+    def setDisabled(self, sids):
+        """Disable ``sids``, e.g. while they are removed."""
+        for sid in sids:
+            self._disabled.add(sid)
+            row = self.rowOf(sid)
+
+            if row is not None:
+                self._rowsChanged(row, row)
+
+    def groupsOutdated(self):
+        """``True`` if the day changed since the group headers were
+        computed."""
+        return date.today() != self._groups.now
+
+    def addSnapshot(self, sid):
+        """Insert ``sid`` at its place. A group header is inserted, too, if
+        it is the first snapshot of its group. All rows are rebuilt if the
+        group headers are outdated."""
+        if sid.isRoot or sid in self._rowOf:
+            return
+
+        # number of newer snapshots, which are sorted newest first
+        i = next((n for n, other in enumerate(self._snapshots) if other < sid),
+                 len(self._snapshots))
+
+        if self.groupsOutdated():
+            # e.g. "Today" became "Yesterday" after midnight
+            self.beginResetModel()
+            self._snapshots.insert(i, sid)
+            self._build()
+            self.endResetModel()
+            return
+
+        newer = self._snapshots[i - 1] if i else None
+        older = self._snapshots[i] if i < len(self._snapshots) else None
+        text, _startDate, endDate = self._groups.group(sid.date)
+
+        if newer and self._groups.group(newer.date)[2] == endDate:
+            row = self._rowOf[newer] + 1
+            rows = [(sid, None)]
+
+        elif older and self._groups.group(older.date)[2] == endDate:
+            row = self._rowOf[older]
+            rows = [(sid, None)]
+
+        else:
+            if newer:
+                row = self._rowOf[newer] + 1
+            else:
+                row = 0 if self._root is None else 1
+
+            rows = [(snapshots.SID(endDate, self.config), text), (sid, None)]
+
+        self.beginInsertRows(QModelIndex(), row, row + len(rows) - 1)
+        self._rows[row:row] = rows
+        self._snapshots.insert(i, sid)
+        self._indexRows()
+        self.endInsertRows()
+
+    def removeSnapshot(self, sid):
+        """Remove ``sid`` and the header of its group if it was the last
+        snapshot in it."""
+        row = self.rowOf(sid)
+
+        if row is None or sid.isRoot:
+            return
+
+        first = row
+
+        if (row > 0 and self.isHeader(row - 1)
+                and (row + 1 == len(self._rows) or self.isHeader(row + 1))):
+            first = row - 1
+
+        self.beginRemoveRows(QModelIndex(), first, row)
+        del self._rows[first:row + 1]
+        self._snapshots.remove(sid)
+        self._names.pop(sid, None)
+        self._disabled.discard(sid)
+        self._indexRows()
+        self.endRemoveRows()
+
+    def _rowsChanged(self, first, last):
+        if first <= last:
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+
+class GroupHeaders:
+    """Groups of the snapshots in the timeline by their date: Today,
+    Yesterday, This week, Last week, the rest of this and of last month and
+    any previous month.
+    """
 
-    def _resetHeaderData(self):
+    def __init__(self):
         self.now = date.today()
 
         # list of tuples with (text, startDate, endDate)
@@ -547,36 +830,20 @@ class TimeLine(QTreeWidget):
         self.headerData.append((lastMonthMin.strftime('%B').capitalize(),
                                 lastMonthMin, lastMonthMax))
 
-    def addRoot(self, sid):
-        self.rootItem = self.addSnapshot(sid)
-
-        return self.rootItem
-
-    @pyqtSlot(snapshots.SID)
-    def addSnapshot(self, sid):
-        item = SnapshotItem(sid)
-
-        self.addTopLevelItem(item)
-
-        # Select the snapshot that was selected before
-        if sid == self.parent.sid:
-            self.setCurrentItem(item)
-
-        if not sid.isRoot:
-            self.addHeader(sid)
-
-        return item
-
-    def addHeader(self, sid):
+    def group(self, dt):
+        """Group of a snapshot taken at ``dt``.
 
+        Returns:
+            tuple: ``(text, startDate, endDate)``
+        """
         for text, startDate, endDate in self.headerData:
 
-            if startDate <= sid.date <= endDate:
-                return self._createHeaderItem(text, endDate)
+            if startDate <= dt <= endDate:
+                return (text, startDate, endDate)
 
         # Any previous months
-        year = sid.date.year
-        month = sid.date.month
+        year = dt.year
+        month = dt.month
 
         if year == self.now.year:
             text = date(year, month, 1).strftime('%B').capitalize()
@@ -588,120 +855,125 @@ class TimeLine(QTreeWidget):
         endDate = datetime.combine(
             date(year, month, monthrange(year, month)[1]), datetime.max.time())
 
-        if self._createHeaderItem(text, endDate):
-            self.headerData.append((text, startDate, endDate))
+        return (text, startDate, endDate)
+
+
+class TimeLine(QTreeView):
+    """List of snapshots in the left part of the main window and in the
+    snapshots dialog. See :py:class:`TimeLineModel`.
+    """
+    updateFilesView = pyqtSignal(int)
+    itemSelectionChanged = pyqtSignal()
+
+    def __init__(self, parent):
+        super(TimeLine, self).__init__(parent)
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(
+            QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.header().setSectionsClickable(False)
+
+        self.parent = parent
+        self.snapshots = parent.snapshots
 
-    def _createHeaderItem(self, text, endDate):
+        self.timeLineModel = TimeLineModel(parent.config, self)
+        self.setModel(self.timeLineModel)
+        self.selectionModel().selectionChanged.connect(
+            self.itemSelectionChanged)
 
-        for item in self.iterHeaderItems():
+    def clear(self):
+        self.timeLineModel.clear()
 
-            if item.snapshotID().date == endDate:
-                return False
+    def addRoot(self, sid):
+        self.timeLineModel.setRoot(sid)
+        self._selectParentSnapshot()
+
+    @pyqtSlot(list)
+    def setSnapshots(self, sids):
+        """Show ``sids`` below the root snapshot."""
+        self.timeLineModel.setSnapshots(sids)
+        self._selectParentSnapshot()
 
-        item = HeaderItem(text, snapshots.SID(endDate, self.parent.config))
-        self.addTopLevelItem(item)
+    def _selectParentSnapshot(self):
+        # Select the snapshot that was selected before
+        row = self.timeLineModel.rowOf(self.parent.sid)
 
-        return True
+        if row is not None:
+            self.setCurrentRow(row)
 
     @pyqtSlot()
     def checkSelection(self):
-        if self.currentItem() is None:
+        if not self.currentIndex().isValid():
             self.selectRootItem()
 
     def selectRootItem(self):
-        self.setCurrentItem(self.rootItem)
+        row = self.timeLineModel.rowOf(self.timeLineModel.root)
 
-        if not self.parent.sid.isRoot:
-            self.parent.sid = self.rootItem.snapshotID()
-            self.updateFilesView.emit(2)
+        if row is not None:
+            self.setCurrentRow(row)
 
     def selectedSnapshotIDs(self):
-        return [i.snapshotID() for i in self.selectedItems()]
+        rows = sorted(i.row() for i in self.selectionModel().selectedRows())
+
+        return [self.timeLineModel.sid(row) for row in rows]
 
     def currentSnapshotID(self):
-        item = self.currentItem()
+        index = self.currentIndex()
 
-        if item:
-            return item.snapshotID()
+        if index.isValid():
+            return self.timeLineModel.sid(index.row())
 
     def setCurrentSnapshotID(self, sid):
+        row = self.timeLineModel.rowOf(sid)
 
-        for item in self.iterItems():
-
-            if item.snapshotID() == sid:
-                self.setCurrentItem(item)
-                break
+        if row is not None:
+            self.setCurrentRow(row)
 
-    def setCurrentItem(self, item, *args, **kwargs):
-        super(TimeLine, self).setCurrentItem(item, *args, **kwargs)
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.timeLineModel.index(row))
+        sid = self.timeLineModel.sid(row)
 
-        if self.parent.sid != item.snapshotID():
-            self.parent.sid = item.snapshotID()
+        if self.parent.sid != sid:
+            self.parent.sid = sid
             self.updateFilesView.emit(2)
 
-    def iterItems(self):
-        for index in range(self.topLevelItemCount()):
-            yield self.topLevelItem(index)
-
-    def iterSnapshotItems(self):
-        for item in self.iterItems():
-            if isinstance(item, SnapshotItem):
-                yield item
+    def selectAllSnapshots(self):
+        """Select all snapshots except the root snapshot."""
+        model = self.timeLineModel
+        selection = QItemSelection()
 
-    def iterHeaderItems(self):
-        for item in self.iterItems():
-            if isinstance(item, HeaderItem):
-                yield item
+        for row in range(model.rowCount()):
+            if not model.isHeader(row) and not model.sid(row).isRoot:
+                selection.select(model.index(row), model.index(row))
 
+        self.selectionModel().select(
+            selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
 
-class TimeLineItem(QTreeWidgetItem):
-    def __lt__(self, other):
-        return self.snapshotID() < other.snapshotID()
+    def setSizes(self, sizes):
+        self.timeLineModel.setSizes(sizes)
 
-    def snapshotID(self):
-        return self.data(0, Qt.ItemDataRole.UserRole)
+    def updateSnapshot(self, sid):
+        """Update the display name of ``sid``."""
+        self.timeLineModel.refreshSnapshot(sid)
 
+    def setSnapshotsDisabled(self, sids):
+        self.timeLineModel.setDisabled(sids)
 
-class SnapshotItem(TimeLineItem):
-    def __init__(self, sid):
-        super(SnapshotItem, self).__init__()
-        self.setText(0, sid.displayName)
-        self.setFont(0, fontNormal(self.font(0)))
+    def addSnapshots(self, sids):
+        """Insert ``sids`` without rebuilding the whole list, unless the day
+        changed since it was built."""
+        rebuild = self.timeLineModel.groupsOutdated()
 
-        self.setData(0, Qt.ItemDataRole.UserRole, sid)
+        for sid in sids:
+            self.timeLineModel.addSnapshot(sid)
 
-        if sid.isRoot:
-            self.setToolTip(0, _('This is NOT a snapshot but a live '
-                                 'view of your local files'))
-        else:
-            self.setToolTip(
-                0,
-                _('Last check {time}').format(time=sid.lastChecked))
+        if rebuild:
+            self._selectParentSnapshot()
 
-    def updateText(self):
-        sid = self.snapshotID()
-        self.setText(0, sid.displayName)
-
-
-class HeaderItem(TimeLineItem):
-    def __init__(self, name, sid):
-        """
-        Dev note (buhtz, 2024-01-14): Parts of that code are redundant with
-        app.py::MainWindow.addPlace().
-        """
-        super(HeaderItem, self).__init__()
-        self.setText(0, name)
-        self.setFont(0, fontBold(self.font(0)))
-
-        palette = QApplication.instance().palette()
-        self.setForeground(
-            0, palette.color(QPalette.ColorRole.PlaceholderText))
-        self.setBackground(
-            0, palette.color(QPalette.ColorRole.Window))
-
-        self.setFlags(Qt.ItemFlag.NoItemFlags)
-
-        self.setData(0, Qt.ItemDataRole.UserRole, sid)
+    @pyqtSlot(snapshots.SID)
+    def hideSnapshot(self, sid):
+        self.timeLineModel.removeSnapshot(sid)
 
 
 class SortedComboBox(QComboBox):
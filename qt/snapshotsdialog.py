@@ -174,7 +174,7 @@ class SnapshotsDialog(QDialog):
         self.timeLine = qttools.TimeLine(self)
         self.mainLayout.addWidget(self.timeLine)
         self.timeLine.itemSelectionChanged.connect(self.timeLineChanged)
-        self.timeLine.itemActivated.connect(self.timeLineExecute)
+        self.timeLine.activated.connect(self.timeLineExecute)
 
         # Diff
         layout = QHBoxLayout()
@@ -218,8 +218,6 @@ class SnapshotsDialog(QDialog):
         self.UpdateSnapshotsAndComboEqualTo()
 
     def addSnapshot(self, sid):
-        self.timeLine.addSnapshot(sid)
-
         #add to combo
         self.comboDiff.addSnapshotID(sid)
 
@@ -247,6 +245,8 @@ class SnapshotsDialog(QDialog):
             list_equal_to=equal_to
         )
 
+        self.timeLine.setSnapshots(snapshotsFiltered)
+
         for sid in snapshotsFiltered:
             self.addSnapshot(sid)
 
@@ -319,7 +319,7 @@ class SnapshotsDialog(QDialog):
     def timeLineChanged(self):
         self.updateToolbar()
 
-    def timeLineExecute(self, item, column):
+    def timeLineExecute(self, index):
         if self.qapp.keyboardModifiers() and Qt.ControlModifier:
             return
 
@@ -387,31 +387,31 @@ class SnapshotsDialog(QDialog):
         self.updateSnapshots()
 
     def btnDeleteClicked(self):
-        items = self.timeLine.selectedItems()
+        sids = self.timeLine.selectedSnapshotIDs()
 
-        if not items:
+        if not sids:
             return
 
-        elif len(items) == 1:
+        elif len(sids) == 1:
             msg = _('Do you really want to delete {file} in snapshot '
                     '{snapshot_id}?').format(
                         file=f'"{self.path}"',
-                        snapshot_id=f'"{items[0].snapshotID()}"')
+                        snapshot_id=f'"{sids[0]}"')
 
         else:
             msg = _('Do you really want to delete {file} in {count} '
                     'snapshots?').format(
-                        file=f'"{self.path}"', count=len(items))
+                        file=f'"{self.path}"', count=len(sids))
 
         msg = _('WARNING: This cannot be revoked.')
 
         answer = messagebox.warningYesNo(self, msg)
         if answer == QMessageBox.StandardButton.Yes:
 
-            for item in items:
-                item.setFlags(Qt.ItemFlag.NoItemFlags)
+            self.timeLine.setSnapshotsDisabled(sids)
 
-            thread = RemoveFileThread(self, items)
+            thread = RemoveFileThread(self, sids)
+            thread.hideSnapshot.connect(self.timeLine.hideSnapshot)
             thread.started.connect(lambda: self.btnGoto.setDisabled(True))
             thread.finished.connect(lambda: self.btnGoto.setDisabled(False))
             thread.started.connect(lambda: self.btnDelete.setDisabled(True))
@@ -435,10 +435,7 @@ class SnapshotsDialog(QDialog):
         """
         select all expect 'Now'
         """
-        self.timeLine.clearSelection()
-        for item in self.timeLine.iterSnapshotItems():
-            if not isinstance(item.snapshotID(), snapshots.RootSnapshot):
-                item.setSelected(True)
+        self.timeLine.selectAllSnapshots()
 
     def accept(self):
         sid = self.timeLine.currentSnapshotID()
@@ -451,11 +448,13 @@ class RemoveFileThread(QThread):
     """
     remove files in background thread so GUI will not freeze
     """
-    def __init__(self, parent, items):
+    hideSnapshot = pyqtSignal(snapshots.SID)
+
+    def __init__(self, parent, sids):
         self.parent = parent
         self.config = parent.config
         self.snapshots = parent.snapshots
-        self.items = items
+        self.sids = sids
         super(RemoveFileThread, self).__init__(parent)
 
     def run(self):
@@ -463,14 +462,9 @@ class RemoveFileThread(QThread):
         self.config.inhibitCookie = tools.inhibitSuspend(toplevel_xid = self.config.xWindowId,
                                                          reason = 'deleting files')
 
-        for item in self.items:
-            self.snapshots.deletePath(item.snapshotID(), self.parent.path)
-            try:
-                item.setHidden(True)
-            except RuntimeError:
-                #item has been deleted
-                #probably because user refreshed treeview
-                pass
+        for sid in self.sids:
+            self.snapshots.deletePath(sid, self.parent.path)
+            self.hideSnapshot.emit(sid)
 
         #release inhibit suspend
         if self.config.inhibitCookie:
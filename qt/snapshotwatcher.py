@@ -0,0 +1,140 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See LICENSES directory or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Watch the snapshot folder for added and removed snapshots.
+
+The folder is watched with :py:class:`QFileSystemWatcher` (inotify on
+Linux). Events are collected for a moment before the folder is checked.
+Changes done on the remote host of SSH profiles don't cause inotify events.
+Because of this the folder is polled additionally for those profiles.
+
+A check costs one ``stat()`` of the snapshot folder (see
+:py:func:`snapshotcatalog.SnapshotCatalog.fingerprint`). Only if the folder
+changed the snapshots are listed, using the snapshot catalog.
+"""
+# pylint: disable=wrong-import-position,wrong-import-order
+from __future__ import annotations
+from PyQt6.QtCore import (QObject,
+                          QFileSystemWatcher,
+                          QTimer,
+                          pyqtSignal,
+                          pyqtSlot)
+from qttools_path import registerBackintimePath
+registerBackintimePath('common')
+import logger  # noqa: E402
+import snapshots  # noqa: E402
+
+# Milliseconds to wait for further events before checking the folder
+SETTLE_INTERVAL = 500
+
+# Milliseconds between two checks of the folder on SSH profiles
+POLL_INTERVAL = 10000
+
+# Modes whose snapshot folder is modified on other hosts, too
+POLLED_MODES = ('ssh', 'ssh_encfs')
+
+
+class SnapshotWatcher(QObject):
+    """Emit :py:attr:`snapshotsChanged` with the snapshots added to and
+    removed from the snapshot folder of the current profile.
+
+    Args:
+        config (config.Config): Current config instance.
+        parent (QObject): Parent object.
+    """
+    # added and removed snapshot IDs
+    snapshotsChanged = pyqtSignal(list, list)
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.path = None
+        self.known = set()
+        self.fingerprint = None
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.scheduleCheck)
+
+        self.timerSettle = QTimer(self)
+        self.timerSettle.setInterval(SETTLE_INTERVAL)
+        self.timerSettle.setSingleShot(True)
+        self.timerSettle.timeout.connect(self.check)
+
+        self.timerPoll = QTimer(self)
+        self.timerPoll.setInterval(POLL_INTERVAL)
+        self.timerPoll.timeout.connect(self.check)
+
+    @pyqtSlot(list)
+    def setSnapshots(self, sids):
+        """Start watching with the snapshots currently shown.
+
+        Called after the snapshots got listed completely, e.g. on startup
+        or when the profile changed.
+        """
+        self.known = {sid for sid in sids if not sid.isRoot}
+        path = self.config.snapshotsFullPath()
+
+        if path != self.path:
+            self._watch(path)
+
+        self.fingerprint = snapshots.snapshotCatalog(self.config).fingerprint()
+
+        # the folder might have changed while it was listed
+        self.scheduleCheck()
+
+    def _watch(self, path):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+        self.timerPoll.stop()
+        self.path = path
+
+        if not self.watcher.addPath(path):
+            logger.debug(f'Can not watch {path}. Polling instead.', self)
+            self.timerPoll.start()
+
+        elif self.config.snapshotsMode() in POLLED_MODES:
+            self.timerPoll.start()
+
+    @pyqtSlot()
+    def scheduleCheck(self):
+        """Check the folder after events settled."""
+        self.timerSettle.start()
+
+    @pyqtSlot()
+    def check(self):
+        """Emit :py:attr:`snapshotsChanged` if snapshots were added or
+        removed since the last check.
+
+        Returns:
+            bool: ``True`` if snapshots changed.
+        """
+        self.timerSettle.stop()
+
+        # profile changed, wait for setSnapshots()
+        if self.path is None or self.path != self.config.snapshotsFullPath():
+            return False
+
+        fingerprint = snapshots.snapshotCatalog(self.config).fingerprint()
+
+        # folder not accessible (e.g. unmounted) or not changed
+        if fingerprint is None or fingerprint == self.fingerprint:
+            return False
+
+        self.fingerprint = fingerprint
+        current = set(snapshots.listSnapshots(self.config))
+        added = sorted(current - self.known)
+        removed = sorted(self.known - current)
+        self.known = current
+
+        if not added and not removed:
+            return False
+
+        logger.debug(f'Snapshots added: {added}, removed: {removed}', self)
+        self.snapshotsChanged.emit(added, removed)
+
+        return True
@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: © 2026 Back In Time Team
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# This file is part of the program "Back In Time" which is released under GNU
+# General Public License v2 (GPLv2). See LICENSES directory or go to
+# <https://spdx.org/licenses/GPL-2.0-or-later.html>.
+"""Follow a running snapshot through its status socket.
+
+See :py:mod:`statussocket`. Events are read when they arrive (via
+:py:class:`QSocketNotifier`), so the message, progress and PID files don't
+need to be polled while a backup with status socket is running.
+"""
+# pylint: disable=wrong-import-position,wrong-import-order
+from __future__ import annotations
+import time
+from PyQt6.QtCore import QObject, QSocketNotifier, pyqtSignal
+from qttools_path import registerBackintimePath
+registerBackintimePath('common')
+import progress  # noqa: E402
+import statussocket  # noqa: E402
+import tools  # noqa: E402
+
+# Seconds without events after which the process is checked for being
+# paused (SIGSTOP). A paused backup can't send anything.
+PAUSE_CHECK_DELAY = 2
+
+
+class StatusSubscriber(QObject):
+    """Subscriber of the status socket of the current profile.
+
+    :py:attr:`changed` is emitted for each batch of received events and
+    when the connection was closed.
+
+    Args:
+        config (config.Config): Current config instance.
+        parent (QObject): Parent object.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.client = None
+        self.notifier = None
+        self.state = {}
+        self.lastEvent = 0.0
+
+    def subscribe(self):
+        """Connect to the running snapshot if not connected yet.
+
+        Returns:
+            bool: ``True`` if connected. Otherwise no snapshot is running
+                or it has no status socket and the status files have to be
+                read.
+        """
+        if self.client is not None:
+            return True
+
+        client = statussocket.StatusClient(
+            self.config.takeSnapshotSocketFile())
+
+        if not client.connect():
+            return False
+
+        client.setBlocking(False)
+        self.client = client
+        self.state = {}
+        self.lastEvent = time.monotonic()
+        self.notifier = QSocketNotifier(
+            client.fileno(), QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self._receive)
+
+        return True
+
+    def unsubscribe(self):
+        """Disconnect, e.g. because the profile changed."""
+        if self.client is None:
+            return
+
+        self.notifier.setEnabled(False)
+        self.notifier.deleteLater()
+        self.notifier = None
+        self.client.close()
+        self.client = None
+        self.state = {}
+
+    def _receive(self):
+        events = self.client.receive()
+
+        if events is None:
+            self.unsubscribe()
+
+        else:
+            for event in events:
+                statussocket.applyEvent(self.state, event)
+
+            self.lastEvent = time.monotonic()
+
+        self.changed.emit()
+
+    @property
+    def connected(self):
+        return self.client is not None
+
+    def pid(self):
+        return self.state.get('pid')
+
+    def message(self):
+        """Latest status message like
+        :py:func:`snapshots.Snapshots.takeSnapshotMessage`."""
+        message = self.state.get('message')
+
+        return tuple(message) if message else None
+
+    def progressFile(self):
+        """Latest progress as :py:class:`progress.ProgressFile` or ``None``
+        if nothing is transferred."""
+        values = self.state.get('progress')
+
+        if not values:
+            return None
+
+        return progress.ProgressFile.fromValues(self.config, values)
+
+    def paused(self):
+        """``True`` if the backup process is paused. Its ``/proc`` entry is
+        only read if no event arrived for a while."""
+        if time.monotonic() - self.lastEvent < PAUSE_CHECK_DELAY:
+            return False
+
+        return bool(self.pid()) and tools.processPaused(self.pid())